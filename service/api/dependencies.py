@@ -0,0 +1,40 @@
+# service/api/dependencies.py
+"""
+API 依赖提供者
+进程级共享的轻量服务，在应用启动时创建，避免每个请求构建完整的 Container
+"""
+
+from typing import Optional
+
+from doc_agent.common.prompt_selector import PromptSelector
+from doc_agent.core.config import settings
+from doc_agent.core.logger import logger
+from doc_agent.llm_clients import get_llm_client
+from doc_agent.tools.ai_editing_tool import AIEditingTool
+
+_ai_editing_tool: Optional[AIEditingTool] = None
+
+
+def _get_default_llm_key() -> str:
+    """获取默认 LLM 模型键名（与 Container 保持一致）"""
+    default_llm = None
+    if hasattr(settings, '_yaml_config') and settings._yaml_config:
+        agent_cfg = settings._yaml_config.get('agent_config', {})
+        default_llm = agent_cfg.get('default_llm', 'qwen_2_5_235b_a22b')
+    return default_llm or 'qwen_2_5_235b_a22b'
+
+
+def init_ai_editing_tool() -> AIEditingTool:
+    """创建进程级共享的 AI 编辑工具（应用启动时调用）"""
+    global _ai_editing_tool
+    if _ai_editing_tool is None:
+        _ai_editing_tool = AIEditingTool(
+            llm_client=get_llm_client(model_key=_get_default_llm_key()),
+            prompt_selector=PromptSelector())
+        logger.info("✅ 共享 AI 编辑工具初始化完成")
+    return _ai_editing_tool
+
+
+def get_ai_editing_tool() -> AIEditingTool:
+    """FastAPI 依赖：获取共享的 AI 编辑工具，未在启动时初始化则惰性创建"""
+    return init_ai_editing_tool()
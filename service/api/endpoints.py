@@ -31,6 +31,9 @@ from doc_agent.schemas import (
 # 导入AI编辑工具和任务ID生成器
 from doc_agent.tools.ai_editing_tool import AIEditingTool
 
+from api.dependencies import get_ai_editing_tool
+
+from doc_agent.core.admission_queue import AdmissionQueue
 from doc_agent.core.task_manager import TaskManager
 
 MAX_CONCURRENT_TASKS = settings.get("server", {}).get("max_concurrent_tasks",
@@ -44,16 +47,23 @@ task_manager = TaskManager(RUNNING_TASKS)
 # 并发控制
 task_semaphore = asyncio.Semaphore(MAX_CONCURRENT_TASKS)
 
+# 作业类型 -> 执行函数
+JOB_HANDLERS = {
+    "outline": generate_outline_async,
+    "document": generate_document_sync,
+}
+
+# 全局准入队列：各 worker 有空闲名额时领取作业，按会话公平调度
+admission_queue = AdmissionQueue(worker_id=task_manager.worker_id,
+                                 capacity=MAX_CONCURRENT_TASKS)
+for job_kind, job_handler in JOB_HANDLERS.items():
+    admission_queue.register_handler(job_kind, job_handler)
+
 # 创建API路由器实例
 # router = APIRouter()
 router = APIRouter(tags=["Generation Jobs & Tasks"])
 
 
-def get_ai_editing_tool():
-    from doc_agent.core.container import Container
-    return Container().ai_editing_tool
-
-
 # =================================================================
 # 任务管理和监控
 # =================================================================
@@ -80,6 +90,8 @@ async def get_job_stats():
     等待中的任务数仅在 worker 内部可见，无法全局统计。
     """
     global_tasks = await task_manager.get_global_task_stats()
+    if admission_queue.running:
+        global_tasks.update(await admission_queue.stats())
 
     # 获取当前 worker 的等待任务数
     waiting_tasks_local = len(task_semaphore._waiters) if hasattr(
@@ -97,8 +109,17 @@ async def get_job_stats():
 @router.post("/jobs/waiting-index", summary="检查任务排队次序（1 表示第一个，0 表示已经开始服务）")
 async def check_job_waiting_index(request: TaskWaitingIndexRequest):
     """
-    检查任务在本地的排队情况。
+    检查任务的排队情况。
     """
+    if admission_queue.running:
+        try:
+            waiting_index = await admission_queue.get_waiting_index(
+                request.task_id)
+            if waiting_index is not None:
+                return {"waitingIndex": waiting_index}
+        except Exception as e:
+            logger.error(f"从全局队列获取排队位置失败: {e}")
+
     worker_task_info = await task_manager.get_worker_task_info(request.task_id)
     logger.info(f"worker_task_info: {worker_task_info}")
 
@@ -123,6 +144,9 @@ async def cancel_job(request: TaskCancelRequest):
     """
     取消一个任务。
     """
+    if admission_queue.running and await admission_queue.cancel(
+            request.task_id):
+        return {"message": f"任务 {request.task_id} 已从等待队列中移除。"}
     await task_manager.publish_cancellation(request.task_id)
     return {"message": f"任务 {request.task_id} 取消请求已发送。"}
 
@@ -155,6 +179,26 @@ def create_and_track_task(task_id: str, coro):
     logger.success(f"任务 {task_id} 已创建并全局跟踪。")
 
 
+async def submit_job(task_id: str, kind: str, tenant: str, **kwargs):
+    """
+    提交作业：优先进入全局准入队列，由任意有空闲名额的 worker 执行；
+    队列未启用或不可用时，在本 worker 中通过信号量排队执行。
+    """
+    if admission_queue.running:
+        try:
+            await admission_queue.submit(task_id, kind, tenant, kwargs)
+            return
+        except Exception as e:
+            logger.error(f"任务 {task_id} 进入全局队列失败，改为本地排队: {e}")
+
+    # 使用信号量控制并发，避免资源竞争
+    async def run_with_semaphore():
+        async with task_semaphore:
+            await JOB_HANDLERS[kind](task_id=task_id, **kwargs)
+
+    create_and_track_task(task_id, run_with_semaphore())
+
+
 @router.post("/jobs/outline",
              response_model=TaskCreationResponse,
              status_code=status.HTTP_202_ACCEPTED,
@@ -168,22 +212,16 @@ async def generate_outline_endpoint(request: OutlineGenerationRequest,
     logger.info(f"收到大纲生成请求，正在添加到后台任务。SessionId: {request.session_id}")
     task_id = generate_task_id()
 
-    # 使用信号量控制并发，避免资源竞争
-    async def run_with_semaphore():
-        async with task_semaphore:
-            await generate_outline_async(
-                task_id=str(task_id),
-                session_id=request.session_id,
-                task_prompt=request.task_prompt,
-                is_online=request.is_online,
-                is_es_search=request.is_es_search,
-                context_files=request.context_files,
-                style_guide_content=request.style_guide_content,
-                requirements=request.requirements,
-            )
-
-    create_and_track_task(str(task_id), run_with_semaphore())
-    # asyncio.create_task(run_with_semaphore())
+    await submit_job(str(task_id),
+                     "outline",
+                     str(request.session_id),
+                     session_id=request.session_id,
+                     task_prompt=request.task_prompt,
+                     is_online=request.is_online,
+                     is_es_search=request.is_es_search,
+                     context_files=request.context_files,
+                     style_guide_content=request.style_guide_content,
+                     requirements=request.requirements)
 
     logger.success(f"大纲生成任务 {task_id} 已提交到后台。")
     return TaskCreationResponse(
@@ -211,18 +249,15 @@ async def generate_document_endpoint(request: DocumentGenerationRequest,
     is_online = request.is_online
     is_es_search = request.is_es_search
 
-    # 使用信号量控制并发，避免资源竞争
-    async def run_with_semaphore():
-        async with task_semaphore:
-            await generate_document_sync(task_id=str(task_id),
-                                         task_prompt=task_prompt,
-                                         session_id=session_id,
-                                         outline_file_token=outline_json_file,
-                                         context_files=context_files,
-                                         is_online=is_online,
-                                         is_es_search=is_es_search)
-
-    create_and_track_task(str(task_id), run_with_semaphore())
+    await submit_job(str(task_id),
+                     "document",
+                     session_id,
+                     task_prompt=task_prompt,
+                     session_id=session_id,
+                     outline_file_token=outline_json_file,
+                     context_files=context_files,
+                     is_online=is_online,
+                     is_es_search=is_es_search)
 
     logger.success(f"文档生成任务 {task_id} 已提交到后台。")
     return TaskCreationResponse(
@@ -250,19 +285,16 @@ async def generate_document_ai_show_endpoint(
     is_online = request.is_online
     is_es_search = request.is_es_search
 
-    # 使用信号量控制并发，避免资源竞争
-    async def run_with_semaphore():
-        async with task_semaphore:
-            await generate_document_sync(task_id=str(task_id),
-                                         task_prompt=task_prompt,
-                                         session_id=session_id,
-                                         outline_file_token=outline_json_file,
-                                         context_files=context_files,
-                                         is_online=is_online,
-                                         is_es_search=is_es_search,
-                                         ai_demo=True)
-
-    create_and_track_task(str(task_id), run_with_semaphore())
+    await submit_job(str(task_id),
+                     "document",
+                     session_id,
+                     task_prompt=task_prompt,
+                     session_id=session_id,
+                     outline_file_token=outline_json_file,
+                     context_files=context_files,
+                     is_online=is_online,
+                     is_es_search=is_es_search,
+                     ai_demo=True)
 
     logger.success(f"AI展示文档生成任务 {task_id} 已提交到后台。")
     return TaskCreationResponse(
@@ -3,11 +3,14 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
-from api.endpoints import router, RUNNING_TASKS
+from api.dependencies import init_ai_editing_tool
+from api.endpoints import (router, RUNNING_TASKS, admission_queue,
+                           create_and_track_task)
 from doc_agent.core.config import settings
 from doc_agent.core.logger import logger
 from doc_agent.core.redis_health_check import close_redis_pool, init_redis_pool
 from doc_agent.core.task_manager import TaskManager
+from doc_agent.tools.file_module.parse_executor import shutdown_parse_executor
 
 
 @asynccontextmanager
@@ -20,12 +23,40 @@ async def lifespan(app: FastAPI):
 
     # 启动TaskManager
     await TaskManager.start_listener(RUNNING_TASKS)
+
+    # 启动全局准入队列调度
+    if settings.admission_queue_config.enabled:
+        await admission_queue.start(create_and_track_task)
+
+    # 创建共享的 AI 编辑工具（/actions/edit 不再依赖 Container）
+    init_ai_editing_tool()
+
+    # 启动事件流后台批量写入任务
+    from doc_agent.core.container import get_container
+    container = get_container()
+    if container.stream_buffer is not None:
+        await container.stream_buffer.start()
+
+    # 预编译所有 genre 的图，避免首个作业承担编译耗时
+    try:
+        await asyncio.to_thread(container.warm_up_graphs)
+    except Exception as e:
+        logger.error(f"图预编译失败，将在首次使用时编译: {e}")
     yield
 
     # 关闭
     logger.info("FastAPI应用正在关闭...")
+    # 停止领取新作业
+    await admission_queue.stop()
     # 停止TaskManager
     await TaskManager.stop_listener()
+    # 写出队列中剩余的事件
+    if container.stream_buffer is not None:
+        await container.stream_buffer.close()
+    # 关闭网络搜索共享会话
+    await container.web_search_tool.close()
+    # 关闭文件解析进程池
+    shutdown_parse_executor()
     # 最后关闭Redis连接池
     close_redis_pool()
 
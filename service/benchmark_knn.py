@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+KNN 离线评测：对比精确 kNN，统计不同 num_candidates 下的 recall@k 与延迟
+
+用法:
+    python benchmark_knn.py --index standard_index_prod --k 10 --num-queries 50
+    python benchmark_knn.py --index standard_index_prod --queries queries.txt --candidates 20,40,100,200
+
+结果用于标定配置中的 knn_tuning.recall_multipliers。
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from doc_agent.core.config import settings
+from doc_agent.core.logger import logger
+from doc_agent.llm_clients.providers import EmbeddingClient
+from doc_agent.tools.es_discovery import ESDiscovery
+from doc_agent.tools.es_service import ESService
+from doc_agent.tools.knn_tuning import KnnTuner, benchmark_knn
+
+
+async def sample_query_vectors(es_service: ESService, index: str,
+                               count: int) -> list[list[float]]:
+    """从索引中随机抽取文档向量作为查询向量"""
+    response = await es_service._client.search(
+        index=index,
+        body={
+            "size": count,
+            "_source": ["context_vector"],
+            "query": {
+                "function_score": {
+                    "query": {
+                        "term": {
+                            "valid": True
+                        }
+                    },
+                    "random_score": {}
+                }
+            }
+        })
+    return [
+        hit["_source"]["context_vector"] for hit in response["hits"]["hits"]
+        if hit["_source"].get("context_vector")
+    ]
+
+
+async def embed_queries(path: str) -> list[list[float]]:
+    """使用 embedding 服务生成查询文件中每行查询的向量"""
+    with open(path, encoding="utf-8") as f:
+        queries = [line.strip() for line in f if line.strip()]
+    embedding_config = settings.supported_models["gte_qwen"]
+    embedding_client = EmbeddingClient(base_url=embedding_config.url,
+                                       api_key=embedding_config.api_key)
+    return await embedding_client.aembed_many(queries)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="KNN 召回率/延迟离线评测")
+    parser.add_argument("--index", required=True, help="评测索引")
+    parser.add_argument("--k", type=int, default=10, help="评测的 top-k")
+    parser.add_argument("--num-queries",
+                        type=int,
+                        default=50,
+                        help="未提供查询文件时，从索引随机抽取的文档向量数")
+    parser.add_argument("--queries", help="查询文件，每行一个查询，使用 embedding 服务生成向量")
+    parser.add_argument("--candidates",
+                        help="逗号分隔的 num_candidates 档位，默认 k 的 1/2/4/10/20 倍")
+    args = parser.parse_args()
+
+    es_config = settings.elasticsearch_config
+    es_service = ESService(hosts=es_config.hosts,
+                           username=es_config.username,
+                           password=es_config.password,
+                           timeout=es_config.timeout,
+                           knn_tuner=KnnTuner.from_config(
+                               settings.knn_tuning_config))
+    try:
+        if not await es_service.connect():
+            logger.error("无法连接ES服务")
+            return
+        await ESDiscovery(es_service).refresh_knn_profile()
+
+        if args.queries:
+            query_vectors = await embed_queries(args.queries)
+        else:
+            query_vectors = await sample_query_vectors(es_service, args.index,
+                                                       args.num_queries)
+        if not query_vectors:
+            logger.error("没有可用的查询向量")
+            return
+
+        candidates = ([int(c) for c in args.candidates.split(",")]
+                      if args.candidates else None)
+        report = await benchmark_knn(es_service,
+                                     args.index,
+                                     query_vectors,
+                                     k=args.k,
+                                     candidate_settings=candidates)
+
+        tuned = es_service.knn_tuner.num_candidates(args.index, args.k)
+        print(f"\n索引: {args.index}  k: {args.k}  查询数: {len(query_vectors)}  "
+              f"向量维度: {es_service.vector_dims}  当前配置选择: {tuned}")
+        print(f"{'num_candidates':>15} {'recall@k':>10} {'p50(ms)':>10} {'p95(ms)':>10}")
+        for row in report:
+            print(f"{row['num_candidates']:>15} {row['recall_at_k']:>10.4f} "
+                  f"{row['latency_p50_ms']:>10.1f} {row['latency_p95_ms']:>10.1f}")
+    finally:
+        await es_service.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
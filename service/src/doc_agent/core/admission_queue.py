@@ -0,0 +1,376 @@
+# service/src/doc_agent/core/admission_queue.py
+
+import asyncio
+import json
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any, Optional
+
+from doc_agent.core.config import settings
+from doc_agent.core.logger import logger
+from doc_agent.core.task_manager import TaskManager
+
+# --- Redis 键名 ---
+# 脚本会同时访问以下所有键，键名带 {admission} 哈希标签，Redis Cluster 下位于同一槽
+# 等待中的作业: 有序集合 task_id -> 公平调度分数
+ADMISSION_QUEUE_KEY = "doc_agent:{admission}:queue"
+# 作业载荷: 哈希 task_id -> {"kind", "tenant", "kwargs"}
+ADMISSION_PAYLOADS_KEY = "doc_agent:{admission}:payloads"
+# 运行中作业的租约: 有序集合 task_id -> 租约到期时间
+ADMISSION_LEASES_KEY = "doc_agent:{admission}:leases"
+# 租约持有者: 哈希 task_id -> worker_id
+ADMISSION_LEASE_OWNERS_KEY = "doc_agent:{admission}:lease_owners"
+# 全局虚拟时间（最近一次出队作业的开始轮次）
+ADMISSION_VTIME_KEY = "doc_agent:{admission}:vtime"
+# 入队序号，同一轮次内按提交顺序排序
+ADMISSION_SEQ_KEY = "doc_agent:{admission}:seq"
+# 租户的最近完成轮次，键名后接租户标识
+ADMISSION_TENANT_KEY_PREFIX = "doc_agent:{admission}:tenant:"
+
+# 分数 = 轮次 * 2^20 + 序号，保证在 double 精度内精确比较
+_SEQ_SPAN = 1 << 20
+
+# 入队：按开始时间公平排队（start-time fair queuing）。
+# 租户新作业的轮次 = max(全局虚拟时间, 该租户上一作业轮次) + 1，
+# 因此多个租户的作业按轮次交替出队，单个租户的大量提交不会挤占其他租户。
+_ENQUEUE_SCRIPT = """
+local vtime = tonumber(redis.call('GET', KEYS[4]) or '0')
+local last = tonumber(redis.call('GET', KEYS[3]) or '0')
+local round = math.max(vtime, last) + 1
+redis.call('SET', KEYS[3], round, 'EX', ARGV[3])
+local seq = redis.call('INCR', KEYS[5]) % tonumber(ARGV[4])
+redis.call('ZADD', KEYS[1], round * tonumber(ARGV[4]) + seq, ARGV[1])
+redis.call('HSET', KEYS[2], ARGV[1], ARGV[2])
+return redis.call('ZRANK', KEYS[1], ARGV[1])
+"""
+
+# 领取：弹出分数最小的 n 个作业，推进虚拟时间并写入租约，返回 [task_id, payload, ...]
+_CLAIM_SCRIPT = """
+local items = redis.call('ZPOPMIN', KEYS[1], ARGV[1])
+local claimed = {}
+for i = 1, #items, 2 do
+  local task_id = items[i]
+  local round = math.floor(tonumber(items[i + 1]) / tonumber(ARGV[5]))
+  local vtime = tonumber(redis.call('GET', KEYS[4]) or '0')
+  if round - 1 > vtime then
+    redis.call('SET', KEYS[4], round - 1)
+  end
+  redis.call('ZADD', KEYS[2], tonumber(ARGV[3]) + tonumber(ARGV[4]), task_id)
+  redis.call('HSET', KEYS[3], task_id, ARGV[2])
+  table.insert(claimed, task_id)
+  table.insert(claimed, redis.call('HGET', KEYS[5], task_id) or '')
+end
+return claimed
+"""
+
+# 回收：租约过期的作业放回队首（当前虚拟时间所在轮次），返回被回收的 task_id
+_REAP_SCRIPT = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+local vtime = tonumber(redis.call('GET', KEYS[4]) or '0')
+for _, task_id in ipairs(expired) do
+  redis.call('ZREM', KEYS[1], task_id)
+  redis.call('HDEL', KEYS[2], task_id)
+  redis.call('ZADD', KEYS[3], vtime * tonumber(ARGV[2]), task_id)
+end
+return expired
+"""
+
+# 释放：仅当租约仍由本 worker 持有时删除租约与载荷，返回是否释放
+_RELEASE_SCRIPT = """
+if redis.call('HGET', KEYS[2], ARGV[1]) ~= ARGV[2] then
+  return 0
+end
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('HDEL', KEYS[2], ARGV[1])
+redis.call('HDEL', KEYS[3], ARGV[1])
+return 1
+"""
+
+# 续约：只续期仍由本 worker 持有的租约，返回已不再持有的 task_id
+_RENEW_SCRIPT = """
+local lost = {}
+for i = 3, #ARGV do
+  if redis.call('HGET', KEYS[2], ARGV[i]) == ARGV[1] then
+    redis.call('ZADD', KEYS[1], 'XX', ARGV[2], ARGV[i])
+  else
+    table.insert(lost, ARGV[i])
+  end
+end
+return lost
+"""
+
+JobHandler = Callable[..., Awaitable[Any]]
+
+
+class AdmissionQueue:
+    """
+    基于 Redis 的全局作业准入队列。
+
+    - 作业提交后进入有序集合，按租户（会话）公平排序，ZRANK 即可得到排队位置
+    - 每个 worker 在本地有空闲名额时原子地领取队首作业并持有租约，
+      空闲 worker 会领取其他 worker 收到的作业（work stealing）
+    - 运行中的作业定期续约；持有者失联导致租约过期时，作业重新入队
+    - 续约与释放都先校验租约持有者，不会影响已被回收并由其他 worker 领取的作业
+    - 续约时发现租约已丢失（已被回收，可能正由其他 worker 执行）的作业会在本地取消，
+      避免同一作业被执行两次
+    """
+
+    def __init__(self, worker_id: str, capacity: int):
+        self.worker_id = worker_id
+        self.capacity = max(1, capacity)
+        self._handlers: dict[str, JobHandler] = {}
+        self._launcher: Optional[Callable[[str, Awaitable[Any]], None]] = None
+        self._local_jobs: set[str] = set()
+        # 本地运行中作业的 asyncio 任务，租约丢失时用于取消
+        self._job_tasks: dict[str, asyncio.Task] = {}
+        self._wakeup = asyncio.Event()
+        self._dispatcher_task: Optional[asyncio.Task] = None
+        self._scripts: dict[str, Any] = {}
+
+    @property
+    def running(self) -> bool:
+        return (self._dispatcher_task is not None
+                and not self._dispatcher_task.done())
+
+    def register_handler(self, kind: str, handler: JobHandler) -> None:
+        """注册作业类型对应的协程函数，handler(task_id=..., **kwargs)"""
+        self._handlers[kind] = handler
+
+    async def _script(self, name: str, source: str):
+        if name not in self._scripts:
+            client = await TaskManager.get_redis_client()
+            self._scripts[name] = client.register_script(source)
+        return self._scripts[name]
+
+    async def submit(self, task_id: str, kind: str, tenant: str,
+                     kwargs: dict[str, Any]) -> int:
+        """
+        提交作业到全局队列
+
+        Returns:
+            int: 作业的排队位置（1 表示队首）
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"未注册的作业类型: {kind}")
+        config = settings.admission_queue_config
+        payload = json.dumps({
+            "kind": kind,
+            "tenant": tenant,
+            "kwargs": kwargs
+        },
+                             ensure_ascii=False)
+        script = await self._script("enqueue", _ENQUEUE_SCRIPT)
+        rank = await script(keys=[
+            ADMISSION_QUEUE_KEY, ADMISSION_PAYLOADS_KEY,
+            f"{ADMISSION_TENANT_KEY_PREFIX}{tenant}", ADMISSION_VTIME_KEY,
+            ADMISSION_SEQ_KEY
+        ],
+                            args=[
+                                task_id, payload, config.tenant_ttl_seconds,
+                                _SEQ_SPAN
+                            ])
+        self._wakeup.set()
+        logger.info(
+            f"[AdmissionQueue] Job {task_id} ({kind}) queued for tenant {tenant} at position {int(rank) + 1}."
+        )
+        return int(rank) + 1
+
+    async def cancel(self, task_id: str) -> bool:
+        """从队列中移除尚未开始的作业，返回是否移除成功"""
+        client = await TaskManager.get_redis_client()
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.zrem(ADMISSION_QUEUE_KEY, task_id)
+            pipe.hdel(ADMISSION_PAYLOADS_KEY, task_id)
+            removed, _ = await pipe.execute()
+        return bool(removed)
+
+    async def get_waiting_index(self, task_id: str) -> Optional[int]:
+        """
+        获取作业的排队位置
+
+        Returns:
+            Optional[int]: 1 表示队首，0 表示已经开始执行，None 表示作业不存在
+        """
+        client = await TaskManager.get_redis_client()
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.zrank(ADMISSION_QUEUE_KEY, task_id)
+            pipe.zscore(ADMISSION_LEASES_KEY, task_id)
+            rank, lease = await pipe.execute()
+        if rank is not None:
+            return int(rank) + 1
+        if lease is not None:
+            return 0
+        return None
+
+    async def stats(self) -> dict[str, Any]:
+        """全局排队与运行中作业数量"""
+        client = await TaskManager.get_redis_client()
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.zcard(ADMISSION_QUEUE_KEY)
+            pipe.zcard(ADMISSION_LEASES_KEY)
+            queued, leased = await pipe.execute()
+        return {
+            "global_queued_jobs": queued,
+            "global_leased_jobs": leased,
+            "local_admitted_jobs": len(self._local_jobs)
+        }
+
+    async def start(
+            self, launcher: Callable[[str, Awaitable[Any]], None]) -> None:
+        """
+        启动后台调度循环
+
+        Args:
+            launcher: 在本 worker 中启动并跟踪作业协程的函数 launcher(task_id, coro)
+        """
+        self._launcher = launcher
+        if self.running:
+            logger.warning("[AdmissionQueue] Dispatcher already running.")
+            return
+        self._dispatcher_task = asyncio.create_task(self._run())
+        logger.info(
+            f"[AdmissionQueue] Dispatcher started for worker {self.worker_id} with capacity {self.capacity}."
+        )
+
+    async def stop(self) -> None:
+        """停止调度循环；已领取的作业由各自的租约在过期后重新入队"""
+        if self._dispatcher_task is not None:
+            self._dispatcher_task.cancel()
+            try:
+                await self._dispatcher_task
+            except asyncio.CancelledError:
+                pass
+            self._dispatcher_task = None
+            logger.info("[AdmissionQueue] Dispatcher stopped.")
+
+    async def _run(self) -> None:
+        config = settings.admission_queue_config
+        poll_interval = config.poll_interval_ms / 1000
+        lease_seconds = max(1, config.lease_seconds)
+        maintenance_interval = lease_seconds / 3
+        last_maintenance = 0.0
+        while True:
+            try:
+                now = time.time()
+                if now - last_maintenance >= maintenance_interval:
+                    await self._renew_leases(now, lease_seconds)
+                    await self._reap_expired(now)
+                    last_maintenance = now
+                free_slots = self.capacity - len(self._local_jobs)
+                if free_slots > 0:
+                    await self._claim(free_slots, now, lease_seconds)
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(
+                    f"[AdmissionQueue] Dispatcher iteration failed: {e}")
+                await asyncio.sleep(poll_interval)
+
+    async def _claim(self, count: int, now: float,
+                     lease_seconds: int) -> None:
+        script = await self._script("claim", _CLAIM_SCRIPT)
+        claimed = await script(keys=[
+            ADMISSION_QUEUE_KEY, ADMISSION_LEASES_KEY,
+            ADMISSION_LEASE_OWNERS_KEY, ADMISSION_VTIME_KEY,
+            ADMISSION_PAYLOADS_KEY
+        ],
+                               args=[
+                                   count, self.worker_id, now, lease_seconds,
+                                   _SEQ_SPAN
+                               ])
+        for task_id, payload in zip(claimed[::2], claimed[1::2]):
+            self._launch(task_id, payload)
+
+    def _launch(self, task_id: str, payload: str) -> None:
+        try:
+            job = json.loads(payload)
+            handler = self._handlers[job["kind"]]
+        except (json.JSONDecodeError, KeyError, TypeError) as e:
+            logger.error(
+                f"[AdmissionQueue] Dropping job {task_id} with invalid payload: {e}"
+            )
+            asyncio.create_task(self._release(task_id))
+            return
+
+        self._local_jobs.add(task_id)
+        logger.info(
+            f"[AdmissionQueue] Worker {self.worker_id} admitted job {task_id} ({job['kind']})."
+        )
+        self._launcher(task_id,
+                       self._run_job(task_id, handler, job.get("kwargs", {})))
+
+    async def _run_job(self, task_id: str, handler: JobHandler,
+                       kwargs: dict[str, Any]) -> Any:
+        if task_id not in self._local_jobs:
+            # 启动前租约已丢失
+            return None
+        task = asyncio.current_task()
+        self._job_tasks[task_id] = task
+        try:
+            return await handler(task_id=task_id, **kwargs)
+        finally:
+            # 因租约丢失被取消时，状态已由 _drop_lost_jobs 清理
+            if self._job_tasks.get(task_id) is task:
+                del self._job_tasks[task_id]
+                self._local_jobs.discard(task_id)
+                await self._release(task_id)
+            self._wakeup.set()
+
+    async def _release(self, task_id: str) -> None:
+        """作业结束后释放租约与载荷（租约已不属于本 worker 时不做修改）"""
+        try:
+            script = await self._script("release", _RELEASE_SCRIPT)
+            released = await script(keys=[
+                ADMISSION_LEASES_KEY, ADMISSION_LEASE_OWNERS_KEY,
+                ADMISSION_PAYLOADS_KEY
+            ],
+                                    args=[task_id, self.worker_id])
+            if not released:
+                logger.warning(
+                    f"[AdmissionQueue] Lease of job {task_id} is no longer held by worker {self.worker_id}, skip release."
+                )
+        except Exception as e:
+            logger.error(
+                f"[AdmissionQueue] Failed to release job {task_id}: {e}")
+
+    async def _renew_leases(self, now: float, lease_seconds: int) -> None:
+        if not self._local_jobs:
+            return
+        script = await self._script("renew", _RENEW_SCRIPT)
+        lost = await script(
+            keys=[ADMISSION_LEASES_KEY, ADMISSION_LEASE_OWNERS_KEY],
+            args=[self.worker_id, now + lease_seconds, *self._local_jobs])
+        if lost:
+            logger.warning(
+                f"[AdmissionQueue] Worker {self.worker_id} no longer holds leases: {lost}"
+            )
+            self._drop_lost_jobs(lost)
+
+    def _drop_lost_jobs(self, task_ids: list[str]) -> None:
+        """取消租约已丢失的本地作业，作业已重新入队或由其他 worker 执行"""
+        for task_id in task_ids:
+            self._local_jobs.discard(task_id)
+            task = self._job_tasks.pop(task_id, None)
+            if task is not None and not task.done():
+                task.cancel()
+                logger.warning(
+                    f"[AdmissionQueue] Cancelled job {task_id} on worker {self.worker_id} after losing its lease."
+                )
+        self._wakeup.set()
+
+    async def _reap_expired(self, now: float) -> None:
+        script = await self._script("reap", _REAP_SCRIPT)
+        expired = await script(keys=[
+            ADMISSION_LEASES_KEY, ADMISSION_LEASE_OWNERS_KEY,
+            ADMISSION_QUEUE_KEY, ADMISSION_VTIME_KEY
+        ],
+                               args=[now, _SEQ_SPAN])
+        if expired:
+            logger.warning(
+                f"[AdmissionQueue] Requeued {len(expired)} jobs with expired leases: {expired}"
+            )
@@ -171,6 +171,110 @@ class SearchConfig(BaseSettings):
     max_search_rounds: int = 5
 
 
+class ResearchConfig(BaseSettings):
+    """章节研究节点配置"""
+    concurrent_mode: bool = True  # 并发执行所有查询及查询内的各路检索
+    max_concurrency: int = 5  # 单个作业内同时执行的查询数上限
+    batched_es_search: bool = True  # 所有查询的ES检索合并为一次 msearch 请求
+
+
+class HybridSearchConfig(BaseSettings):
+    """知识库混合检索（KNN + BM25，RRF 融合）配置"""
+    enabled: bool = False  # 关闭时只执行 KNN 向量检索
+    vector_top_k: int = 0  # 向量一路召回数量，<=0 时与最终召回数量相同
+    text_top_k: int = 0  # BM25 一路召回数量，<=0 时与最终召回数量相同
+    vector_weight: float = 1.0  # 向量一路 RRF 权重
+    text_weight: float = 1.0  # BM25 一路 RRF 权重
+    rank_constant: int = 60  # RRF 常数 k
+
+
+class KnnTuningConfig(BaseSettings):
+    """KNN 向量检索调优配置"""
+    target_recall: float = 0.95  # 目标召回率（相对精确 kNN 的 recall@k）
+    # 召回率档位 -> num_candidates / k 倍数，使用 benchmark_knn.py 离线标定
+    recall_multipliers: dict[float, float] = {0.9: 2.0, 0.95: 4.0, 0.99: 10.0}
+    reference_docs: int = 1_000_000  # 倍数标定时的索引文档数，更大的索引按 log10 增加候选
+    min_candidates: int = 50  # num_candidates 下限
+    max_candidates: int = 10000  # num_candidates 上限（ES 限制为 10000）
+
+
+class LocalVectorIndexConfig(BaseSettings):
+    """作业级用户文档内存向量索引配置"""
+    enabled: bool = True  # 关闭时用户文档检索逐次请求 ES
+    max_chunks: int = 5000  # 单个作业的切片上限，超过时回退为 ES 检索
+    max_jobs: int = 32  # 同时缓存索引的作业数（LRU 淘汰）
+    ttl_seconds: float = 3600  # 索引过期时间（秒），<=0 表示不过期
+
+
+class ChapterPipelineConfig(BaseSettings):
+    """文档生成阶段的章节调度配置"""
+    mode: str = "serial"  # "serial" 逐章研究+写作 | "pipelined" 先并发研究再调度写作
+    research_concurrency: int = 4  # 流水线模式下同时研究的章节数
+    writer_parallelism: int = 1  # 流水线模式下同时写作的章节数，>1 时使用大纲上下文
+    research_prefetch: bool = True  # 串行模式下在当前章节写作时预取下一章节的研究结果
+    chapter_summary: bool = True  # 是否在后台生成章节摘要，快速模式可关闭
+
+
+class EmbeddingCacheConfig(BaseSettings):
+    """查询向量缓存配置"""
+    enabled: bool = True
+    max_entries: int = 10000  # 进程内 LRU 最大条目数
+    ttl_seconds: int = 3600  # 进程内缓存过期时间（秒）
+    redis_enabled: bool = False  # 是否启用 Redis 共享缓存层
+    redis_ttl_seconds: int = 7 * 24 * 60 * 60  # Redis 缓存过期时间（秒）
+
+
+class RerankCacheConfig(BaseSettings):
+    """重排序评分缓存配置"""
+    enabled: bool = True
+    max_entries: int = 50000  # 进程内 LRU 最大条目数（按 查询+文档 计）
+    ttl_seconds: int = 3600  # 缓存过期时间（秒）
+
+
+class MetaCacheConfig(BaseSettings):
+    """文档元信息缓存配置"""
+    enabled: bool = True
+    max_entries: int = 20000  # 进程内 LRU 最大条目数（按 file_token 计）
+    ttl_seconds: int = 1800  # 缓存过期时间（秒）
+
+
+class RedisStreamConfig(BaseSettings):
+    """作业事件流发布配置"""
+    buffered: bool = True  # 是否启用内存队列 + 后台批量 XADD
+    flush_interval_ms: int = 50  # 后台刷新间隔（毫秒）
+    max_batch_size: int = 500  # 单次 pipeline 最多写入的事件数
+    max_queue_size: int = 20000  # 队列容量，超过后生产者等待，等待超时或无法等待的事件被丢弃
+    token_high_watermark: float = 0.8  # 队列占比超过该值时丢弃 token 事件
+    enqueue_timeout_s: float = 5.0  # 异步生产者等待队列空间的最长时间
+    expire_seconds: int = 24 * 60 * 60  # 事件流过期时间（秒）
+    max_retries: int = 3  # 整批写入失败时非 token 事件的最多重试次数，token 事件不重试
+    max_len: int = 0  # 单个事件流近似长度上限（XADD MAXLEN ~），<=0 不裁剪；裁剪不区分事件类型，会丢掉回放依赖的早期事件
+    compact_token_events: bool = False  # token 事件使用紧凑格式（需消费端支持）
+    compact_chapters: bool = False  # 章节完成后用全文事件替换该章节的 token 事件（需消费端支持）
+
+
+class AdmissionQueueConfig(BaseSettings):
+    """跨 worker 的全局作业准入队列配置"""
+    enabled: bool = True  # 关闭时退回各 worker 进程内信号量
+    lease_seconds: int = 60  # 作业租约时长，worker 失联超过该时间后作业重新入队
+    poll_interval_ms: int = 200  # 空闲 worker 轮询全局队列的间隔（毫秒）
+    tenant_ttl_seconds: int = 24 * 60 * 60  # 租户公平调度状态的过期时间（秒）
+
+
+class FileParsingConfig(BaseSettings):
+    """文件解析进程池配置"""
+    use_process_pool: bool = True  # 关闭时在线程中解析
+    max_workers: int = 4  # 进程池大小，<=0 时使用 CPU 核数
+    timeout_s: float = 120.0  # 单个文件解析超时（秒）
+    max_file_size_mb: int = 200  # 允许解析的最大文件大小（MB）
+    # 按格式限制同时解析的文件数，未列出的格式不超过进程池大小
+    format_concurrency: dict[str, int] = {
+        "excel": 2,
+        "word": 4,
+        "powerpoint": 2
+    }
+
+
 class AppSettings(BaseSettings):
     """应用的主配置类"""
     model_config = SettingsConfigDict(env_file=".env",
@@ -194,6 +298,17 @@ class AppSettings(BaseSettings):
     _document_generation_config: Optional[DocumentGenerationConfig] = None
     _logging_config: Optional[LoggingSettings] = None
     _redis_config: Optional[dict[str, Any]] = None
+    _research_config: Optional[ResearchConfig] = None
+    _chapter_pipeline_config: Optional[ChapterPipelineConfig] = None
+    _hybrid_search_config: Optional[HybridSearchConfig] = None
+    _knn_tuning_config: Optional[KnnTuningConfig] = None
+    _local_vector_index_config: Optional[LocalVectorIndexConfig] = None
+    _embedding_cache_config: Optional[EmbeddingCacheConfig] = None
+    _rerank_cache_config: Optional[RerankCacheConfig] = None
+    _meta_cache_config: Optional[MetaCacheConfig] = None
+    _redis_stream_config: Optional[RedisStreamConfig] = None
+    _admission_queue_config: Optional[AdmissionQueueConfig] = None
+    _file_parsing_config: Optional[FileParsingConfig] = None
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -272,6 +387,127 @@ class AppSettings(BaseSettings):
                 self._search_config = SearchConfig()  # 使用默认配置
         return self._search_config
 
+    @property
+    def research_config(self) -> ResearchConfig:
+        """获取章节研究配置"""
+        if self._research_config is None:
+            if self._yaml_config and 'research_config' in self._yaml_config:
+                self._research_config = ResearchConfig(
+                    **self._yaml_config['research_config'])
+            else:
+                self._research_config = ResearchConfig()  # 使用默认配置
+        return self._research_config
+
+    @property
+    def hybrid_search_config(self) -> HybridSearchConfig:
+        """获取混合检索配置"""
+        if self._hybrid_search_config is None:
+            if self._yaml_config and 'hybrid_search' in self._yaml_config:
+                self._hybrid_search_config = HybridSearchConfig(
+                    **self._yaml_config['hybrid_search'])
+            else:
+                self._hybrid_search_config = HybridSearchConfig()  # 使用默认配置
+        return self._hybrid_search_config
+
+    @property
+    def knn_tuning_config(self) -> KnnTuningConfig:
+        """获取KNN调优配置"""
+        if self._knn_tuning_config is None:
+            if self._yaml_config and 'knn_tuning' in self._yaml_config:
+                self._knn_tuning_config = KnnTuningConfig(
+                    **self._yaml_config['knn_tuning'])
+            else:
+                self._knn_tuning_config = KnnTuningConfig()  # 使用默认配置
+        return self._knn_tuning_config
+
+    @property
+    def local_vector_index_config(self) -> LocalVectorIndexConfig:
+        """获取作业级用户文档内存向量索引配置"""
+        if self._local_vector_index_config is None:
+            if self._yaml_config and 'local_vector_index' in self._yaml_config:
+                self._local_vector_index_config = LocalVectorIndexConfig(
+                    **self._yaml_config['local_vector_index'])
+            else:
+                self._local_vector_index_config = LocalVectorIndexConfig()
+        return self._local_vector_index_config
+
+    @property
+    def chapter_pipeline_config(self) -> ChapterPipelineConfig:
+        """获取章节调度配置"""
+        if self._chapter_pipeline_config is None:
+            if self._yaml_config and 'chapter_pipeline' in self._yaml_config:
+                self._chapter_pipeline_config = ChapterPipelineConfig(
+                    **self._yaml_config['chapter_pipeline'])
+            else:
+                self._chapter_pipeline_config = ChapterPipelineConfig()
+        return self._chapter_pipeline_config
+
+    @property
+    def embedding_cache_config(self) -> EmbeddingCacheConfig:
+        """获取查询向量缓存配置"""
+        if self._embedding_cache_config is None:
+            if self._yaml_config and 'embedding_cache' in self._yaml_config:
+                self._embedding_cache_config = EmbeddingCacheConfig(
+                    **self._yaml_config['embedding_cache'])
+            else:
+                self._embedding_cache_config = EmbeddingCacheConfig()
+        return self._embedding_cache_config
+
+    @property
+    def rerank_cache_config(self) -> RerankCacheConfig:
+        """获取重排序评分缓存配置"""
+        if self._rerank_cache_config is None:
+            if self._yaml_config and 'rerank_cache' in self._yaml_config:
+                self._rerank_cache_config = RerankCacheConfig(
+                    **self._yaml_config['rerank_cache'])
+            else:
+                self._rerank_cache_config = RerankCacheConfig()
+        return self._rerank_cache_config
+
+    @property
+    def meta_cache_config(self) -> MetaCacheConfig:
+        """获取文档元信息缓存配置"""
+        if self._meta_cache_config is None:
+            if self._yaml_config and 'meta_cache' in self._yaml_config:
+                self._meta_cache_config = MetaCacheConfig(
+                    **self._yaml_config['meta_cache'])
+            else:
+                self._meta_cache_config = MetaCacheConfig()
+        return self._meta_cache_config
+
+    @property
+    def redis_stream_config(self) -> RedisStreamConfig:
+        """获取作业事件流发布配置"""
+        if self._redis_stream_config is None:
+            if self._yaml_config and 'redis_stream' in self._yaml_config:
+                self._redis_stream_config = RedisStreamConfig(
+                    **self._yaml_config['redis_stream'])
+            else:
+                self._redis_stream_config = RedisStreamConfig()
+        return self._redis_stream_config
+
+    @property
+    def admission_queue_config(self) -> AdmissionQueueConfig:
+        """获取全局作业准入队列配置"""
+        if self._admission_queue_config is None:
+            if self._yaml_config and 'admission_queue' in self._yaml_config:
+                self._admission_queue_config = AdmissionQueueConfig(
+                    **self._yaml_config['admission_queue'])
+            else:
+                self._admission_queue_config = AdmissionQueueConfig()
+        return self._admission_queue_config
+
+    @property
+    def file_parsing_config(self) -> FileParsingConfig:
+        """获取文件解析进程池配置"""
+        if self._file_parsing_config is None:
+            if self._yaml_config and 'file_parsing' in self._yaml_config:
+                self._file_parsing_config = FileParsingConfig(
+                    **self._yaml_config['file_parsing'])
+            else:
+                self._file_parsing_config = FileParsingConfig()
+        return self._file_parsing_config
+
     @property
     def tavily_config(self) -> TavilyConfig:
         """获取Tavily配置"""
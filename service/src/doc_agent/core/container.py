@@ -1,12 +1,13 @@
+import threading
 from functools import partial
 from pathlib import Path
 
 import yaml
-from doc_agent.core.logger import logger
 
 # 确保环境变量已加载
 from doc_agent.core.config import settings
 from doc_agent.core.env_loader import setup_environment
+from doc_agent.core.logger import logger
 
 setup_environment()
 
@@ -15,15 +16,22 @@ import redis  # 导入同步 redis
 import redis.asyncio as aredis
 
 from doc_agent.common.prompt_selector import PromptSelector
-from doc_agent.core.redis_stream_publisher import RedisStreamPublisher
+from doc_agent.core.redis_stream_publisher import (
+    AsyncRedisStreamPublisher,
+    RedisStreamPublisher,
+    StreamEventBuffer,
+)
 from doc_agent.graph.callbacks import create_redis_callback_handler
 from doc_agent.graph.chapter_workflow import router as chapter_router
-from doc_agent.graph.chapter_workflow.builder import build_chapter_workflow_graph
+from doc_agent.graph.chapter_workflow.builder import (
+    build_chapter_research_graph,
+    build_chapter_workflow_graph,
+)
 from doc_agent.graph.chapter_workflow.nodes import (
     async_researcher_node,
+    async_writer_node,
     planner_node,
     reflection_node,
-    writer_node,
 )
 from doc_agent.graph.main_orchestrator.builder import (
     build_document_graph,
@@ -130,16 +138,53 @@ class Container:
                                                 decode_responses=True)
         logger.info("    - Synchronous Redis client created.")
 
+        # 事件缓冲区：由主事件循环上的后台任务批量写入，需在应用启动时 start()
+        stream_config = settings.redis_stream_config
+        self.stream_buffer = None
+        if stream_config.buffered:
+            self.stream_buffer = StreamEventBuffer(
+                self.async_redis_client,
+                flush_interval_ms=stream_config.flush_interval_ms,
+                max_batch_size=stream_config.max_batch_size,
+                max_queue_size=stream_config.max_queue_size,
+                token_high_watermark=stream_config.token_high_watermark,
+                enqueue_timeout_s=stream_config.enqueue_timeout_s,
+                expire_seconds=stream_config.expire_seconds,
+                max_len=stream_config.max_len,
+                max_retries=stream_config.max_retries)
+            logger.info("    - StreamEventBuffer created.")
+
         # 创建并存储同步的 RedisStreamPublisher 实例
         self.redis_publisher = RedisStreamPublisher(
-            redis_client=self.sync_redis_client, stream_name=stream_name)
+            redis_client=self.sync_redis_client,
+            stream_name=stream_name,
+            buffer=self.stream_buffer,
+            max_len=stream_config.max_len)
         logger.info("    - Synchronous RedisStreamPublisher created.")
+
+        # 异步发布器供协程节点（如 async_writer_node）使用
+        self.async_redis_publisher = AsyncRedisStreamPublisher(
+            redis_client=self.async_redis_client,
+            stream_name=stream_name,
+            buffer=self.stream_buffer,
+            max_len=stream_config.max_len)
+        logger.info("    - Asynchronous RedisStreamPublisher created.")
         # --- Redis 初始化结束 ---
 
         # 加载 genre 策略
         self.genre_strategies = self._load_genre_strategies()
         logger.info(f"加载了 {len(self.genre_strategies)} 个 genre 策略")
 
+        # 编译后的图按 (图类型, genre) 缓存，作业级回调通过运行时配置注入
+        self._compiled_graphs = {}
+        self._compiled_graphs_lock = threading.Lock()
+        self._graph_builders = {
+            "main": self._build_main_graph,
+            "outline": self._build_outline_graph,
+            "outline_loader": self._build_outline_loader_graph,
+            "document": self._build_document_graph,
+        }
+
         default_llm = None
         if hasattr(settings, '_yaml_config') and settings._yaml_config:
             agent_cfg = settings._yaml_config.get('agent_config', {})
@@ -170,7 +215,7 @@ class Container:
                                           web_search_tool=self.web_search_tool,
                                           es_search_tool=self.es_search_tool,
                                           reranker_tool=self.reranker_tool)
-        chapter_writer_node = partial(writer_node,
+        chapter_writer_node = partial(async_writer_node,
                                       llm_client=self.llm_client,
                                       prompt_selector=self.prompt_selector,
                                       genre="default",
@@ -256,19 +301,47 @@ class Container:
     # 这个方法现在已经不需要了，可以安全删除
     # def _get_redis_publisher(self): ...
 
-    def _get_genre_aware_graph(self, genre: str, redis_handler):
-        """
-        根据genre获取相应的图执行器
-        """
+    def _resolve_genre(self, genre: str) -> str:
+        """未知的 genre 回退为默认 genre"""
         if genre not in self.genre_strategies:
             logger.warning(f"Genre '{genre}' 不存在，使用默认genre")
-            genre = "default"
+            return "default"
+        return genre
 
+    def _get_compiled_graph(self, graph_type: str, genre: str):
+        """
+        获取 (图类型, genre) 对应的编译后图，首次访问时构建并缓存
+        编译后的图不含作业状态，可在作业之间安全复用
+        """
+        genre = self._resolve_genre(genre)
+        key = (graph_type, genre)
+        compiled_graph = self._compiled_graphs.get(key)
+        if compiled_graph is None:
+            with self._compiled_graphs_lock:
+                compiled_graph = self._compiled_graphs.get(key)
+                if compiled_graph is None:
+                    compiled_graph = self._graph_builders[graph_type](genre)
+                    self._compiled_graphs[key] = compiled_graph
+                    logger.info(f"编译并缓存图: {graph_type} (genre: {genre})")
+        return compiled_graph
+
+    def warm_up_graphs(self):
+        """预编译 genres.yaml 中所有 genre 的各类图，避免首个作业承担编译耗时"""
+        for genre in self.genre_strategies:
+            for graph_type in self._graph_builders:
+                try:
+                    self._get_compiled_graph(graph_type, genre)
+                except Exception as e:
+                    logger.error(f"预编译图失败: {graph_type} (genre: {genre}): {e}")
+        logger.info(f"✅ 图预编译完成，共缓存 {len(self._compiled_graphs)} 个图")
+
+    def _bind_chapter_nodes(self, genre: str) -> dict:
+        """为指定 genre 绑定章节工作流各节点的依赖"""
         chapter_planner_node = partial(planner_node,
                                        llm_client=self.llm_client,
                                        prompt_selector=self.prompt_selector,
                                        genre=genre)
-        chapter_writer_node = partial(writer_node,
+        chapter_writer_node = partial(async_writer_node,
                                       llm_client=self.llm_client,
                                       prompt_selector=self.prompt_selector,
                                       genre=genre,
@@ -286,12 +359,20 @@ class Container:
                                           web_search_tool=self.web_search_tool,
                                           es_search_tool=self.es_search_tool,
                                           reranker_tool=self.reranker_tool)
-        chapter_graph = build_chapter_workflow_graph(
-            planner_node=chapter_planner_node,
-            researcher_node=chapter_researcher_node,
-            writer_node=chapter_writer_node,
-            supervisor_router_func=chapter_supervisor_router,
-            reflection_node=reflection_node_func)
+        return {
+            "planner_node": chapter_planner_node,
+            "researcher_node": chapter_researcher_node,
+            "writer_node": chapter_writer_node,
+            "supervisor_router_func": chapter_supervisor_router,
+            "reflection_node": reflection_node_func
+        }
+
+    def _build_chapter_graph(self, genre: str):
+        """构建指定 genre 的章节工作流图"""
+        return build_chapter_workflow_graph(**self._bind_chapter_nodes(genre))
+
+    def _build_main_graph(self, genre: str):
+        """构建指定 genre 的主工作流图"""
         main_outline_generation_node = partial(
             outline_generation_node,
             llm_client=self.llm_client,
@@ -307,24 +388,16 @@ class Container:
         bibliography_node_func = partial(bibliography_node)
         fusion_editor_node_func = partial(fusion_editor_node,
                                           llm_client=self.llm_client)
-        main_graph = build_main_orchestrator_graph(
+        return build_main_orchestrator_graph(
             initial_research_node=main_initial_research_node,
             outline_generation_node=main_outline_generation_node,
             split_chapters_node=main_split_chapters_node,
-            chapter_workflow_graph=chapter_graph,
+            chapter_workflow_graph=self._build_chapter_graph(genre),
             fusion_editor_node=fusion_editor_node_func,
             bibliography_node_func=bibliography_node_func)
-        configured_graph = main_graph.with_config(
-            {"callbacks": [redis_handler]})
-        return configured_graph
 
-    def _get_genre_aware_outline_graph(self, genre: str, redis_handler):
-        """
-        根据genre获取大纲生成图的执行器
-        """
-        if genre not in self.genre_strategies:
-            logger.warning(f"Genre '{genre}' 不存在，使用默认genre")
-            genre = "default"
+    def _build_outline_graph(self, genre: str):
+        """构建指定 genre 的大纲生成图"""
         main_initial_research_node = partial(
             initial_research_node,
             web_search_tool=self.web_search_tool,
@@ -336,77 +409,77 @@ class Container:
             llm_client=self.llm_client,
             prompt_selector=self.prompt_selector,
             genre=genre)
-        outline_graph = build_outline_graph(
+        return build_outline_graph(
             initial_research_node=main_initial_research_node,
             outline_generation_node=main_outline_generation_node)
-        configured_graph = outline_graph.with_config(
-            {"callbacks": [redis_handler]})
-        return configured_graph
 
-    def _get_genre_aware_outline_loader_graph(self, genre: str, redis_handler):
-        """
-        根据genre获取大纲加载器图的执行器
-        """
-        if genre not in self.genre_strategies:
-            logger.warning(f"Genre '{genre}' 不存在，使用默认genre")
-            genre = "default"
+    def _build_outline_loader_graph(self, genre: str):
+        """构建大纲加载器图（与 genre 无关，按 genre 缓存以保持接口一致）"""
         main_outline_loader_node = partial(outline_loader_node,
                                            llm_client=self.llm_client,
                                            es_search_tool=self.es_search_tool)
-        outline_loader_graph = build_outline_loader_graph(
+        return build_outline_loader_graph(
             outline_loader_node=main_outline_loader_node)
-        configured_graph = outline_loader_graph.with_config(
-            {"callbacks": [redis_handler]})
-        return configured_graph
 
-    def _get_genre_aware_document_graph(self, genre: str, redis_handler):
-        """
-        根据genre获取文档生成图的执行器
-        """
-        if genre not in self.genre_strategies:
-            logger.warning(f"Genre '{genre}' 不存在，使用默认genre")
-            genre = "default"
-        chapter_planner_node = partial(planner_node,
-                                       llm_client=self.llm_client,
-                                       prompt_selector=self.prompt_selector,
-                                       genre=genre)
-        chapter_writer_node = partial(writer_node,
-                                      llm_client=self.llm_client,
-                                      prompt_selector=self.prompt_selector,
-                                      genre=genre,
-                                      prompt_version="v4_with_style_guide")
-        chapter_supervisor_router = partial(
-            chapter_router.supervisor_router,
-            llm_client=self.llm_client,
-            prompt_selector=self.prompt_selector,
-            genre=genre)
-        reflection_node_func = partial(reflection_node,
-                                       llm_client=self.llm_client,
-                                       prompt_selector=self.prompt_selector,
-                                       genre=genre)
-        chapter_researcher_node = partial(async_researcher_node,
-                                          web_search_tool=self.web_search_tool,
-                                          es_search_tool=self.es_search_tool,
-                                          reranker_tool=self.reranker_tool)
-        chapter_graph = build_chapter_workflow_graph(
-            planner_node=chapter_planner_node,
-            researcher_node=chapter_researcher_node,
-            writer_node=chapter_writer_node,
-            supervisor_router_func=chapter_supervisor_router,
-            reflection_node=reflection_node_func)
+    def _build_document_graph(self, genre: str):
+        """构建指定 genre 的文档生成图"""
         main_split_chapters_node = partial(split_chapters_node,
                                            llm_client=self.llm_client)
         bibliography_node_func = partial(bibliography_node)
         fusion_editor_node_func = partial(fusion_editor_node,
                                           llm_client=self.llm_client)
-        document_graph = build_document_graph(
-            chapter_workflow_graph=chapter_graph,
+        chapter_nodes = self._bind_chapter_nodes(genre)
+        pipeline_config = settings.chapter_pipeline_config
+        pipelined = pipeline_config.mode == "pipelined"
+        pipeline_kwargs = {}
+        if pipelined or pipeline_config.research_prefetch:
+            # 流水线/预取模式：研究图与写作节点分开调度
+            research_nodes = {
+                name: node
+                for name, node in chapter_nodes.items()
+                if name != "writer_node"
+            }
+            pipeline_kwargs = {
+                "chapter_research_graph":
+                build_chapter_research_graph(**research_nodes),
+                "chapter_writer_node": chapter_nodes["writer_node"],
+                "pipelined": pipelined
+            }
+        return build_document_graph(
+            chapter_workflow_graph=build_chapter_workflow_graph(
+                **chapter_nodes),
             split_chapters_node=main_split_chapters_node,
             fusion_editor_node=fusion_editor_node_func,
-            bibliography_node_func=bibliography_node_func)
-        configured_graph = document_graph.with_config(
+            bibliography_node_func=bibliography_node_func,
+            **pipeline_kwargs)
+
+    def _get_genre_aware_graph(self, genre: str, redis_handler):
+        """
+        根据genre获取相应的图执行器
+        """
+        return self._get_compiled_graph("main", genre).with_config(
+            {"callbacks": [redis_handler]})
+
+    def _get_genre_aware_outline_graph(self, genre: str, redis_handler):
+        """
+        根据genre获取大纲生成图的执行器
+        """
+        return self._get_compiled_graph("outline", genre).with_config(
+            {"callbacks": [redis_handler]})
+
+    def _get_genre_aware_outline_loader_graph(self, genre: str, redis_handler):
+        """
+        根据genre获取大纲加载器图的执行器
+        """
+        return self._get_compiled_graph("outline_loader", genre).with_config(
+            {"callbacks": [redis_handler]})
+
+    def _get_genre_aware_document_graph(self, genre: str, redis_handler):
+        """
+        根据genre获取文档生成图的执行器
+        """
+        return self._get_compiled_graph("document", genre).with_config(
             {"callbacks": [redis_handler]})
-        return configured_graph
 
     def get_outline_graph_runnable_for_job(self,
                                            job_id: str,
@@ -458,6 +531,7 @@ class Container:
         """清理资源 (保持不变)"""
         from doc_agent.tools import close_all_es_tools
         await close_all_es_tools()
+        await self.web_search_tool.close()
         print("🧹 Resources cleaned up.")
 
 
@@ -7,17 +7,19 @@ from doc_agent.core.container import container
 from doc_agent.core.file_parser import parse_context_files
 from doc_agent.core.logger import logger
 from doc_agent.graph.callbacks import publish_event
+from doc_agent.graph.main_orchestrator.builder import release_chapter_tasks
 from doc_agent.graph.state import ResearchState
 from doc_agent.tools.file_module import file_processor
+from doc_agent.tools.local_vector_index import release_job_vector_index
 
 
-def generate_initial_state(task_prompt: str,
-                           outline_file_token: str,
-                           task_id: str,
-                           context_files: Optional[list[dict]] = None,
-                           is_online: bool = False,
-                           is_es_search: bool = True,
-                           ai_demo: bool = False) -> ResearchState:
+async def generate_initial_state(task_prompt: str,
+                                 outline_file_token: str,
+                                 task_id: str,
+                                 context_files: Optional[list[dict]] = None,
+                                 is_online: bool = False,
+                                 is_es_search: bool = True,
+                                 ai_demo: bool = False) -> ResearchState:
     """
     生成初始状态
 
@@ -31,8 +33,9 @@ def generate_initial_state(task_prompt: str,
     Returns:
         ResearchState: 初始状态对象
     """
-    # 解析大纲文件
-    document_outline = file_processor.filetoken_to_outline(outline_file_token)
+    # 解析大纲文件（下载在线程中执行，解析在进程池中执行）
+    document_outline = await file_processor.afiletoken_to_outline(
+        outline_file_token)
     if not document_outline:
         logger.error("解析大纲失败，file_token 无法转换为有效的 outline。token: {}",
                      outline_file_token)
@@ -109,10 +112,11 @@ async def generate_document_sync(task_id: str,
             task_id)
 
         # 准备图的初始状态
-        initial_state = generate_initial_state(task_prompt, outline_file_token,
-                                               task_id, context_files,
-                                               is_online, is_es_search,
-                                               ai_demo)
+        initial_state = await generate_initial_state(task_prompt,
+                                                     outline_file_token,
+                                                     task_id, context_files,
+                                                     is_online, is_es_search,
+                                                     ai_demo)
 
         # 创建 ResearchState 前记录数据
         logger.info(f"ResearchState <debug>: {initial_state}")
@@ -166,3 +170,7 @@ async def generate_document_sync(task_id: str,
         logger.error("Job {}: 后台文档生成任务失败。错误: {}", task_id, e, exc_info=True)
         end_time = time.time()
         logger.info(f" 文档生成用时 <timer>: {end_time - start_time}")
+    finally:
+        # 失败或取消时图不会走到最终化节点，在此清理作业遗留的章节后台任务和内存索引
+        release_chapter_tasks(task_id)
+        release_job_vector_index(task_id)
@@ -5,14 +5,111 @@ Redis Streams 事件发布器
 支持单节点和集群模式，统一使用原生redis。
 """
 
+import asyncio
 import json
+import threading
 import time
+from collections import deque
 from typing import Optional, Union
+
 from redis import Redis
 from redis.cluster import RedisCluster
 
 from doc_agent.core.logger import logger
 from doc_agent.core.redis_health_check import get_redis_client
+from doc_agent.utils.ttl_cache import TTLCache
+
+# 大模型 token 增量事件类型，队列拥塞时可丢弃
+TOKEN_EVENT_TYPE = "大模型实时输出"
+# 紧凑格式的 token 事件类型：{"eventType": "t", "i": 章节序号, "d": 增量文本}
+# 不携带 redisStreamKey/redisStreamId/timestamp 等可由 Stream 本身推导的字段
+COMPACT_TOKEN_EVENT_TYPE = "t"
+
+
+def is_token_event(event_data: dict) -> bool:
+    """是否为 token 增量事件（完整或紧凑格式）"""
+    return event_data.get("eventType") in (TOKEN_EVENT_TYPE,
+                                           COMPACT_TOKEN_EVENT_TYPE)
+
+
+def _is_token_fields(fields: dict) -> bool:
+    """已序列化的 XADD 字段是否为 token 事件"""
+    try:
+        return is_token_event(json.loads(fields["data"]))
+    except (KeyError, TypeError, ValueError):
+        return False
+
+
+# 载荷中 Stream ID 的占位符，由写入脚本替换为 Redis 端分配的 ID
+_STREAM_ID_PLACEHOLDER = "$redisStreamId$"
+
+# 在 Redis 端为 Stream 分配单调递增的 ID 并写入事件，多个进程写同一 Stream 时不会冲突
+# 或回退（ID 生成规则与 XADD * 相同，但写入前即可得到 ID 以填入载荷）。
+# KEYS[1]: Stream；KEYS[2]: 该 Stream 最近分配的 ID（以 Stream 名为哈希标签，集群下同槽）
+# ARGV[1]: MAXLEN 近似上限，<=0 表示不裁剪；ARGV[2]: 过期时间（秒）
+# ARGV[3]、ARGV[4]: 载荷在 ID 占位符前后的两段，没有 ARGV[4] 时载荷不含 ID
+_XADD_SCRIPT = """
+local now = redis.call('TIME')
+local ms = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+local seq = 0
+local last = redis.call('GET', KEYS[2])
+if not last then
+    local top = redis.call('XREVRANGE', KEYS[1], '+', '-', 'COUNT', 1)[1]
+    if top then
+        last = top[1]
+    end
+end
+if last then
+    local last_ms, last_seq = string.match(last, '^(%d+)-(%d+)$')
+    last_ms = tonumber(last_ms)
+    if last_ms >= ms then
+        ms = last_ms
+        seq = tonumber(last_seq) + 1
+    end
+end
+local id = string.format('%.0f-%.0f', ms, seq)
+local payload = ARGV[3]
+if ARGV[4] then
+    payload = ARGV[3] .. id .. ARGV[4]
+end
+local max_len = tonumber(ARGV[1])
+if max_len > 0 then
+    redis.call('XADD', KEYS[1], 'MAXLEN', '~', max_len, id, 'data', payload)
+else
+    redis.call('XADD', KEYS[1], id, 'data', payload)
+end
+local ttl = tonumber(ARGV[2])
+redis.call('EXPIRE', KEYS[1], ttl)
+redis.call('SET', KEYS[2], id, 'EX', ttl)
+return id
+"""
+
+
+def _stamp_event(event_data: dict,
+                 job_id_str: str,
+                 stream_id: str = _STREAM_ID_PLACEHOLDER) -> dict:
+    """补充 Stream 元信息并序列化为 XADD 字段，紧凑 token 事件不补充"""
+    if event_data.get("eventType") != COMPACT_TOKEN_EVENT_TYPE:
+        event_data["redisStreamKey"] = job_id_str
+        event_data["redisStreamId"] = stream_id
+        event_data["timestamp"] = _get_current_timestamp()
+    return {"data": json.dumps(event_data, ensure_ascii=False)}
+
+
+def _xadd_keys(job_id_str: str) -> list[str]:
+    """写入脚本的 KEYS：Stream 及其 ID 序列键"""
+    return [job_id_str, f"stream_seq:{{{job_id_str}}}"]
+
+
+def _xadd_args(fields: dict, max_len: int, expire_seconds: int) -> list:
+    """写入脚本的 ARGV，载荷按最后一个 ID 占位符拆成两段"""
+    head, placeholder, tail = fields["data"].rpartition(_STREAM_ID_PLACEHOLDER)
+    payload = [head, tail] if placeholder else [fields["data"]]
+    return [max_len or 0, expire_seconds, *payload]
+
+
+def _decode_id(stream_id) -> str:
+    return stream_id.decode() if isinstance(stream_id, bytes) else stream_id
 
 
 class RedisStreamPublisher:
@@ -21,12 +118,20 @@ class RedisStreamPublisher:
     支持单节点和集群模式。
     """
 
-    def __init__(self, redis_client: Union[Redis, RedisCluster],
-                 stream_name: str):
+    def __init__(self,
+                 redis_client: Union[Redis, RedisCluster],
+                 stream_name: str,
+                 buffer: Optional["StreamEventBuffer"] = None,
+                 max_len: int = 0):
         if not hasattr(redis_client, 'xadd'):
             raise TypeError("redis_client 必须是一个 Redis 客户端实例")
         self.redis_client = redis_client
         self.stream_name = stream_name
+        # 缓冲区运行时事件交由后台任务批量写入
+        self.buffer = buffer
+        # Stream 近似长度上限，<=0 表示不裁剪
+        self.max_len = max_len
+        self._xadd_script = redis_client.register_script(_XADD_SCRIPT)
 
         # 检查是否为集群模式
         self.is_cluster = hasattr(redis_client, 'cluster_nodes')
@@ -38,46 +143,57 @@ class RedisStreamPublisher:
     def publish_event(self,
                       job_id: Union[str, int],
                       event_data: dict,
-                      enable_listen_logger=True):
+                      enable_listen_logger=True) -> Optional[str]:
+        """
+        发布事件，返回 Stream ID，失败或被丢弃时返回 None
+        经缓冲区写入时返回事件句柄，可传给 delete_events 删除该事件
+        """
+        if self.buffer is not None and self.buffer.running:
+            # 不在缓冲区所在事件循环线程时，可以安全地阻塞等待队列空间
+            return self.buffer.offer(job_id,
+                                     event_data,
+                                     enable_listen_logger,
+                                     block=not self.buffer.on_loop_thread())
 
         job_id_str = str(job_id)
 
         try:
-            # 2. 使用 Redis INCR 生成原子性的序列号
-            counter_key = f"job_counter:{job_id_str}"
-            i = self.redis_client.incr(counter_key)
-
-            stream_name = f"job:{job_id_str}"
-            # 使用时间戳作为ID的一部分，确保唯一性
-            timestamp = int(time.time() * 1000)
-            custom_id = f"{timestamp}-{i}"
-            # logger.info(f"custom_id: {custom_id}")
-
-            event_data["redisStreamKey"] = job_id_str
-            event_data["redisStreamId"] = custom_id
-            event_data["timestamp"] = self._get_current_timestamp()
-            fields = {"data": json.dumps(event_data, ensure_ascii=False)}
+            # Stream ID 由 Redis 端脚本分配，与其他进程写入同一 Stream 时保持递增
+            fields = _stamp_event(event_data, job_id_str)
 
             if enable_listen_logger:
                 logger.info(f"redis_event listener: {fields}")
 
-            # 4. 使用 xadd 命令，让Redis自动生成ID
-            # 集群模式下，需要确保key路由到正确的节点
-            event_id = self.redis_client.xadd(job_id_str, fields, id=custom_id)
-
-            # 5. 设置过期时间（使用实际存储数据的 key）
-            self.redis_client.expire(job_id_str, 24 * 60 * 60)
+            # 写入、裁剪与设置过期时间在同一个脚本中完成
+            stream_id = _decode_id(
+                self._xadd_script(keys=_xadd_keys(job_id_str),
+                                  args=_xadd_args(fields, self.max_len,
+                                                  24 * 60 * 60)))
 
             if enable_listen_logger:
                 logger.info(
-                    f"事件发布成功: job_id={job_id_str}, event_id={event_id}, "
-                    f"event_type={event_data.get('eventType', 'unknown')}, i={i}, "
+                    f"事件发布成功: job_id={job_id_str}, event_id={stream_id}, "
+                    f"event_type={event_data.get('eventType', 'unknown')}, "
                     f"模式={'集群' if self.is_cluster else '单节点'}")
+            return stream_id
 
         except Exception as e:
             logger.error(
                 f"事件发布失败: job_id={job_id_str}, error_type={type(e).__name__}, "
                 f"error_msg={e}, 模式={'集群' if self.is_cluster else '单节点'}")
+            return None
+
+    def delete_events(self, job_id: Union[str, int], stream_ids: list[str]):
+        """删除 Stream 中指定 ID 的事件（用于章节完成后压缩 token 事件）"""
+        if not stream_ids:
+            return
+        if self.buffer is not None and self.buffer.running:
+            self.buffer.offer_delete(job_id, stream_ids)
+            return
+        try:
+            self.redis_client.xdel(str(job_id), *stream_ids)
+        except Exception as e:
+            logger.warning(f"删除 Stream 事件失败: job_id={job_id}, error={e}")
 
     def publish_task_started(self, job_id: Union[str, int], task_type: str,
                              **kwargs) -> Optional[str]:
@@ -271,16 +387,7 @@ class RedisStreamPublisher:
         Returns:
             str: ISO 格式的时间戳（UTC+8）
         """
-        from datetime import datetime, timezone, timedelta
-
-        # 创建东八区时区
-        tz_east_asia = timezone(timedelta(hours=8))
-
-        # 获取当前UTC时间并转换为东八区时间
-        utc_now = datetime.now(timezone.utc)
-        east_asia_time = utc_now.astimezone(tz_east_asia)
-
-        return east_asia_time.isoformat()
+        return _get_current_timestamp()
 
     def get_stream_info(self, job_id: Union[str, int]) -> Optional[dict]:
         """
@@ -317,3 +424,402 @@ class RedisStreamPublisher:
         except Exception as e:
             logger.warning(f"获取 Stream 长度失败: job_id={job_id}, error={e}")
             return 0
+
+
+class AsyncRedisStreamPublisher:
+    """
+    RedisStreamPublisher 的异步版本，基于 redis.asyncio 客户端。
+    在事件循环内发布事件时不阻塞其他协程。
+    """
+
+    def __init__(self,
+                 redis_client,
+                 stream_name: str,
+                 buffer: Optional["StreamEventBuffer"] = None,
+                 max_len: int = 0):
+        if not hasattr(redis_client, 'xadd'):
+            raise TypeError("redis_client 必须是一个 Redis 客户端实例")
+        self.redis_client = redis_client
+        self.stream_name = stream_name
+        self.buffer = buffer
+        self.max_len = max_len
+        self._xadd_script = redis_client.register_script(_XADD_SCRIPT)
+        logger.info(
+            f"AsyncRedisStreamPublisher 已初始化，将发布到 Stream: '{self.stream_name}'")
+
+    async def publish_event(self,
+                            job_id: Union[str, int],
+                            event_data: dict,
+                            enable_listen_logger=True) -> Optional[str]:
+        """异步发布事件，字段格式与 RedisStreamPublisher.publish_event 一致"""
+        if self.buffer is not None and self.buffer.running:
+            return await self.buffer.put(job_id, event_data,
+                                         enable_listen_logger)
+
+        job_id_str = str(job_id)
+
+        try:
+            fields = _stamp_event(event_data, job_id_str)
+
+            if enable_listen_logger:
+                logger.info(f"redis_event listener: {fields}")
+
+            # 写入、裁剪与设置过期时间在同一个脚本中完成，只需一次往返
+            stream_id = _decode_id(await self._xadd_script(
+                keys=_xadd_keys(job_id_str),
+                args=_xadd_args(fields, self.max_len, 24 * 60 * 60)))
+
+            if enable_listen_logger:
+                logger.info(
+                    f"事件发布成功: job_id={job_id_str}, event_id={stream_id}, "
+                    f"event_type={event_data.get('eventType', 'unknown')}")
+            return stream_id
+
+        except Exception as e:
+            logger.error(
+                f"异步事件发布失败: job_id={job_id_str}, error_type={type(e).__name__}, "
+                f"error_msg={e}")
+            return None
+
+    async def delete_events(self, job_id: Union[str, int],
+                            stream_ids: list[str]):
+        """删除 Stream 中指定 ID 的事件（用于章节完成后压缩 token 事件）"""
+        if not stream_ids:
+            return
+        if self.buffer is not None and self.buffer.running:
+            self.buffer.offer_delete(job_id, stream_ids)
+            return
+        try:
+            await self.redis_client.xdel(str(job_id), *stream_ids)
+        except Exception as e:
+            logger.warning(f"删除 Stream 事件失败: job_id={job_id}, error={e}")
+
+
+def _get_current_timestamp() -> str:
+    """获取当前东八区时间的 ISO 格式时间戳"""
+    from datetime import datetime, timedelta, timezone
+
+    tz_east_asia = timezone(timedelta(hours=8))
+    return datetime.now(timezone.utc).astimezone(tz_east_asia).isoformat()
+
+
+class StreamEventBuffer:
+    """
+    作业事件流的内存写入缓冲区。
+    事件先进入内存队列，由主事件循环上的后台任务按批次写入 Redis：
+    - 每批事件通过一次 pipeline 发送，逐事件 INCR/XADD/EXPIRE 合并为一次脚本调用
+    - Stream ID 由写入脚本在 Redis 端按 Stream 分配，多个 worker 写同一 Stream 也严格递增
+    - 入队时返回事件句柄，写入后解析为实际 Stream ID，供 offer_delete 删除事件
+    - XADD 附带近似 MAXLEN 裁剪，XDEL 与写入按入队顺序执行
+    - 队列超过水位线时丢弃 token 事件；其余事件对可等待的生产者施加背压，
+      队列满且无法等待时丢弃并计数，不会无限制地超出 max_queue_size
+    - 整批写入失败时非 token 事件按原顺序放回队首重试（有次数上限），token 事件直接丢弃
+    """
+
+    def __init__(self,
+                 redis_client,
+                 flush_interval_ms: int = 50,
+                 max_batch_size: int = 500,
+                 max_queue_size: int = 20000,
+                 token_high_watermark: float = 0.8,
+                 enqueue_timeout_s: float = 5.0,
+                 expire_seconds: int = 24 * 60 * 60,
+                 max_len: int = 0,
+                 max_retries: int = 3,
+                 max_tracked_ids: int = 50000):
+        """
+        初始化缓冲区
+        Args:
+            redis_client: redis.asyncio 客户端
+            flush_interval_ms: 后台刷新间隔（毫秒）
+            max_batch_size: 单次 pipeline 最多写入的事件数
+            max_queue_size: 队列容量，超过后生产者等待，无法等待的事件被丢弃
+            token_high_watermark: 队列占比超过该值时丢弃 token 事件
+            enqueue_timeout_s: 生产者等待队列空间的最长时间
+            expire_seconds: Stream 过期时间（秒）
+            max_len: Stream 近似长度上限，<=0 表示不裁剪
+            max_retries: 整批写入失败时非 token 事件的最多重试次数
+            max_tracked_ids: 记录 事件句柄 -> Stream ID 的条目上限
+        """
+        self.redis_client = redis_client
+        self.flush_interval_s = max(0.001, flush_interval_ms / 1000.0)
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_queue_size = max(1, max_queue_size)
+        self.token_queue_limit = max(
+            1, int(self.max_queue_size * token_high_watermark))
+        self.enqueue_timeout_s = enqueue_timeout_s
+        self.expire_seconds = expire_seconds
+        self.max_len = max_len
+        self.max_retries = max(0, max_retries)
+
+        # 队列元素: ("xadd", stream_key, fields, handle) 或
+        #          ("xdel", stream_key, None, handles)
+        self._queue: deque[tuple] = deque()
+        self._lock = threading.Lock()
+        self._next_handle = 0
+        # 事件句柄 -> 写入后由 Redis 分配的 Stream ID
+        self._stream_ids: TTLCache[str, str] = TTLCache(
+            max_tracked_ids, expire_seconds)
+        self._xadd_script = redis_client.register_script(_XADD_SCRIPT)
+        # 重试中的队列元素 -> 已失败次数，键为 (stream_key, handle)
+        self._retries: dict[tuple, int] = {}
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+        self.published = 0
+        self.failed = 0
+        self.dropped_tokens = 0
+        self.dropped_events = 0
+
+    @property
+    def running(self) -> bool:
+        """后台刷新任务是否在运行"""
+        return self._task is not None and not self._task.done()
+
+    def on_loop_thread(self) -> bool:
+        """当前是否运行在缓冲区所在的事件循环中"""
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    async def start(self):
+        """在当前事件循环上启动后台刷新任务"""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._closing = False
+        self._task = self._loop.create_task(self._run())
+        logger.info(
+            f"StreamEventBuffer 已启动: interval={self.flush_interval_s * 1000:.0f}ms, "
+            f"batch={self.max_batch_size}, queue={self.max_queue_size}")
+
+    async def close(self):
+        """停止后台任务并写出队列中剩余的事件"""
+        if self._task is None:
+            return
+        self._closing = True
+        self._wake()
+        try:
+            await self._task
+        except Exception as e:
+            logger.warning(f"StreamEventBuffer 后台任务退出异常: {e}")
+        self._task = None
+        logger.info(f"StreamEventBuffer 已关闭: {self.stats()}")
+
+    def offer(self,
+              job_id: Union[str, int],
+              event_data: dict,
+              enable_listen_logger: bool = True,
+              block: bool = False) -> Optional[str]:
+        """
+        将事件放入队列（线程安全）
+        Args:
+            job_id: 作业ID，即 Stream key
+            event_data: 事件数据，会补充 redisStreamKey/redisStreamId/timestamp
+            enable_listen_logger: 是否记录事件日志
+            block: 队列已满时是否阻塞等待（仅限不在缓冲区事件循环内的调用方）
+        Returns:
+            Optional[str]: 事件句柄，可传给 offer_delete；事件被丢弃时返回 None
+        """
+        if is_token_event(event_data):
+            if len(self._queue) >= self.token_queue_limit:
+                self.dropped_tokens += 1
+                if self.dropped_tokens % 1000 == 1:
+                    logger.warning(
+                        f"事件队列拥塞，丢弃 token 事件: job_id={job_id}, "
+                        f"累计丢弃={self.dropped_tokens}")
+                return None
+        elif len(self._queue) >= self.max_queue_size:
+            if block:
+                deadline = time.monotonic() + self.enqueue_timeout_s
+                while (len(self._queue) >= self.max_queue_size
+                       and time.monotonic() < deadline):
+                    time.sleep(self.flush_interval_s)
+            if len(self._queue) >= self.max_queue_size:
+                self.dropped_events += 1
+                logger.error(
+                    f"事件队列已满，丢弃事件: job_id={job_id}, "
+                    f"event_type={event_data.get('eventType', 'unknown')}, "
+                    f"累计丢弃={self.dropped_events}")
+                return None
+
+        return self._enqueue(str(job_id), event_data, enable_listen_logger)
+
+    async def put(self,
+                  job_id: Union[str, int],
+                  event_data: dict,
+                  enable_listen_logger: bool = True) -> Optional[str]:
+        """将事件放入队列，队列已满时异步等待空间（token 事件直接丢弃）"""
+        if not is_token_event(event_data):
+            deadline = time.monotonic() + self.enqueue_timeout_s
+            while (len(self._queue) >= self.max_queue_size
+                   and time.monotonic() < deadline):
+                await asyncio.sleep(self.flush_interval_s)
+        return self.offer(job_id, event_data, enable_listen_logger)
+
+    def offer_delete(self, job_id: Union[str, int], handles: list[str]):
+        """将 XDEL 放入队列，在此前入队的事件写入之后执行"""
+        with self._lock:
+            self._queue.append(("xdel", str(job_id), None, tuple(handles)))
+
+    def _enqueue(self, job_id_str: str, event_data: dict,
+                 enable_listen_logger: bool) -> str:
+        fields = _stamp_event(event_data, job_id_str)
+        with self._lock:
+            self._next_handle += 1
+            # 句柄不是合法的 Stream ID，误传给 XDEL 时不会删除其他事件
+            handle = f"pending:{self._next_handle}"
+            self._queue.append(("xadd", job_id_str, fields, handle))
+            queue_size = len(self._queue)
+
+        if enable_listen_logger:
+            logger.info(f"redis_event listener: {fields}")
+        if queue_size >= self.max_batch_size:
+            self._wake()
+        return handle
+
+    def _wake(self):
+        """唤醒后台任务立即刷新"""
+        if self._wakeup is None or self._loop is None:
+            return
+        if self.on_loop_thread():
+            self._wakeup.set()
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        except RuntimeError:
+            # 事件循环已关闭
+            pass
+
+    def _drain_batch(self) -> list[tuple]:
+        with self._lock:
+            size = min(len(self._queue), self.max_batch_size)
+            return [self._queue.popleft() for _ in range(size)]
+
+    def _push_front(self, items: list[tuple]):
+        """将元素按原顺序放回队首"""
+        with self._lock:
+            self._queue.extendleft(reversed(items))
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(),
+                                       timeout=self.flush_interval_s)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            while self._queue:
+                if await self._flush_batch(self._drain_batch()):
+                    continue
+                if not self._closing:
+                    # 写入失败，等到下一个刷新周期再重试
+                    break
+                await asyncio.sleep(self.flush_interval_s)
+
+            if self._closing:
+                return
+
+    async def _flush_batch(self, batch: list[tuple]) -> bool:
+        """
+        通过一次 pipeline 写入一批事件
+        XDEL 引用的事件若在同一批次中写入，其 Stream ID 尚未分配，
+        此时从该 XDEL 起的剩余元素放回队首，留到下一批。
+        Returns:
+            bool: pipeline 是否执行成功（单条命令失败不影响返回值）
+        """
+        if not batch:
+            return True
+        pipe = self.redis_client.pipeline(transaction=False)
+        ops: list[tuple[str, str, object]] = []
+        pending: set[str] = set()
+        for index, (op, stream_key, fields, ref) in enumerate(batch):
+            if op == "xdel":
+                if pending.intersection(ref):
+                    self._push_front(batch[index:])
+                    batch = batch[:index]
+                    break
+                stream_ids = list(self._stream_ids.get_many(ref).values())
+                if stream_ids:
+                    pipe.xdel(stream_key, *stream_ids)
+                    ops.append(("xdel", stream_key, ref))
+                continue
+            await self._xadd_script(keys=_xadd_keys(stream_key),
+                                    args=_xadd_args(fields, self.max_len,
+                                                    self.expire_seconds),
+                                    client=pipe)
+            ops.append(("xadd", stream_key, ref))
+            pending.add(ref)
+
+        try:
+            results = await pipe.execute(raise_on_error=False)
+        except Exception as e:
+            requeued = self._requeue_failed(batch)
+            logger.error(
+                f"事件批量写入失败: size={len(batch)}, 重新入队={requeued}, "
+                f"error_type={type(e).__name__}, error_msg={e}")
+            return False
+
+        if self._retries:
+            for _, stream_key, _, ref in batch:
+                self._retries.pop((stream_key, ref), None)
+        assigned: dict[str, str] = {}
+        for (op, stream_key, ref), result in zip(ops, results):
+            if isinstance(result, Exception):
+                if op == "xadd":
+                    self.failed += 1
+                logger.error(
+                    f"事件写入失败: job_id={stream_key}, op={op}, error_msg={result}")
+            elif op == "xadd":
+                self.published += 1
+                assigned[ref] = _decode_id(result)
+            else:
+                for handle in ref:
+                    self._stream_ids.pop(handle)
+        self._stream_ids.set_many(assigned)
+        return True
+
+    def _requeue_failed(self, batch: list[tuple]) -> int:
+        """
+        将写入失败的批次放回队首：token 事件直接丢弃，其余事件与 XDEL 按原顺序重试，
+        超过重试次数后丢弃。
+        Returns:
+            int: 重新入队的元素数
+        """
+        retry: list[tuple] = []
+        for item in batch:
+            op, stream_key, fields, ref = item
+            if op == "xadd" and _is_token_fields(fields):
+                self.failed += 1
+                continue
+            key = (stream_key, ref)
+            attempts = self._retries.get(key, 0) + 1
+            if attempts > self.max_retries:
+                self._retries.pop(key, None)
+                if op == "xadd":
+                    self.failed += 1
+                logger.error(
+                    f"事件重试次数耗尽，丢弃: job_id={stream_key}, op={op}, "
+                    f"ref={ref}")
+                continue
+            self._retries[key] = attempts
+            retry.append(item)
+
+        self._push_front(retry)
+        return len(retry)
+
+    def stats(self) -> dict:
+        """获取发布统计"""
+        return {
+            "queued": len(self._queue),
+            "published": self.published,
+            "failed": self.failed,
+            "dropped_tokens": self.dropped_tokens,
+            "dropped_events": self.dropped_events,
+        }
@@ -14,9 +14,38 @@ from doc_agent.core.logger import logger
 # --- 全局变量 ---
 # Redis 键名
 RUNNING_TASKS_KEY = "doc_agent:running_tasks"
+# 每个 worker 的任务索引：有序集合 task_id -> created_at，键名后接 worker_id
+WORKER_TASKS_KEY_PREFIX = "doc_agent:running_tasks:worker:"
+# 每个 worker 的运行任务计数：哈希 worker_id -> 任务数
+WORKER_TASK_COUNTS_KEY = "doc_agent:running_tasks:worker_counts"
 # Redis Pub/Sub 频道名
 CANCELLATION_CHANNEL = "doc_agent:cancellation_channel"
 
+# 注册：写入任务哈希，首次注册时同步更新 worker 索引与计数
+_REGISTER_SCRIPT = """
+if redis.call('HSET', KEYS[1], ARGV[1], ARGV[2]) == 1 then
+  redis.call('ZADD', KEYS[2], ARGV[4], ARGV[1])
+  redis.call('HINCRBY', KEYS[3], ARGV[3], 1)
+end
+return 1
+"""
+
+# 注销：仅当任务存在时移除索引并递减计数，计数归零时删除该 worker
+_DEREGISTER_SCRIPT = """
+if redis.call('HDEL', KEYS[1], ARGV[1]) == 0 then
+  return 0
+end
+redis.call('ZREM', KEYS[2], ARGV[1])
+if redis.call('HINCRBY', KEYS[3], ARGV[2], -1) <= 0 then
+  redis.call('HDEL', KEYS[3], ARGV[2])
+end
+return 1
+"""
+
+
+def _worker_tasks_key(worker_id: str) -> str:
+    return f"{WORKER_TASKS_KEY_PREFIX}{worker_id}"
+
 
 class TaskManager:
     """
@@ -57,15 +86,19 @@ class TaskManager:
         return cls._redis_client
 
     async def register_task(self, task_id: str):
-        """在 Redis 中注册一个新任务。"""
+        """在 Redis 中注册一个新任务，并更新所在 worker 的索引与计数。"""
         try:
             client = await self.get_redis_client()
+            created_at = time.time()
             task_data = json.dumps({
                 "worker_id": self.worker_id,
                 "status": "running",
-                "created_at": time.time()
+                "created_at": created_at
             })
-            await client.hset(RUNNING_TASKS_KEY, task_id, task_data)
+            await client.eval(_REGISTER_SCRIPT, 3, RUNNING_TASKS_KEY,
+                              _worker_tasks_key(self.worker_id),
+                              WORKER_TASK_COUNTS_KEY, task_id, task_data,
+                              self.worker_id, created_at)
             logger.success(
                 f"[TaskManager] Task {task_id} registered by worker {self.worker_id}."
             )
@@ -77,41 +110,32 @@ class TaskManager:
         """从 Redis 中移除一个已完成的任务。"""
         try:
             client = await self.get_redis_client()
-            await client.hdel(RUNNING_TASKS_KEY, task_id)
+            await client.eval(_DEREGISTER_SCRIPT, 3, RUNNING_TASKS_KEY,
+                              _worker_tasks_key(self.worker_id),
+                              WORKER_TASK_COUNTS_KEY, task_id, self.worker_id)
             logger.info(f"[TaskManager] Task {task_id} deregistered.")
         except Exception as e:
             logger.error(
                 f"[TaskManager] Failed to deregister task {task_id}: {e}")
 
     async def get_global_task_stats(self) -> dict:
-        """从 Redis 获取全局任务统计信息。"""
+        """从 Redis 获取全局任务统计信息（worker 统计基于计数索引，不逐条解析任务详情）。"""
         try:
             client = await self.get_redis_client()
-            running_tasks = await client.hgetall(RUNNING_TASKS_KEY)
-            # await client.hset(RUNNING_TASKS_KEY, task_id, task_data)
-            # running_tasks 的结构为 [{task_id: task_data}]
-
-            # 统计活跃的 worker 数量
-            active_workers = set()
-            total_tasks = len(running_tasks.keys())
-            task_detail_data = running_tasks
-
-            for task_id, task_data in running_tasks.items():
-                try:
-                    task_info = json.loads(task_data)
-                    worker_id = task_info.get("worker_id")
-                    if worker_id:
-                        active_workers.add(worker_id)
-                except (json.JSONDecodeError, KeyError) as e:
-                    logger.warning(
-                        f"[TaskManager] Failed to parse task data for {task_id}: {e}"
-                    )
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.hgetall(RUNNING_TASKS_KEY)
+                pipe.hgetall(WORKER_TASK_COUNTS_KEY)
+                task_detail_data, worker_counts = await pipe.execute()
 
             return {
                 "global_running_tasks_detail": task_detail_data,
-                "global_running_tasks": total_tasks,
-                "active_workers_count": len(active_workers),
-                "active_worker_ids": list(active_workers)
+                "global_running_tasks": len(task_detail_data),
+                "global_running_tasks_by_worker": {
+                    worker_id: int(count)
+                    for worker_id, count in worker_counts.items()
+                },
+                "active_workers_count": len(worker_counts),
+                "active_worker_ids": list(worker_counts.keys())
             }
         except Exception as e:
             logger.error(f"[TaskManager] Failed to get global task stats: {e}")
@@ -124,46 +148,29 @@ class TaskManager:
         """获取一个 task_id 在 task 所在 worker 中的排队位置"""
         try:
             client = await self.get_redis_client()
-            running_tasks = await client.hgetall(RUNNING_TASKS_KEY)
+            task_data = await client.hget(RUNNING_TASKS_KEY, task_index)
 
             # 检查任务是否存在
-            if task_index not in running_tasks:
+            if task_data is None:
                 logger.warning(f"任务 {task_index} 不在运行中的任务列表中")
                 return {"error": f"任务 {task_index} 不存在"}
 
-            worker_task_list = []
-            task_data = running_tasks[task_index]
-            task_info = json.loads(task_data)
-            task_worker_id = task_info.get("worker_id")
+            task_worker_id = json.loads(task_data).get("worker_id")
             logger.info(f"task_worker_id: {task_worker_id}")
-            worker_ids = set()
-
-            for task_id, task_data in running_tasks.items():
-                try:
-                    task_info = json.loads(task_data)
-                    worker_id = task_info.get("worker_id")
-                    worker_ids.add(worker_id)
-                    if task_worker_id == worker_id:
-                        worker_task_list.append(
-                            (task_id, task_info.get("created_at")))
-                except (json.JSONDecodeError, KeyError) as e:
-                    logger.warning(f"解析任务 {task_id} 数据失败: {e}")
-                    continue
-
-            logger.info(f"worker_task_list: {worker_task_list}")
-
-            # 按 created_at 排序后取 task_id
-            worker_task_list.sort(key=lambda x: x[1])
-            worker_task_id_list = [x[0] for x in worker_task_list]
+
+            # worker 索引按 created_at 排序，ZRANK 即为排队位置
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.zrank(_worker_tasks_key(task_worker_id), task_index)
+                pipe.hkeys(WORKER_TASK_COUNTS_KEY)
+                rank, worker_ids_list = await pipe.execute()
 
             # 检查任务是否在列表中
-            if task_index not in worker_task_id_list:
+            if rank is None:
                 logger.warning(f"任务 {task_index} 不在当前 worker 的任务列表中")
                 return {"error": f"任务 {task_index} 不在当前 worker 的任务列表中"}
 
-            task_position = worker_task_id_list.index(task_index) + 1
-            worker_ids_list = list(worker_ids)
-            logger.info(f"worker_ids: {worker_ids}")
+            task_position = rank + 1
+            logger.info(f"worker_ids: {worker_ids_list}")
             return {
                 "task_position": task_position,
                 "task_worker_id": task_worker_id,
@@ -190,23 +197,20 @@ class TaskManager:
 
     async def cleanup_tasks_by_worker(self, worker_id: str = None):
         """清理指定 worker 的任务，如果不指定则清理当前 worker 的任务"""
+        target_worker = worker_id or self.worker_id
         try:
             client = await self.get_redis_client()
-            running_tasks = await client.hgetall(RUNNING_TASKS_KEY)
+            worker_key = _worker_tasks_key(target_worker)
+            tasks_to_remove = await client.zrange(worker_key, 0, -1)
 
-            target_worker = worker_id or self.worker_id
-            tasks_to_remove = []
-
-            for task_id, task_data in running_tasks.items():
-                try:
-                    task_info = json.loads(task_data)
-                    if task_info.get("worker_id") == target_worker:
-                        tasks_to_remove.append(task_id)
-                except (json.JSONDecodeError, KeyError):
-                    continue
+            async with client.pipeline(transaction=True) as pipe:
+                if tasks_to_remove:
+                    pipe.hdel(RUNNING_TASKS_KEY, *tasks_to_remove)
+                pipe.delete(worker_key)
+                pipe.hdel(WORKER_TASK_COUNTS_KEY, target_worker)
+                await pipe.execute()
 
             if tasks_to_remove:
-                await client.hdel(RUNNING_TASKS_KEY, *tasks_to_remove)
                 logger.info(
                     f"[TaskManager] Cleaned up {len(tasks_to_remove)} tasks for worker {target_worker}"
                 )
@@ -223,24 +227,23 @@ class TaskManager:
         """清理过期任务（超过指定时间的任务）"""
         try:
             client = await self.get_redis_client()
-            running_tasks = await client.hgetall(RUNNING_TASKS_KEY)
-            current_time = time.time()
-            tasks_to_remove = []
-
-            for task_id, task_data in running_tasks.items():
-                try:
-                    task_info = json.loads(task_data)
-                    task_time = task_info.get("created_at", 0)
-                    if current_time - task_time > max_age_seconds:
-                        tasks_to_remove.append(task_id)
-                except (json.JSONDecodeError, KeyError):
-                    continue
-
-            if tasks_to_remove:
-                await client.hdel(RUNNING_TASKS_KEY, *tasks_to_remove)
+            cutoff = time.time() - max_age_seconds
+            worker_ids = await client.hkeys(WORKER_TASK_COUNTS_KEY)
+            removed_count = 0
+
+            for worker_id in worker_ids:
+                # 按 created_at 范围查询过期任务，逐个注销以保持计数一致
+                expired = await client.zrangebyscore(
+                    _worker_tasks_key(worker_id), "-inf", cutoff)
+                for task_id in expired:
+                    removed_count += await client.eval(
+                        _DEREGISTER_SCRIPT, 3, RUNNING_TASKS_KEY,
+                        _worker_tasks_key(worker_id), WORKER_TASK_COUNTS_KEY,
+                        task_id, worker_id)
+
+            if removed_count:
                 logger.info(
-                    f"[TaskManager] Cleaned up {len(tasks_to_remove)} expired tasks"
-                )
+                    f"[TaskManager] Cleaned up {removed_count} expired tasks")
             else:
                 logger.info("[TaskManager] No expired tasks found")
 
@@ -303,7 +306,12 @@ class TaskManager:
         client = await cls.get_redis_client()
         # 清理 redis 中的 RUNNING_TASKS_KEY 中的内容
         # 注意：这里会清空所有任务，在生产环境中要谨慎使用
-        await client.delete(RUNNING_TASKS_KEY)
+        worker_keys = [
+            key async for key in client.scan_iter(
+                match=f"{WORKER_TASKS_KEY_PREFIX}*")
+        ]
+        await client.delete(RUNNING_TASKS_KEY, WORKER_TASK_COUNTS_KEY,
+                            *worker_keys)
         # logger.info("[TaskManager] Cleared all running tasks from Redis")
 
     @classmethod
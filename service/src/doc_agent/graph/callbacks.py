@@ -357,6 +357,87 @@ def publish_event(job_id: str,
             exc_info=True)
 
 
+async def apublish_event(job_id: str,
+                         event_type: str,
+                         task_type: str,
+                         status: str,
+                         data: dict[str, Any] = None,
+                         task_finished: bool = False):
+    """
+    publish_event 的异步版本，供异步节点使用。
+    通过 container.async_redis_publisher 发布，不会阻塞事件循环。
+
+    Args:
+        job_id (str): 当前任务的 ID。
+        event_type (str): 事件的类型 (例如 'initial_research_start')。
+        status (str): 任务的状态 (例如 'START', 'RUNNING', 'ERROR')。
+        task_type (str): 任务的类型 (例如 'outline_generation')。
+        data (Dict[str, Any]): 要随事件发送的数据负载。
+    """
+    if data is None:
+        data = {}
+    try:
+        from doc_agent.core.container import get_container
+        publisher = get_container().async_redis_publisher
+
+        data["eventType"] = event_type
+        data["taskType"] = task_type
+        data["status"] = status
+        data["taskFinished"] = task_finished
+
+        await publisher.publish_event(job_id, data)
+        logger.info(f"✅ Event Published: [Job: {job_id}] [Type: {event_type}]")
+    except Exception as e:
+        logger.error(
+            f"❌ Failed to publish event {event_type} for job {job_id}: {e}",
+            exc_info=True)
+
+
+# 章节完成后替换该章节 token 事件的全文事件类型
+CHAPTER_CONTENT_EVENT_TYPE = "章节内容"
+
+
+def build_token_event(chunk: str, chapter_title: str,
+                      chapter_index: int) -> dict:
+    """构建 token 增量事件，按配置选择完整或紧凑格式"""
+    from doc_agent.core.config import settings
+    from doc_agent.core.redis_stream_publisher import COMPACT_TOKEN_EVENT_TYPE
+
+    if settings.redis_stream_config.compact_token_events:
+        return {
+            "eventType": COMPACT_TOKEN_EVENT_TYPE,
+            "i": chapter_index,
+            "d": chunk
+        }
+    return {
+        "eventType": "大模型实时输出",
+        "taskType": "document_generation",
+        "token": chunk,
+        "description": f"{chapter_index} {chapter_title} 正在生成中...",
+        "taskFinished": False
+    }
+
+
+def build_chapter_content_event(content: str, chapter_title: str,
+                                chapter_index: int,
+                                replaced_count: int) -> dict:
+    """构建章节全文事件，用于替换该章节已流式发布的 token 事件"""
+    return {
+        "eventType": CHAPTER_CONTENT_EVENT_TYPE,
+        "taskType": "document_generation",
+        "chapterIndex": chapter_index,
+        "chapterTitle": chapter_title,
+        "content": content,
+        "replacedEvents": replaced_count,
+        "taskFinished": False
+    }
+
+
+def _compact_chapters_enabled() -> bool:
+    from doc_agent.core.config import settings
+    return settings.redis_stream_config.compact_chapters
+
+
 class TokenStreamCallbackHandler(BaseCallbackHandler):
     """
     一个专门用于将 LLM 生成的 token 流式传输到 Redis 的回调处理器。
@@ -392,6 +473,8 @@ class TokenStreamCallbackHandler(BaseCallbackHandler):
             self._flush_interval_s = 0.08
         self._last_flush_ts = time.monotonic()
         self._buffer: list[str] = []
+        # 已发布 token 事件的 Stream ID，章节完成后用于压缩
+        self._stream_ids: list[str] = []
         super().__init__()
 
     def on_llm_new_token(self,
@@ -421,16 +504,12 @@ class TokenStreamCallbackHandler(BaseCallbackHandler):
             return
         try:
             chunk = "".join(self._buffer)
-            event_data = {
-                "eventType": "大模型实时输出",
-                "taskType": "document_generation",
-                "token": chunk,
-                "description":
-                f"{self.chapter_index} {self.chapter_title} 正在生成中...",
-                "taskFinished": False
-            }
-            self.publisher.publish_event(self.job_id, event_data,
-                                         enable_listen_logger)
+            event_data = build_token_event(chunk, self.chapter_title,
+                                           self.chapter_index)
+            stream_id = self.publisher.publish_event(self.job_id, event_data,
+                                                     enable_listen_logger)
+            if stream_id:
+                self._stream_ids.append(stream_id)
         except Exception as e:
             logger.warning(
                 f"Token streaming to Redis failed for job {self.job_id}: {e}")
@@ -439,6 +518,116 @@ class TokenStreamCallbackHandler(BaseCallbackHandler):
             import time
             self._last_flush_ts = time.monotonic()
 
+    def compact(self, content: str) -> None:
+        """
+        章节完成后发布全文事件，并删除该章节已发布的 token 事件。
+        回放事件流的消费端直接读取全文，不再逐条拼接 token。
+        """
+        if not _compact_chapters_enabled():
+            return
+        try:
+            event_data = build_chapter_content_event(content,
+                                                     self.chapter_title,
+                                                     self.chapter_index,
+                                                     len(self._stream_ids))
+            if self.publisher.publish_event(self.job_id, event_data, False):
+                self.publisher.delete_events(self.job_id, self._stream_ids)
+                self._stream_ids = []
+        except Exception as e:
+            logger.warning(f"章节事件压缩失败 for job {self.job_id}: {e}")
+
+
+class AsyncTokenStreamCallbackHandler:
+    """
+    TokenStreamCallbackHandler 的异步版本，供 async_writer_node 使用。
+    缓冲策略与同步版本一致，通过异步发布器发送，不阻塞事件循环。
+    """
+
+    def __init__(self, job_id: str, chapter_title: str, chapter_index: int):
+        """
+        初始化处理器。
+        Args:
+            job_id (str): 当前的作业 ID。
+            chapter_title (str): 正在生成内容的章节标题，用于提供上下文。
+            chapter_index (int): 章节序号。
+        """
+        from doc_agent.core.container import get_container
+        container = get_container()
+        self.publisher = container.async_redis_publisher
+        self.job_id = job_id
+        self.chapter_title = chapter_title
+        self.chapter_index = chapter_index
+        import os
+        import time
+        try:
+            self._flush_tokens = int(os.getenv("STREAM_FLUSH_TOKENS", "20"))
+            if self._flush_tokens <= 0:
+                self._flush_tokens = 20
+        except Exception:
+            self._flush_tokens = 20
+        try:
+            self._flush_interval_s = max(
+                0.01,
+                float(os.getenv("STREAM_FLUSH_INTERVAL_MS", "80")) / 1000.0)
+        except Exception:
+            self._flush_interval_s = 0.08
+        self._last_flush_ts = time.monotonic()
+        self._buffer: list[str] = []
+        self._stream_ids: list[str] = []
+
+    async def on_llm_new_token(self,
+                               token: str,
+                               enable_listen_logger=False) -> None:
+        """当 LLM 生成一个新 token 时被调用，按数量或时间间隔批量发送"""
+        if not token:
+            return
+
+        self._buffer.append(token)
+
+        import time
+        should_flush_by_count = len(self._buffer) >= self._flush_tokens
+        should_flush_by_time = (time.monotonic() -
+                                self._last_flush_ts) >= self._flush_interval_s
+
+        if should_flush_by_count or should_flush_by_time:
+            await self.flush(enable_listen_logger)
+
+    async def flush(self, enable_listen_logger=False) -> None:
+        """立即发送缓冲区内的增量文本。"""
+        if not self._buffer:
+            return
+        chunk = "".join(self._buffer)
+        self._buffer.clear()
+        import time
+        self._last_flush_ts = time.monotonic()
+        try:
+            event_data = build_token_event(chunk, self.chapter_title,
+                                           self.chapter_index)
+            stream_id = await self.publisher.publish_event(
+                self.job_id, event_data, enable_listen_logger)
+            if stream_id:
+                self._stream_ids.append(stream_id)
+        except Exception as e:
+            logger.warning(
+                f"Token streaming to Redis failed for job {self.job_id}: {e}")
+
+    async def compact(self, content: str) -> None:
+        """章节完成后发布全文事件，并删除该章节已发布的 token 事件"""
+        if not _compact_chapters_enabled():
+            return
+        try:
+            event_data = build_chapter_content_event(content,
+                                                     self.chapter_title,
+                                                     self.chapter_index,
+                                                     len(self._stream_ids))
+            if await self.publisher.publish_event(self.job_id, event_data,
+                                                  False):
+                await self.publisher.delete_events(self.job_id,
+                                                   self._stream_ids)
+                self._stream_ids = []
+        except Exception as e:
+            logger.warning(f"章节事件压缩失败 for job {self.job_id}: {e}")
+
 
 def create_redis_callback_handler(job_id: str) -> RedisCallbackHandler:
     """
@@ -1,4 +1,6 @@
 # service/src/doc_agent/graph/builder.py
+import inspect
+
 from langgraph.graph import END, StateGraph
 from doc_agent.core.logger import logger
 
@@ -14,9 +16,12 @@ def build_graph(planner_node, researcher_node, writer_node,
     workflow.add_node("planner", planner_node)
     workflow.add_node("researcher", researcher_node)
 
-    def writer_with_log(*args, **kwargs):
+    async def writer_with_log(*args, **kwargs):
         logger.info("🚩 已进入 writer 节点，准备终止流程（END）")
-        return writer_node(*args, **kwargs)
+        result = writer_node(*args, **kwargs)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
 
     workflow.add_node("writer", writer_with_log)
 
@@ -62,18 +67,12 @@ def build_chapter_workflow_graph(
     # 创建状态图
     workflow = StateGraph(ResearchState)
 
-    # 注册节点
-    workflow.add_node("planner", planner_node)
-    workflow.add_node("researcher", researcher_node)
-
-    # 注册反思节点（可选）
-    if reflection_node is not None:
-        workflow.add_node("reflector", reflection_node)
-
-    # 为 writer 节点添加日志和输出处理
-    def writer_with_log(*args, **kwargs):
+    # 为 writer 节点添加日志和输出处理，同时兼容同步与异步写作节点
+    async def writer_with_log(*args, **kwargs):
         logger.info("📝 进入章节 writer 节点，撰写当前章节内容")
         result = writer_node(*args, **kwargs)
+        if inspect.isawaitable(result):
+            result = await result
 
         # 确保 cited_sources_in_chapter 被正确传递
         if "cited_sources_in_chapter" in result:
@@ -101,6 +100,53 @@ def build_chapter_workflow_graph(
 
     workflow.add_node("writer", writer_with_log)
 
+    # 注册规划、研究、反思节点及路由
+    _add_research_nodes(workflow, planner_node, researcher_node,
+                        supervisor_router_func, reflection_node, "writer")
+
+    # writer 完成后结束
+    workflow.add_edge("writer", END)
+
+    # 编译并返回图
+    return workflow.compile()
+
+
+def build_chapter_research_graph(
+    planner_node,
+    researcher_node,
+    supervisor_router_func,
+    reflection_node=None,
+):
+    """
+    构建章节研究图
+    与章节工作流图相同，但在路由决定进入写作时结束，不包含 writer 节点。
+    用于流水线模式：先并发完成所有章节的规划与研究，再单独调度写作。
+    Args:
+        planner_node: 已绑定依赖的规划节点函数
+        researcher_node: 已绑定依赖的研究节点函数
+        supervisor_router_func: 已绑定依赖的路由决策函数
+        reflection_node: 已绑定依赖的智能查询扩展节点函数（可选）
+    Returns:
+        CompiledGraph: 编译后的章节研究图
+    """
+    workflow = StateGraph(ResearchState)
+    _add_research_nodes(workflow, planner_node, researcher_node,
+                        supervisor_router_func, reflection_node, END)
+    return workflow.compile()
+
+
+def _add_research_nodes(workflow, planner_node, researcher_node,
+                        supervisor_router_func, reflection_node,
+                        writer_target):
+    """注册 planner/researcher/reflector 节点，研究充分后路由到 writer_target"""
+    # 注册节点
+    workflow.add_node("planner", planner_node)
+    workflow.add_node("researcher", researcher_node)
+
+    # 注册反思节点（可选）
+    if reflection_node is not None:
+        workflow.add_node("reflector", reflection_node)
+
     # 设置入口点
     workflow.set_entry_point("planner")
 
@@ -112,7 +158,7 @@ def build_chapter_workflow_graph(
     if reflection_node is not None:
         # 如果有 reflection_node，使用反思流程
         workflow.add_conditional_edges("researcher", supervisor_router_func, {
-            "continue_to_writer": "writer",
+            "continue_to_writer": writer_target,
             "rerun_researcher": "reflector"
         })
         # reflector 节点无条件回到 researcher
@@ -120,12 +166,6 @@ def build_chapter_workflow_graph(
     else:
         # 如果没有 reflection_node，直接回到 researcher
         workflow.add_conditional_edges("researcher", supervisor_router_func, {
-            "continue_to_writer": "writer",
+            "continue_to_writer": writer_target,
             "rerun_researcher": "researcher"
         })
-
-    # writer 完成后结束
-    workflow.add_edge("writer", END)
-
-    # 编译并返回图
-    return workflow.compile()
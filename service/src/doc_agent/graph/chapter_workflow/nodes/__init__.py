@@ -11,12 +11,13 @@
 from .planner import planner_node
 from .reflection import reflection_node
 from .researcher import async_researcher_node, researcher_node
-from .writer import writer_node
+from .writer import async_writer_node, writer_node
 
 __all__ = [
     'planner_node',
     'researcher_node',
     'async_researcher_node',
     'writer_node',
+    'async_writer_node',
     'reflection_node',
 ]
@@ -4,8 +4,8 @@
 负责执行搜索和收集信息
 """
 
-import json
-from typing import Any
+import asyncio
+from typing import Any, Optional
 
 from doc_agent.core.logging_config import get_logger
 
@@ -19,10 +19,12 @@ from doc_agent.graph.state import ResearchState
 from doc_agent.llm_clients.providers import EmbeddingClient
 from doc_agent.tools.es_search import ESSearchTool
 from doc_agent.tools.es_service import ESSearchResult
+from doc_agent.tools.local_vector_index import get_job_vector_index
 from doc_agent.tools.reranker import RerankedSearchResult, RerankerTool
 from doc_agent.tools.web_search import WebSearchTool
+from doc_agent.utils.embedding_cache import get_embedding_cache
 from doc_agent.utils.search_utils import format_search_results, search_and_rerank
-from doc_agent.graph.callbacks import publish_event, safe_serialize
+from doc_agent.graph.callbacks import apublish_event, safe_serialize
 
 
 def researcher_node(state: ResearchState,
@@ -41,6 +43,8 @@ async def async_researcher_node(
     从状态中获取 search_queries，使用搜索工具收集相关信息
     优先使用向量检索，如果失败则回退到文本搜索
     使用重排序工具对搜索结果进行优化
+    并发模式下所有查询同时执行（受 research_config.max_concurrency 限制），
+    查询内的用户文档、ES、网络检索也并行执行；信源ID按查询顺序统一分配
 
     Args:
         state: 研究状态，包含 search_queries
@@ -82,7 +86,8 @@ async def async_researcher_node(
         try:
             embedding_client = EmbeddingClient(
                 base_url=embedding_config.url,
-                api_key=embedding_config.api_key)
+                api_key=embedding_config.api_key,
+                cache=get_embedding_cache())
             logger.info("✅ Embedding客户端初始化成功")
         except Exception as e:
             logger.warning(f"⚠️  Embedding客户端初始化失败: {str(e)}")
@@ -101,7 +106,7 @@ async def async_researcher_node(
         logger.info(f"🔧 限制搜索查询数量从 {len(search_queries)} 到 {max_queries}")
         search_queries = search_queries[:max_queries]
 
-    publish_event(
+    await apublish_event(
         job_id, "信息收集", "document_generation", "RUNNING", {
             "search_queries": search_queries,
             "description": f"开始信息收集，共需搜索{len(search_queries)}个查询"
@@ -110,291 +115,104 @@ async def async_researcher_node(
     user_style_guide_content = state.get("user_style_guide_content", [])
     user_requirements_content = state.get("user_requirements_content", [])
 
-    # 执行搜索
-    for i, query in enumerate(search_queries, 1):
-        # 生成向量
-        query_vector = await _get_embedding_vector(query, embedding_client)
-
-        logger.info(f"执行搜索查询 {i}/{len(search_queries)}: {query}")
-        # ============================
-        # 用户上传的文件搜索
-        # ============================
-        user_data_raw_results: list[RerankedSearchResult] = []
-        user_style_raw_results: list[RerankedSearchResult] = []
-        user_requirement_raw_results: list[RerankedSearchResult] = []
-        user_str_results = ""
-
-        # 检查是否有用户上传的文档
-        has_user_documents = (user_data_reference_files
-                              or user_style_guide_content
-                              or user_requirements_content)
-
-        if has_user_documents:
-            logger.info(
-                f"🔍 在用户上传文档范围内搜索，参考文档ID数量: {len(user_data_reference_files) if user_data_reference_files else 0}"
-            )
-            logger.info(
-                f"风格指南ID数量: {len(user_style_guide_content) if user_style_guide_content else 0}"
-            )
-            logger.info(
-                f"需求文档ID数量: {len(user_requirements_content) if user_requirements_content else 0}"
-            )
-
-            user_data_es_results = []
-            user_style_es_results = []
-            user_requirement_es_results = []
-            try:
-                # 在指定文档范围内执行ES搜索
-                if user_data_reference_files:
-                    logger.info(
-                        f"🔍 搜索用户参考文档，文档ID: {user_data_reference_files[:3]}...")
-                    user_data_es_results = await es_search_tool.search_within_documents(
-                        query=query,
-                        query_vector=query_vector,
-                        file_tokens=user_data_reference_files,  # 实际上是doc_id列表
-                        top_k=initial_top_k,
-                        min_score=0.0)  # 临时设置为0，确保有内容返回
-                    logger.info(
-                        f"🔍 用户参考文档搜索结果数量: {len(user_data_es_results) if user_data_es_results else 0}"
-                    )
-
-                if user_style_guide_content:
-                    logger.info(
-                        f"🔍 搜索用户风格指南，文档ID: {user_style_guide_content[:3]}...")
-                    user_style_es_results = await es_search_tool.search_within_documents(
-                        query=query,
-                        query_vector=query_vector,
-                        file_tokens=user_style_guide_content,  # 实际上是doc_id列表
-                        top_k=initial_top_k,
-                        min_score=0.0)  # 临时设置为0，确保有内容返回
-                    logger.info(
-                        f"🔍 用户风格指南搜索结果数量: {len(user_style_es_results) if user_style_es_results else 0}"
-                    )
-
-                if user_requirements_content:
-                    logger.info(
-                        f"🔍 搜索用户需求文档，文档ID: {user_requirements_content[:3]}...")
-                    user_requirement_es_results = await es_search_tool.search_within_documents(
-                        query=query,
-                        query_vector=query_vector,
-                        file_tokens=user_requirements_content,  # 实际上是doc_id列表
-                        top_k=initial_top_k,
-                        min_score=0.0)  # 临时设置为0，确保有内容返回
-                    logger.info(
-                        f"🔍 用户需求文档搜索结果数量: {len(user_requirement_es_results) if user_requirement_es_results else 0}"
-                    )
-
-                # 对用户文档搜索结果进行重排序
-                if user_data_es_results and reranker_tool:
-                    logger.info(
-                        f"🔄 对用户文档搜索结果进行重排序，原始结果数: {len(user_data_es_results)}")
-
-                    # 过滤有内容的结果
-                    valid_user_data_results = []
-                    for result in user_data_es_results:
-                        # 确保内容不为空
-                        content = result.original_content or result.div_content or ""
-                        if content.strip():  # 只添加有内容的结果
-                            valid_user_data_results.append(result)
-
-                    logger.info(
-                        f"🔄 有效用户文档搜索结果数: {len(valid_user_data_results)}")
-
-                    # 执行重排序
-                    reranked_user_results = reranker_tool.rerank_search_results(
-                        query=query,
-                        search_results=valid_user_data_results,
-                        top_k=final_top_k)
-
-                    # 重排序结果已经是RerankedSearchResult格式，直接使用
-                    user_data_raw_results.extend(reranked_user_results)
-
-                    logger.info(
-                        f"✅ 用户文档重排序完成，结果数: {len(user_data_raw_results)}")
-
-                    # style 重排序
-                    if user_style_es_results and reranker_tool:
-                        logger.info(
-                            f"🔄 对用户风格指南搜索结果进行重排序，原始结果数: {len(user_style_es_results)}"
-                        )
-
-                        # 执行重排序
-                        reranked_user_style_results = reranker_tool.rerank_search_results(
-                            query=query,
-                            search_results=user_style_es_results,
-                            top_k=final_top_k)
-
-                        # 重排序结果已经是RerankedSearchResult格式，直接使用
-                        user_style_raw_results.extend(
-                            reranked_user_style_results)
-
-                    # requirement 重排序
-                    if user_requirement_es_results and reranker_tool:
-                        logger.info(
-                            f"🔄 对用户需求搜索结果进行重排序，原始结果数: {len(user_requirement_es_results)}"
-                        )
-
-                        # 执行重排序
-                        reranked_user_requirement_results = reranker_tool.rerank_search_results(
-                            query=query,
-                            search_results=user_requirement_es_results,
-                            top_k=final_top_k)
-                        logger.info(
-                            f"用户要求内容：重排序结果: {reranked_user_requirement_results}"
-                        )
-
-                        # 重排序结果已经是RerankedSearchResult格式，直接使用
-                        user_requirement_raw_results.extend(
-                            reranked_user_requirement_results)
-                else:
-                    # 如果没有重排序工具，直接使用原始结果
-                    for result in user_data_es_results:
-                        user_data_raw_results.append(
-                            RerankedSearchResult(
-                                id=result.id,
-                                doc_id=result.doc_id,
-                                index=result.index,
-                                domain_id=result.domain_id,
-                                doc_from=result.doc_from,
-                                original_content=result.original_content
-                                or result.div_content,
-                                score=result.score,
-                                metadata={
-                                    'source': result.source,
-                                    'doc_id': result.doc_id,
-                                    'file_token': result.file_token,
-                                    'alias_name': result.alias_name
-                                }))
-
-                    # 处理用户风格指南结果
-                    for result in user_style_es_results:
-                        user_style_raw_results.append(
-                            RerankedSearchResult(
-                                id=result.id,
-                                doc_id=result.doc_id,
-                                index=result.index,
-                                domain_id=result.domain_id,
-                                doc_from=result.doc_from,
-                                original_content=result.original_content
-                                or result.div_content,
-                                score=result.score,
-                                metadata={
-                                    'source': result.source,
-                                    'doc_id': result.doc_id,
-                                    'file_token': result.file_token,
-                                    'alias_name': result.alias_name
-                                }))
-
-                    # 处理用户需求文档结果
-                    for result in user_requirement_es_results:
-                        user_requirement_raw_results.append(
-                            RerankedSearchResult(
-                                id=result.id,
-                                doc_id=result.doc_id,
-                                index=result.index,
-                                domain_id=result.domain_id,
-                                doc_from=result.doc_from,
-                                original_content=result.original_content
-                                or result.div_content,
-                                score=result.score,
-                                metadata={
-                                    'source': result.source,
-                                    'doc_id': result.doc_id,
-                                    'file_token': result.file_token,
-                                    'alias_name': result.alias_name
-                                }))
-
-                    logger.info(
-                        f"✅ 用户文档搜索完成，结果数: {len(user_data_raw_results)}")
-                    logger.info(
-                        f"✅ 用户风格指南搜索完成，结果数: {len(user_style_raw_results)}")
-                    logger.info(
-                        f"✅ 用户需求文档搜索完成，结果数: {len(user_requirement_raw_results)}"
-                    )
-
-                # 格式化用户文档搜索结果
-                user_results_combined = []
-                if user_data_raw_results:
-                    user_results_combined.extend(user_data_raw_results)
-                if user_style_raw_results:
-                    user_results_combined.extend(user_style_raw_results)
-                if user_requirement_raw_results:
-                    user_results_combined.extend(user_requirement_raw_results)
-
-                if user_results_combined:
-                    user_str_results = format_search_results(
-                        user_results_combined, query)
-                    logger.info(
-                        f"📝 用户文档搜索结果格式化完成，总结果数: {len(user_results_combined)}，格式化长度: {len(user_str_results)}"
-                    )
-                else:
-                    logger.warning("⚠️ 未找到有效的用户文档搜索结果")
-
-            except Exception as e:
-                logger.error(f"❌ 用户文档搜索失败: {str(e)}")
-                user_data_raw_results = []
-                user_str_results = ""
-
-        # ============================
-        # ES搜索
-        # ============================
-        es_raw_results: list[RerankedSearchResult] = []
-        es_str_results = ""
-        if is_es_search:
-            try:
-                if query_vector and len(query_vector) == 1536:
-                    logger.debug(
-                        f"✅ 向量维度: {len(query_vector)}，前5: {query_vector[:5]}")
-                    # 使用新的搜索和重排序功能
-                    search_query = query if query.strip() else "相关文档"
-
-                    _, reranked_es_results, formatted_es_results = await search_and_rerank(
-                        es_search_tool=es_search_tool,
-                        query=search_query,
-                        query_vector=query_vector,
-                        reranker_tool=reranker_tool,
-                        initial_top_k=initial_top_k,
-                        final_top_k=final_top_k,
-                        config={
-                            'min_score':
-                            complexity_config.get('min_score', 0.3)
-                        },
-                        index="*" if not ai_demo else "ai_demo")
-                    # 添加新的结果
-                    es_raw_results.extend(reranked_es_results)
-                    es_str_results = formatted_es_results
-                    logger.info(
-                        f"✅ 向量检索+重排序执行成功，结果长度: {len(formatted_es_results)}")
-                    logger.info(f"🔍 向量检索+重排序结果: {reranked_es_results}")
-                else:
-                    # 报错返回
-                    raise ValueError("向量维度不正确")
-            except Exception as e:
-                logger.error(f"❌ 向量检索异常: {str(e)}！ 请检查embedding客户端配置")
-                raise e
-
-        # ============================
-        # 网络搜索
-        # ============================
-        web_raw_results: list[RerankedSearchResult] = []
-        web_str_results = ""
-        if is_online:
-            try:
-                # 使用异步搜索方法
-                web_raw_results, web_str_results = await web_search_tool.search_async(
-                    query)
-                if "模拟" in web_str_results or "mock" in web_str_results.lower(
-                ):
-                    logger.info(f"网络搜索返回模拟结果，跳过: {query}")
-                    web_str_results = ""
-                    web_raw_results = []
-                if "搜索失败" in web_str_results:
-                    logger.error(f"网络搜索失败: {web_str_results}")
-                    web_str_results = ""
-                    web_raw_results = []
-            except Exception as e:
-                logger.error(f"网络搜索失败: {str(e)}")
-                web_str_results = ""
+    # 并发配置：所有查询同时执行，受单作业并发上限约束
+    research_config = settings.research_config
+    concurrent = research_config.concurrent_mode
+    max_concurrency = (max(1, research_config.max_concurrency)
+                       if concurrent else 1)
+    semaphore = asyncio.Semaphore(max_concurrency)
+    logger.info(
+        f"🔧 研究模式: {'并发' if concurrent else '串行'}，查询并发上限: {max_concurrency}")
+
+    # 所有查询的向量在一次批量请求中生成
+    query_vectors = await _get_embedding_vectors(search_queries,
+                                                 embedding_client)
+
+    # 用户文档范围检索优先使用作业级内存索引（整个作业只从ES加载一次）
+    local_scoped_results = await _search_local_index(
+        job_id=job_id,
+        queries=search_queries,
+        query_vectors=query_vectors,
+        es_search_tool=es_search_tool,
+        document_scopes={
+            "user_data": user_data_reference_files,
+            "user_style": user_style_guide_content,
+            "user_requirement": user_requirements_content
+        },
+        initial_top_k=initial_top_k)
+
+    # 所有查询的知识库检索与用户文档范围检索合并为一次 msearch 请求
+    prefetched_es_results: list[Optional[dict[str, list[ESSearchResult]]]] = [
+        None
+    ] * len(search_queries)
+    if research_config.batched_es_search:
+        # 已在本地索引完成的用户文档检索不再进入 msearch
+        use_es_scopes = local_scoped_results is None
+        prefetched_es_results = await _prefetch_es_results(
+            queries=search_queries,
+            query_vectors=query_vectors,
+            es_search_tool=es_search_tool,
+            user_data_reference_files=(user_data_reference_files
+                                       if use_es_scopes else []),
+            user_style_guide_content=(user_style_guide_content
+                                      if use_es_scopes else []),
+            user_requirements_content=(user_requirements_content
+                                       if use_es_scopes else []),
+            complexity_config=complexity_config,
+            initial_top_k=initial_top_k,
+            is_es_search=is_es_search,
+            ai_demo=ai_demo)
+    if local_scoped_results is not None:
+        prefetched_es_results = [{
+            **(prefetched or {}),
+            **scoped
+        } for prefetched, scoped in zip(prefetched_es_results,
+                                        local_scoped_results)]
+
+    async def _bounded_research(
+            i: int, query: str, query_vector: Optional[list[float]],
+            prefetched: Optional[dict[str, list[ESSearchResult]]]
+    ) -> dict[str, Any]:
+        async with semaphore:
+            logger.info(f"执行搜索查询 {i}/{len(search_queries)}: {query}")
+            return await _research_single_query(
+                query=query,
+                query_vector=query_vector,
+                prefetched=prefetched,
+                web_search_tool=web_search_tool,
+                es_search_tool=es_search_tool,
+                reranker_tool=reranker_tool,
+                user_data_reference_files=user_data_reference_files,
+                user_style_guide_content=user_style_guide_content,
+                user_requirements_content=user_requirements_content,
+                complexity_config=complexity_config,
+                initial_top_k=initial_top_k,
+                final_top_k=final_top_k,
+                is_es_search=is_es_search,
+                is_online=is_online,
+                ai_demo=ai_demo,
+                concurrent=concurrent)
+
+    # 执行搜索（结果按查询顺序返回）
+    query_results = await asyncio.gather(*[
+        _bounded_research(i, query, query_vector, prefetched)
+        for i, (query, query_vector, prefetched) in enumerate(
+            zip(search_queries, query_vectors, prefetched_es_results), 1)
+    ])
+
+    # 按查询顺序统一分配信源ID，保证编号与执行完成顺序无关
+    es_raw_results: list[RerankedSearchResult] = []
+    es_sources = []
+    web_sources = []
+    user_data_sources = []
+    user_requirement_sources = []
+    user_style_sources = []
+    for query, result in zip(search_queries, query_results):
+        es_raw_results = result["es"]
+        web_raw_results = result["web"]
+        user_data_raw_results = result["user_data"]
+        user_requirement_raw_results = result["user_requirement"]
+        user_style_raw_results = result["user_style"]
 
         # 处理ES搜索结果
         logger.info(f"🔍 ES搜索结果: {es_raw_results}")
@@ -487,19 +305,19 @@ async def async_researcher_node(
     new_retry_count = current_retry_count + 1
     logger.info(f"📊 更新重试计数器: {current_retry_count} -> {new_retry_count}")
 
-    publish_event(
-        job_id, "信息收集", "document_generation", "SUCCESS", {
-            "web_sources": [safe_serialize(source) for source in web_sources],
-            "es_sources": [safe_serialize(source) for source in es_sources],
-            "user_data_reference_sources":
-            [safe_serialize(source) for source in user_data_sources],
-            "user_requirement_sources":
-            [safe_serialize(source) for source in user_requirement_sources],
-            "user_style_guide_sources":
-            [safe_serialize(source) for source in user_style_sources],
-            "description":
-            f"信息收集完成，搜索到{len(all_sources)}个信息源，其中网络搜索结果 {len(web_sources)} 个，ES搜索结果 {len(es_sources)} 个，用户文档搜索结果 {len(user_data_sources)} 个"
-        })
+    sources_event = {
+        "web_sources": web_sources,
+        "es_sources": es_sources,
+        "user_data_reference_sources": user_data_sources,
+        "user_requirement_sources": user_requirement_sources,
+        "user_style_guide_sources": user_style_sources,
+        "description":
+        f"信息收集完成，搜索到{len(all_sources)}个信息源，其中网络搜索结果 {len(web_sources)} 个，ES搜索结果 {len(es_sources)} 个，用户文档搜索结果 {len(user_data_sources)} 个"
+    }
+    defer_source_events = state.get("defer_source_events", False)
+    if not defer_source_events:
+        await apublish_event(job_id, "信息收集", "document_generation",
+                             "SUCCESS", serialize_sources_event(sources_event))
 
     logger.info(
         f"🔍 信息收集完成，搜索到{len(all_sources)}个信息源，其中网络搜索结果 {len(web_sources)} 个，ES搜索结果 {len(es_sources)} 个，用户文档搜索结果 {len(user_data_sources)} 个"
@@ -513,7 +331,7 @@ async def async_researcher_node(
     logger.info(f"🔍 样式指南内容to state: {user_style_sources}")
     logger.info(f"🔍 参考文档内容to state: {user_data_sources}")
 
-    return {
+    result = {
         "gathered_sources": all_sources,
         "researcher_retry_count": new_retry_count,
         "user_requirement_sources": user_requirement_sources,
@@ -523,20 +341,368 @@ async def async_researcher_node(
         "is_online": is_online,
         "ai_demo": ai_demo,
     }
+    if defer_source_events:
+        # 引用编号尚未确定，由调用方平移编号后再发布信源事件
+        result["deferred_sources_event"] = sources_event
+    return result
+
+
+def serialize_sources_event(sources_event: dict[str, Any]) -> dict[str, Any]:
+    """序列化 "信息收集" SUCCESS 事件中的信源列表"""
+    return {
+        key: ([safe_serialize(source)
+               for source in value] if isinstance(value, list) else value)
+        for key, value in sources_event.items()
+    }
+
 
+async def _gather_searches(*coros, concurrent: bool = True) -> list[Any]:
+    """并发模式下同时执行各路检索，否则按顺序逐个执行"""
+    if concurrent:
+        return list(await asyncio.gather(*coros))
+    return [await coro for coro in coros]
 
-async def _get_embedding_vector(
-        query: str, embedding_client: EmbeddingClient) -> list[float]:
-    embedding_response = embedding_client.invoke(query)
-    embedding_data = json.loads(embedding_response)
-    if isinstance(embedding_data, list):
-        if len(embedding_data) > 0 and isinstance(embedding_data[0], list):
-            query_vector = embedding_data[0]
+
+async def _research_single_query(
+        query: str, query_vector: Optional[list[float]],
+        prefetched: Optional[dict[str, list[ESSearchResult]]],
+        web_search_tool: WebSearchTool, es_search_tool: ESSearchTool,
+        reranker_tool: RerankerTool, user_data_reference_files: list[str],
+        user_style_guide_content: list[str],
+        user_requirements_content: list[str], complexity_config: dict,
+        initial_top_k: int, final_top_k: int, is_es_search: bool,
+        is_online: bool, ai_demo: bool, concurrent: bool) -> dict[str, Any]:
+    """
+    执行单个查询的全部检索（用户文档、ES、网络），不分配信源ID
+    prefetched 为批量 msearch 的结果，提供时ES检索直接使用，不再单独请求
+
+    Returns:
+        dict: 各路检索的原始结果，键为 user_data/user_style/user_requirement/es/web
+    """
+    (user_data_raw_results, user_style_raw_results,
+     user_requirement_raw_results), es_raw_results, web_raw_results = (
+         await _gather_searches(
+             _search_user_documents(
+                 query=query,
+                 query_vector=query_vector,
+                 prefetched=prefetched,
+                 es_search_tool=es_search_tool,
+                 reranker_tool=reranker_tool,
+                 user_data_reference_files=user_data_reference_files,
+                 user_style_guide_content=user_style_guide_content,
+                 user_requirements_content=user_requirements_content,
+                 initial_top_k=initial_top_k,
+                 final_top_k=final_top_k,
+                 concurrent=concurrent),
+             _search_es(query=query,
+                        query_vector=query_vector,
+                        prefetched=prefetched,
+                        es_search_tool=es_search_tool,
+                        reranker_tool=reranker_tool,
+                        complexity_config=complexity_config,
+                        initial_top_k=initial_top_k,
+                        final_top_k=final_top_k,
+                        is_es_search=is_es_search,
+                        ai_demo=ai_demo),
+             _search_web(query=query,
+                         web_search_tool=web_search_tool,
+                         is_online=is_online),
+             concurrent=concurrent))
+
+    return {
+        "user_data": user_data_raw_results,
+        "user_style": user_style_raw_results,
+        "user_requirement": user_requirement_raw_results,
+        "es": es_raw_results,
+        "web": web_raw_results,
+    }
+
+
+def _to_reranked_results(
+        es_results: list[ESSearchResult]) -> list[RerankedSearchResult]:
+    """没有重排序工具时直接使用ES原始结果（与重排序结果为同一类型，无需转换）"""
+    return list(es_results)
+
+
+async def _search_user_documents(
+    query: str, query_vector: list[float],
+    prefetched: Optional[dict[str, list[ESSearchResult]]],
+    es_search_tool: ESSearchTool,
+    reranker_tool: RerankerTool, user_data_reference_files: list[str],
+    user_style_guide_content: list[str], user_requirements_content: list[str],
+    initial_top_k: int, final_top_k: int, concurrent: bool
+) -> tuple[list[RerankedSearchResult], list[RerankedSearchResult],
+           list[RerankedSearchResult]]:
+    """
+    在用户上传的文档范围内搜索
+
+    Returns:
+        tuple: (参考文档结果, 风格指南结果, 需求文档结果)
+    """
+    user_data_raw_results: list[RerankedSearchResult] = []
+    user_style_raw_results: list[RerankedSearchResult] = []
+    user_requirement_raw_results: list[RerankedSearchResult] = []
+
+    # 检查是否有用户上传的文档
+    if not (user_data_reference_files or user_style_guide_content
+            or user_requirements_content):
+        return [], [], []
+
+    logger.info(
+        f"🔍 在用户上传文档范围内搜索，参考文档ID数量: {len(user_data_reference_files) if user_data_reference_files else 0}"
+    )
+    logger.info(
+        f"风格指南ID数量: {len(user_style_guide_content) if user_style_guide_content else 0}"
+    )
+    logger.info(
+        f"需求文档ID数量: {len(user_requirements_content) if user_requirements_content else 0}"
+    )
+
+    async def _search_within(doc_ids: list[str], label: str,
+                             scope: str) -> list[ESSearchResult]:
+        if not doc_ids:
+            return []
+        if prefetched is not None and scope in prefetched:
+            return prefetched[scope]
+        logger.info(f"🔍 搜索{label}，文档ID: {doc_ids[:3]}...")
+        results = await es_search_tool.search_within_documents(
+            query=query,
+            query_vector=query_vector,
+            file_tokens=doc_ids,  # 实际上是doc_id列表
+            top_k=initial_top_k,
+            min_score=0.0)  # 临时设置为0，确保有内容返回
+        logger.info(f"🔍 {label}搜索结果数量: {len(results) if results else 0}")
+        return results
+
+    try:
+        # 在指定文档范围内执行ES搜索
+        (user_data_es_results, user_style_es_results,
+         user_requirement_es_results) = await _gather_searches(
+             _search_within(user_data_reference_files, "用户参考文档",
+                            "user_data"),
+             _search_within(user_style_guide_content, "用户风格指南",
+                            "user_style"),
+             _search_within(user_requirements_content, "用户需求文档",
+                            "user_requirement"),
+             concurrent=concurrent)
+
+        # 对用户文档搜索结果进行重排序
+        if user_data_es_results and reranker_tool:
+            logger.info(
+                f"🔄 对用户文档搜索结果进行重排序，原始结果数: {len(user_data_es_results)}")
+
+            # 过滤有内容的结果
+            valid_user_data_results = []
+            for result in user_data_es_results:
+                # 确保内容不为空
+                content = result.original_content or result.div_content or ""
+                if content.strip():  # 只添加有内容的结果
+                    valid_user_data_results.append(result)
+
+            logger.info(f"🔄 有效用户文档搜索结果数: {len(valid_user_data_results)}")
+
+            # 参考文档、风格指南、需求文档合并为一次异步重排序请求
+            (reranked_user_results, reranked_user_style_results,
+             reranked_user_requirement_results
+             ) = await reranker_tool.arerank_groups(
+                 query=query,
+                 groups=[
+                     valid_user_data_results, user_style_es_results,
+                     user_requirement_es_results
+                 ],
+                 top_k=final_top_k)
+
+            # 重排序结果已经是RerankedSearchResult格式，直接使用
+            user_data_raw_results.extend(reranked_user_results)
+            user_style_raw_results.extend(reranked_user_style_results)
+            user_requirement_raw_results.extend(
+                reranked_user_requirement_results)
+            logger.info(f"用户要求内容：重排序结果: {reranked_user_requirement_results}")
+
+            logger.info(f"✅ 用户文档重排序完成，结果数: {len(user_data_raw_results)}")
         else:
-            query_vector = embedding_data
-    elif isinstance(embedding_data, dict) and 'data' in embedding_data:
-        query_vector = embedding_data['data']
-    else:
-        logger.warning(f"⚠️  无法解析embedding响应格式: {type(embedding_data)}")
-        query_vector = None
-    return query_vector
+            # 如果没有重排序工具，直接使用原始结果
+            user_data_raw_results.extend(
+                _to_reranked_results(user_data_es_results))
+            # 处理用户风格指南结果
+            user_style_raw_results.extend(
+                _to_reranked_results(user_style_es_results))
+            # 处理用户需求文档结果
+            user_requirement_raw_results.extend(
+                _to_reranked_results(user_requirement_es_results))
+
+            logger.info(f"✅ 用户文档搜索完成，结果数: {len(user_data_raw_results)}")
+            logger.info(f"✅ 用户风格指南搜索完成，结果数: {len(user_style_raw_results)}")
+            logger.info(
+                f"✅ 用户需求文档搜索完成，结果数: {len(user_requirement_raw_results)}")
+
+        # 格式化用户文档搜索结果
+        user_results_combined = (user_data_raw_results +
+                                 user_style_raw_results +
+                                 user_requirement_raw_results)
+        if user_results_combined:
+            user_str_results = format_search_results(user_results_combined,
+                                                     query)
+            logger.info(
+                f"📝 用户文档搜索结果格式化完成，总结果数: {len(user_results_combined)}，格式化长度: {len(user_str_results)}"
+            )
+        else:
+            logger.warning("⚠️ 未找到有效的用户文档搜索结果")
+
+    except Exception as e:
+        logger.error(f"❌ 用户文档搜索失败: {str(e)}")
+        user_data_raw_results = []
+
+    return (user_data_raw_results, user_style_raw_results,
+            user_requirement_raw_results)
+
+
+async def _search_es(query: str, query_vector: list[float],
+                     prefetched: Optional[dict[str, list[ESSearchResult]]],
+                     es_search_tool: ESSearchTool,
+                     reranker_tool: RerankerTool, complexity_config: dict,
+                     initial_top_k: int, final_top_k: int, is_es_search: bool,
+                     ai_demo: bool) -> list[RerankedSearchResult]:
+    """执行知识库向量检索并重排序"""
+    es_raw_results: list[RerankedSearchResult] = []
+    if not is_es_search:
+        return es_raw_results
+    try:
+        # 向量维度由 ES 工具按发现的索引维度截断或补零，这里不再限定维度
+        if query_vector:
+            logger.debug(f"✅ 向量维度: {len(query_vector)}，前5: {query_vector[:5]}")
+            # 使用新的搜索和重排序功能
+            search_query = query if query.strip() else "相关文档"
+
+            _, reranked_es_results, formatted_es_results = await search_and_rerank(
+                es_search_tool=es_search_tool,
+                query=search_query,
+                query_vector=query_vector,
+                reranker_tool=reranker_tool,
+                initial_top_k=initial_top_k,
+                final_top_k=final_top_k,
+                config={'min_score': complexity_config.get('min_score', 0.3)},
+                index="*" if not ai_demo else "ai_demo",
+                search_results=prefetched.get("es") if prefetched else None)
+            # 添加新的结果
+            es_raw_results.extend(reranked_es_results)
+            logger.info(f"✅ 向量检索+重排序执行成功，结果长度: {len(formatted_es_results)}")
+            logger.info(f"🔍 向量检索+重排序结果: {reranked_es_results}")
+        else:
+            # 报错返回
+            raise ValueError("缺少查询向量")
+    except Exception as e:
+        logger.error(f"❌ 向量检索异常: {str(e)}！ 请检查embedding客户端配置")
+        raise e
+    return es_raw_results
+
+
+async def _prefetch_es_results(
+    queries: list[str], query_vectors: list[Optional[list[float]]],
+    es_search_tool: ESSearchTool, user_data_reference_files: list[str],
+    user_style_guide_content: list[str], user_requirements_content: list[str],
+    complexity_config: dict, initial_top_k: int, is_es_search: bool,
+    ai_demo: bool
+) -> list[Optional[dict[str, list[ESSearchResult]]]]:
+    """
+    一次 msearch 获取所有查询的知识库检索及用户文档范围检索结果
+    开启混合检索时每个子查询同时执行 KNN 与 BM25 并以 RRF 融合
+    失败时返回 None 列表，各检索分支回退为单独请求
+    """
+    hybrid_config = settings.hybrid_search_config
+    hybrid = (hybrid_config.model_dump(exclude={"enabled"})
+              if hybrid_config.enabled else None)
+    try:
+        return await es_search_tool.search_many(
+            queries=queries,
+            query_vectors=query_vectors,
+            top_k=initial_top_k,
+            min_score=complexity_config.get('min_score', 0.3),
+            index=("ai_demo" if ai_demo else "*") if is_es_search else None,
+            document_scopes={
+                "user_data": user_data_reference_files,
+                "user_style": user_style_guide_content,
+                "user_requirement": user_requirements_content
+            },
+            scoped_top_k=initial_top_k,
+            scoped_min_score=0.0,
+            hybrid=hybrid)
+    except Exception as e:
+        logger.warning(f"⚠️  批量ES检索失败，回退为逐个查询: {str(e)}")
+        return [None] * len(queries)
+
+
+async def _search_local_index(
+    job_id: str, queries: list[str],
+    query_vectors: list[Optional[list[float]]], es_search_tool: ESSearchTool,
+    document_scopes: dict[str, list[str]], initial_top_k: int
+) -> Optional[list[dict[str, list[ESSearchResult]]]]:
+    """
+    使用作业级内存向量索引完成所有查询的用户文档范围检索
+    与 ES 文档范围检索参数一致（min_score 为 0，混合检索配置相同）
+    未启用、没有用户文档或索引不可用时返回 None，由 ES 检索
+    """
+    scopes = {
+        name: doc_ids
+        for name, doc_ids in document_scopes.items() if doc_ids
+    }
+    if not scopes:
+        return None
+
+    local_index = await get_job_vector_index(
+        job_id, [doc_id for doc_ids in scopes.values() for doc_id in doc_ids],
+        es_search_tool)
+    if local_index is None:
+        return None
+
+    hybrid_config = settings.hybrid_search_config
+    hybrid = (hybrid_config.model_dump(exclude={"enabled"})
+              if hybrid_config.enabled else None)
+    logger.info(
+        f"📦 用户文档在本地索引中检索，查询数量: {len(queries)}，文档范围: {list(scopes)}")
+    return [{
+        name: local_index.search(query,
+                                 query_vector,
+                                 top_k=initial_top_k,
+                                 doc_ids=doc_ids,
+                                 min_score=0.0,
+                                 hybrid=hybrid)
+        for name, doc_ids in scopes.items()
+    } for query, query_vector in zip(queries, query_vectors)]
+
+
+async def _search_web(query: str, web_search_tool: WebSearchTool,
+                      is_online: bool) -> list:
+    """执行网络搜索，模拟结果或失败时返回空列表"""
+    if not is_online:
+        return []
+    try:
+        # 使用异步搜索方法
+        web_raw_results, web_str_results = await web_search_tool.search_async(
+            query)
+        if "模拟" in web_str_results or "mock" in web_str_results.lower():
+            logger.info(f"网络搜索返回模拟结果，跳过: {query}")
+            return []
+        if "搜索失败" in web_str_results:
+            logger.error(f"网络搜索失败: {web_str_results}")
+            return []
+        return web_raw_results
+    except Exception as e:
+        logger.error(f"网络搜索失败: {str(e)}")
+        return []
+
+
+async def _get_embedding_vectors(
+        queries: list[str],
+        embedding_client: EmbeddingClient) -> list[Optional[list[float]]]:
+    """
+    一次批量请求获取所有查询的向量
+    失败时返回与查询等长的 None 列表，由各检索分支自行处理
+    """
+    if not embedding_client:
+        return [None] * len(queries)
+    try:
+        return await embedding_client.aembed_many(queries)
+    except Exception as e:
+        logger.warning(f"⚠️  批量获取embedding失败: {str(e)}")
+        return [None] * len(queries)
@@ -9,13 +9,14 @@ from pprint import pformat as pprint
 from typing import Any
 
 from doc_agent.core.logging_config import get_logger
-from doc_agent.graph.callbacks import publish_event
+from doc_agent.graph.callbacks import apublish_event, publish_event
 
 logger = get_logger(__name__)
 
 from doc_agent.common.prompt_selector import PromptSelector
 from doc_agent.core.config import settings
-from doc_agent.graph.callbacks import TokenStreamCallbackHandler
+from doc_agent.graph.callbacks import (AsyncTokenStreamCallbackHandler,
+                                       TokenStreamCallbackHandler)
 from doc_agent.graph.common import (
     format_requirements_to_text as _format_requirements_to_text, )
 from doc_agent.graph.common import format_sources_to_text as _format_sources_to_text
@@ -46,6 +47,136 @@ def writer_node(state: ResearchState,
     Returns:
         dict: 包含当前章节内容和引用源的字典
     """
+    ctx = _prepare_writing(state, prompt_selector, genre, prompt_version)
+    job_id = ctx["job_id"]
+    chapter_title = ctx["chapter_title"]
+
+    publish_event(
+        job_id, "章节写作", "document_generation", "RUNNING", {
+            "description":
+            f"开始写作章节{ctx['current_chapter_index'] + 1}：{chapter_title}"
+        })
+
+    try:
+        # 创建流式回调处理器
+        streaming_handler = TokenStreamCallbackHandler(
+            job_id=job_id,
+            chapter_title=chapter_title,
+            chapter_index=ctx["current_chapter_index"])
+
+        logger.info(f"开始为章节 '{chapter_title}' 流式调用 LLM...")
+
+        # 使用同步流式调用 LLM
+        response_list = []
+        # 仅监听第一次流式输出
+        enable_listen_logger = True
+        for chunk in llm_client.stream(ctx["prompt"],
+                                       temperature=ctx["temperature"],
+                                       max_tokens=ctx["max_tokens"],
+                                       **ctx["extra_params"]):
+            # 累加 token 内容
+            response_list.append(chunk)
+            # 使用 TokenStreamCallbackHandler 发送每个 token
+            streaming_handler.on_llm_new_token(
+                chunk, enable_listen_logger=enable_listen_logger)
+            enable_listen_logger = False
+
+        # 在一章生成结束时额外添加一个换行符
+        streaming_handler.on_llm_new_token(
+            "\n", enable_listen_logger=enable_listen_logger)
+        logger.success(f"章节 '{chapter_title}' 内容流式生成完毕。")
+
+        # 发送剩余缓冲
+        try:
+            streaming_handler.flush()
+        except Exception:
+            pass
+
+        response = "".join(response_list)
+        # 用章节全文事件替换已发布的 token 事件
+        streaming_handler.compact(response + "\n")
+
+        return _finalize_writing(state, ctx, response)
+
+    except Exception as e:
+        # 如果LLM调用失败，返回错误信息
+        logger.error(f"Writer node error: {str(e)}")
+        return _build_error_result(state, ctx, e)
+
+
+async def async_writer_node(
+        state: ResearchState,
+        llm_client: LLMClient,
+        prompt_selector: PromptSelector,
+        genre: str = "default",
+        prompt_version: str = "v3_context_aware") -> dict[str, Any]:
+    """
+    章节写作节点的异步版本
+    使用 llm_client.astream 流式生成，并通过异步发布器批量推送 token，
+    多个章节或作业在同一 worker 上并发写作时互不阻塞事件循环
+    
+    Args:
+        state: 研究状态，包含章节信息、研究数据和已完成章节
+        llm_client: LLM客户端实例
+        prompt_selector: PromptSelector实例，用于获取prompt模板
+        genre: genre类型，默认为"default"
+        prompt_version: prompt版本，默认为"v3_context_aware"
+        
+    Returns:
+        dict: 包含当前章节内容和引用源的字典
+    """
+    ctx = _prepare_writing(state, prompt_selector, genre, prompt_version)
+    job_id = ctx["job_id"]
+    chapter_title = ctx["chapter_title"]
+
+    await apublish_event(
+        job_id, "章节写作", "document_generation", "RUNNING", {
+            "description":
+            f"开始写作章节{ctx['current_chapter_index'] + 1}：{chapter_title}"
+        })
+
+    try:
+        streaming_handler = AsyncTokenStreamCallbackHandler(
+            job_id=job_id,
+            chapter_title=chapter_title,
+            chapter_index=ctx["current_chapter_index"])
+
+        logger.info(f"开始为章节 '{chapter_title}' 异步流式调用 LLM...")
+
+        response_list = []
+        # 仅监听第一次流式输出
+        enable_listen_logger = True
+        async for chunk in llm_client.astream(ctx["prompt"],
+                                              temperature=ctx["temperature"],
+                                              max_tokens=ctx["max_tokens"],
+                                              **ctx["extra_params"]):
+            response_list.append(chunk)
+            await streaming_handler.on_llm_new_token(
+                chunk, enable_listen_logger=enable_listen_logger)
+            enable_listen_logger = False
+
+        # 在一章生成结束时额外添加一个换行符
+        await streaming_handler.on_llm_new_token(
+            "\n", enable_listen_logger=enable_listen_logger)
+        logger.success(f"章节 '{chapter_title}' 内容流式生成完毕。")
+
+        # 发送剩余缓冲
+        await streaming_handler.flush()
+
+        response = "".join(response_list)
+        # 用章节全文事件替换已发布的 token 事件
+        await streaming_handler.compact(response + "\n")
+
+        return _finalize_writing(state, ctx, response)
+
+    except Exception as e:
+        logger.error(f"Async writer node error: {str(e)}")
+        return _build_error_result(state, ctx, e)
+
+
+def _prepare_writing(state: ResearchState, prompt_selector: PromptSelector,
+                     genre: str, prompt_version: str) -> dict[str, Any]:
+    """校验章节信息并构建写作提示词，供同步与异步写作节点共用"""
     job_id = state.get("job_id")
     if not job_id:
         logger.error("Writer node: job_id not found in state.")
@@ -70,10 +201,6 @@ def writer_node(state: ResearchState,
     chapter_word_count = current_chapter.get("chapter_word_count", 0)
     sub_sections = current_chapter.get("sub_sections", [])  # 获取子节信息
 
-    publish_event(
-        job_id, "章节写作", "document_generation", "RUNNING",
-        {"description": f"开始写作章节{current_chapter_index + 1}：{chapter_title}"})
-
     if not chapter_title:
         raise ValueError("章节标题不能为空")
 
@@ -140,108 +267,64 @@ def writer_node(state: ResearchState,
 
     logger.debug(f"Invoking LLM with writer prompt:\n{pprint(prompt)}")
 
-    try:
-        # 创建流式回调处理器
-        streaming_handler = TokenStreamCallbackHandler(
-            job_id=job_id,
-            chapter_title=chapter_title,
-            chapter_index=current_chapter_index)
+    return {
+        "job_id": job_id,
+        "current_chapter_index": current_chapter_index,
+        "chapter_title": chapter_title,
+        "chapter_description": chapter_description,
+        "chapter_word_count": chapter_word_count,
+        "gathered_sources": gathered_sources,
+        "prompt": prompt,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "extra_params": extra_params,
+    }
 
-        logger.info(f"开始为章节 '{chapter_title}' 流式调用 LLM...")
 
-        # 使用同步流式调用 LLM
-        response_list = []
-        # 仅监听第一次流式输出
-        enable_listen_logger = True
-        for chunk in llm_client.stream(prompt,
-                                       temperature=temperature,
-                                       max_tokens=max_tokens,
-                                       **extra_params):
-            # 累加 token 内容
-            response_list.append(chunk)
-            # 使用 TokenStreamCallbackHandler 发送每个 token
-            streaming_handler.on_llm_new_token(
-                chunk, enable_listen_logger=enable_listen_logger)
-            enable_listen_logger = False
+def _finalize_writing(state: ResearchState, ctx: dict[str, Any],
+                      response: str) -> dict[str, Any]:
+    """处理 LLM 完整响应：标记引用源并拼接到已有文档"""
+    gathered_sources = ctx["gathered_sources"]
+    logger.info(f"chapter raw response: {response}")
+    logger.info(f"实际生成 {len(response)} 字，目标 {ctx['chapter_word_count']} 字")
 
-        # 在一章生成结束时额外添加一个换行符
-        streaming_handler.on_llm_new_token(
-            "\n", enable_listen_logger=enable_listen_logger)
-        logger.success(f"章节 '{chapter_title}' 内容流式生成完毕。")
+    # 处理引用标记
+    _update_cited_sources_inplace(response, gathered_sources)
 
-        # 发送剩余缓冲
-        try:
-            streaming_handler.flush()
-        except Exception:
-            pass
+    # 后处理
+    final_document = _response_postprocess(response)
 
-        # 使用流式生成的完整响应
-        response = "".join(response_list)
-        logger.info(f"chapter raw response: {response}")
-
-        logger.info(f"实际生成 {len(response)} 字，目标 {chapter_word_count} 字")
-        # 获取章节编号信息
-        current_chapter_index = state.get("current_chapter_index", 0)
-        chapters_to_process = state.get("chapters_to_process", [])
-        chapter_number = current_chapter_index + 1
-
-        # 确保响应格式正确
-        # if not response.strip():
-        #     response = f"## {chapter_number}. {chapter_title}\n\n无法生成章节内容。"
-        # elif not response.startswith("##"):
-        #     # 如果没有二级标题，添加章节标题
-        #     response = f"## {chapter_number}. {chapter_title}\n\n{response}"
-        # else:
-        #     # 如果已经有二级标题，确保格式正确
-        #     lines = response.split('\n')
-        #     if lines and lines[0].startswith(
-        #             '## ') and not lines[0].startswith('### '):
-        #         # 这是章节标题，确保包含编号
-        #         if not lines[0].strip().startswith(f"## {chapter_number}."):
-        #             lines[0] = f"## {chapter_number}. {chapter_title}"
-        #             response = '\n'.join(lines)
-
-        # 处理引用标记
-        # 处理引用标记
-        _update_cited_sources_inplace(response, gathered_sources)
-
-        # 后处理
-        final_document = _response_postprocess(response)
-
-        # 根据引用标记，对相关文献进行标记，并更新状态
-        cited_sources = [source for source in gathered_sources if source.cited]
-        logger.info(f"✅ 章节生成完成，引用了 {len(cited_sources)} 个信息源")
-
-        previous_document = state.get("final_document", "")
-
-        # 返回当前章节的内容和引用源
-        return {
-            "final_document": previous_document + response,
-            "cited_sources_in_chapter": cited_sources
-        }
+    # 根据引用标记，对相关文献进行标记，并更新状态
+    cited_sources = [source for source in gathered_sources if source.cited]
+    logger.info(f"✅ 章节生成完成，引用了 {len(cited_sources)} 个信息源")
 
-    except Exception as e:
-        # 如果LLM调用失败，返回错误信息
-        logger.error(f"Writer node error: {str(e)}")
-        current_chapter_index = state.get("current_chapter_index", 0)
-        chapter_number = current_chapter_index + 1
+    previous_document = state.get("final_document", "")
+
+    # 返回当前章节的内容和引用源
+    return {
+        "final_document": previous_document + response,
+        "cited_sources_in_chapter": cited_sources
+    }
 
-        error_content = f"""## {chapter_number}. {chapter_title}
+
+def _build_error_result(state: ResearchState, ctx: dict[str, Any],
+                        error: Exception) -> dict[str, Any]:
+    """LLM 调用失败时构造错误章节内容"""
+    chapter_number = state.get("current_chapter_index", 0) + 1
+
+    error_content = f"""## {chapter_number}. {ctx["chapter_title"]}
 
 ### 章节生成错误
 
 由于技术原因，无法生成本章节的内容。
 
-**错误信息:** {str(e)}
+**错误信息:** {str(error)}
 
-**章节描述:** {chapter_description}
+**章节描述:** {ctx["chapter_description"]}
 
 请检查系统配置或稍后重试。
 """
-        return {
-            "final_document": error_content,
-            "cited_sources_in_chapter": []
-        }
+    return {"final_document": error_content, "cited_sources_in_chapter": []}
 
 
 def _build_writing_context(completed_chapters: list) -> str:
@@ -260,7 +343,7 @@ def _build_writing_context(completed_chapters: list) -> str:
         if len(completed_chapters) > 1:
             earlier_summaries = []
             for chapter in completed_chapters[:-1]:  # 除了最后一章的所有章节
-                if isinstance(chapter, dict) and "summary" in chapter:
+                if isinstance(chapter, dict) and chapter.get("summary"):
                     earlier_summaries.append(chapter["summary"])
                 elif isinstance(chapter, dict) and "content" in chapter:
                     # 如果没有摘要，使用内容的前200字符作为摘要
@@ -311,52 +311,33 @@ def parse_es_search_results(es_raw_results: list[RerankedSearchResult],
 
     for index, es_raw_result in enumerate(es_raw_results):
         try:
-            # 🔧 修复：确保所有必需字段都存在
             source_id = start_id + index
-            source_type = "es_result"
-            title = es_raw_result.metadata.get(
-                'file_name', f'文档 {source_id}'
-            ) if es_raw_result.metadata else f'文档 {source_id}'
-            url = es_raw_result.metadata.get(
-                'url', '') if es_raw_result.metadata else ''
+            metadata = es_raw_result.metadata or {}
+            title = metadata.get('file_name') or f'文档 {source_id}'
             content = es_raw_result.original_content or ''
-            locations = es_raw_result.metadata.get('locations', [])
-            source = es_raw_result.doc_from
 
             # 截断内容到500字符
             if len(content) > 500:
                 content = content[:500] + "..."
 
-            # 从 metadata 中获取更多信息
-            metadata = es_raw_result.metadata or {}
-            date = metadata.get('date', '')
-            author = metadata.get('author', '')
-            file_token = metadata.get('file_token', '')
-            page_number = metadata.get('page_number')
-
-            # 保留原有的 metadata，只添加必要的字段
-            metadata = es_raw_result.metadata or {}
-            # metadata.update({
-            #     "file_name": title,
-            #     "locations": locations,
-            #     # 统一使用 doc_from 作为 source 值
-            #     "source": es_raw_result.doc_from
-            # })
-
-            source = Source(id=source_id,
-                            doc_id=es_raw_result.doc_id,
-                            doc_from=es_raw_result.doc_from,
-                            domain_id=es_raw_result.domain_id,
-                            index=es_raw_result.index,
-                            source_type=source_type,
-                            title=title,
-                            url=url,
-                            content=content,
-                            date=date,
-                            author=author,
-                            file_token=file_token,
-                            page_number=page_number,
-                            metadata=metadata)
+            # 字段均来自已解析的搜索结果，跳过逐字段校验直接构建，
+            # 再补充前端格式字段（等价于模型校验后的 after 校验器）
+            source = Source.model_construct(
+                id=source_id,
+                doc_id=es_raw_result.doc_id,
+                doc_from=es_raw_result.doc_from,
+                domain_id=es_raw_result.domain_id,
+                index=es_raw_result.index,
+                source_type="es_result",
+                title=title,
+                url=metadata.get('url', ''),
+                content=content,
+                date=metadata.get('date', ''),
+                author=metadata.get('author', ''),
+                file_token=es_raw_result.file_token
+                or metadata.get('file_token', ''),
+                page_number=metadata.get('page_number'),
+                metadata=metadata).populate_frontend_fields()
 
             sources.append(source)
             logger.debug(f"✅ 成功创建ES源: {source_id} - {title}")
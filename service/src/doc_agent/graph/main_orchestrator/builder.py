@@ -1,9 +1,20 @@
 # service/src/doc_agent/graph/main_orchestrator/builder.py
+import asyncio
+import inspect
 import pprint
+import re
+import weakref
+from typing import Optional
 
 from langgraph.graph import END, StateGraph
 
+from doc_agent.core.config import settings
 from doc_agent.core.logger import logger
+from doc_agent.graph.callbacks import (CHAPTER_CONTENT_EVENT_TYPE,
+                                       apublish_event,
+                                       build_chapter_content_event)
+from doc_agent.graph.chapter_workflow.nodes.researcher import \
+    serialize_sources_event
 from doc_agent.graph.main_orchestrator.nodes import (bibliography_node,
                                                      fusion_editor_node,
                                                      initial_research_node,
@@ -11,18 +22,145 @@ from doc_agent.graph.main_orchestrator.nodes import (bibliography_node,
                                                      split_chapters_node)
 from doc_agent.graph.state import ResearchState
 from doc_agent.llm_clients import get_llm_client
+from doc_agent.schemas import Source
+from doc_agent.tools.local_vector_index import release_job_vector_index
 
+# 持有作业级后台任务的章节处理节点，作业结束时逐个清理
+_chapter_nodes_with_tasks: "weakref.WeakSet" = weakref.WeakSet()
 
-def create_chapter_processing_node(chapter_workflow_graph):
+
+def release_chapter_tasks(job_id: str) -> None:
+    """取消并移除作业遗留的章节后台任务（预取研究、章节摘要）"""
+    for node in list(_chapter_nodes_with_tasks):
+        node.release_job(job_id)
+
+
+def create_chapter_processing_node(chapter_workflow_graph,
+                                   chapter_research_graph=None,
+                                   chapter_writer_node=None):
     """
     创建章节处理节点的工厂函数
+
+    同时提供 chapter_research_graph 与 chapter_writer_node 时，研究与写作分开执行：
+    当前章节开始写作时即在后台预取下一章节的规划与研究结果，下一次迭代直接使用。
+    预取与摘要任务按 job_id 记录，作业结束时由 release_chapter_tasks 清理。
     
     Args:
         chapter_workflow_graph: 编译后的章节工作流图
+        chapter_research_graph: 可选的章节研究图（不含 writer）
+        chapter_writer_node: 可选的已绑定依赖的写作节点函数
         
     Returns:
         章节处理节点函数
     """
+    split_research = (chapter_research_graph is not None
+                      and chapter_writer_node is not None)
+    # 按 job_id 记录预取任务: job_id -> (章节索引, asyncio.Task)
+    prefetch_tasks: dict[str, tuple[int, asyncio.Task]] = {}
+    # 按 job_id 记录后台摘要任务: job_id -> {章节索引: asyncio.Task}
+    summary_tasks: dict[str, dict[int, asyncio.Task]] = {}
+    summary_llm_client = None
+
+    def start_summary(state: ResearchState, chapter_index: int,
+                      chapter_title: str, chapter_content: str) -> None:
+        """在后台生成章节摘要，不阻塞下一章节"""
+        nonlocal summary_llm_client
+        if summary_llm_client is None:
+            summary_llm_client = get_llm_client()
+        summary_tasks.setdefault(state.get("job_id", ""), {})[
+            chapter_index] = asyncio.create_task(
+                _generate_chapter_summary(summary_llm_client, chapter_title,
+                                          chapter_content))
+
+    async def resolve_summaries(state: ResearchState, completed_chapters: list,
+                                upto: int) -> list:
+        """等待前 upto 个章节的后台摘要完成并写回章节字典"""
+        job_id = state.get("job_id", "")
+        pending = summary_tasks.get(job_id, {})
+        indexes = [i for i in sorted(pending) if i < upto]
+        if not indexes:
+            return completed_chapters
+        summaries = await asyncio.gather(*[pending.pop(i) for i in indexes])
+        if not pending:
+            summary_tasks.pop(job_id, None)
+        resolved = list(completed_chapters)
+        for index, summary in zip(indexes, summaries):
+            if index < len(resolved) and isinstance(resolved[index], dict):
+                resolved[index] = {**resolved[index], "summary": summary}
+        return resolved
+
+    def start_prefetch(state: ResearchState, chapter_index: int) -> None:
+        """
+        后台启动指定章节的研究，引用编号从 1 开始，使用时再平移。
+        起始编号取决于当前章节的引用结果，因此信源事件推迟到使用时发布。
+        """
+        if chapter_index >= len(state.get("chapters_to_process", [])):
+            return
+        chapter_input = _build_chapter_input(state, chapter_index, [], 1)
+        chapter_input["defer_source_events"] = True
+        prefetch_tasks[state.get("job_id", "")] = (
+            chapter_index,
+            asyncio.create_task(
+                chapter_research_graph.ainvoke(chapter_input)))
+        logger.info(f"🔮 已开始预取第 {chapter_index + 1} 章的研究结果")
+
+    async def take_prefetched(state: ResearchState, chapter_index: int,
+                              current_citation_index: int) -> Optional[dict]:
+        """取出指定章节的预取结果，将引用编号平移到当前起始编号后发布信源事件"""
+        job_id = state.get("job_id", "")
+        entry = prefetch_tasks.pop(job_id, None)
+        if entry is None:
+            return None
+        prefetched_index, task = entry
+        if prefetched_index != chapter_index:
+            task.cancel()
+            return None
+        try:
+            research_result = await task
+        except Exception as e:
+            logger.warning(f"⚠️  预取研究失败，重新研究当前章节: {str(e)}")
+            return None
+        offset = current_citation_index - 1
+        for source in research_result.get("gathered_sources", []):
+            source.id += offset
+        sources_event = research_result.get("deferred_sources_event")
+        if sources_event:
+            await apublish_event(job_id, "信息收集", "document_generation",
+                                 "SUCCESS",
+                                 serialize_sources_event(sources_event))
+        logger.info(f"🔮 使用第 {chapter_index + 1} 章的预取研究结果")
+        return research_result
+
+    def release_job(job_id: str) -> None:
+        """取消并移除作业的预取与摘要任务"""
+        entry = prefetch_tasks.pop(job_id, None)
+        if entry is not None:
+            entry[1].cancel()
+        for task in summary_tasks.pop(job_id, {}).values():
+            task.cancel()
+
+    async def run_research_then_write(state: ResearchState,
+                                      chapter_workflow_input: dict) -> dict:
+        """先研究（优先使用预取结果），写作开始时预取下一章节"""
+        chapter_index = chapter_workflow_input["current_chapter_index"]
+        current_citation_index = chapter_workflow_input[
+            "current_citation_index"]
+        research_result = await take_prefetched(state, chapter_index,
+                                                current_citation_index)
+        if research_result is None:
+            research_result = await chapter_research_graph.ainvoke(
+                chapter_workflow_input)
+
+        writer_state = dict(research_result)
+        writer_state["completed_chapters_content"] = chapter_workflow_input[
+            "completed_chapters_content"]
+        writer_state["current_citation_index"] = current_citation_index
+
+        start_prefetch(state, chapter_index + 1)
+        result = chapter_writer_node(writer_state)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
 
     async def chapter_processing_node(state: ResearchState) -> dict:
         """
@@ -39,8 +177,15 @@ def create_chapter_processing_node(chapter_workflow_graph):
         # 获取当前状态信息
         current_chapter_index = state.get("current_chapter_index", 0)
         chapters_to_process = state.get("chapters_to_process", [])
-        completed_chapters = state.get("completed_chapters", [])
         topic = state.get("topic", "")
+        if not state.get("job_id") and (
+                split_research
+                or settings.chapter_pipeline_config.chapter_summary):
+            raise ValueError("缺少 job_id，无法跟踪章节的预取与摘要任务")
+        # 第 k 章的写作上下文只使用第 k-2 章及更早章节的摘要，此时才等待其完成
+        completed_chapters = await resolve_summaries(
+            state, state.get("completed_chapters", []),
+            current_chapter_index - 1)
 
         # 验证索引
         if current_chapter_index >= len(chapters_to_process):
@@ -65,50 +210,9 @@ def create_chapter_processing_node(chapter_workflow_graph):
                 completed_chapters_content.append(str(chapter))
         current_citation_index = state.get('current_citation_index', 0)
 
-        chapter_workflow_input = {
-            "job_id":
-            state.get("job_id", ""),
-            "topic":
-            topic,
-            "is_online":
-            state.get("is_online", True),
-            "user_data_reference_files":
-            state.get("user_data_reference_files", []),
-            "user_style_guide_content":
-            state.get("user_style_guide_content", []),
-            "user_requirements_content":
-            state.get("user_requirements_content", []),
-            "current_chapter_index":
-            current_chapter_index,
-            "chapters_to_process":
-            chapters_to_process,
-            "completed_chapters_content":
-            completed_chapters_content,  # 关键：传递上下文
-            "search_queries": [],  # 初始化搜索查询，planner节点会生成
-            "research_plan":
-            "",  # 初始化研究计划，planner节点会生成
-            "gathered_sources": [],  # 初始化收集的源数据，researcher节点会填充
-            "gathered_data":
-            "",  # 保持向后兼容
-            "messages": [],  # 新的消息历史
-            # 传递风格指南和需求文档到章节工作流
-            "current_citation_index":
-            current_citation_index,
-            "style_guide_content":
-            state.get("style_guide_content"),
-            "requirements_content":
-            state.get("requirements_content"),
-            # 传递完整的大纲信息，包括子节结构
-            "document_outline":
-            state.get("document_outline", {}),
-            # 传递当前章节的子节信息
-            "current_chapter_sub_sections":
-            current_chapter.get("sub_sections", []) if current_chapter else [],
-            "is_es_search":
-            state.get("is_es_search", False),
-            "ai_demo":
-            state.get("ai_demo", False)
-        }
+        chapter_workflow_input = _build_chapter_input(
+            state, current_chapter_index, completed_chapters_content,
+            current_citation_index)
 
         logger.debug(
             f"Chapter workflow input state:\n{pprint.pformat(chapter_workflow_input)}"
@@ -117,8 +221,12 @@ def create_chapter_processing_node(chapter_workflow_graph):
         try:
             # 调用章节工作流
             logger.info(f"🔄 调用章节工作流处理: {chapter_title}")
-            chapter_result = await chapter_workflow_graph.ainvoke(
-                chapter_workflow_input)
+            if split_research:
+                chapter_result = await run_research_then_write(
+                    state, chapter_workflow_input)
+            else:
+                chapter_result = await chapter_workflow_graph.ainvoke(
+                    chapter_workflow_input)
 
             # 详细的调试信息
             logger.info(f"📊 章节工作流输出键: {list(chapter_result.keys())}")
@@ -166,33 +274,12 @@ def create_chapter_processing_node(chapter_workflow_graph):
                 f"📚 章节引用源数量: {len(chapter_result.get('cited_sources_in_chapter', []))}"
             )
 
-            # 生成章节摘要
-            logger.info(f"📝 开始生成章节摘要: {chapter_title}")
-            try:
-                # 获取 LLM 客户端
-                llm_client = get_llm_client()
-
-                # 创建摘要提示
-                summary_prompt = f"""请为以下章节内容生成一个简洁的摘要，控制在200字以内：
-
-章节标题：{chapter_title}
-
-章节内容：
-{chapter_content}
-
-请生成一个简洁的摘要，突出章节的主要观点和关键信息："""
-
-                # 调用 LLM 生成摘要
-                current_chapter_summary = llm_client.invoke(summary_prompt,
-                                                            temperature=0.3,
-                                                            max_tokens=300)
-
-                logger.info(
-                    f"✅ 章节摘要生成完成，长度: {len(current_chapter_summary)} 字符")
-
-            except Exception as e:
-                logger.warning(f"⚠️  章节摘要生成失败: {str(e)}")
-                current_chapter_summary = f"章节摘要生成失败: {str(e)}"
+            # 章节摘要在后台生成，需要时再等待；快速模式下跳过
+            current_chapter_summary = ""
+            if settings.chapter_pipeline_config.chapter_summary:
+                logger.info(f"📝 后台生成章节摘要: {chapter_title}")
+                start_summary(state, current_chapter_index, chapter_title,
+                              chapter_content)
 
             # 更新章节索引
             state['current_citation_index'] = max_citation_index
@@ -205,9 +292,13 @@ def create_chapter_processing_node(chapter_workflow_graph):
             }
 
             # 获取现有的已完成章节列表
-            completed_chapters = state.get("completed_chapters", [])
             updated_completed_chapters = completed_chapters.copy()
             updated_completed_chapters.append(newly_completed_chapter)
+            if current_chapter_index + 1 >= len(chapters_to_process):
+                # 最后一章完成后收齐所有摘要
+                updated_completed_chapters = await resolve_summaries(
+                    state, updated_completed_chapters,
+                    len(updated_completed_chapters))
 
             # 更新 completed_chapters_content 以保持上下文连贯性
             completed_chapters_content = state.get(
@@ -254,9 +345,12 @@ def create_chapter_processing_node(chapter_workflow_graph):
             }
 
             # 获取现有的已完成章节列表
-            completed_chapters = state.get("completed_chapters", [])
             updated_completed_chapters = completed_chapters.copy()
             updated_completed_chapters.append(failed_chapter)
+            if current_chapter_index + 1 >= len(chapters_to_process):
+                updated_completed_chapters = await resolve_summaries(
+                    state, updated_completed_chapters,
+                    len(updated_completed_chapters))
 
             # 更新 completed_chapters_content 以保持上下文连贯性（即使失败也要添加内容）
             completed_chapters_content = state.get(
@@ -277,9 +371,318 @@ def create_chapter_processing_node(chapter_workflow_graph):
                 "writer_steps": updated_writer_steps
             }
 
+    chapter_processing_node.release_job = release_job
+    _chapter_nodes_with_tasks.add(chapter_processing_node)
     return chapter_processing_node
 
 
+async def _generate_chapter_summary(llm_client, chapter_title: str,
+                                    chapter_content: str) -> str:
+    """生成章节摘要，失败时返回失败说明"""
+    summary_prompt = f"""请为以下章节内容生成一个简洁的摘要，控制在200字以内：
+
+章节标题：{chapter_title}
+
+章节内容：
+{chapter_content}
+
+请生成一个简洁的摘要，突出章节的主要观点和关键信息："""
+    try:
+        chunks = [
+            chunk async for chunk in llm_client.astream(
+                summary_prompt, temperature=0.3, max_tokens=300)
+        ]
+        summary = "".join(chunks)
+        logger.info(f"✅ 章节摘要生成完成: {chapter_title}，长度: {len(summary)} 字符")
+        return summary
+    except Exception as e:
+        logger.warning(f"⚠️  章节摘要生成失败: {str(e)}")
+        return f"章节摘要生成失败: {str(e)}"
+
+
+def _build_chapter_input(state: ResearchState, chapter_index: int,
+                         completed_chapters_content: list[str],
+                         current_citation_index: int) -> dict:
+    """构建章节子工作流的输入状态"""
+    chapters_to_process = state.get("chapters_to_process", [])
+    current_chapter = chapters_to_process[chapter_index]
+    return {
+        "job_id":
+        state.get("job_id", ""),
+        "topic":
+        state.get("topic", ""),
+        "is_online":
+        state.get("is_online", True),
+        "user_data_reference_files":
+        state.get("user_data_reference_files", []),
+        "user_style_guide_content":
+        state.get("user_style_guide_content", []),
+        "user_requirements_content":
+        state.get("user_requirements_content", []),
+        "current_chapter_index":
+        chapter_index,
+        "chapters_to_process":
+        chapters_to_process,
+        "completed_chapters_content":
+        completed_chapters_content,  # 关键：传递上下文
+        "search_queries": [],  # 初始化搜索查询，planner节点会生成
+        "research_plan":
+        "",  # 初始化研究计划，planner节点会生成
+        "gathered_sources": [],  # 初始化收集的源数据，researcher节点会填充
+        "gathered_data":
+        "",  # 保持向后兼容
+        "messages": [],  # 新的消息历史
+        # 传递风格指南和需求文档到章节工作流
+        "current_citation_index":
+        current_citation_index,
+        "style_guide_content":
+        state.get("style_guide_content"),
+        "requirements_content":
+        state.get("requirements_content"),
+        # 传递完整的大纲信息，包括子节结构
+        "document_outline":
+        state.get("document_outline", {}),
+        # 传递当前章节的子节信息
+        "current_chapter_sub_sections":
+        current_chapter.get("sub_sections", []) if current_chapter else [],
+        "is_es_search":
+        state.get("is_es_search", False),
+        "ai_demo":
+        state.get("ai_demo", False)
+    }
+
+
+def create_pipelined_chapters_node(chapter_research_graph, chapter_writer_node):
+    """
+    创建流水线章节处理节点的工厂函数
+
+    章节之间唯一的依赖是写作上下文，因此：
+    1. 所有章节的规划与研究并发执行（受 research_concurrency 限制）
+    2. 写作按 writer_parallelism 调度；并行度为 1 时按顺序写作并传递前文，
+       大于 1 时以大纲中前序章节的描述代替前文
+    3. 研究完成后按章节顺序为各章分配互不重叠的引用编号区间，再发布信源事件，
+       写作中流式输出的编号全局唯一；全部完成后按章节顺序重排为连续编号，
+       内容因此变化的章节再发布一次更正后的章节全文事件
+
+    Args:
+        chapter_research_graph: 编译后的章节研究图（不含 writer）
+        chapter_writer_node: 已绑定依赖的写作节点函数
+
+    Returns:
+        章节处理节点函数
+    """
+
+    async def pipelined_chapters_node(state: ResearchState) -> dict:
+        pipeline_config = settings.chapter_pipeline_config
+        chapters_to_process = state.get("chapters_to_process", [])
+        chapter_count = len(chapters_to_process)
+        research_semaphore = asyncio.Semaphore(
+            max(1, pipeline_config.research_concurrency))
+        writer_parallelism = max(1, pipeline_config.writer_parallelism)
+
+        logger.info(f"🚀 流水线模式处理 {chapter_count} 个章节: "
+                    f"研究并发={pipeline_config.research_concurrency}, "
+                    f"写作并行度={writer_parallelism}")
+
+        job_id = state.get("job_id", "")
+
+        async def research(index: int) -> dict:
+            async with research_semaphore:
+                chapter_input = _build_chapter_input(state, index, [], 1)
+                chapter_input["defer_source_events"] = True
+                return await chapter_research_graph.ainvoke(chapter_input)
+
+        research_results = await asyncio.gather(
+            *[research(i) for i in range(chapter_count)],
+            return_exceptions=True)
+
+        # 各章研究时编号均从 1 开始，发布信源事件前平移到互不重叠的区间
+        citation_starts = _assign_citation_ranges(research_results)
+        for research_result in research_results:
+            if isinstance(research_result, BaseException):
+                continue
+            sources_event = research_result.get("deferred_sources_event")
+            if sources_event:
+                await apublish_event(job_id, "信息收集", "document_generation",
+                                     "SUCCESS",
+                                     serialize_sources_event(sources_event))
+        logger.info("✅ 所有章节研究完成，开始写作")
+
+        async def write(index: int, previous_contents: list[str]) -> dict:
+            chapter_title = chapters_to_process[index].get("chapter_title", "")
+            research_result = research_results[index]
+            try:
+                if isinstance(research_result, BaseException):
+                    raise research_result
+                writer_state = dict(research_result)
+                writer_state["completed_chapters_content"] = previous_contents
+                writer_state["current_citation_index"] = citation_starts[index]
+                result = chapter_writer_node(writer_state)
+                if inspect.isawaitable(result):
+                    result = await result
+                content = result.get("final_document", "")
+                if not content:
+                    logger.warning("⚠️  章节工作流未返回内容，使用默认内容")
+                    content = f"## {chapter_title}\n\n章节内容生成失败。"
+                return {
+                    "title": chapter_title,
+                    "content": content,
+                    "cited_sources": result.get("cited_sources_in_chapter",
+                                                [])
+                }
+            except Exception as e:
+                logger.error(f"❌ 章节处理失败: {chapter_title}: {str(e)}")
+                return {
+                    "title": chapter_title,
+                    "content": f"## {chapter_title}\n\n章节处理失败: {str(e)}",
+                    "cited_sources": []
+                }
+
+        written: list[dict] = []
+        if writer_parallelism == 1:
+            for index in range(chapter_count):
+                written.append(await write(
+                    index, [chapter["content"] for chapter in written]))
+        else:
+            outline_contexts = [
+                _outline_chapter_context(chapter)
+                for chapter in chapters_to_process
+            ]
+            writer_semaphore = asyncio.Semaphore(writer_parallelism)
+
+            async def bounded_write(index: int) -> dict:
+                async with writer_semaphore:
+                    return await write(index, outline_contexts[:index])
+
+            written = await asyncio.gather(
+                *[bounded_write(i) for i in range(chapter_count)])
+
+        contents, cited_sources = renumber_chapter_citations(
+            [chapter["content"] for chapter in written],
+            [chapter["cited_sources"] for chapter in written])
+
+        # 已流式发布的章节内容使用重排前的编号，发布更正后的章节全文
+        for index, (chapter, content) in enumerate(zip(written, contents)):
+            if content != chapter["content"]:
+                await apublish_event(
+                    job_id, CHAPTER_CONTENT_EVENT_TYPE, "document_generation",
+                    "SUCCESS",
+                    build_chapter_content_event(content, chapter["title"],
+                                                index, 0))
+
+        completed_chapters = list(state.get("completed_chapters", []))
+        for index, (chapter, content) in enumerate(zip(written, contents)):
+            completed_chapters.append({
+                "title":
+                chapter["title"],
+                "content":
+                content,
+                "summary":
+                chapters_to_process[index].get("description", "")
+            })
+
+        logger.info(
+            f"✅ 流水线章节处理完成: {chapter_count} 章，全局引用源 {len(cited_sources)} 个")
+        return {
+            "completed_chapters": completed_chapters,
+            "completed_chapters_content":
+            [chapter["content"] for chapter in completed_chapters],
+            "current_citation_index": len(cited_sources),
+            "current_chapter_index": chapter_count,
+            "cited_sources": cited_sources,
+            "writer_steps": state.get("writer_steps", 0) + chapter_count
+        }
+
+    return pipelined_chapters_node
+
+
+def _assign_citation_ranges(research_results: list) -> list[int]:
+    """
+    按章节顺序平移各章研究结果的信源编号，使各章编号区间互不重叠
+
+    Args:
+        research_results: 各章节的研究结果（编号从 1 开始），失败的章节为异常对象
+
+    Returns:
+        list[int]: 各章节的起始引用编号
+    """
+    starts = []
+    next_id = 1
+    for result in research_results:
+        starts.append(next_id)
+        if isinstance(result, BaseException):
+            continue
+        sources = result.get("gathered_sources", [])
+        for source in sources:
+            source.id += next_id - 1
+        if sources:
+            next_id = max(source.id for source in sources) + 1
+    return starts
+
+
+def _outline_chapter_context(chapter: dict) -> str:
+    """以大纲中的章节标题、描述和子节标题作为写作上下文"""
+    parts = [f"## {chapter.get('chapter_title', '')}"]
+    if chapter.get("description"):
+        parts.append(chapter["description"])
+    for sub_section in chapter.get("sub_sections", []):
+        parts.append(f"### {sub_section.get('section_number', '')} "
+                     f"{sub_section.get('section_title', '')}")
+    return "\n".join(parts)
+
+
+_BRACKET_CITATION = re.compile(r'\[(\d+)\]')
+_SOURCE_TAG_CITATION = re.compile(r'<信息源\s*(\d+)>')
+
+
+def renumber_chapter_citations(
+        chapter_contents: list[str],
+        chapter_sources: list[list[Source]]) -> tuple[list[str], list[Source]]:
+    """
+    按章节顺序将各章的局部引用编号重排为全局编号
+
+    同一 URL 的信源在全文中只保留一个编号；文本中的 [n] 与 <信息源 n>
+    标记同步替换，未对应到引用源的数字保持不变。
+
+    Args:
+        chapter_contents: 各章节内容
+        chapter_sources: 各章节被引用的信源（重排前的编号）
+
+    Returns:
+        tuple: (重排后的章节内容, 全局引用源列表)
+    """
+    global_sources: list[Source] = []
+    url_to_id: dict[str, int] = {}
+    renumbered_contents = []
+
+    for content, sources in zip(chapter_contents, chapter_sources):
+        id_map: dict[int, int] = {}
+        for source in sorted(sources, key=lambda s: s.id):
+            if source.url and source.url in url_to_id:
+                id_map[source.id] = url_to_id[source.url]
+                continue
+            global_id = len(global_sources) + 1
+            id_map[source.id] = global_id
+            source.id = global_id
+            global_sources.append(source)
+            if source.url:
+                url_to_id[source.url] = global_id
+
+        def _replace(match, template, id_map=id_map):
+            local_id = int(match.group(1))
+            if local_id not in id_map:
+                return match.group(0)
+            return template.format(id_map[local_id])
+
+        content = _BRACKET_CITATION.sub(lambda m: _replace(m, "[{}]"),
+                                        content)
+        content = _SOURCE_TAG_CITATION.sub(
+            lambda m: _replace(m, "<信息源 {}>"), content)
+        renumbered_contents.append(content)
+
+    return renumbered_contents, global_sources
+
+
 def chapter_decision_function(state: ResearchState) -> str:
     """
     决策函数：判断是否还有章节需要处理
@@ -322,6 +725,10 @@ def finalize_document_node(state: ResearchState) -> dict:
 
     logger.info(f"\n📑 开始生成最终文档")
 
+    # 章节研究已全部完成，释放作业的用户文档内存索引与章节后台任务
+    release_job_vector_index(state.get("job_id", ""))
+    release_chapter_tasks(state.get("job_id", ""))
+
     # 获取文档标题和摘要
     doc_title = document_outline.get("title", topic)
     doc_summary = document_outline.get("summary", "")
@@ -627,7 +1034,10 @@ def build_document_graph(chapter_workflow_graph,
                          split_chapters_node,
                          fusion_editor_node=None,
                          finalize_document_node_func=None,
-                         bibliography_node_func=None):
+                         bibliography_node_func=None,
+                         chapter_research_graph=None,
+                         chapter_writer_node=None,
+                         pipelined=False):
     """
     构建文档生成图
     
@@ -639,6 +1049,10 @@ def build_document_graph(chapter_workflow_graph,
         fusion_editor_node: 可选的融合编辑器节点函数
         finalize_document_node_func: 可选的文档最终化节点函数
         bibliography_node_func: 可选的参考文献生成节点函数
+        chapter_research_graph: 可选的章节研究图，与 chapter_writer_node
+            同时提供时研究与写作分开执行（预取下一章节研究或流水线模式）
+        chapter_writer_node: 可选的已绑定依赖的写作节点函数
+        pipelined: 是否使用流水线模式一次性处理所有章节
         
     Returns:
         CompiledGraph: 编译后的文档生成图
@@ -647,8 +1061,13 @@ def build_document_graph(chapter_workflow_graph,
     workflow = StateGraph(ResearchState)
 
     # 创建章节处理节点
-    chapter_processing_node = create_chapter_processing_node(
-        chapter_workflow_graph)
+    if pipelined:
+        chapter_processing_node = create_pipelined_chapters_node(
+            chapter_research_graph, chapter_writer_node)
+    else:
+        chapter_processing_node = create_chapter_processing_node(
+            chapter_workflow_graph, chapter_research_graph,
+            chapter_writer_node)
 
     # 使用提供的或默认的节点函数
     if fusion_editor_node is None:
@@ -10,7 +10,7 @@ import re
 import tempfile
 
 from doc_agent.core.logger import logger
-from doc_agent.graph.callbacks import publish_event
+from doc_agent.graph.callbacks import apublish_event
 from doc_agent.graph.state import ResearchState
 from doc_agent.llm_clients.base import LLMClient
 from doc_agent.tools.es_search import ESSearchTool
@@ -341,7 +341,7 @@ async def outline_loader_node(state: ResearchState, llm_client: LLMClient,
             file_token = None
 
         # 10. 发布成功事件
-        publish_event(
+        await apublish_event(
             job_id,
             "大纲生成",
             "outline_loader",
@@ -366,9 +366,9 @@ async def outline_loader_node(state: ResearchState, llm_client: LLMClient,
 
     except Exception as e:
         logger.error(f"❌ 大纲加载失败: {e}", exc_info=True)
-        publish_event(job_id,
-                      "大纲加载",
-                      "outline_loader",
-                      "ERROR", {"description": f"大纲加载失败: {str(e)}"},
-                      task_finished=True)
+        await apublish_event(job_id,
+                             "大纲加载",
+                             "outline_loader",
+                             "ERROR", {"description": f"大纲加载失败: {str(e)}"},
+                             task_finished=True)
         raise
\ No newline at end of file
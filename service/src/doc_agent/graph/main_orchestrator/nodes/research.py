@@ -8,7 +8,7 @@ import json
 
 from doc_agent.core.config import settings
 from doc_agent.core.logger import logger
-from doc_agent.graph.callbacks import publish_event, safe_serialize
+from doc_agent.graph.callbacks import apublish_event, safe_serialize
 from doc_agent.graph.common import (
     parse_es_search_results,
     parse_web_search_results,
@@ -19,6 +19,7 @@ from doc_agent.llm_clients.providers import EmbeddingClient
 from doc_agent.tools.es_search import ESSearchTool
 from doc_agent.tools.reranker import RerankerTool
 from doc_agent.tools.web_search import WebSearchTool
+from doc_agent.utils.embedding_cache import get_embedding_cache
 from doc_agent.utils.search_utils import search_and_rerank
 
 
@@ -221,7 +222,7 @@ JSON 输出:
     logger.info(f"🔍 开始初始研究 (模式: {complexity_config['level']}): {task_prompt}")
 
     # Outline-1a & 1b: 开始初步调研，并包含 query
-    publish_event(job_id, "初步调研", "outline_generation", "START", {
+    await apublish_event(job_id, "初步调研", "outline_generation", "START", {
         "task_prompt": task_prompt,
         "description": "开始根据您的要求进行初步调研和信息搜索..."
     })
@@ -313,7 +314,7 @@ JSON
 
     logger.info(f"📊 配置搜索轮数: {num_queries}，实际执行: {len(initial_queries)} 轮")
 
-    publish_event(job_id, "初步调研", "outline_generation", "RUNNING", {
+    await apublish_event(job_id, "初步调研", "outline_generation", "RUNNING", {
         "queries": initial_queries,
         "description": "开始进行信息搜索..."
     })
@@ -330,14 +331,24 @@ JSON
         try:
             embedding_client = EmbeddingClient(
                 base_url=embedding_config.url,
-                api_key=embedding_config.api_key)
+                api_key=embedding_config.api_key,
+                cache=get_embedding_cache())
             logger.info("✅ Embedding客户端初始化成功")
         except Exception as e:
             logger.warning(f"⚠️  Embedding客户端初始化失败: {str(e)}")
             embedding_client = None
 
+    # 所有初始查询的向量在一次批量请求中生成
+    query_vectors = [None] * len(initial_queries)
+    if embedding_client and is_es_search:
+        try:
+            query_vectors = await embedding_client.aembed_many(initial_queries)
+        except Exception as e:
+            logger.warning(f"⚠️  批量获取embedding失败: {str(e)}")
+
     # 执行搜索
     for i, query in enumerate(initial_queries, 1):
+        query_vector = None
         logger.info(f"执行初始搜索 {i}/{len(initial_queries)}: {query}")
 
         # 网络搜索
@@ -365,20 +376,7 @@ JSON
                 if embedding_client:
                     # 尝试向量检索
                     try:
-                        embedding_response = embedding_client.invoke(query)
-                        embedding_data = json.loads(embedding_response)
-
-                        # 解析向量
-                        if isinstance(embedding_data, list):
-                            query_vector = embedding_data[0] if len(
-                                embedding_data) > 0 and isinstance(
-                                    embedding_data[0],
-                                    list) else embedding_data
-                        elif isinstance(embedding_data,
-                                        dict) and 'data' in embedding_data:
-                            query_vector = embedding_data['data']
-                        else:
-                            query_vector = None
+                        query_vector = query_vectors[i - 1]
 
                         if query_vector:
                             # 使用向量检索
@@ -442,7 +440,7 @@ JSON
 
     logger.info(f"✅ 初始研究完成，收集到 {len(all_sources)} 个信息源")
 
-    publish_event(
+    await apublish_event(
         job_id, "初步调研", "outline_generation", "SUCCESS", {
             "web_sources": [safe_serialize(source) for source in web_sources],
             "es_sources": [safe_serialize(source) for source in es_sources],
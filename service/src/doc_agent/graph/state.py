@@ -62,6 +62,8 @@ class ResearchState(TypedDict):
     user_requirement_sources: list[Source]  # 用户上传的需求源
     user_style_guide_sources: list[Source]  # 用户上传的样式指南源
     current_citation_index: int = 1  # 当前章节引用源的索引编号
+    defer_source_events: bool  # 信源事件由调用方确定引用编号后发布（预取/流水线研究）
+    deferred_sources_event: dict[str, Any]  # 推迟发布的 "信息收集" 信源事件数据
 
     # 全局引用源追踪 - 用于最终参考文献
     cited_sources: list[Source]  # 🔧 修复：改为列表以保持一致性
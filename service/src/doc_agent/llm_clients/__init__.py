@@ -104,8 +104,10 @@ def get_embedding_client() -> EmbeddingClient:
     embedding_config = settings.get_model_config("gte_qwen")
     if embedding_config:
         logger.info(f"✅ 创建Embedding客户端: {embedding_config.model_name}")
+        from doc_agent.utils.embedding_cache import get_embedding_cache
         return EmbeddingClient(base_url=embedding_config.url,
-                               api_key=embedding_config.api_key)
+                               api_key=embedding_config.api_key,
+                               cache=get_embedding_cache())
     else:
         logger.error("❌ Embedding模型配置未找到")
         raise ValueError("Embedding model not found in configuration")
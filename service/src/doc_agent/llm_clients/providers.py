@@ -4,13 +4,18 @@ import pprint
 import re
 import time
 from collections.abc import AsyncGenerator, Generator
+from typing import TYPE_CHECKING, Any, Optional
 
 import httpx
 
 from doc_agent.core.logger import logger
 from doc_agent.llm_clients.base import BaseOutputParser, LLMClient
+from doc_agent.utils.loop_local import LoopLocal
 from doc_agent.utils.timing import CodeTimer
 
+if TYPE_CHECKING:
+    from doc_agent.utils.embedding_cache import EmbeddingCache
+
 
 class ReasoningParser(BaseOutputParser):
     """
@@ -33,6 +38,51 @@ class ReasoningParser(BaseOutputParser):
             return response.strip()
 
 
+def async_client_pool(limits: httpx.Limits) -> LoopLocal[httpx.AsyncClient]:
+    """按事件循环缓存的异步连接池，循环关闭后丢弃"""
+    return LoopLocal(lambda: httpx.AsyncClient(limits=limits),
+                     is_usable=lambda client: not client.is_closed)
+
+
+class PooledHTTPMixin:
+    """
+    进程级共享HTTP连接池
+    同步客户端全进程共享一个，异步客户端按事件循环各建一个
+    """
+
+    _sync_client: Optional[httpx.Client] = None
+    _pool_limits = httpx.Limits(max_connections=100,
+                                max_keepalive_connections=20,
+                                keepalive_expiry=60.0)
+    _async_pool = async_client_pool(_pool_limits)
+
+    @classmethod
+    def _get_sync_client(cls) -> httpx.Client:
+        """获取共享的同步连接池"""
+        pool = PooledHTTPMixin
+        if pool._sync_client is None or pool._sync_client.is_closed:
+            pool._sync_client = httpx.Client(limits=cls._pool_limits)
+        return pool._sync_client
+
+    @classmethod
+    def _get_async_client(cls) -> httpx.AsyncClient:
+        """获取当前事件循环共享的异步连接池"""
+        return cls._async_pool.get()
+
+    @classmethod
+    async def aclose(cls):
+        """关闭当前事件循环的异步连接池"""
+        client = cls._async_pool.pop()
+        if client is not None:
+            await client.aclose()
+
+    @property
+    def _headers(self) -> dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self.api_key}"
+        } if self.api_key != "EMPTY" else {}
+
+
 class GeminiClient(LLMClient):
 
     def __init__(self,
@@ -542,7 +592,13 @@ class MoonshotClient(LLMClient):
             raise Exception(f"Moonshot 流式API调用失败: {str(e)}") from e
 
 
-class InternalLLMClient(LLMClient):
+class InternalLLMClient(PooledHTTPMixin, LLMClient):
+
+    # 流式生成长时间占用连接，使用独立的异步连接池，避免挤占嵌入/重排序请求
+    _pool_limits = httpx.Limits(max_connections=200,
+                                max_keepalive_connections=50,
+                                keepalive_expiry=60.0)
+    _async_pool = async_client_pool(_pool_limits)
 
     def __init__(self,
                  base_url: str,
@@ -723,66 +779,79 @@ class InternalLLMClient(LLMClient):
                 "Authorization": f"Bearer {self.api_key}"
             } if self.api_key != "EMPTY" else {}
 
-            async with httpx.AsyncClient(
-                    timeout=self.timeout) as client:  # 使用配置的timeout
-                async with client.stream("POST",
-                                         url,
-                                         json=data,
-                                         headers=headers) as response:
-                    response.raise_for_status()
+            # 复用事件循环级连接池，避免每次流式调用重新建立连接
+            client = self._get_async_client()
+            async with client.stream("POST",
+                                     url,
+                                     json=data,
+                                     headers=headers,
+                                     timeout=self.timeout) as response:
+                response.raise_for_status()
 
-                    async for line in response.aiter_lines():
-                        if line.startswith("data: "):
-                            data_str = line[6:]  # 移除 "data: " 前缀
-                            if data_str.strip() == "[DONE]":
-                                break
-                            try:
-                                chunk = json.loads(data_str)
-                                if "choices" in chunk and len(
-                                        chunk["choices"]) > 0:
-                                    delta = chunk["choices"][0].get(
-                                        "delta", {})
-                                    if "content" in delta and delta["content"]:
-                                        content = delta["content"]
-                                        # 调试：检查内容是否为 Unicode 编码
-                                        if content.startswith('\\u'):
+                async for line in response.aiter_lines():
+                    if line.startswith("data: "):
+                        data_str = line[6:]  # 移除 "data: " 前缀
+                        if data_str.strip() == "[DONE]":
+                            break
+                        try:
+                            chunk = json.loads(data_str)
+                            if "choices" in chunk and len(
+                                    chunk["choices"]) > 0:
+                                delta = chunk["choices"][0].get(
+                                    "delta", {})
+                                if "content" in delta and delta["content"]:
+                                    content = delta["content"]
+                                    # 调试：检查内容是否为 Unicode 编码
+                                    if content.startswith('\\u'):
+                                        logger.debug(
+                                            f"检测到 Unicode 编码内容: {content}")
+                                        # 尝试解码 Unicode 转义序列
+                                        try:
+                                            decoded_content = content.encode(
+                                                'utf-8').decode(
+                                                    'unicode_escape')
                                             logger.debug(
-                                                f"检测到 Unicode 编码内容: {content}")
-                                            # 尝试解码 Unicode 转义序列
-                                            try:
-                                                decoded_content = content.encode(
-                                                    'utf-8').decode(
-                                                        'unicode_escape')
-                                                logger.debug(
-                                                    f"解码后内容: {decoded_content}"
-                                                )
-                                                yield decoded_content
-                                            except Exception as e:
-                                                logger.warning(
-                                                    f"Unicode 解码失败: {e}, 使用原始内容"
-                                                )
-                                                yield content
-                                        else:
+                                                f"解码后内容: {decoded_content}"
+                                            )
+                                            yield decoded_content
+                                        except Exception as e:
+                                            logger.warning(
+                                                f"Unicode 解码失败: {e}, 使用原始内容"
+                                            )
                                             yield content
-                            except json.JSONDecodeError:
-                                continue
+                                    else:
+                                        yield content
+                        except json.JSONDecodeError:
+                            continue
 
         except Exception as e:
             logger.error(f"Internal 流式API调用失败: {str(e)}")
             raise Exception(f"Internal 流式API调用失败: {str(e)}") from e
 
 
-class RerankerClient(LLMClient):
+class RerankerClient(PooledHTTPMixin, LLMClient):
 
-    def __init__(self, base_url: str, api_key: str):
+    def __init__(self, base_url: str, api_key: str, timeout: float = 60.0):
         """
         初始化Reranker客户端
         Args:
             base_url: Reranker API地址
             api_key: API密钥
+            timeout: 请求超时时间（秒）
         """
         self.base_url = base_url.rstrip('/')
         self.api_key = api_key
+        self.timeout = timeout
+
+    def _build_request(self, prompt: str, **kwargs) -> dict[str, Any]:
+        documents = kwargs.get("documents", [])
+        doc_objs = [{"text": doc} for doc in documents]
+        size = kwargs.get("size", len(doc_objs))
+        data = {"query": prompt, "doc_list": doc_objs, "size": size}
+        logger.debug(
+            f"Reranker API request:\nURL: {self.base_url}\nData: {pprint.pformat(data)}"
+        )
+        return data
 
     def invoke(self, prompt: str, **kwargs) -> dict:
         """
@@ -794,28 +863,41 @@ class RerankerClient(LLMClient):
             dict: 重排序结果
         """
         try:
-            documents = kwargs.get("documents", [])
-            doc_objs = [{"text": doc} for doc in documents]
-            size = kwargs.get("size", len(doc_objs))
-            data = {"query": prompt, "doc_list": doc_objs, "size": size}
-            url = f"{self.base_url}"
-            headers = {
-                "Authorization": f"Bearer {self.api_key}"
-            } if self.api_key != "EMPTY" else {}
-
-            logger.debug(
-                f"Reranker API request:\nURL: {url}\nData: {pprint.pformat(data)}"
-            )
-
-            with httpx.Client(timeout=60.0) as client:
-                response = client.post(url, json=data, headers=headers)
-                response.raise_for_status()
-                result = response.json()
-                return result
+            data = self._build_request(prompt, **kwargs)
+            client = self._get_sync_client()
+            response = client.post(self.base_url,
+                                   json=data,
+                                   headers=self._headers,
+                                   timeout=self.timeout)
+            response.raise_for_status()
+            return response.json()
         except Exception as e:
             logger.error(f"Reranker API调用失败: {str(e)}")
             raise Exception(f"Reranker API调用失败: {str(e)}") from e
 
+    async def ainvoke(self, prompt: str, **kwargs) -> dict:
+        """
+        异步调用Reranker API，使用共享连接池，不阻塞事件循环
+        Args:
+            prompt: 输入提示
+            **kwargs: 其他参数，如 documents, size
+        Returns:
+            dict: 重排序结果
+        """
+        try:
+            data = self._build_request(prompt, **kwargs)
+            with CodeTimer("rerank_call <timer>"):
+                client = self._get_async_client()
+                response = await client.post(self.base_url,
+                                             json=data,
+                                             headers=self._headers,
+                                             timeout=self.timeout)
+                response.raise_for_status()
+                return response.json()
+        except Exception as e:
+            logger.error(f"Reranker API异步调用失败: {str(e)}")
+            raise Exception(f"Reranker API异步调用失败: {str(e)}") from e
+
     def stream(self, prompt: str, **kwargs) -> Generator[str, None, None]:
         """
         Reranker客户端不支持流式输出，返回空生成器
@@ -833,17 +915,118 @@ class RerankerClient(LLMClient):
         yield  # 这行永远不会执行，只是为了满足类型注解
 
 
-class EmbeddingClient(LLMClient):
+class EmbeddingClient(PooledHTTPMixin, LLMClient):
+    """
+    Embedding客户端
+    同步与异步调用均复用进程级共享的长连接池，异步接口直接返回浮点向量
+    """
 
-    def __init__(self, base_url: str, api_key: str):
+    def __init__(self,
+                 base_url: str,
+                 api_key: str,
+                 model: str = "gte-qwen",
+                 timeout: float = 60.0,
+                 cache: Optional["EmbeddingCache"] = None):
         """
         初始化Embedding客户端
         Args:
             base_url: Embedding API地址
             api_key: API密钥
+            model: 嵌入模型名称
+            timeout: 请求超时时间（秒）
+            cache: 查询向量缓存（可选），命中的文本不再请求远程服务
         """
         self.base_url = base_url.rstrip('/')
         self.api_key = api_key
+        self.model = model
+        self.timeout = timeout
+        self.cache = cache
+
+    @staticmethod
+    def _parse_vectors(result: Any, expected: int) -> list[list[float]]:
+        """
+        将API响应解析为向量列表
+        兼容 [[...], ...]、[...]（单条）以及 {"data": ...} 三种格式
+        """
+        if isinstance(result, dict) and 'data' in result:
+            result = result['data']
+            # OpenAI 格式: [{"embedding": [...]}, ...]
+            if result and isinstance(result[0], dict):
+                result = [item.get('embedding', []) for item in result]
+        if not isinstance(result, list) or not result:
+            raise ValueError(f"无法解析embedding响应格式: {type(result)}")
+        if not isinstance(result[0], list):
+            result = [result]
+        if len(result) != expected:
+            raise ValueError(
+                f"embedding响应数量不匹配: 期望 {expected}，实际 {len(result)}")
+        return [[float(x) for x in vector] for vector in result]
+
+    async def aembed_many(self, texts: list[str],
+                          **kwargs) -> list[list[float]]:
+        """
+        批量异步生成嵌入向量，所有文本在一次请求中发送
+        Args:
+            texts: 输入文本列表
+            **kwargs: 其他参数，如 model
+        Returns:
+            list[list[float]]: 与输入顺序一致的嵌入向量列表
+        """
+        if not texts:
+            return []
+        model = kwargs.get("model", self.model)
+        try:
+            vectors: list[Optional[list[float]]] = [None] * len(texts)
+            if self.cache is not None:
+                vectors = await self.cache.aget_many(model, texts)
+
+            # 只请求缓存未命中的文本（相同文本只请求一次）
+            missing_texts = list(
+                dict.fromkeys(text for text, vector in zip(texts, vectors)
+                              if vector is None))
+            if not missing_texts:
+                logger.debug(f"Embedding缓存全部命中，文本数量: {len(texts)}")
+                return vectors
+
+            data = {"inputs": missing_texts, "model": model}
+            logger.debug(
+                f"Embedding API批量请求:\nURL: {self.base_url}\n文本数量: {len(missing_texts)}/{len(texts)}"
+            )
+
+            with CodeTimer("embedding_call <timer>"):
+                client = self._get_async_client()
+                response = await client.post(self.base_url,
+                                             json=data,
+                                             headers=self._headers,
+                                             timeout=self.timeout)
+                response.raise_for_status()
+                fetched = self._parse_vectors(response.json(),
+                                              len(missing_texts))
+
+            if self.cache is not None:
+                await self.cache.aset_many(model, missing_texts, fetched)
+                logger.debug(f"Embedding缓存统计: {self.cache.stats()}")
+
+            fetched_map = dict(zip(missing_texts, fetched))
+            return [
+                vector if vector is not None else fetched_map[text]
+                for text, vector in zip(texts, vectors)
+            ]
+
+        except Exception as e:
+            logger.error(f"Embedding API批量调用失败: {str(e)}")
+            raise Exception(f"Embedding API批量调用失败: {str(e)}") from e
+
+    async def aembed(self, text: str, **kwargs) -> list[float]:
+        """
+        异步生成单条文本的嵌入向量
+        Args:
+            text: 输入文本
+        Returns:
+            list[float]: 嵌入向量
+        """
+        vectors = await self.aembed_many([text], **kwargs)
+        return vectors[0]
 
     def invoke(self, prompt: str, **kwargs) -> str:
         """
@@ -856,23 +1039,21 @@ class EmbeddingClient(LLMClient):
         """
         try:
             # 构建请求数据 - 修复字段名
-            data = {"inputs": prompt, "model": kwargs.get("model", "gte-qwen")}
+            data = {"inputs": prompt, "model": kwargs.get("model", self.model)}
 
             logger.debug(
                 f"Embedding API request:\nURL: {self.base_url}\nData: {pprint.pformat(data)}"
             )
 
             # 发送请求 - 直接使用根端点，因为测试显示它工作正常
-            url = f"{self.base_url}"
-            headers = {
-                "Authorization": f"Bearer {self.api_key}"
-            } if self.api_key != "EMPTY" else {}
-
-            with httpx.Client(timeout=60.0) as client:
-                response = client.post(url, json=data, headers=headers)
-                response.raise_for_status()
-                result = response.json()
-                return str(result)  # 返回嵌入向量
+            client = self._get_sync_client()
+            response = client.post(self.base_url,
+                                   json=data,
+                                   headers=self._headers,
+                                   timeout=self.timeout)
+            response.raise_for_status()
+            result = response.json()
+            return json.dumps(result)  # 返回嵌入向量
 
         except Exception as e:
             logger.error(f"Embedding API调用失败: {str(e)}")
@@ -26,6 +26,16 @@ async def startup_event():
     # 4. 获取当前正在运行的事件循环，并存到全局变量中
     redis_health_check.main_event_loop = asyncio.get_running_loop()
     logger.info("应用启动完成，并已捕获主事件循环。")
+    from doc_agent.core.container import get_container
+    container = get_container()
+    # 启动事件流后台批量写入任务
+    if container.stream_buffer is not None:
+        await container.stream_buffer.start()
+    # 预编译所有 genre 的图，避免首个作业承担编译耗时
+    try:
+        await asyncio.to_thread(container.warm_up_graphs)
+    except Exception as e:
+        logger.error(f"图预编译失败，将在首次使用时编译: {e}")
     logger.info("应用启动完成。")
 
 
@@ -35,6 +45,10 @@ async def shutdown_event():
     应用关闭事件处理
     """
     logger.info("应用开始关闭...")
+    from doc_agent.core.container import get_container
+    stream_buffer = get_container().stream_buffer
+    if stream_buffer is not None:
+        await stream_buffer.close()
     # 3. 在应用关闭时调用关闭函数
     await close_redis_pool()
     logger.info("应用关闭完成。")
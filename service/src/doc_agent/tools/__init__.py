@@ -4,6 +4,7 @@ from doc_agent.core.config import settings
 
 from .code_execute import CodeExecuteTool
 from .es_search import ESSearchTool
+from .knn_tuning import KnnTuner
 from .reranker import RerankerTool
 from .web_search import WebSearchTool
 
@@ -63,7 +64,8 @@ def get_es_search_tool() -> ESSearchTool:
                         password=es_config.password,
                         index_prefix=es_config.index_prefix,
                         timeout=es_config.timeout,
-                        connections_per_node=getattr(es_config, 'connections_per_node', 25))
+                        connections_per_node=getattr(es_config, 'connections_per_node', 25),
+                        knn_tuner=KnnTuner.from_config(settings.knn_tuning_config))
 
     # 注册到全局注册表
     register_es_tool(tool)
@@ -87,6 +87,8 @@ class ESDiscovery:
                     vector_config = properties['context_vector']
                     if 'dims' in vector_config:
                         self._vector_dims = vector_config['dims']
+                        # 同步到 ES 服务，KNN 查询向量按该维度截断或补零
+                        self.es_service.vector_dims = self._vector_dims
                         logger.info(f"检测到向量维度: {self._vector_dims}")
                     else:
                         logger.debug("向量配置中未找到dims字段")
@@ -97,6 +99,22 @@ class ESDiscovery:
         except Exception as e:
             logger.warning(f"检测向量维度失败: {str(e)}")
 
+    async def refresh_knn_profile(self):
+        """
+        刷新 KNN 调优所需的索引信息：各索引文档数及向量维度
+        向量维度取有效索引中文档数最多的索引的映射
+        """
+        logger.info("开始刷新KNN索引信息")
+        doc_counts = await self.es_service.get_index_doc_counts()
+        if doc_counts:
+            self.es_service.knn_tuner.update_index_sizes(doc_counts)
+
+        valid_indices = self.es_service.get_valid_indices()
+        if valid_indices:
+            largest_index = max(valid_indices,
+                                key=lambda name: doc_counts.get(name, 0))
+            await self._detect_vector_dims(largest_index)
+
     def get_best_index(self) -> Optional[str]:
         """获取最佳索引名称"""
         # if self._available_indices:
@@ -10,6 +10,7 @@ from doc_agent.core.logger import logger
 
 from .es_discovery import ESDiscovery
 from .es_service import ESSearchResult, ESService
+from .knn_tuning import KnnTuner, fit_vector_dims
 
 
 class ESSearchTool:
@@ -24,7 +25,8 @@ class ESSearchTool:
                  password: str = "",
                  index_prefix: str = "doc_gen",
                  timeout: int = 30,
-                 connections_per_node: int = 25):
+                 connections_per_node: int = 25,
+                 knn_tuner: Optional[KnnTuner] = None):
         """
         初始化Elasticsearch搜索工具
         Args:
@@ -34,6 +36,7 @@ class ESSearchTool:
             index_prefix: 索引前缀
             timeout: 超时时间
             connections_per_node: 每个节点的连接数
+            knn_tuner: KNN num_candidates 选择器（可选）
         """
         self.hosts = hosts
         self.username = username
@@ -43,7 +46,7 @@ class ESSearchTool:
 
         # 初始化底层服务
         self._es_service = ESService(hosts, username, password, timeout,
-                                     connections_per_node)
+                                     connections_per_node, knn_tuner)
         self._discovery = ESDiscovery(self._es_service)
         self._current_index = None
         self._indices_list = self._es_service.get_valid_indices()
@@ -56,6 +59,8 @@ class ESSearchTool:
         if not self._initialized:
             logger.info("开始初始化ES搜索工具")
             try:
+                # 获取索引规模与向量维度（KNN 调优）
+                await self._discovery.refresh_knn_profile()
                 # 发现可用索引
                 # 提取索引名称列表
                 self._indices_list = self._es_service.get_valid_indices()
@@ -100,15 +105,8 @@ class ESSearchTool:
             #     logger.warning("没有可用的知识库索引")
             #     return []
 
-            # 调整向量维度
-            if len(query_vector) != self._vector_dims:
-                if len(query_vector) > self._vector_dims:
-                    query_vector = query_vector[:self._vector_dims]
-                    logger.info(f"截断向量维度到 {self._vector_dims}")
-                else:
-                    query_vector.extend(
-                        [0.0] * (self._vector_dims - len(query_vector)))
-                    logger.info(f"扩展向量维度到 {self._vector_dims}")
+            # 调整向量维度（生成新向量，不修改调用方的列表）
+            query_vector = fit_vector_dims(query_vector, self._vector_dims)
 
             # # 使用第一个索引进行搜索
             # index_to_use = self._indices_list[0]
@@ -145,14 +143,19 @@ class ESSearchTool:
         """
         执行混合搜索（文本+向量）
 
+        KNN 与 BM25 子查询在一次 msearch 中发出，结果以加权 RRF 融合
+
         Args:
             query: 搜索查询字符串
             query_vector: 查询向量
             top_k: 返回结果数量
             filters: 过滤条件
+            config: 配置参数，支持 hybrid_recall_size（融合后数量）、
+                vector_recall_size / text_recall_size（各路召回数量）、
+                vector_weight / text_weight、rank_constant、min_score
 
         Returns:
-            List[ESSearchResult]: 搜索结果列表
+            List[ESSearchResult]: 搜索结果列表，score 为 RRF 融合分数
         """
         logger.info(f"开始混合搜索，查询: {query[:50]}...")
         logger.debug(f"混合搜索参数 - top_k: {top_k}")
@@ -177,25 +180,16 @@ class ESSearchTool:
                 logger.warning("没有可用的知识库索引")
                 return []
 
-            # 准备查询向量
-            if len(query_vector) != self._vector_dims:
-                if len(query_vector) > self._vector_dims:
-                    query_vector = query_vector[:self._vector_dims]
-                else:
-                    query_vector.extend(
-                        [0.0] * (self._vector_dims - len(query_vector)))
-                logger.info(f"调整向量维度到 {self._vector_dims}")
+            # 准备查询向量（生成新向量，不修改调用方的列表）
+            query_vector = fit_vector_dims(query_vector, self._vector_dims)
 
             # 使用配置参数或默认值
-            if config:
-                hybrid_recall_size = config.get('hybrid_recall_size', top_k)
-                min_score = config.get('min_score', 0.3)
-                logger.debug(
-                    f"使用配置参数 - hybrid_recall_size: {hybrid_recall_size}, min_score: {min_score}"
-                )
-            else:
-                hybrid_recall_size = top_k
-                min_score = 0.3
+            config = config or {}
+            hybrid_recall_size = config.get('hybrid_recall_size', top_k)
+            min_score = config.get('min_score', 0.3)
+            logger.debug(
+                f"使用配置参数 - hybrid_recall_size: {hybrid_recall_size}, min_score: {min_score}"
+            )
 
             # 执行混合搜索
             index_to_use = self._current_index or self._indices_list[
@@ -204,20 +198,21 @@ class ESSearchTool:
                 logger.warning("没有可用的索引")
                 return []
 
+            # KNN 与 BM25 在一次 msearch 中执行，结果按 RRF 融合；
+            # min_score 只作用于向量一路，融合分数不再与其比较
             logger.info(f"执行混合搜索，索引: {index_to_use}")
-            results = await self._es_service.search(index=index_to_use,
-                                                    query=query,
-                                                    top_k=hybrid_recall_size,
-                                                    query_vector=query_vector,
-                                                    filters=filters)
-
-            # 根据最小分数过滤结果
-            if min_score > 0:
-                original_count = len(results)
-                results = [r for r in results if r.score >= min_score]
-                logger.info(
-                    f"根据最小分数 {min_score} 过滤后，剩余 {len(results)} 个结果（原始: {original_count}）"
-                )
+            results = await self._es_service.search_hybrid(
+                index=index_to_use,
+                query=query,
+                query_vector=query_vector,
+                top_k=hybrid_recall_size,
+                filters=filters,
+                vector_top_k=config.get('vector_recall_size'),
+                text_top_k=config.get('text_recall_size'),
+                vector_weight=config.get('vector_weight', 1.0),
+                text_weight=config.get('text_weight', 1.0),
+                rank_constant=config.get('rank_constant', 60),
+                min_score=min_score)
 
             logger.info(f"混合搜索完成，返回 {len(results)} 个结果")
             return results
@@ -308,6 +303,118 @@ class ESSearchTool:
         logger.info(f"文档范围搜索完成，返回 {len(results)} 个结果")
         return results
 
+    async def load_document_chunks(
+        self,
+        doc_ids: list[str],
+        max_chunks: int = 5000
+    ) -> tuple[list[ESSearchResult], list[Optional[list[float]]]]:
+        """
+        加载指定文档的全部切片及向量，用于构建作业级内存向量索引
+
+        Args:
+            doc_ids: 文档ID列表
+            max_chunks: 最多加载的切片数量
+
+        Returns:
+            tuple: (切片结果列表, 对应的 context_vector 列表)
+        """
+        await self._ensure_initialized()
+        return await self._es_service.fetch_document_chunks(
+            doc_ids, max_chunks=max_chunks)
+
+    async def search_many(
+        self,
+        queries: list[str],
+        query_vectors: list[Optional[list[float]]],
+        top_k: int = 10,
+        min_score: float = 0.3,
+        index: Optional[str] = "*",
+        document_scopes: Optional[dict[str, list[str]]] = None,
+        scoped_top_k: Optional[int] = None,
+        scoped_min_score: float = 0.0,
+        hybrid: Optional[dict[str, Any]] = None
+    ) -> list[dict[str, list[ESSearchResult]]]:
+        """
+        批量执行多个查询的知识库检索和文档范围检索，只发起一次 msearch 请求
+
+        Args:
+            queries: 搜索查询列表
+            query_vectors: 与 queries 对应的查询向量
+            top_k: 知识库检索返回结果数量
+            min_score: 知识库检索最小相似度分数
+            index: 知识库检索索引，为 None 时不执行知识库检索
+            document_scopes: 文档范围检索，范围名称 -> 文档token列表
+                （等价于对每个范围调用 search_within_documents）
+            scoped_top_k: 文档范围检索返回结果数量，默认与 top_k 相同
+            scoped_min_score: 文档范围检索最小相似度分数
+            hybrid: 混合检索参数，提供时每个子查询同时执行 KNN 与 BM25 并以 RRF 融合，
+                支持 vector_top_k、text_top_k、vector_weight、text_weight、rank_constant；
+                最小分数只作用于向量一路
+
+        Returns:
+            list: 与 queries 顺序一致，每项为 {"es": 知识库结果, <范围名称>: 范围结果}
+        """
+        scopes = {
+            name: file_tokens
+            for name, file_tokens in (document_scopes or {}).items()
+            if file_tokens
+        }
+        scoped_top_k = scoped_top_k if scoped_top_k is not None else top_k
+        logger.info(f"开始批量检索，查询数量: {len(queries)}，文档范围: {list(scopes)}")
+
+        await self._ensure_initialized()
+
+        # 展开为 (查询序号, 结果键, 最小分数, 搜索参数)
+        planned = []
+        for i, (query, query_vector) in enumerate(zip(queries,
+                                                      query_vectors)):
+            if query_vector:
+                query_vector = fit_vector_dims(query_vector, self._vector_dims)
+            if index is not None:
+                planned.append((i, "es", min_score, {
+                    "index": index,
+                    "query": query,
+                    "top_k": top_k,
+                    "query_vector": query_vector
+                }))
+            for name, file_tokens in scopes.items():
+                planned.append((i, name, scoped_min_score, {
+                    "index": "personal_knowledge_base",
+                    "query": query,
+                    "top_k": scoped_top_k,
+                    "query_vector": query_vector,
+                    "filters": {
+                        "doc_id": file_tokens
+                    }
+                }))
+
+        if hybrid is not None:
+            planned = [(i, key, 0.0, {
+                **search, "hybrid": True,
+                "min_score": threshold,
+                **hybrid
+            }) for i, key, threshold, search in planned]
+
+        grouped: list[dict[str, list[ESSearchResult]]] = [{
+            **({
+                "es": []
+            } if index is not None else {}),
+            **{name: []
+               for name in scopes}
+        } for _ in queries]
+        if not planned:
+            return grouped
+
+        responses = await self._es_service.search_many(
+            [search for _, _, _, search in planned])
+        for (i, key, threshold, _), results in zip(planned, responses):
+            if threshold > 0:
+                results = [r for r in results if r.score >= threshold]
+            grouped[i][key] = results
+
+        logger.info(f"批量检索完成，共 {len(planned)} 个子查询")
+        return grouped
+
     async def get_available_indices(self) -> list[str]:
         """获取可用索引列表"""
         await self._ensure_initialized()
@@ -5,35 +5,121 @@ Elasticsearch 底层服务模块
 
 import asyncio
 import time
-from dataclasses import dataclass
 from typing import Any, Optional
 
 from elasticsearch import AsyncElasticsearch
 
 from doc_agent.core.logger import logger
-from doc_agent.utils.meta_api import update_doc_meta_data
+from doc_agent.utils.meta_api import aupdate_doc_meta_data
 from doc_agent.utils.timing import CodeTimer
 
+from .knn_tuning import KnnTuner, fit_vector_dims
+
 
-@dataclass
 class ESSearchResult:
-    """ES搜索结果"""
-    id: str
-    doc_id: str  # file_token
-    index: str  # 索引
-    domain_id: str  # index 映射之后的 domain_id
-    doc_from: str  # 来源 self/data_platform （用户上传为 self， 其他为 data_platform）
-    file_token: str  # file_token (大概率没有值)
-    original_content: str  # 原始内容
-    div_content: str = ""  # 切分后的内容
-    source: str = ""
-    score: float = 0.0
-    metadata: dict[str, Any] = None
-    alias_name: str = ""  # 来源索引别名
-
-    def __post_init__(self):
-        if self.metadata is None:
-            self.metadata = {}
+    """
+    ES搜索结果
+
+    使用 __slots__ 的紧凑结构，从 ES 响应解析后直接在重排序、信源构建中复用；
+    重排序通过 with_rerank_score 生成浅拷贝，不修改可能被缓存复用的原对象
+    """
+    __slots__ = ("id", "doc_id", "index", "domain_id", "doc_from",
+                 "file_token", "original_content", "div_content", "source",
+                 "score", "rerank_score", "metadata", "alias_name")
+
+    def __init__(self,
+                 id: str,
+                 doc_id: str = "",
+                 index: str = "",
+                 domain_id: str = "",
+                 doc_from: str = "",
+                 file_token: str = "",
+                 original_content: str = "",
+                 div_content: str = "",
+                 source: str = "",
+                 score: float = 0.0,
+                 rerank_score: float = 0.0,
+                 metadata: Optional[dict[str, Any]] = None,
+                 alias_name: str = ""):
+        self.id = id
+        self.doc_id = doc_id  # file_token
+        self.index = index  # 索引
+        self.domain_id = domain_id  # index 映射之后的 domain_id
+        self.doc_from = doc_from  # 来源 self/data_platform （用户上传为 self， 其他为 data_platform）
+        self.file_token = file_token  # file_token (大概率没有值)
+        self.original_content = original_content  # 原始内容
+        self.div_content = div_content  # 切分后的内容
+        self.source = source
+        self.score = score
+        self.rerank_score = rerank_score  # 重排序评分
+        self.metadata = metadata if metadata is not None else {}
+        self.alias_name = alias_name  # 来源索引别名
+
+    def with_rerank_score(self, rerank_score: float) -> "ESSearchResult":
+        """返回写入重排序评分的浅拷贝（metadata 与原对象共享）"""
+        result = object.__new__(type(self))
+        for name in self.__slots__:
+            setattr(result, name, getattr(self, name))
+        result.rerank_score = rerank_score
+        return result
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}"
+                           for name in self.__slots__)
+        return f"ESSearchResult({fields})"
+
+
+# 解析搜索结果实际使用的 _source 字段（content 为大字段，向量检索不返回）
+ES_SOURCE_FIELDS = [
+    "doc_id", "file_token", "content_view", "text", "title", "file_name",
+    "name", "meta_data"
+]
+# 只保留命中的必要字段，减少响应体积和反序列化开销
+_HITS_FILTER_PATH = [
+    "hits.hits._id", "hits.hits._index", "hits.hits._score",
+    "hits.hits._source"
+]
+# status 保证每个子响应都保留在数组中，结果可按位置拆分
+_MSEARCH_FILTER_PATH = ["responses.status", "responses.error"] + [
+    f"responses.{path}" for path in _HITS_FILTER_PATH
+]
+
+
+def reciprocal_rank_fusion(ranked_hits: list[list[dict[str, Any]]],
+                           weights: Optional[list[float]] = None,
+                           rank_constant: int = 60,
+                           top_k: Optional[int] = None) -> list[dict[str, Any]]:
+    """
+    加权倒数排名融合（RRF）
+
+    score(d) = Σ weight_i / (rank_constant + rank_i(d))，rank 从 1 开始，
+    只依赖各路排名，不要求 BM25 与向量相似度分数可比。
+
+    Args:
+        ranked_hits: 各路检索的 ES 命中列表（已按相关度排序）
+        weights: 各路权重，默认均为 1.0
+        rank_constant: RRF 平滑常数 k
+        top_k: 融合后保留数量，None 表示全部保留
+
+    Returns:
+        List[Dict[str, Any]]: 按融合分数降序的命中列表，_score 为融合分数
+    """
+    weights = weights or [1.0] * len(ranked_hits)
+    fused_scores: dict[tuple[str, str], float] = {}
+    first_hits: dict[tuple[str, str], dict[str, Any]] = {}
+    for hits, weight in zip(ranked_hits, weights):
+        for rank, hit in enumerate(hits, 1):
+            key = (hit["_index"], hit["_id"])
+            fused_scores[key] = fused_scores.get(
+                key, 0.0) + weight / (rank_constant + rank)
+            first_hits.setdefault(key, hit)
+
+    ranked_keys = sorted(fused_scores, key=fused_scores.get, reverse=True)
+    if top_k is not None:
+        ranked_keys = ranked_keys[:top_k]
+    return [{
+        **first_hits[key], "_score": fused_scores[key]
+    } for key in ranked_keys]
 
 
 """
@@ -68,7 +154,8 @@ class ESService:
                  username: str = "",
                  password: str = "",
                  timeout: int = 30,
-                 connections_per_node: int = 25):
+                 connections_per_node: int = 25,
+                 knn_tuner: Optional[KnnTuner] = None):
         """
         初始化ES服务
 
@@ -78,6 +165,7 @@ class ESService:
             password: 密码
             timeout: 超时时间
             connections_per_node: 每个节点的连接数
+            knn_tuner: KNN num_candidates 选择器（可选）
         """
         self.hosts = hosts
         self.username = username
@@ -109,6 +197,9 @@ class ESService:
         self.index_id_to_domain_id_map = {}
         self.valid_indeces = []
         self._es_request_semaphore = asyncio.Semaphore(connections_per_node)
+        # KNN 调优：查询向量维度由 ESDiscovery 检测后更新
+        self.knn_tuner = knn_tuner or KnnTuner()
+        self.vector_dims = 1536
         self._ensure_connected()
 
     async def connect(self) -> bool:
@@ -274,7 +365,7 @@ class ESService:
                 doc['domain_id'] = domain_id
                 docs.append(doc)
 
-            docs = update_doc_meta_data(docs)
+            docs = await aupdate_doc_meta_data(docs)
 
             for doc in docs:
                 # 安全获取 doc_id
@@ -359,7 +450,7 @@ class ESService:
         try:
             # 构建搜索查询
             search_body = self._build_search_body(query, query_vector, filters,
-                                                  top_k)
+                                                  top_k, index)
             # logger.debug(f"搜索查询体: {search_body}")
 
             logger.info(f"搜索query <es_search>: {query}")
@@ -368,79 +459,335 @@ class ESService:
             with CodeTimer("es_search <timer>"):
                 async with self._es_request_semaphore:
                     # 执行搜索
-                    response = await self._client.search(index=index,
-                                                         body=search_body)
+                    response = await self._client.search(
+                        index=index,
+                        body=search_body,
+                        filter_path=_HITS_FILTER_PATH)
             end_time = time.time()
             logger.info(
                 f"ES搜索耗时<es_search>: {query} {end_time - start_time:.4f} 秒")
 
             # 解析结果
-            results = []
-            docs = []
-            for hit in response['hits']['hits']:
-                doc = hit['_source'].copy()
-                index = hit["_index"]
-                doc["index"] = index
-                domain_id = self.index_id_to_domain_id_map.get(index, "")
-                doc["domain_id"] = domain_id
-                docs.append(doc)
+            results = await self._parse_search_hits(
+                response.get('hits', {}).get('hits', []))
 
-            docs = update_doc_meta_data(docs)
+            logger.info(f"ES搜索成功，返回 {len(results)} 个文档")
+            return results
 
-            for doc in docs:
-                # 获取原始内容和切分后的内容
-                original_content = (doc.get('content_view')
-                                    or doc.get('content') or doc.get('text')
-                                    or doc.get('title') or '')
+        except Exception as e:
+            logger.error(f"ES搜索失败: {str(e)}")
+            return []
 
-                div_content = (doc.get('content') or doc.get('text')
-                               or doc.get('title') or '')
+    async def _parse_search_hits(self, hits: list[dict[str,
+                                                 Any]]) -> list[ESSearchResult]:
+        """
+        将ES命中结果解析为 ESSearchResult，并批量补充文档元信息
 
-                # 灵活获取来源字段
-                source = (doc.get('meta_data', {}).get('file_name')
-                          or doc.get('file_name') or doc.get('name') or '')
+        直接在响应的 _source 上补充字段（响应解析后即丢弃），不复制文档
 
-                # 安全获取 doc_id，如果不存在则使用 _id
-                doc_id = doc.get('doc_id', "")
-                index = hit["_index"]
-                domain_id = self.index_id_to_domain_id_map.get(index, "")
-                if index == "personal_knowledge_base":
-                    domain_id = "documentUploadAnswer"
+        Args:
+            hits: ES返回的 hits 列表（可以来自多个查询）
 
-                doc_from = "self" if domain_id == "documentUploadAnswer" else "data_platform"
+        Returns:
+            List[ESSearchResult]: 与 hits 顺序一致的结果列表
+        """
+        docs = []
+        for hit in hits:
+            doc = hit['_source']
+            index = hit["_index"]
+            doc["index"] = index
+            doc["domain_id"] = self.index_id_to_domain_id_map.get(index, "")
+            docs.append(doc)
+
+        # 元信息异步批量补充（原地更新并保持顺序）
+        docs = await aupdate_doc_meta_data(docs)
+
+        results = []
+        for hit, doc in zip(hits, docs):
+            # 切分后的内容；原始内容优先使用 content_view
+            div_content = (doc.get('content') or doc.get('text')
+                           or doc.get('title') or '')
+            original_content = doc.get('content_view') or div_content
+
+            metadata = doc.get('meta_data') or {}
+            # 灵活获取来源字段
+            source = (metadata.get('file_name') or doc.get('file_name')
+                      or doc.get('name') or '')
+
+            index = hit["_index"]
+            domain_id = doc["domain_id"]
+            if index == "personal_knowledge_base":
+                domain_id = "documentUploadAnswer"
+            doc_from = "self" if domain_id == "documentUploadAnswer" else "data_platform"
+            metadata["source"] = doc_from
+
+            logger.debug(
+                f"搜索结果 - 索引: {index}, domain_id: {domain_id}, doc_from: {doc_from}"
+            )
+
+            results.append(
+                ESSearchResult(id=hit['_id'],
+                               doc_id=doc.get('doc_id', ""),
+                               index=index,
+                               domain_id=domain_id,
+                               doc_from=doc_from,
+                               file_token=doc.get('file_token', ""),
+                               original_content=original_content,
+                               div_content=div_content,
+                               source=source,
+                               score=hit['_score'],
+                               metadata=metadata,
+                               alias_name=index))
+        return results
+
+    async def search_many(
+            self, searches: list[dict[str,
+                                      Any]]) -> list[list[ESSearchResult]]:
+        """
+        通过一次 msearch 请求执行多个搜索，并按请求顺序拆分结果
 
-                logger.info(
-                    f"搜索结果 - 索引: {index}, domain_id: {domain_id}, doc_from: {doc_from}"
-                )
+        Args:
+            searches: 搜索参数列表，每项包含 index、query，
+                可选 top_k（默认10）、query_vector、filters；
+                hybrid 为 True 且同时有文本和向量时执行混合检索，可选
+                vector_top_k / text_top_k（各路召回数量，默认 top_k）、
+                vector_weight / text_weight（RRF 权重，默认 1.0）、
+                rank_constant（RRF 常数，默认 60）、
+                min_score（向量一路的最小相似度，默认 0）
 
-                result = ESSearchResult(id=hit['_id'],
-                                        doc_id=doc_id,
-                                        index=index,
-                                        domain_id=domain_id,
-                                        doc_from=doc_from,
-                                        file_token=doc.get('file_token', ""),
-                                        original_content=original_content,
-                                        div_content=div_content,
-                                        source=source,
-                                        score=hit['_score'],
-                                        metadata=doc.get('meta_data', {}),
-                                        alias_name=index)
-                # 修改 metadata.source = doc_from
-                result.metadata["source"] = doc_from
-                results.append(result)
+        Returns:
+            List[List[ESSearchResult]]: 与 searches 顺序一致的结果，
+                单个查询失败时对应位置为空列表；混合检索结果的 score 为 RRF 融合分数
+        """
+        logger.info(f"开始批量ES搜索，查询数量: {len(searches)}")
+        if not searches:
+            return []
 
-            logger.info(f"ES搜索成功，返回 {len(results)} 个文档")
+        await self._ensure_connected()
+
+        if not self._client:
+            logger.error("ES客户端未连接")
+            return [[] for _ in searches]
+
+        try:
+            # 混合检索的 KNN 与 BM25 子查询放入同一次 msearch
+            msearch_body = []
+            bodies_per_search = []
+            for search in searches:
+                index = search.get("index", "*")
+                if index == "*":
+                    index = self.valid_indeces
+                if isinstance(index, list):
+                    index = ",".join(index)
+                bodies = self._build_msearch_bodies(search, index)
+                bodies_per_search.append(len(bodies))
+                for body in bodies:
+                    msearch_body.append({"index": index})
+                    msearch_body.append(body)
+
+            start_time = time.time()
+            with CodeTimer("es_msearch <timer>"):
+                async with self._es_request_semaphore:
+                    response = await self._client.msearch(
+                        body=msearch_body, filter_path=_MSEARCH_FILTER_PATH)
+            logger.info(
+                f"批量ES搜索耗时<es_msearch>: {len(msearch_body) // 2} 个子查询 {time.time() - start_time:.4f} 秒"
+            )
+
+            sub_hits = []
+            for i, search_response in enumerate(response["responses"]):
+                if "error" in search_response:
+                    logger.error(
+                        f"批量ES搜索第 {i + 1} 个子查询失败: {search_response['error']}")
+                sub_hits.append(search_response.get("hits", {}).get("hits", []))
+
+            # 混合检索先在原始命中上做 RRF 融合，只解析融合后保留的结果
+            hits_per_search = []
+            offset = 0
+            for search, body_count in zip(searches, bodies_per_search):
+                hits = sub_hits[offset:offset + body_count]
+                offset += body_count
+                if body_count == 1:
+                    hits_per_search.append(hits[0])
+                    continue
+                knn_hits, text_hits = hits
+                min_score = search.get("min_score", 0.0)
+                if min_score > 0:
+                    knn_hits = [
+                        hit for hit in knn_hits if hit["_score"] >= min_score
+                    ]
+                hits_per_search.append(
+                    reciprocal_rank_fusion(
+                        [knn_hits, text_hits],
+                        weights=[
+                            search.get("vector_weight", 1.0),
+                            search.get("text_weight", 1.0)
+                        ],
+                        rank_constant=search.get("rank_constant", 60),
+                        top_k=search.get("top_k", 10)))
+
+            # 所有查询的命中结果合并解析，元信息只需批量获取一次
+            all_results = await self._parse_search_hits(
+                [hit for hits in hits_per_search for hit in hits])
+
+            results = []
+            offset = 0
+            for hits in hits_per_search:
+                results.append(all_results[offset:offset + len(hits)])
+                offset += len(hits)
+
+            logger.info(
+                f"批量ES搜索成功，各查询结果数: {[len(result) for result in results]}")
             return results
 
         except Exception as e:
-            logger.error(f"ES搜索失败: {str(e)}")
-            return []
+            logger.error(f"批量ES搜索失败: {str(e)}")
+            return [[] for _ in searches]
+
+    async def search_hybrid(self,
+                            index: str,
+                            query: str,
+                            query_vector: list[float],
+                            top_k: int = 10,
+                            filters: Optional[dict[str, Any]] = None,
+                            vector_top_k: Optional[int] = None,
+                            text_top_k: Optional[int] = None,
+                            vector_weight: float = 1.0,
+                            text_weight: float = 1.0,
+                            rank_constant: int = 60,
+                            min_score: float = 0.0) -> list[ESSearchResult]:
+        """
+        执行混合检索：KNN 与 BM25 子查询在一次 msearch 中发出，结果以加权 RRF 融合
+
+        Args:
+            index: 索引名称
+            query: 文本查询
+            query_vector: 查询向量
+            top_k: 融合后返回结果数量
+            filters: 过滤条件（两路共用）
+            vector_top_k: 向量一路召回数量，默认 top_k
+            text_top_k: BM25 一路召回数量，默认 top_k
+            vector_weight: 向量一路 RRF 权重
+            text_weight: BM25 一路 RRF 权重
+            rank_constant: RRF 常数
+            min_score: 向量一路参与融合的最小相似度
+
+        Returns:
+            List[ESSearchResult]: 融合后的结果，score 为 RRF 分数
+        """
+        results = await self.search_many([{
+            "index": index,
+            "query": query,
+            "query_vector": query_vector,
+            "top_k": top_k,
+            "filters": filters,
+            "hybrid": True,
+            "vector_top_k": vector_top_k,
+            "text_top_k": text_top_k,
+            "vector_weight": vector_weight,
+            "text_weight": text_weight,
+            "rank_constant": rank_constant,
+            "min_score": min_score
+        }])
+        return results[0]
+
+    async def fetch_document_chunks(
+        self,
+        doc_ids: list[str],
+        max_chunks: int = 5000,
+        index: str = "personal_knowledge_base"
+    ) -> tuple[list[ESSearchResult], list[Optional[list[float]]]]:
+        """
+        一次性获取指定文档的全部有效切片及其向量（用于构建作业级内存索引）
+
+        Args:
+            doc_ids: 文档ID列表
+            max_chunks: 最多返回的切片数量（受 ES max_result_window 限制）
+            index: 索引名称
+
+        Returns:
+            tuple: (切片结果列表, 与之对应的 context_vector 列表)
+        """
+        logger.info(f"开始加载文档切片，文档数量: {len(doc_ids)}, 上限: {max_chunks}")
+
+        await self._ensure_connected()
+
+        if not self._client:
+            logger.error("ES客户端未连接")
+            return [], []
+
+        search_body = {
+            "size": min(max_chunks, 10000),
+            "_source": {
+                "includes": [*ES_SOURCE_FIELDS, "context_vector"]
+            },
+            "query": {
+                "bool": {
+                    "filter": [{
+                        "term": {
+                            "valid": True
+                        }
+                    }, {
+                        "terms": {
+                            "doc_id": doc_ids
+                        }
+                    }]
+                }
+            }
+        }
+        try:
+            with CodeTimer("es_fetch_chunks <timer>"):
+                async with self._es_request_semaphore:
+                    response = await self._client.search(
+                        index=index,
+                        body=search_body,
+                        filter_path=_HITS_FILTER_PATH)
+            hits = response.get('hits', {}).get('hits', [])
+            # 向量只进入内存索引，不保留在切片元信息中
+            vectors = [
+                hit['_source'].pop('context_vector', None) for hit in hits
+            ]
+            results = await self._parse_search_hits(hits)
+            logger.info(f"文档切片加载完成，共 {len(results)} 个切片")
+            return results, vectors
+        except Exception as e:
+            logger.error(f"加载文档切片失败: {str(e)}")
+            raise
+
+    def _build_msearch_bodies(self, search: dict[str, Any],
+                              index: str) -> list[dict[str, Any]]:
+        """
+        构建单个搜索在 msearch 中的查询体
+
+        混合检索返回 [KNN 查询体, BM25 查询体]，否则返回单个查询体
+        """
+        query = search.get("query", "")
+        query_vector = search.get("query_vector")
+        filters = search.get("filters")
+        top_k = search.get("top_k", 10)
+        if not (search.get("hybrid") and query_vector and query.strip()):
+            return [
+                self._build_search_body(query, query_vector, filters, top_k,
+                                        index)
+            ]
+
+        knn_body = self._build_knn_search_body(
+            query_vector, query, filters,
+            search.get("vector_top_k") or top_k, index)
+        # BM25 一路与 KNN 使用相同的有效性过滤和返回字段，保证同一文档两路结果一致
+        text_body = self._build_text_search_body(query, {
+            "valid": True,
+            **(filters or {})
+        }, search.get("text_top_k") or top_k)
+        text_body["_source"] = knn_body["_source"]
+        return [knn_body, text_body]
 
     def _build_search_body(self,
                            query: str,
                            query_vector: Optional[list[float]] = None,
                            filters: Optional[dict[str, Any]] = None,
-                           top_k: int = 10) -> dict[str, Any]:
+                           top_k: int = 10,
+                           index: Any = None) -> dict[str, Any]:
         """
         构建搜索查询体
 
@@ -449,6 +796,7 @@ class ESService:
             query_vector: 查询向量
             filters: 过滤条件
             top_k: 返回结果数量
+            index: 目标索引，用于选择 KNN num_candidates
 
         Returns:
             Dict[str, Any]: 搜索查询体
@@ -457,7 +805,7 @@ class ESService:
         if query_vector:
             logger.debug("使用KNN向量搜索")
             return self._build_knn_search_body(query_vector, query, filters,
-                                               top_k)
+                                               top_k, index)
         else:
             logger.debug("使用文本搜索")
             return self._build_text_search_body(query, filters, top_k)
@@ -466,39 +814,40 @@ class ESService:
                                query_vector: list[float],
                                query: str = "",
                                filters: Optional[dict[str, Any]] = None,
-                               top_k: int = 10) -> dict[str, Any]:
+                               top_k: int = 10,
+                               index: Any = None,
+                               num_candidates: Optional[int] = None
+                               ) -> dict[str, Any]:
         """
         构建KNN向量搜索查询体
 
         Args:
-            query_vector: 查询向量
+            query_vector: 查询向量（不会被修改）
             query: 文本查询（可选，用于混合搜索）
             filters: 过滤条件
             top_k: 返回结果数量
+            index: 目标索引，按其规模选择 num_candidates
+            num_candidates: 指定候选数量（离线评测用），默认由 knn_tuner 计算
 
         Returns:
             Dict[str, Any]: KNN搜索查询体
         """
-        # 确保向量维度正确
-        if len(query_vector) != 1536:
-            if len(query_vector) > 1536:
-                query_vector = query_vector[:1536]
-                logger.debug("截断向量维度到 1536")
-            else:
-                query_vector.extend([0.0] * (1536 - len(query_vector)))
-                logger.debug("扩展向量维度到 1536")
+        # 按索引维度截断或补零，生成新向量
+        query_vector = fit_vector_dims(query_vector, self.vector_dims)
+        if num_candidates is None:
+            num_candidates = self.knn_tuner.num_candidates(index, top_k)
 
         # 构建基础KNN查询
         search_body = {
             "size": top_k,
             "_source": {
-                "excludes": ["content"]  # 排除大字段以提高性能
+                "includes": ES_SOURCE_FIELDS  # 只返回解析用到的字段，排除大字段
             },
             "knn": {
                 "field": "context_vector",
                 "query_vector": query_vector,
                 "k": top_k,
-                "num_candidates": top_k * 2
+                "num_candidates": num_candidates
             }
         }
 
@@ -546,9 +895,12 @@ class ESService:
         Returns:
             Dict[str, Any]: 文本搜索查询体
         """
-        # 基础文本查询
+        # 基础文本查询（文本检索保留 content 字段）
         search_body = {
             "size": top_k,
+            "_source": {
+                "includes": [*ES_SOURCE_FIELDS, "content"]
+            },
             "query": {
                 "bool": {
                     "should": [{
@@ -661,7 +1013,7 @@ class ESService:
             # 构建msearch请求体
             msearch_body = []
             search_body = self._build_search_body(query, query_vector, filters,
-                                                  top_k)
+                                                  top_k, valid_indices)
 
             for index in valid_indices:
                 msearch_body.append({"index": index})
@@ -850,6 +1202,27 @@ class ESService:
             logger.error(f"获取索引失败: {str(e)}")
             return []
 
+    async def get_index_doc_counts(self) -> dict[str, int]:
+        """获取各索引的文档数（用于 KNN num_candidates 选择）"""
+        await self._ensure_connected()
+
+        if not self._client:
+            logger.error("ES客户端未连接")
+            return {}
+
+        try:
+            indices = await self._client.cat.indices(format="json",
+                                                     h="index,docs.count")
+            doc_counts = {
+                idx["index"]: int(idx.get("docs.count") or 0)
+                for idx in indices
+            }
+            logger.debug(f"获取到 {len(doc_counts)} 个索引的文档数")
+            return doc_counts
+        except Exception as e:
+            logger.error(f"获取索引文档数失败: {str(e)}")
+            return {}
+
     async def get_index_mapping(self, index: str) -> Optional[dict[str, Any]]:
         """获取索引映射"""
         logger.debug(f"获取索引 {index} 的映射信息")
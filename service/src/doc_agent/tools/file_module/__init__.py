@@ -65,6 +65,10 @@ def filetoken_to_outline(file_token: str) -> dict | None:
     """便捷函数：将 file_token 转为 outline 对象"""
     return file_processor.filetoken_to_outline(file_token)
 
+async def afiletoken_to_outline(file_token: str) -> dict | None:
+    """便捷函数：异步将 file_token 转为 outline 对象（解析在进程池中执行）"""
+    return await file_processor.afiletoken_to_outline(file_token)
+
 def filetoken_to_text(file_token: str) -> str:
     """便捷函数：将 file_token 转为文本"""
     return file_processor.filetoken_to_text(file_token)
@@ -75,5 +79,6 @@ __all__ = [
     "file_processor",
     "filetoken_to_sources",
     "filetoken_to_outline", 
+    "afiletoken_to_outline",
     "filetoken_to_text"
 ]
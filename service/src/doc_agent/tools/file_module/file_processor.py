@@ -2,6 +2,7 @@
 文件处理器 - 整合上传、下载和解析功能的主类
 """
 
+import asyncio
 import base64
 import hashlib
 import hmac
@@ -25,6 +26,7 @@ from bs4 import BeautifulSoup
 # 使用相对导入，支持独立运行
 try:
     from .file_utils import FileUtils
+    from .parse_executor import get_parse_executor
     from .parsers import (
         ExcelParser,
         HtmlParser,
@@ -36,6 +38,7 @@ try:
 except ImportError:
     # 如果相对导入失败，尝试绝对导入
     from file_utils import FileUtils
+    from parse_executor import get_parse_executor
     from parsers import (
         ExcelParser,
         HtmlParser,
@@ -380,6 +383,46 @@ class FileProcessor:
             logger.error(f"Parse file error: {str(e)}")
             raise
 
+    async def aparse_file(self, file_path: str,
+                          file_type: str) -> list[list[str]]:
+        """
+        异步解析文件内容，解析在进程池中执行，不阻塞事件循环
+        
+        Args:
+            file_path: 文件路径
+            file_type: 文件类型 (docx, xlsx, pptx, txt, md, html, doc)
+            
+        Returns:
+            解析后的内容列表
+        """
+        return await get_parse_executor().parse(file_path, file_type,
+                                                self.file_transform_url)
+
+    async def adownload_and_parse(self,
+                                  file_token: str,
+                                  file_type: str,
+                                  tmpdir: str = "/tmp") -> list[list[str]]:
+        """
+        异步下载文件并解析内容（下载在线程中执行，解析在进程池中执行）
+        
+        Args:
+            file_token: 文件token
+            file_type: 文件类型
+            tmpdir: 临时目录
+            
+        Returns:
+            解析后的内容列表
+        """
+        file_path = await asyncio.to_thread(self.download_file, file_token,
+                                            tmpdir)
+        try:
+            return await self.aparse_file(file_path, file_type)
+        finally:
+            # 清理临时文件
+            if os.path.exists(file_path):
+                os.remove(file_path)
+                logger.info(f"临时文件已删除: {file_path}")
+
     def _parse_json_file(self, file_path: str) -> list[list[str]]:
         """
         解析JSON文件
@@ -547,23 +590,8 @@ class FileProcessor:
         if self._is_storage_token(file_token):
             # 对于storage token，直接解析JSON
             try:
-                text = self.filetoken_to_text(file_token)
-                outline_data = json.loads(text)
-
-                # 检查是否是直接的outline格式
-                if isinstance(
-                        outline_data, dict
-                ) and "title" in outline_data and "chapters" in outline_data:
-                    # 直接返回outline数据
-                    word_count = outline_data.get("word_count", 0)
-                    return {
-                        "title": outline_data["title"],
-                        "word_count": word_count,
-                        "chapters": outline_data["chapters"]
-                    }
-                else:
-                    # 尝试使用原有的text_to_outline方法
-                    return self.text_to_outline(text)
+                return self._storage_text_to_outline(
+                    self.filetoken_to_text(file_token))
             except Exception as e:
                 logger.error(f"解析storage token outline失败: {e}")
                 return None
@@ -572,6 +600,40 @@ class FileProcessor:
             text = self.filetoken_to_text(file_token)
             return self.text_to_outline(text)
 
+    async def afiletoken_to_outline(self, file_token: str) -> dict | None:
+        """
+        异步将给定 file_token 转换为 outline 对象
+        storage 文件的下载在线程中执行，解析在进程池中执行，不阻塞事件循环
+        """
+        if self._is_storage_token(file_token):
+            try:
+                text, _ = await self._aload_text_from_storage(file_token)
+                return self._storage_text_to_outline(text)
+            except Exception as e:
+                logger.error(f"解析storage token outline失败: {e}")
+                return None
+        else:
+            text = await asyncio.to_thread(self.filetoken_to_text, file_token)
+            return self.text_to_outline(text)
+
+    def _storage_text_to_outline(self, text: str) -> dict | None:
+        """将 storage 文件文本解析为 outline，兼容直接的 outline JSON 与原有格式"""
+        outline_data = json.loads(text)
+
+        # 检查是否是直接的outline格式
+        if isinstance(
+                outline_data, dict
+        ) and "title" in outline_data and "chapters" in outline_data:
+            # 直接返回outline数据
+            word_count = outline_data.get("word_count", 0)
+            return {
+                "title": outline_data["title"],
+                "word_count": word_count,
+                "chapters": outline_data["chapters"]
+            }
+        # 尝试使用原有的text_to_outline方法
+        return self.text_to_outline(text)
+
     def text_to_sources(self,
                         text: str,
                         *,
@@ -832,67 +894,12 @@ class FileProcessor:
             temp_dir = tempfile.mkdtemp()
 
             try:
-                # 首先下载文件以获取文件名
+                # 下载文件，根据文件扩展名确定文件类型后直接解析
                 file_path = self.download_file(file_token, temp_dir)
-                file_name = os.path.basename(file_path)
-
-                # 根据文件扩展名确定文件类型
-                file_ext = os.path.splitext(file_name)[1].lower()
-                if file_ext in ['.json']:
-                    file_type = "json"
-                elif file_ext in ['.md', '.markdown']:
-                    file_type = "md"
-                elif file_ext in ['.txt']:
-                    file_type = "txt"
-                elif file_ext in ['.docx', '.doc']:
-                    file_type = "word"
-                elif file_ext in ['.xlsx', '.xls']:
-                    file_type = "excel"
-                elif file_ext in ['.pptx', '.ppt']:
-                    file_type = "powerpoint"
-                elif file_ext in ['.html', '.htm']:
-                    file_type = "html"
-                else:
-                    # 默认按文本处理
-                    file_type = "txt"
-
-                # 下载并解析文件
-                parsed_content = self.download_and_parse(
-                    file_token, file_type, temp_dir)
-
-                if not parsed_content:
-                    raise Exception("文件内容为空")
-
-                # 提取文本内容
-                if file_type == "json":
-                    # JSON 文件可能被 _parse_json_file 分块，这里需要拼接所有内容块
-                    if parsed_content:
-                        try:
-                            text = "".join(chunk[1] for chunk in parsed_content
-                                           if len(chunk) > 1)
-                        except Exception:
-                            # 退化回第一块，尽量不抛出异常
-                            text = parsed_content[0][1]
-                    else:
-                        text = ""
-                else:
-                    # 其他文件类型，保持分块结构，只提取文本内容
-                    # 注意：这个方法主要用于 filetoken_to_text 等需要完整文本的场景
-                    # 对于 Source 生成，建议直接使用 filetoken_to_sources 方法，避免重复分块
-                    text_blocks = []
-                    for content in parsed_content:
-                        if len(content) > 1:
-                            text_blocks.append(content[1])
-                    text = "\n\n".join(text_blocks)
-
-                meta = {
-                    "title": f"storage_file_{file_token[:8]}",
-                    "source_type": "document",
-                    "url": None,
-                }
-
-                logger.info(f"成功从storage加载文件: {file_token} (类型: {file_type})")
-                return text, meta
+                file_type = self._file_type_from_name(file_path)
+                parsed_content = self.parse_file(file_path, file_type)
+                return self._storage_parsed_to_text(file_token, file_type,
+                                                    parsed_content)
 
             finally:
                 # 清理临时目录
@@ -905,6 +912,83 @@ class FileProcessor:
             logger.error(f"从storage加载文件失败: {e}")
             raise
 
+    async def _aload_text_from_storage(
+            self, file_token: str) -> tuple[str, dict[str, str]]:
+        """
+        异步从远程storage下载文件并提取文本（下载在线程中执行，解析在进程池中执行）
+
+        Args:
+            file_token: storage文件token
+
+        Returns:
+            (text, meta)
+        """
+        temp_dir = tempfile.mkdtemp()
+        try:
+            file_path = await asyncio.to_thread(self.download_file, file_token,
+                                                temp_dir)
+            file_type = self._file_type_from_name(file_path)
+            parsed_content = await self.aparse_file(file_path, file_type)
+            return self._storage_parsed_to_text(file_token, file_type,
+                                                parsed_content)
+        except Exception as e:
+            logger.error(f"从storage加载文件失败: {e}")
+            raise
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def _file_type_from_name(self, file_name: str) -> str:
+        """
+        根据文件扩展名确定 parse_file 使用的文件类型，未知扩展名按文本处理
+
+        .xls/.ppt 等二进制格式原样返回扩展名，由 parse_file 报告不支持的文件类型
+        """
+        file_ext = os.path.splitext(file_name)[1].lower()
+        if file_ext in ['.json']:
+            return "json"
+        elif file_ext in ['.md', '.markdown']:
+            return "md"
+        elif file_ext in [
+                '.docx', '.doc', '.xlsx', '.xls', '.csv', '.pptx', '.ppt'
+        ]:
+            return file_ext[1:]
+        elif file_ext in ['.html', '.htm']:
+            return "html"
+        # 默认按文本处理
+        return "txt"
+
+    def _storage_parsed_to_text(
+            self, file_token: str, file_type: str,
+            parsed_content: list[list[str]]) -> tuple[str, dict[str, str]]:
+        """将 storage 文件的解析结果拼接为纯文本"""
+        if not parsed_content:
+            raise Exception("文件内容为空")
+
+        # 提取文本内容
+        if file_type == "json":
+            # JSON 文件可能被 _parse_json_file 分块，这里需要拼接所有内容块
+            try:
+                text = "".join(chunk[1] for chunk in parsed_content
+                               if len(chunk) > 1)
+            except Exception:
+                # 退化回第一块，尽量不抛出异常
+                text = parsed_content[0][1]
+        else:
+            # 其他文件类型，保持分块结构，只提取文本内容
+            # 注意：这个方法主要用于 filetoken_to_text 等需要完整文本的场景
+            # 对于 Source 生成，建议直接使用 filetoken_to_sources 方法，避免重复分块
+            text = "\n\n".join(content[1] for content in parsed_content
+                                if len(content) > 1)
+
+        meta = {
+            "title": f"storage_file_{file_token[:8]}",
+            "source_type": "document",
+            "url": None,
+        }
+
+        logger.info(f"成功从storage加载文件: {file_token} (类型: {file_type})")
+        return text, meta
+
     def _is_http_url(self, token: str) -> bool:
         """判断是否为HTTP URL"""
         t = token.lower()
@@ -0,0 +1,172 @@
+"""
+文件解析执行器 - 在进程池中执行 CPU 密集的文件解析，避免阻塞事件循环
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# 文件类型 -> 并发限制分组
+_FORMAT_GROUPS = {
+    "docx": "word",
+    "doc": "word",
+    "xlsx": "excel",
+    "csv": "excel",
+    "pptx": "powerpoint",
+}
+
+# 子进程内复用的文件处理器
+_worker_processor = None
+
+
+def _new_processor(file_transform_url: Optional[str]):
+    try:
+        from .file_processor import FileProcessor
+    except ImportError:
+        from file_processor import FileProcessor
+    return FileProcessor(file_transform_url=file_transform_url)
+
+
+def _parse_in_worker(file_path: str, file_type: str,
+                     file_transform_url: Optional[str]) -> list[list[str]]:
+    """子进程入口：使用进程内缓存的 FileProcessor 解析文件"""
+    global _worker_processor
+    if _worker_processor is None:
+        _worker_processor = _new_processor(file_transform_url)
+    _worker_processor.file_transform_url = file_transform_url
+    return _worker_processor.parse_file(file_path, file_type)
+
+
+def _parse_in_thread(file_path: str, file_type: str,
+                     file_transform_url: Optional[str]) -> list[list[str]]:
+    """线程模式：每次使用独立的 FileProcessor，避免线程间共享解析器"""
+    return _new_processor(file_transform_url).parse_file(file_path, file_type)
+
+
+class ParseExecutor:
+    """
+    文件解析执行器
+
+    - 解析在 forkserver 进程池中执行，多个文件可同时利用多个 CPU 核
+    - 按格式分组限制并发，避免大体积 Excel/PowerPoint 占满进程池
+    - 超时后调用方立即收到 TimeoutError；子进程中的解析无法中断，会继续运行至结束
+    - 并发限制的信号量按事件循环创建，worker 中每个任务的 asyncio.run 各自使用一组
+    """
+
+    def __init__(self,
+                 max_workers: int = 4,
+                 timeout_s: float = 120.0,
+                 max_file_size_mb: int = 200,
+                 format_concurrency: Optional[dict[str, int]] = None,
+                 use_process_pool: bool = True):
+        self.max_workers = max_workers if max_workers > 0 else (
+            os.cpu_count() or 1)
+        self.timeout_s = timeout_s
+        self.max_file_size = max_file_size_mb * 1024 * 1024
+        self.format_concurrency = format_concurrency or {}
+        self.use_process_pool = use_process_pool
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # 延迟导入：子进程只需要 _parse_in_worker，不加载 doc_agent.utils
+        from doc_agent.utils.loop_local import LoopLocal
+        self._semaphores: LoopLocal[dict[str, asyncio.Semaphore]] = LoopLocal(
+            dict)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("forkserver"))
+            logger.info(f"文件解析进程池已创建，进程数: {self.max_workers}")
+        return self._executor
+
+    def _get_semaphore(self, file_type: str) -> asyncio.Semaphore:
+        group = _FORMAT_GROUPS.get(file_type, "default")
+        semaphores = self._semaphores.get()
+        if group not in semaphores:
+            limit = min(self.format_concurrency.get(group, self.max_workers),
+                        self.max_workers)
+            semaphores[group] = asyncio.Semaphore(max(1, limit))
+        return semaphores[group]
+
+    async def parse(self,
+                    file_path: str,
+                    file_type: str,
+                    file_transform_url: Optional[str] = None
+                    ) -> list[list[str]]:
+        """
+        异步解析文件
+
+        Args:
+            file_path: 文件路径
+            file_type: 文件类型
+            file_transform_url: 文件转换服务URL（doc 文件需要）
+
+        Returns:
+            解析后的内容列表
+        """
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"文件不存在: {file_path}")
+        file_size = os.path.getsize(file_path)
+        if file_size > self.max_file_size:
+            raise ValueError(
+                f"文件过大: {file_path} ({file_size / 1024 / 1024:.1f}MB)，"
+                f"上限 {self.max_file_size / 1024 / 1024:.0f}MB")
+
+        file_type = file_type.lower()
+        async with self._get_semaphore(file_type):
+            if not self.use_process_pool:
+                return await asyncio.wait_for(
+                    asyncio.to_thread(_parse_in_thread, file_path, file_type,
+                                      file_transform_url), self.timeout_s)
+
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self._get_executor(),
+                                          _parse_in_worker, file_path,
+                                          file_type, file_transform_url)
+            try:
+                return await asyncio.wait_for(future, self.timeout_s)
+            except asyncio.TimeoutError:
+                raise TimeoutError(
+                    f"文件解析超时（{self.timeout_s}s）: {file_path}") from None
+            except BrokenProcessPool:
+                # 子进程异常退出（如内存不足被杀），下次解析时重建进程池
+                logger.error(f"文件解析进程池异常，将重建: {file_path}")
+                self._executor = None
+                raise
+
+    def shutdown(self) -> None:
+        """关闭进程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            logger.info("文件解析进程池已关闭")
+
+
+_parse_executor: Optional[ParseExecutor] = None
+
+
+def get_parse_executor() -> ParseExecutor:
+    """获取按配置创建的全局解析执行器"""
+    global _parse_executor
+    if _parse_executor is None:
+        from doc_agent.core.config import settings
+        config = settings.file_parsing_config
+        _parse_executor = ParseExecutor(
+            max_workers=config.max_workers,
+            timeout_s=config.timeout_s,
+            max_file_size_mb=config.max_file_size_mb,
+            format_concurrency=config.format_concurrency,
+            use_process_pool=config.use_process_pool)
+    return _parse_executor
+
+
+def shutdown_parse_executor() -> None:
+    """关闭全局解析执行器（应用退出时调用）"""
+    if _parse_executor is not None:
+        _parse_executor.shutdown()
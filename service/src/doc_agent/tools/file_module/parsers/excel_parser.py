@@ -2,29 +2,58 @@
 Excel文件解析器 - 解析.xlsx和.csv文件内容
 """
 
+import codecs
 import os
+from collections.abc import Iterable, Iterator
+from itertools import chain, islice
+
 import pandas as pd
-from typing import List
+from openpyxl import load_workbook
 
 
 class ExcelParser:
     """
     Excel文件解析器，支持.xlsx和.csv格式
+
+    以流式方式读取：工作簿只打开一次并逐行迭代，CSV 按块读取；
+    每块行数据以向量化方式拼接为文本，再按 chunk_size 合并为带表头的记录。
+    parsing() 返回完整的记录列表，逐条产出记录请使用 iter_parsing()。
     """
 
-    def __init__(self):
-        pass
+    def __init__(self, chunk_size: int = 4096, block_rows: int = 5000):
+        """
+        Args:
+            chunk_size: 单条记录的最大字符数
+            block_rows: 每次向量化处理的行数
+        """
+        self.chunk_size = chunk_size
+        self.block_rows = block_rows
 
     def parsing(self, file_path):
         """
         解析Excel文件内容
-        
+
+        文件仍按流式读取，但返回值会把全部记录保存在内存中（结果需要跨进程池返回，
+        且调用方按列表使用）；需要逐条处理超大表格时请使用 iter_parsing。
+
         Args:
             file_path: 文件路径
-            
+
         Returns:
             解析后的内容列表
         """
+        return list(self.iter_parsing(file_path))
+
+    def iter_parsing(self, file_path) -> Iterator[list]:
+        """
+        惰性解析Excel文件内容，逐条产出记录
+
+        Args:
+            file_path: 文件路径
+
+        Yields:
+            ['paragraph', 文本, [[0, 0, 0, 0]], [0], [0]]
+        """
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"文件不存在: {file_path}")
 
@@ -32,9 +61,9 @@ class ExcelParser:
 
         try:
             if file_extension == '.csv':
-                return self._parse_csv(file_path)
+                yield from self._parse_csv(file_path)
             elif file_extension == '.xlsx':
-                return self._parse_xlsx(file_path)
+                yield from self._parse_xlsx(file_path)
             else:
                 raise ValueError(f"不支持的文件格式: {file_extension}")
         except Exception as e:
@@ -42,95 +71,136 @@ class ExcelParser:
 
     def _parse_csv(self, file_path):
         """
-        解析CSV文件
-        
+        按块解析CSV文件
+
         Args:
             file_path: CSV文件路径
-            
-        Returns:
-            解析后的内容列表
+
+        Yields:
+            解析后的记录
         """
         try:
-            # 尝试不同的编码方式读取CSV
-            encodings = ['utf-8', 'gbk', 'gb2312', 'latin1']
-            df = None
-
-            for encoding in encodings:
-                try:
-                    df = pd.read_csv(file_path, encoding=encoding)
-                    break
-                except UnicodeDecodeError:
-                    continue
-
-            if df is None:
-                raise Exception("无法读取CSV文件，请检查文件编码")
-
-            return self._process_dataframe(df)
+            encoding = self._detect_csv_encoding(file_path)
+            with pd.read_csv(file_path,
+                             encoding=encoding,
+                             dtype=str,
+                             keep_default_na=False,
+                             chunksize=self.block_rows) as reader:
+                first = next(reader, None)
+                if first is None:
+                    return
+                header_text = self._join_row(first.columns)
+                blocks = (self._frame_to_texts(df)
+                          for df in chain([first], reader))
+                yield from self._group_rows(header_text, blocks)
 
         except Exception as e:
             raise Exception(f"解析CSV文件失败: {str(e)}")
 
+    def _detect_csv_encoding(self, file_path, sample_size=1024 * 1024):
+        """根据文件开头的样本检测CSV编码"""
+        with open(file_path, 'rb') as f:
+            sample = f.read(sample_size)
+        for encoding in ['utf-8', 'gbk', 'gb2312']:
+            try:
+                # 增量解码，允许样本末尾截断的多字节字符
+                codecs.getincrementaldecoder(encoding)().decode(sample,
+                                                                final=False)
+                return encoding
+            except UnicodeDecodeError:
+                continue
+        return 'latin1'
+
     def _parse_xlsx(self, file_path):
         """
-        解析XLSX文件
-        
+        流式解析XLSX文件，工作簿只读取一次
+
         Args:
             file_path: XLSX文件路径
-            
-        Returns:
-            解析后的内容列表
+
+        Yields:
+            解析后的记录
         """
         try:
-            # 读取所有工作表
-            excel_file = pd.ExcelFile(file_path)
-            all_content = []
-
-            for sheet_name in excel_file.sheet_names:
-                df = pd.read_excel(file_path, sheet_name=sheet_name)
-                sheet_content = self._process_dataframe(df, sheet_name)
-                all_content.extend(sheet_content)
-
-            return all_content
+            workbook = load_workbook(file_path, read_only=True, data_only=True)
+            try:
+                for worksheet in workbook.worksheets:
+                    yield from self._parse_worksheet(worksheet)
+            finally:
+                workbook.close()
 
         except Exception as e:
             raise Exception(f"解析XLSX文件失败: {str(e)}")
 
-    def _process_dataframe(self, df, sheet_name=None):
+    def _parse_worksheet(self, worksheet):
+        """逐行迭代工作表，首个非空行作为表头"""
+        rows = (row for row in worksheet.iter_rows(values_only=True)
+                if any(cell is not None for cell in row))
+        header = next(rows, None)
+        if header is None:
+            return
+
+        header_text = self._join_row(
+            "" if cell is None else cell for cell in header)
+        header_text = f"[{worksheet.title}] {header_text}"
+
+        def blocks():
+            while True:
+                block = list(islice(rows, self.block_rows))
+                if not block:
+                    return
+                # object 列保留单元格原值，避免含空值的整数列被转为浮点（2 -> "2.0"）
+                yield self._frame_to_texts(pd.DataFrame(block, dtype=object))
+
+        yield from self._group_rows(header_text, blocks())
+
+    def _frame_to_texts(self, df) -> list[str]:
+        """向量化地将每行单元格以 ' | ' 拼接为文本"""
+        if df.empty:
+            return []
+        df = df.fillna("").astype(str)
+        first = df.iloc[:, 0]
+        if df.shape[1] == 1:
+            return first.tolist()
+        return first.str.cat([df.iloc[:, i] for i in range(1, df.shape[1])],
+                             sep=" | ").tolist()
+
+    def _join_row(self, cells) -> str:
+        return " | ".join(str(cell) for cell in cells)
+
+    def _group_rows(self, header_text: str,
+                    row_blocks: Iterable[list[str]]) -> Iterator[list]:
         """
-        处理DataFrame数据
-        
-        Args:
-            df: pandas DataFrame对象
-            sheet_name: 工作表名称（可选）
-            
-        Returns:
-            处理后的内容列表
+        将行文本合并为不超过 chunk_size 的记录，每条记录以表头开头
+
+        超长的单行按 chunk_size 切分为独立记录。
         """
-        result = []
-
-        # 处理表头
-        if not df.empty:
-            header_text = " | ".join([str(col) for col in df.columns])
-            if sheet_name:
-                header_text = f"[{sheet_name}] {header_text}"
-            result.append(['paragraph', header_text, [[0, 0, 0, 0]], [0], [0]])
-
-        # 处理数据行
-        for index, row in df.iterrows():
-            row_text = " | ".join([str(cell) for cell in row.values])
-
-            # 检查内容长度
-            if len(row_text) > 4096:
-                # 分割长内容
-                chunks = [
-                    row_text[i:i + 4096]
-                    for i in range(0, len(row_text), 4096)
-                ]
-                for chunk in chunks:
-                    result.append(
-                        ['paragraph', chunk, [[0, 0, 0, 0]], [0], [0]])
-            else:
-                result.append(
-                    ['paragraph', row_text, [[0, 0, 0, 0]], [0], [0]])
+        parts = [header_text]
+        length = len(header_text)
+        emitted = False
+
+        for row_texts in row_blocks:
+            for row_text in row_texts:
+                if len(row_text) > self.chunk_size:
+                    if len(parts) > 1:
+                        yield self._record("\n".join(parts))
+                        parts, length = [header_text], len(header_text)
+                    for i in range(0, len(row_text), self.chunk_size):
+                        yield self._record(row_text[i:i + self.chunk_size])
+                    emitted = True
+                    continue
+
+                if len(parts) > 1 and length + 1 + len(
+                        row_text) > self.chunk_size:
+                    yield self._record("\n".join(parts))
+                    parts, length = [header_text], len(header_text)
+                    emitted = True
+                parts.append(row_text)
+                length += 1 + len(row_text)
+
+        # 剩余行；没有任何数据行时只输出表头
+        if len(parts) > 1 or not emitted:
+            yield self._record("\n".join(parts))
 
-        return result
+    def _record(self, text: str) -> list:
+        return ['paragraph', text, [[0, 0, 0, 0]], [0], [0]]
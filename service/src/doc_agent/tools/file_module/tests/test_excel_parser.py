@@ -0,0 +1,120 @@
+"""
+Excel解析器测试
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+from openpyxl import Workbook
+
+# 添加模块路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parsers.excel_parser import ExcelParser
+
+
+class TestExcelParser(unittest.TestCase):
+    """Excel解析器测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.parser = ExcelParser()
+
+    def tearDown(self):
+        """测试后清理"""
+        self.tmp_dir.cleanup()
+
+    def _path(self, name):
+        return os.path.join(self.tmp_dir.name, name)
+
+    def _write_csv(self, name, text, encoding="utf-8"):
+        path = self._path(name)
+        with open(path, "w", encoding=encoding, newline="") as f:
+            f.write(text)
+        return path
+
+    def _write_xlsx(self, name, sheets):
+        workbook = Workbook()
+        workbook.remove(workbook.active)
+        for title, rows in sheets.items():
+            worksheet = workbook.create_sheet(title)
+            for row in rows:
+                worksheet.append(row)
+        path = self._path(name)
+        workbook.save(path)
+        return path
+
+    def _texts(self, path):
+        return [record[1] for record in self.parser.parsing(path)]
+
+    def test_csv_records_are_header_prefixed_and_empty_cells_blank(self):
+        """测试CSV输出格式：记录以表头开头，空单元格为空字符串"""
+        path = self._write_csv("data.csv", "名称,数量,备注\n苹果,3,\n梨,,甜\n")
+
+        records = self.parser.parsing(path)
+
+        self.assertEqual(records, [[
+            'paragraph', "名称 | 数量 | 备注\n苹果 | 3 | \n梨 |  | 甜",
+            [[0, 0, 0, 0]], [0], [0]
+        ]])
+
+    def test_xlsx_multiple_sheets_and_ragged_rows(self):
+        """测试多工作表与长短不一的行"""
+        path = self._write_xlsx(
+            "data.xlsx", {
+                "销量": [["地区", "一月", "二月"], ["华东", 1, 2], ["华南"],
+                       ["华北", None, 5]],
+                "空表": [],
+                "备注": [["说明"], ["无"]],
+            })
+
+        self.assertEqual(self._texts(path), [
+            "[销量] 地区 | 一月 | 二月\n华东 | 1 | 2\n华南 |  | \n华北 |  | 5",
+            "[备注] 说明\n无",
+        ])
+
+    def test_records_respect_chunk_size(self):
+        """测试按 chunk_size 合并行，每条记录都带表头"""
+        rows = "\n".join(f"{i:04d},{'x' * 1000}" for i in range(10))
+        path = self._write_csv("rows.csv", "编号,内容\n" + rows + "\n")
+
+        texts = self._texts(path)
+
+        self.assertGreater(len(texts), 1)
+        for text in texts:
+            self.assertLessEqual(len(text), self.parser.chunk_size)
+            self.assertTrue(text.startswith("编号 | 内容\n"))
+        data_rows = [
+            line for text in texts for line in text.split("\n")[1:]
+        ]
+        self.assertEqual(data_rows,
+                         [f"{i:04d} | {'x' * 1000}" for i in range(10)])
+
+    def test_overlong_row_is_split(self):
+        """测试超长单行按 chunk_size 切分为独立记录"""
+        parser = ExcelParser(chunk_size=10)
+        path = self._write_csv("long.csv", "k,v\na,b\nc," + "y" * 20 + "\n")
+
+        texts = [record[1] for record in parser.parsing(path)]
+
+        self.assertEqual(texts, [
+            "k | v\na | b",
+            "c | yyyyyy",
+            "y" * 10,
+            "yyyy",
+        ])
+
+    def test_non_utf8_csv(self):
+        """测试GBK编码的CSV"""
+        path = self._write_csv("gbk.csv",
+                               "城市,人口\n北京,2189\n",
+                               encoding="gbk")
+
+        self.assertEqual(self._texts(path), ["城市 | 人口\n北京 | 2189"])
+
+
+if __name__ == '__main__':
+    unittest.main()
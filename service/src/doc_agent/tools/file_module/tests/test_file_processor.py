@@ -2,17 +2,16 @@
 文件处理器测试
 """
 
+import asyncio
+import json
 import unittest
 import os
+import sys
 import tempfile
 from unittest.mock import Mock, patch
 
-# 添加模块路径
-import sys
-
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from file_module import FileProcessor, FileUtils
+from doc_agent.tools.file_module import FileProcessor, FileUtils
+from doc_agent.tools.file_module.parse_executor import ParseExecutor
 
 
 class TestFileProcessor(unittest.TestCase):
@@ -140,6 +139,62 @@ class TestFileProcessor(unittest.TestCase):
         with self.assertRaises(FileNotFoundError):
             self.processor.parse_file("/nonexistent/file.txt", "txt")
 
+    def test_aparse_file_invalid_path(self):
+        """测试异步解析不存在的文件"""
+        with self.assertRaises(FileNotFoundError):
+            asyncio.run(
+                self.processor.aparse_file("/nonexistent/file.txt", "txt"))
+
+    def test_afiletoken_to_outline_storage_token(self):
+        """测试异步解析storage大纲：下载一次并交给解析执行器"""
+        outline = {"title": "测试文档", "word_count": 3000, "chapters": []}
+        downloads = []
+
+        def fake_download(file_token, tmpdir):
+            downloads.append(tmpdir)
+            file_path = os.path.join(tmpdir, "outline.json")
+            with open(file_path, "w", encoding="utf-8") as f:
+                json.dump(outline, f, ensure_ascii=False)
+            return file_path
+
+        processor_module = sys.modules[FileProcessor.__module__]
+        executor = ParseExecutor(use_process_pool=False)
+        with patch.object(self.processor, "download_file", fake_download), \
+                patch.object(processor_module, "get_parse_executor",
+                             return_value=executor):
+            result = asyncio.run(
+                self.processor.afiletoken_to_outline("a" * 32))
+
+        self.assertEqual(result, outline)
+        self.assertEqual(len(downloads), 1)
+        self.assertFalse(os.path.exists(downloads[0]))
+
+    def test_load_text_from_storage_rejects_binary_office_formats(self):
+        """测试storage中的.xls/.ppt文件报告不支持，而不是按文本解析"""
+        for file_name in ["sheet.xls", "slides.ppt"]:
+
+            def fake_download(file_token, tmpdir, file_name=file_name):
+                file_path = os.path.join(tmpdir, file_name)
+                with open(file_path, "wb") as f:
+                    f.write(b"\xd0\xcf\x11\xe0binary")
+                return file_path
+
+            with patch.object(self.processor, "download_file", fake_download):
+                with self.assertRaisesRegex(ValueError, "不支持的文件类型"):
+                    self.processor._load_text_from_storage("a" * 32)
+
+    def test_parse_executor_semaphores_per_event_loop(self):
+        """测试解析并发信号量按事件循环创建"""
+        executor = ParseExecutor(format_concurrency={"excel": 1})
+
+        async def get_semaphore():
+            semaphore = executor._get_semaphore("xlsx")
+            self.assertIs(executor._get_semaphore("csv"), semaphore)
+            return semaphore
+
+        self.assertIsNot(asyncio.run(get_semaphore()),
+                         asyncio.run(get_semaphore()))
+
     def test_parse_file_unsupported_format(self):
         """测试解析不支持的文件格式"""
         with tempfile.NamedTemporaryFile(suffix='.xyz', delete=False) as f:
@@ -0,0 +1,251 @@
+"""
+KNN 检索调优模块
+根据索引规模与目标召回率选择 num_candidates，并提供对比精确 kNN 的离线评测
+"""
+
+import math
+import statistics
+import time
+from typing import Any, Optional, Union
+
+from doc_agent.core.logger import logger
+
+# ES 对 num_candidates 的上限
+ES_MAX_NUM_CANDIDATES = 10000
+
+# 向量字段相似度 -> 精确 kNN 的 script_score 脚本（与 ES 评分方式一致，保证分数非负）
+_EXACT_SCORE_SCRIPTS = {
+    "cosine":
+    "cosineSimilarity(params.query_vector, 'context_vector') + 1.0",
+    "dot_product":
+    "dotProduct(params.query_vector, 'context_vector') + 1000.0",
+    "max_inner_product":
+    "dotProduct(params.query_vector, 'context_vector') + 1000.0",
+    "l2_norm":
+    "1 / (1 + l2norm(params.query_vector, 'context_vector'))",
+}
+
+
+def fit_vector_dims(vector: list[float], dims: int) -> list[float]:
+    """
+    将查询向量截断或补零到索引维度，始终返回新列表，不修改调用方的向量
+
+    Args:
+        vector: 查询向量
+        dims: 索引向量维度
+
+    Returns:
+        List[float]: 维度为 dims 的向量（维度一致时原样返回）
+    """
+    if len(vector) == dims:
+        return vector
+    if len(vector) > dims:
+        logger.debug(f"截断向量维度 {len(vector)} -> {dims}")
+        return vector[:dims]
+    logger.debug(f"扩展向量维度 {len(vector)} -> {dims}")
+    return [*vector, *([0.0] * (dims - len(vector)))]
+
+
+class KnnTuner:
+    """
+    KNN num_candidates 选择器
+
+    num_candidates = k × 召回倍数 × 规模系数：
+    - 召回倍数取 recall_multipliers 中不低于目标召回率的最小档位（由离线评测标定）
+    - 规模系数在索引文档数超过 reference_docs 后按 log10 增长，HNSW 在大索引上需要更多候选
+    多索引查询按其中最大的索引计算。
+    """
+
+    def __init__(self,
+                 target_recall: float = 0.95,
+                 recall_multipliers: Optional[dict[float, float]] = None,
+                 reference_docs: int = 1_000_000,
+                 min_candidates: int = 50,
+                 max_candidates: int = ES_MAX_NUM_CANDIDATES):
+        """
+        Args:
+            target_recall: 默认目标召回率（相对精确 kNN 的 recall@k）
+            recall_multipliers: 召回率档位 -> num_candidates / k 倍数
+            reference_docs: 倍数标定时的索引文档数
+            min_candidates: num_candidates 下限
+            max_candidates: num_candidates 上限（ES 限制为 10000）
+        """
+        self.target_recall = target_recall
+        self.recall_multipliers = dict(
+            sorted((recall_multipliers or {
+                0.9: 2.0,
+                0.95: 4.0,
+                0.99: 10.0
+            }).items()))
+        self.reference_docs = max(1, reference_docs)
+        self.min_candidates = min_candidates
+        self.max_candidates = min(max_candidates, ES_MAX_NUM_CANDIDATES)
+        self._index_doc_counts: dict[str, int] = {}
+
+    @classmethod
+    def from_config(cls, config) -> "KnnTuner":
+        """根据 KnnTuningConfig 创建"""
+        return cls(target_recall=config.target_recall,
+                   recall_multipliers=config.recall_multipliers,
+                   reference_docs=config.reference_docs,
+                   min_candidates=config.min_candidates,
+                   max_candidates=config.max_candidates)
+
+    def update_index_sizes(self, doc_counts: dict[str, int]) -> None:
+        """更新各索引文档数"""
+        self._index_doc_counts.update(doc_counts)
+        logger.info(f"KNN 调优索引规模已更新，共 {len(doc_counts)} 个索引")
+
+    def candidate_multiplier(self,
+                             target_recall: Optional[float] = None) -> float:
+        """目标召回率对应的 num_candidates / k 倍数"""
+        target_recall = target_recall or self.target_recall
+        for recall, multiplier in self.recall_multipliers.items():
+            if recall >= target_recall:
+                return multiplier
+        return list(self.recall_multipliers.values())[-1]
+
+    def size_factor(self, index: Union[str, list[str], None]) -> float:
+        """索引规模系数，未知规模时为 1"""
+        if isinstance(index, str):
+            index = index.split(",")
+        docs = max((self._index_doc_counts.get(name, 0)
+                    for name in index or []),
+                   default=0)
+        if docs <= self.reference_docs:
+            return 1.0
+        return 1.0 + math.log10(docs / self.reference_docs)
+
+    def num_candidates(self,
+                       index: Union[str, list[str], None],
+                       k: int,
+                       target_recall: Optional[float] = None) -> int:
+        """
+        计算 KNN 查询的 num_candidates
+
+        Args:
+            index: 目标索引（名称、逗号分隔名称或列表）
+            k: 返回结果数量
+            target_recall: 目标召回率，默认使用配置值
+
+        Returns:
+            int: num_candidates，不小于 k 且不超过 ES 上限
+        """
+        candidates = math.ceil(k * self.candidate_multiplier(target_recall) *
+                               self.size_factor(index))
+        candidates = max(candidates, k, self.min_candidates)
+        return min(candidates, max(k, self.max_candidates))
+
+
+def recall_at_k(approx_ids: list[str], exact_ids: list[str]) -> float:
+    """近似结果相对精确结果的 recall@k"""
+    if not exact_ids:
+        return 1.0
+    return len(set(approx_ids) & set(exact_ids)) / len(exact_ids)
+
+
+def build_exact_knn_body(query_vector: list[float],
+                         k: int,
+                         similarity: str = "cosine") -> dict[str, Any]:
+    """构建精确（暴力）kNN 查询体，用作评测基准"""
+    return {
+        "size": k,
+        "_source": False,
+        "query": {
+            "script_score": {
+                "query": {
+                    "bool": {
+                        "filter": [{
+                            "term": {
+                                "valid": True
+                            }
+                        }]
+                    }
+                },
+                "script": {
+                    "source":
+                    _EXACT_SCORE_SCRIPTS.get(similarity,
+                                             _EXACT_SCORE_SCRIPTS["cosine"]),
+                    "params": {
+                        "query_vector": query_vector
+                    }
+                }
+            }
+        }
+    }
+
+
+async def benchmark_knn(
+        es_service,
+        index: str,
+        query_vectors: list[list[float]],
+        k: int = 10,
+        candidate_settings: Optional[list[int]] = None) -> list[dict[str, Any]]:
+    """
+    离线评测不同 num_candidates 下的召回率与延迟
+
+    以 script_score 精确 kNN 的 top-k 为基准，对每个 num_candidates 档位执行
+    与线上相同的 KNN 查询体，统计 recall@k 与延迟。
+
+    Args:
+        es_service: 已连接的 ESService
+        index: 评测索引
+        query_vectors: 查询向量列表
+        k: 评测的 top-k
+        candidate_settings: num_candidates 档位，默认 k 的 1/2/4/10/20 倍
+
+    Returns:
+        List[Dict[str, Any]]: 每个档位一项，包含 num_candidates、recall_at_k、
+            latency_p50_ms、latency_p95_ms
+    """
+    candidate_settings = candidate_settings or [
+        min(k * factor, ES_MAX_NUM_CANDIDATES) for factor in (1, 2, 4, 10, 20)
+    ]
+    query_vectors = [
+        fit_vector_dims(vector, es_service.vector_dims)
+        for vector in query_vectors
+    ]
+
+    mapping = await es_service.get_index_mapping(index) or {}
+    similarity = mapping.get("properties", {}).get("context_vector",
+                                                   {}).get("similarity",
+                                                           "cosine")
+    logger.info(
+        f"开始KNN离线评测，索引: {index}, 查询数: {len(query_vectors)}, k: {k}, 相似度: {similarity}"
+    )
+
+    exact_ids = []
+    for vector in query_vectors:
+        response = await es_service._client.search(
+            index=index, body=build_exact_knn_body(vector, k, similarity))
+        exact_ids.append([hit["_id"] for hit in response["hits"]["hits"]])
+
+    report = []
+    for num_candidates in candidate_settings:
+        recalls, latencies = [], []
+        for vector, expected in zip(query_vectors, exact_ids):
+            body = es_service._build_knn_search_body(
+                vector, top_k=k, index=index, num_candidates=num_candidates)
+            body["_source"] = False
+            start_time = time.perf_counter()
+            response = await es_service._client.search(index=index, body=body)
+            latencies.append((time.perf_counter() - start_time) * 1000)
+            recalls.append(
+                recall_at_k([hit["_id"] for hit in response["hits"]["hits"]],
+                            expected))
+
+        latencies.sort()
+        row = {
+            "num_candidates":
+            num_candidates,
+            "recall_at_k":
+            statistics.mean(recalls) if recalls else 0.0,
+            "latency_p50_ms":
+            statistics.median(latencies) if latencies else 0.0,
+            "latency_p95_ms":
+            latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            if latencies else 0.0
+        }
+        logger.info(f"KNN评测结果: {row}")
+        report.append(row)
+    return report
@@ -0,0 +1,394 @@
+"""
+作业级用户文档内存向量索引
+
+作业首次检索用户上传文档时，从 personal_knowledge_base 一次性拉取这些文档的全部切片
+及向量，构建连续的 float32 矩阵；之后该作业的用户文档检索都在本地以矩阵点积暴力求
+top-k（可选 BM25 + RRF 融合），不再访问 ES
+"""
+
+import asyncio
+import math
+import re
+import time
+from collections import Counter
+from collections.abc import Awaitable, Callable
+from typing import Any, Optional
+
+import numpy as np
+
+from doc_agent.core.logger import logger
+from doc_agent.tools.es_service import ESSearchResult, reciprocal_rank_fusion
+from doc_agent.tools.knn_tuning import fit_vector_dims
+from doc_agent.utils.ttl_cache import TTLCache
+
+# 英文/数字按词切分，中文逐字切分（再组合相邻双字）
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+|[\u4e00-\u9fff]")
+
+
+def tokenize(text: str) -> list[str]:
+    """BM25 分词：英文和数字按词，中文取单字及相邻双字"""
+    tokens = []
+    previous_char, previous_end = "", -1
+    for match in _TOKEN_PATTERN.finditer(text.lower()):
+        token = match.group()
+        tokens.append(token)
+        if len(token) == 1 and "\u4e00" <= token <= "\u9fff":
+            if previous_char and previous_end == match.start():
+                tokens.append(previous_char + token)
+            previous_char, previous_end = token, match.end()
+        else:
+            previous_char = ""
+    return tokens
+
+
+def _top_positions(scores: np.ndarray, k: int) -> np.ndarray:
+    """按分数降序返回前 k 个位置（argpartition 选出后只对 k 个排序）"""
+    if k <= 0 or scores.size == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < scores.size:
+        positions = np.argpartition(-scores, k - 1)[:k]
+    else:
+        positions = np.arange(scores.size)
+    return positions[np.argsort(-scores[positions], kind="stable")]
+
+
+class BM25Index:
+    """切片文本的 BM25 倒排索引"""
+
+    def __init__(self, texts: list[str], k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self._size = len(texts)
+        postings: dict[str, tuple[list[int], list[int]]] = {}
+        lengths = np.zeros(self._size, dtype=np.float32)
+        for row, text in enumerate(texts):
+            term_counts = Counter(tokenize(text or ""))
+            lengths[row] = sum(term_counts.values())
+            for term, count in term_counts.items():
+                rows, tfs = postings.setdefault(term, ([], []))
+                rows.append(row)
+                tfs.append(count)
+
+        avg_length = float(lengths.mean()) if self._size else 0.0
+        self._norms = k1 * (1 - b + b * lengths / max(avg_length, 1.0))
+        self._postings = {
+            term: (np.asarray(rows, dtype=np.int64),
+                   np.asarray(tfs, dtype=np.float32),
+                   math.log(1 + (self._size - len(rows) + 0.5) /
+                            (len(rows) + 0.5)))
+            for term, (rows, tfs) in postings.items()
+        }
+
+    def scores(self, query: str) -> np.ndarray:
+        """查询对所有切片的 BM25 分数"""
+        scores = np.zeros(self._size, dtype=np.float32)
+        for term in set(tokenize(query)):
+            posting = self._postings.get(term)
+            if posting is None:
+                continue
+            rows, tfs, idf = posting
+            scores[rows] += idf * tfs * (self.k1 + 1) / (tfs +
+                                                         self._norms[rows])
+        return scores
+
+
+class LocalVectorIndex:
+    """
+    用户文档切片的内存向量索引
+
+    向量按行 L2 归一化后存为连续 float32 矩阵，查询为一次矩阵-向量点积，
+    分数换算为 (1 + cos) / 2，与 ES cosine 相似度的 KNN 评分一致，min_score 语义不变。
+    缺少向量的切片只参与 BM25 检索，不会出现在向量一路的结果中。
+    返回的结果为新的 ESSearchResult，与 ES 检索结果字段相同，可直接重排序。
+    """
+
+    def __init__(self, chunks: list[ESSearchResult],
+                 vectors: list[Optional[list[float]]]):
+        """
+        Args:
+            chunks: 文档切片（ES 解析后的结果）
+            vectors: 与 chunks 对应的 context_vector，缺失向量的切片只用于 BM25
+        """
+        self._chunks = list(chunks)
+        self._has_vector = np.asarray([bool(vector) for vector in vectors],
+                                      dtype=bool)
+        vector_rows = np.flatnonzero(self._has_vector)
+        if vector_rows.size < len(self._chunks):
+            logger.warning(
+                f"⚠️  {len(self._chunks) - vector_rows.size} 个切片缺少向量，仅参与BM25检索")
+
+        present = np.asarray([vectors[row] for row in vector_rows],
+                             dtype=np.float32)
+        dims = present.shape[1] if present.ndim == 2 else 0
+        matrix = np.zeros((len(self._chunks), dims), dtype=np.float32)
+        if dims:
+            matrix[vector_rows] = present
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self._matrix = np.ascontiguousarray(matrix / norms)
+        self.dims = self._matrix.shape[1]
+
+        doc_rows: dict[str, list[int]] = {}
+        for row, chunk in enumerate(self._chunks):
+            doc_rows.setdefault(chunk.doc_id, []).append(row)
+        self._doc_rows = {
+            doc_id: np.asarray(rows, dtype=np.int64)
+            for doc_id, rows in doc_rows.items()
+        }
+        self._bm25: Optional[BM25Index] = None
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+    @property
+    def bm25(self) -> BM25Index:
+        """BM25 索引，首次混合/文本检索时构建"""
+        if self._bm25 is None:
+            self._bm25 = BM25Index([
+                chunk.div_content or chunk.original_content
+                for chunk in self._chunks
+            ])
+        return self._bm25
+
+    def _candidate_rows(self, doc_ids: Optional[list[str]]) -> np.ndarray:
+        """文档范围内的行号，doc_ids 为 None 时为全部切片"""
+        if doc_ids is None:
+            return np.arange(len(self._chunks))
+        rows = [
+            self._doc_rows[doc_id] for doc_id in dict.fromkeys(doc_ids)
+            if doc_id in self._doc_rows
+        ]
+        # 行号升序：覆盖全部切片时可直接使用整个矩阵
+        return np.sort(np.concatenate(rows)) if rows else np.empty(
+            0, dtype=np.int64)
+
+    def _vector_scores(self, query_vector: list[float],
+                       rows: np.ndarray) -> np.ndarray:
+        """向量一路分数，缺少向量的切片为 -inf，不会通过 min_score 过滤"""
+        query = np.asarray(fit_vector_dims(query_vector, self.dims),
+                           dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query /= norm
+        full = rows.size == len(self._chunks)
+        matrix = self._matrix if full else self._matrix[rows]
+        scores = (1.0 + matrix @ query) / 2.0
+        has_vector = self._has_vector if full else self._has_vector[rows]
+        scores[~has_vector] = -np.inf
+        return scores
+
+    def _result(self, row: int, score: float) -> ESSearchResult:
+        chunk = self._chunks[row]
+        return ESSearchResult(id=chunk.id,
+                              doc_id=chunk.doc_id,
+                              index=chunk.index,
+                              domain_id=chunk.domain_id,
+                              doc_from=chunk.doc_from,
+                              file_token=chunk.file_token,
+                              original_content=chunk.original_content,
+                              div_content=chunk.div_content,
+                              source=chunk.source,
+                              score=float(score),
+                              metadata=chunk.metadata,
+                              alias_name=chunk.alias_name)
+
+    def search(self,
+               query: str,
+               query_vector: Optional[list[float]],
+               top_k: int = 10,
+               doc_ids: Optional[list[str]] = None,
+               min_score: float = 0.0,
+               hybrid: Optional[dict[str, Any]] = None) -> list[ESSearchResult]:
+        """
+        在指定文档范围内检索
+
+        Args:
+            query: 查询文本（BM25 使用）
+            query_vector: 查询向量，为空时只执行 BM25（与 ES 回退文本检索一致）
+            top_k: 返回结果数量
+            doc_ids: 文档范围，None 表示全部已加载文档
+            min_score: 向量一路最小分数
+            hybrid: 混合检索参数，与 ESSearchTool.search_many 相同
+                （vector_top_k、text_top_k、vector_weight、text_weight、rank_constant）
+
+        Returns:
+            List[ESSearchResult]: 按分数降序的结果
+        """
+        rows = self._candidate_rows(doc_ids)
+        if rows.size == 0 or top_k <= 0:
+            return []
+
+        # 所有切片都缺少向量时按文本检索
+        use_vector = bool(query_vector) and self.dims > 0
+        if use_vector:
+            vector_scores = self._vector_scores(query_vector, rows)
+            if hybrid is None or not query.strip():
+                positions = _top_positions(vector_scores, top_k)
+                return [
+                    self._result(rows[p], vector_scores[p]) for p in positions
+                    if vector_scores[p] >= min_score
+                ]
+
+        text_scores = self.bm25.scores(query)[rows]
+        if not use_vector:
+            positions = _top_positions(text_scores, top_k)
+            return [
+                self._result(rows[p], text_scores[p]) for p in positions
+                if text_scores[p] > 0
+            ]
+
+        # 两路各自排序后以 RRF 融合（与 ES 混合检索相同的融合方式）
+        vector_positions = _top_positions(
+            vector_scores,
+            hybrid.get("vector_top_k") or top_k)
+        text_positions = _top_positions(text_scores,
+                                        hybrid.get("text_top_k") or top_k)
+        fused = reciprocal_rank_fusion(
+            [[{
+                "_index": "",
+                "_id": int(rows[p])
+            } for p in vector_positions if vector_scores[p] >= min_score],
+             [{
+                 "_index": "",
+                 "_id": int(rows[p])
+             } for p in text_positions if text_scores[p] > 0]],
+            weights=[
+                hybrid.get("vector_weight", 1.0),
+                hybrid.get("text_weight", 1.0)
+            ],
+            rank_constant=hybrid.get("rank_constant", 60),
+            top_k=top_k)
+        return [self._result(hit["_id"], hit["_score"]) for hit in fused]
+
+
+# 注册表中不存在条目的标记（条目的值可以是 None）
+_ABSENT = object()
+
+
+class JobVectorIndexRegistry:
+    """
+    按作业缓存内存向量索引
+
+    同一作业的各章节共享一份索引；文档集合变化时重建。
+    并发章节通过作业级锁只加载一次，按 LRU 和 TTL 淘汰，作业结束时释放。
+    """
+
+    def __init__(self, max_jobs: int = 32, ttl_seconds: float = 3600):
+        # job_id -> (文档集合, 索引)
+        self._cache: TTLCache[str, tuple[frozenset[str],
+                                         Optional[LocalVectorIndex]]] = TTLCache(
+                                             max_jobs,
+                                             ttl_seconds,
+                                             on_evict=self._on_evict)
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    def _on_evict(self, job_id: str, entry: tuple) -> None:
+        self._locks.pop(job_id, None)
+
+    def _get(self, job_id: str, doc_ids: frozenset[str]
+             ) -> tuple[bool, Optional[LocalVectorIndex]]:
+        entry = self._cache.get(job_id, _ABSENT)
+        if entry is _ABSENT:
+            return False, None
+        cached_doc_ids, index = entry
+        if cached_doc_ids != doc_ids:
+            self._cache.pop(job_id)
+            return False, None
+        return True, index
+
+    async def aget(
+        self, job_id: str, doc_ids: list[str],
+        loader: Callable[[list[str]], Awaitable[Optional[LocalVectorIndex]]]
+    ) -> Optional[LocalVectorIndex]:
+        """
+        获取作业索引，不存在时调用 loader 加载
+
+        loader 返回 None（如切片数超限）也会缓存，避免每个章节重复拉取；
+        空索引（文档尚未入库）和 loader 抛出的异常不缓存，下次检索重试
+
+        Returns:
+            Optional[LocalVectorIndex]: 作业索引，不可用时为 None
+        """
+        key = frozenset(doc_ids)
+        found, index = self._get(job_id, key)
+        if found:
+            return index
+
+        lock = self._locks.setdefault(job_id, asyncio.Lock())
+        async with lock:
+            found, index = self._get(job_id, key)
+            if found:
+                return index
+            index = await loader(sorted(key))
+            if index is not None and len(index) == 0:
+                return None
+            self._cache.set(job_id, (key, index))
+            return index
+
+    def release(self, job_id: str) -> None:
+        """释放作业索引"""
+        if self._cache.pop(job_id, _ABSENT) is not _ABSENT:
+            logger.info(f"🧹 释放作业 {job_id} 的用户文档内存索引")
+        self._locks.pop(job_id, None)
+
+
+_registry: Optional[JobVectorIndexRegistry] = None
+
+
+def _get_registry() -> JobVectorIndexRegistry:
+    global _registry
+    from doc_agent.core.config import settings
+
+    if _registry is None:
+        index_config = settings.local_vector_index_config
+        _registry = JobVectorIndexRegistry(
+            max_jobs=index_config.max_jobs,
+            ttl_seconds=index_config.ttl_seconds)
+    return _registry
+
+
+async def get_job_vector_index(job_id: str, doc_ids: list[str],
+                               es_search_tool) -> Optional[LocalVectorIndex]:
+    """
+    获取作业的用户文档内存索引，未启用或不可用时返回 None（由 ES 检索）
+
+    Args:
+        job_id: 作业ID
+        doc_ids: 作业涉及的全部用户文档ID
+        es_search_tool: 用于首次加载切片的 ESSearchTool
+    """
+    from doc_agent.core.config import settings
+
+    index_config = settings.local_vector_index_config
+    if not (index_config.enabled and job_id and doc_ids):
+        return None
+
+    async def load(load_doc_ids: list[str]) -> Optional[LocalVectorIndex]:
+        start_time = time.perf_counter()
+        chunks, vectors = await es_search_tool.load_document_chunks(
+            load_doc_ids, max_chunks=index_config.max_chunks + 1)
+        if len(chunks) > index_config.max_chunks:
+            logger.warning(
+                f"⚠️  用户文档切片数超过 {index_config.max_chunks}，作业 {job_id} 使用ES检索")
+            return None
+        index = LocalVectorIndex(chunks, vectors)
+        if len(index) == 0:
+            # 文档可能尚未完成入库，不缓存空索引，下次检索重新加载
+            logger.warning(f"⚠️  作业 {job_id} 的用户文档暂无可检索切片，本次使用ES检索")
+            return index
+        logger.info(
+            f"📦 作业 {job_id} 用户文档内存索引构建完成: {len(load_doc_ids)} 个文档, "
+            f"{len(index)} 个切片, 维度 {index.dims}, "
+            f"耗时 {time.perf_counter() - start_time:.3f} 秒")
+        return index
+
+    try:
+        return await _get_registry().aget(job_id, doc_ids, load)
+    except Exception as e:
+        logger.warning(f"⚠️  用户文档内存索引加载失败，使用ES检索: {str(e)}")
+        return None
+
+
+def release_job_vector_index(job_id: str) -> None:
+    """作业结束时释放内存索引"""
+    if _registry is not None:
+        _registry.release(job_id)
@@ -3,8 +3,8 @@ RerankerTool 重排序工具
 接收 ESSearchResult 列表，调用 RerankerClient 进行重排序
 """
 
+import asyncio
 import json
-from dataclasses import dataclass
 from typing import Any, Dict, List, Optional
 
 from doc_agent.core.logger import logger
@@ -12,26 +12,8 @@ from doc_agent.core.logger import logger
 from ..llm_clients.providers import RerankerClient
 from .es_service import ESSearchResult
 
-
-@dataclass
-class RerankedSearchResult:
-    """重排序后的搜索结果"""
-    id: str
-    doc_id: str
-    index: str
-    domain_id: str
-    doc_from: str
-    original_content: str
-    div_content: str = ""
-    source: str = ""
-    score: float = 0.0
-    rerank_score: float = 0.0  # 重排序评分
-    metadata: dict[str, Any] = None
-    alias_name: str = ""
-
-    def __post_init__(self):
-        if self.metadata is None:
-            self.metadata = {}
+# 重排序结果与搜索结果为同一类型：重排序返回写入 rerank_score 的浅拷贝，原对象不变
+RerankedSearchResult = ESSearchResult
 
 
 class RerankerTool:
@@ -70,16 +52,7 @@ class RerankerTool:
             return []
 
         try:
-            # 提取文档文本
-            documents = []
-            for result in search_results:
-                # 优先使用 div_content，如果没有则使用 original_content
-                doc_text = result.div_content if result.div_content else result.original_content
-                if doc_text:
-                    documents.append(doc_text)
-                else:
-                    logger.warning(f"文档 {result.id} 内容为空，跳过")
-
+            documents = self._collect_documents(search_results)
             if not documents:
                 logger.warning("所有文档内容都为空，无法进行重排序")
                 return []
@@ -105,6 +78,166 @@ class RerankerTool:
             # 如果重排序失败，返回原始结果（按原始评分排序）
             return self._fallback_to_original_results(search_results)
 
+    async def arerank_search_results(
+            self,
+            query: str,
+            search_results: list[ESSearchResult],
+            top_k: Optional[int] = None) -> list[RerankedSearchResult]:
+        """
+        异步重排序，通过共享连接池调用重排序服务，不阻塞事件循环
+        Args:
+            query: 查询文本
+            search_results: ESSearchResult 列表
+            top_k: 返回结果数量，None表示返回全部
+        Returns:
+            List[RerankedSearchResult]: 重排序后的结果列表
+        """
+        logger.info(
+            f"开始异步重排序，查询: '{query[:50]}...'，输入结果数量: {len(search_results)}")
+
+        if not search_results:
+            logger.warning("输入搜索结果为空，返回空列表")
+            return []
+
+        try:
+            documents = self._collect_documents(search_results)
+            if not documents:
+                logger.warning("所有文档内容都为空，无法进行重排序")
+                return []
+
+            size = top_k if top_k is not None else len(documents)
+            rerank_result = await self.reranker_client.ainvoke(
+                prompt=query, documents=documents, size=size)
+
+            reranked_results = self._parse_rerank_result(
+                rerank_result, search_results, query)
+
+            logger.info(f"异步重排序完成，返回 {len(reranked_results)} 个结果")
+            return reranked_results
+
+        except Exception as e:
+            logger.error(f"异步重排序失败: {str(e)}")
+            return self._fallback_to_original_results(search_results)
+
+    async def ascore_documents(
+            self, query: str,
+            search_results: list[ESSearchResult]
+    ) -> dict[tuple[str, str], float]:
+        """
+        获取每个文档的重排序评分（不做回退，失败时抛出异常，便于调用方缓存）
+        Args:
+            query: 查询文本
+            search_results: ESSearchResult 列表
+        Returns:
+            dict: (索引, 文档ID) -> 重排序评分，内容为空或未被返回的文档不包含在内
+        """
+        documents = self._collect_documents(search_results)
+        if not documents:
+            return {}
+
+        rerank_result = await self.reranker_client.ainvoke(
+            prompt=query, documents=documents, size=len(documents))
+        if not isinstance(rerank_result,
+                          dict) or 'sorted_doc_list' not in rerank_result:
+            raise ValueError(f"重排序结果格式异常: {rerank_result}")
+
+        text_scores = {
+            doc.get('text', ''): doc.get('rerank_score', 0.0)
+            for doc in rerank_result['sorted_doc_list']
+        }
+        scores = {}
+        for result in search_results:
+            doc_text = result.div_content if result.div_content else result.original_content
+            if doc_text in text_scores:
+                scores[(result.index, result.id)] = text_scores[doc_text]
+        return scores
+
+    async def arerank_groups(
+            self,
+            query: str,
+            groups: list[list[ESSearchResult]],
+            top_k: Optional[int] = None,
+            single_request: bool = True
+    ) -> list[list[RerankedSearchResult]]:
+        """
+        对同一查询的多组搜索结果进行重排序
+        （如用户参考文档、风格指南、需求文档、ES结果）
+
+        Args:
+            query: 查询文本
+            groups: 多组搜索结果
+            top_k: 每组返回结果数量，None表示返回全部
+            single_request: True 时所有组合并为一次请求再按组拆分，
+                否则每组单独请求并发执行
+        Returns:
+            list: 与 groups 顺序一致的重排序结果
+        """
+        if not single_request:
+            return list(await asyncio.gather(*[
+                self.arerank_search_results(query, group, top_k)
+                for group in groups
+            ]))
+
+        non_empty = [group for group in groups if group]
+        if not non_empty:
+            return [[] for _ in groups]
+
+        # 合并所有组的文档（去重），重排序评分与组无关，可一次请求完成
+        documents = list(
+            dict.fromkeys(doc for group in non_empty
+                          for doc in self._collect_documents(group)))
+        if not documents:
+            logger.warning("所有文档内容都为空，无法进行重排序")
+            return [[] for _ in groups]
+
+        logger.info(f"合并重排序，组数: {len(non_empty)}，文档数量: {len(documents)}")
+        try:
+            rerank_result = await self.reranker_client.ainvoke(
+                prompt=query, documents=documents, size=len(documents))
+        except Exception as e:
+            logger.error(f"合并重排序失败: {str(e)}")
+            return [
+                self._fallback_to_original_results(group)[:top_k]
+                if group else [] for group in groups
+            ]
+
+        sorted_docs = (rerank_result.get('sorted_doc_list') if isinstance(
+            rerank_result, dict) else None)
+        grouped_results = []
+        for group in groups:
+            if not group:
+                grouped_results.append([])
+                continue
+            if sorted_docs is None:
+                reranked = self._fallback_to_original_results(group)
+            else:
+                group_texts = set(self._collect_documents(group))
+                reranked = self._parse_rerank_result(
+                    {
+                        'sorted_doc_list': [
+                            doc for doc in sorted_docs
+                            if doc.get('text', '') in group_texts
+                        ]
+                    }, group, query)
+            grouped_results.append(
+                reranked[:top_k] if top_k is not None else reranked)
+        return grouped_results
+
+    def _collect_documents(self,
+                           search_results: list[ESSearchResult]) -> list[str]:
+        """
+        提取待重排序的文档文本
+        优先使用 div_content，如果没有则使用 original_content
+        """
+        documents = []
+        for result in search_results:
+            doc_text = result.div_content if result.div_content else result.original_content
+            if doc_text:
+                documents.append(doc_text)
+            else:
+                logger.warning(f"文档 {result.id} 内容为空，跳过")
+        return documents
+
     def _parse_rerank_result(self, rerank_result: dict[str, Any],
                              original_results: list[ESSearchResult],
                              query: str) -> list[RerankedSearchResult]:
@@ -146,21 +279,9 @@ class RerankerTool:
                 # 查找对应的原始结果
                 original_result = original_doc_map.get(doc_text)
                 if original_result:
-                    # 创建重排序结果
-                    reranked_result = RerankedSearchResult(
-                        id=original_result.id,
-                        doc_id=original_result.doc_id,
-                        index=original_result.index,
-                        domain_id=original_result.domain_id,
-                        doc_from=original_result.doc_from,
-                        original_content=original_result.original_content,
-                        div_content=original_result.div_content,
-                        source=original_result.source,
-                        score=original_result.score,  # 保留原始评分
-                        rerank_score=rerank_score,  # 添加重排序评分
-                        metadata=original_result.metadata,
-                        alias_name=original_result.alias_name)
-                    reranked_results.append(reranked_result)
+                    # 写入重排序评分，保留原始评分
+                    reranked_results.append(
+                        original_result.with_rerank_score(rerank_score))
                 else:
                     logger.warning(f"重排序文档在原始结果中未找到: {doc_text[:50]}...")
 
@@ -189,20 +310,8 @@ class RerankerTool:
         logger.info("回退到原始结果")
         fallback_results = []
         for result in original_results:
-            fallback_result = RerankedSearchResult(
-                id=result.id,
-                doc_id=result.doc_id,
-                index=result.index,
-                domain_id=result.domain_id,
-                doc_from=result.doc_from,
-                original_content=result.original_content,
-                div_content=result.div_content,
-                source=result.source,
-                score=result.score,
-                rerank_score=result.score,  # 使用原始评分作为重排序评分
-                metadata=result.metadata,
-                alias_name=result.alias_name)
-            fallback_results.append(fallback_result)
+            # 使用原始评分作为重排序评分
+            fallback_results.append(result.with_rerank_score(result.score))
 
         logger.info(f"回退到原始结果，返回 {len(fallback_results)} 个结果")
         return fallback_results
@@ -13,6 +13,7 @@ from typing import Any, Optional
 import aiohttp
 from bs4 import BeautifulSoup
 from doc_agent.core.logger import logger
+from doc_agent.utils.loop_local import LoopLocal
 
 
 def timer(func=None, *, log_level="info"):
@@ -55,30 +56,41 @@ class WebScraper:
     def __init__(self):
         self.logger = logger.bind(name="web_scraper")
 
-    async def fetch_full_content(self,
-                                 url: str,
-                                 timeout: int = 10) -> Optional[str]:
+    async def fetch_full_content(
+            self,
+            url: str,
+            timeout: float = 10,
+            session: Optional[aiohttp.ClientSession] = None) -> Optional[str]:
         """
         异步获取网页完整内容
 
         Args:
             url: 网页URL
-            timeout: 超时时间（秒）
+            timeout: 单个请求的截止时间（秒），包含连接与读取
+            session: 共享会话，未提供时临时创建
 
         Returns:
             网页的文本内容，失败时返回None
         """
+        timeout_obj = aiohttp.ClientTimeout(total=timeout)
         try:
-            timeout_obj = aiohttp.ClientTimeout(total=timeout)
-            async with aiohttp.ClientSession(timeout=timeout_obj) as session:
-                async with session.get(url) as response:
-                    response.raise_for_status()
-                    html = await response.text()
-                    return self.extract_text_from_html(html)
+            if session is None:
+                async with aiohttp.ClientSession() as own_session:
+                    html = await self._fetch_html(own_session, url,
+                                                  timeout_obj)
+            else:
+                html = await self._fetch_html(session, url, timeout_obj)
+            return self.extract_text_from_html(html)
         except Exception as e:
-            self.logger.error(f"获取网页内容失败 {url}: {e}")
+            self.logger.error(f"获取网页内容失败 {url}: {e!r}")
             return None
 
+    async def _fetch_html(self, session: aiohttp.ClientSession, url: str,
+                          timeout: aiohttp.ClientTimeout) -> str:
+        async with session.get(url, timeout=timeout) as response:
+            response.raise_for_status()
+            return await response.text()
+
     def extract_text_from_html(self, html: str) -> str:
         """
         从HTML中提取文本内容
@@ -130,7 +142,12 @@ class WebSearchConfig:
             "timeout": 15,
             "retries": 3,
             "delay": 1,
-            "fetch_full_content": True
+            "fetch_full_content": True,
+            "fetch_timeout": 8,  # 单个网页抓取的截止时间（秒）
+            "max_concurrent_fetches": 10,  # 所有查询同时抓取的网页数上限
+            "connection_limit": 100,  # 共享连接池总连接数
+            "limit_per_host": 4,  # 每个主机的连接数上限
+            "dns_cache_ttl": 300  # DNS 缓存时间（秒）
         }
 
         # 合并配置
@@ -144,12 +161,19 @@ class WebSearchConfig:
         self.retries = default_config["retries"]
         self.delay = default_config["delay"]
         self.fetch_full_content = default_config["fetch_full_content"]
+        self.fetch_timeout = default_config["fetch_timeout"]
+        self.max_concurrent_fetches = default_config["max_concurrent_fetches"]
+        self.connection_limit = default_config["connection_limit"]
+        self.limit_per_host = default_config["limit_per_host"]
+        self.dns_cache_ttl = default_config["dns_cache_ttl"]
 
 
 class WebSearchTool:
     """
     网络搜索工具类
     支持异步搜索、网页抓取、重试机制
+    搜索与网页抓取共用一个连接池会话（按主机限制连接数并缓存 DNS），
+    需要完整内容的网页并发抓取，受全局并发上限和单请求截止时间约束
     """
 
     def __init__(self,
@@ -165,6 +189,10 @@ class WebSearchTool:
         self.config = WebSearchConfig(config)
         self.web_scraper = WebScraper()
         self.logger = logger.bind(name="web_search")
+        # 共享会话与抓取并发控制绑定事件循环，每个循环各一份
+        # （同步 search 接口和 worker 任务各自使用新的事件循环）
+        self._sessions = LoopLocal(self._create_session,
+                                   is_usable=lambda entry: not entry[0].closed)
 
         logger.info("初始化网络搜索工具")
         if api_key:
@@ -172,6 +200,29 @@ class WebSearchTool:
         else:
             logger.warning("未提供API密钥，将使用配置中的token")
 
+    def _create_session(
+            self) -> tuple[aiohttp.ClientSession, asyncio.Semaphore]:
+        """创建连接池会话（按主机限制连接数并缓存 DNS）及抓取并发信号量"""
+        connector = aiohttp.TCPConnector(
+            limit=self.config.connection_limit,
+            limit_per_host=self.config.limit_per_host,
+            ttl_dns_cache=self.config.dns_cache_ttl)
+        self.logger.info(
+            f"创建网络搜索共享会话: limit={self.config.connection_limit}, "
+            f"limit_per_host={self.config.limit_per_host}")
+        return (aiohttp.ClientSession(connector=connector),
+                asyncio.Semaphore(max(1, self.config.max_concurrent_fetches)))
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """获取当前事件循环的共享会话"""
+        return self._sessions.get()[0]
+
+    async def close(self):
+        """关闭当前事件循环的共享会话"""
+        entry = self._sessions.pop()
+        if entry is not None and not entry[0].closed:
+            await entry[0].close()
+
     @timer(log_level="info")
     async def get_web_search(self,
                              query: str) -> Optional[list[dict[str, Any]]]:
@@ -190,46 +241,47 @@ class WebSearchTool:
         # 创建aiohttp超时对象
         timeout_obj = aiohttp.ClientTimeout(total=self.config.timeout)
 
-        async with aiohttp.ClientSession(timeout=timeout_obj) as session:
-            for attempt in range(1, self.config.retries + 1):
-                try:
-                    async with session.get(self.config.url,
-                                           headers=headers,
-                                           params=params) as response:
-                        response.raise_for_status()
-                        data = await response.json()
-
-                        # 检查API响应状态
-                        if isinstance(data, dict):
-                            # 如果API返回错误状态，记录错误信息并返回None
-                            if data.get('status') is False:
-                                error_msg = data.get('message', '未知错误')
-                                error_code = data.get('code', '未知错误码')
-                                self.logger.error(
-                                    f"API返回错误: {error_msg} (错误码: {error_code})"
-                                )
-                                return None
-
-                            # 如果API返回成功状态，返回数据
-                            if data.get('status') is True:
-                                return data.get("data", [])
-
-                            # 如果没有明确的状态字段，尝试直接获取data
-                            if "data" in data:
-                                return data.get("data", [])
-
-                        # 如果响应格式不符合预期，记录警告
-                        self.logger.warning(f"API响应格式异常: {data}")
-                        return data.get("data", []) if isinstance(
-                            data, dict) else []
-
-                except Exception as e:
-                    self.logger.error(f"第 {attempt} 次请求失败: {e}")
-                    if attempt < self.config.retries:
-                        await asyncio.sleep(self.config.delay)
-                    else:
-                        self.logger.error("达到最大重试次数，请求失败")
-                        return None
+        session = self._get_session()
+        for attempt in range(1, self.config.retries + 1):
+            try:
+                async with session.get(self.config.url,
+                                       headers=headers,
+                                       params=params,
+                                       timeout=timeout_obj) as response:
+                    response.raise_for_status()
+                    data = await response.json()
+
+                    # 检查API响应状态
+                    if isinstance(data, dict):
+                        # 如果API返回错误状态，记录错误信息并返回None
+                        if data.get('status') is False:
+                            error_msg = data.get('message', '未知错误')
+                            error_code = data.get('code', '未知错误码')
+                            self.logger.error(
+                                f"API返回错误: {error_msg} (错误码: {error_code})"
+                            )
+                            return None
+
+                        # 如果API返回成功状态，返回数据
+                        if data.get('status') is True:
+                            return data.get("data", [])
+
+                        # 如果没有明确的状态字段，尝试直接获取data
+                        if "data" in data:
+                            return data.get("data", [])
+
+                    # 如果响应格式不符合预期，记录警告
+                    self.logger.warning(f"API响应格式异常: {data}")
+                    return data.get("data", []) if isinstance(
+                        data, dict) else []
+
+            except Exception as e:
+                self.logger.error(f"第 {attempt} 次请求失败: {e}")
+                if attempt < self.config.retries:
+                    await asyncio.sleep(self.config.delay)
+                else:
+                    self.logger.error("达到最大重试次数，请求失败")
+                    return None
 
     async def get_web_docs(
             self,
@@ -249,29 +301,29 @@ class WebSearchTool:
         if not net_info:
             return []
 
+        # 需要获取完整内容的网页（当前内容较短，少于200字符）并发抓取，
+        # 耗时取决于最慢的单个网页（受截止时间限制），而不是所有网页之和
+        contents = [
+            web_page.get('materialContent', '') for web_page in net_info
+        ]
+        fetch_indices = [
+            i for i, web_page in enumerate(net_info) if fetch_full_content
+            and len(contents[i]) < 200 and web_page.get('url')
+        ]
+        full_contents = await asyncio.gather(*[
+            self._fetch_full_content(net_info[i]['url'])
+            for i in fetch_indices
+        ])
+        fetched = dict(zip(fetch_indices, full_contents))
+
         # 处理每个搜索结果
         web_docs = []
         for index, web_page in enumerate(net_info):
-            # 获取内容
-            content = web_page.get('materialContent', '')
-
-            # 如果需要获取完整内容且当前内容较短（少于200字符）
-            if fetch_full_content and len(content) < 200 and web_page.get(
-                    'url'):
-                self.logger.info(f"获取完整内容: {web_page.get('url')}")
-                try:
-                    full_content = await self.web_scraper.fetch_full_content(
-                        web_page.get('url'))
-                    if full_content:
-                        content = full_content
-                        web_page['full_content_fetched'] = True
-                    else:
-                        web_page['full_content_fetched'] = False
-                except Exception as e:
-                    self.logger.warning(f"获取完整内容失败: {e}")
-                    web_page['full_content_fetched'] = False
-            else:
-                web_page['full_content_fetched'] = False
+            content = contents[index]
+            full_content = fetched.get(index)
+            if full_content:
+                content = full_content
+            web_page['full_content_fetched'] = bool(full_content)
 
             # 格式化文档
             web_page["file_name"] = web_page.get("docName", "")
@@ -291,6 +343,14 @@ class WebSearchTool:
 
         return web_docs
 
+    async def _fetch_full_content(self, url: str) -> Optional[str]:
+        """在全局并发上限内使用共享会话抓取网页，失败或超时返回None"""
+        session, fetch_semaphore = self._sessions.get()
+        async with fetch_semaphore:
+            self.logger.info(f"获取完整内容: {url}")
+            return await self.web_scraper.fetch_full_content(
+                url, timeout=self.config.fetch_timeout, session=session)
+
     async def get_full_content_for_url(self, url: str) -> Optional[str]:
         """
         获取指定URL的完整内容
@@ -301,7 +361,7 @@ class WebSearchTool:
         Returns:
             网页的完整文本内容
         """
-        return await self.web_scraper.fetch_full_content(url)
+        return await self._fetch_full_content(url)
 
     def search(self, query: str) -> str:
         """
@@ -330,6 +390,8 @@ class WebSearchTool:
                     web_docs = loop.run_until_complete(
                         self.get_web_docs(query))
                 finally:
+                    # 共享会话绑定在该临时事件循环上，关闭循环前一并关闭
+                    loop.run_until_complete(self.close())
                     loop.close()
 
             if not web_docs:
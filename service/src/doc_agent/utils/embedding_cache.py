@@ -0,0 +1,215 @@
+"""
+查询向量缓存
+
+按 (模型, 规范化文本) 内容寻址缓存嵌入向量：
+- 进程内 LRU 层，支持 TTL 过期
+- 可选的 Redis 共享层，跨 worker 复用
+向量统一以 float32 紧凑字节存储
+"""
+
+import hashlib
+import unicodedata
+from array import array
+from typing import Any, Callable, Optional
+
+from doc_agent.core.logger import logger
+from doc_agent.utils.loop_local import LoopLocal
+from doc_agent.utils.ttl_cache import TTLCache
+
+
+def normalize_text(text: str) -> str:
+    """规范化查询文本：NFKC 归一化并合并空白字符"""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def make_cache_key(model: str, text: str) -> str:
+    """根据模型和规范化文本生成缓存键"""
+    digest = hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()
+    return f"{model}:{digest}"
+
+
+def pack_vector(vector: list[float]) -> bytes:
+    """将向量压缩为 float32 字节"""
+    return array("f", vector).tobytes()
+
+
+def unpack_vector(data: bytes) -> list[float]:
+    """将 float32 字节还原为向量"""
+    vector = array("f")
+    vector.frombytes(data)
+    return vector.tolist()
+
+
+class EmbeddingCache:
+    """
+    两级嵌入向量缓存
+    本地 LRU 命中直接返回；未命中再批量查询 Redis，并回填本地层
+    """
+
+    def __init__(self,
+                 max_entries: int = 10000,
+                 ttl_seconds: float = 3600,
+                 redis_client: Any = None,
+                 redis_ttl_seconds: int = 7 * 24 * 60 * 60,
+                 redis_key_prefix: str = "emb_cache",
+                 redis_factory: Optional[Callable[[], Any]] = None):
+        """
+        初始化缓存
+        Args:
+            max_entries: 本地层最大条目数
+            ttl_seconds: 本地层过期时间（秒），<=0 表示不过期
+            redis_client: 异步 Redis 客户端（decode_responses=False），为 None 时仅使用本地层
+            redis_ttl_seconds: Redis 层过期时间（秒）
+            redis_key_prefix: Redis 键前缀
+            redis_factory: 创建异步 Redis 客户端，提供时按事件循环各建一个（优先于 redis_client）
+        """
+        self._local: TTLCache[str, bytes] = TTLCache(max_entries, ttl_seconds)
+        self._redis_client = redis_client
+        self._redis_clients = (LoopLocal(redis_factory)
+                               if redis_factory is not None else None)
+        self.redis_ttl_seconds = redis_ttl_seconds
+        self.redis_key_prefix = redis_key_prefix
+        self.redis_hits = 0
+        self.misses = 0
+
+    @property
+    def redis_client(self) -> Any:
+        """当前事件循环可用的 Redis 客户端，为 None 时仅使用本地层"""
+        if self._redis_clients is None:
+            return self._redis_client
+        try:
+            return self._redis_clients.get()
+        except RuntimeError:
+            return None
+
+    @redis_client.setter
+    def redis_client(self, client: Any):
+        self._redis_client = client
+        self._redis_clients = None
+
+    def _redis_key(self, key: str) -> str:
+        return f"{self.redis_key_prefix}:{key}"
+
+    @property
+    def local_hits(self) -> int:
+        return self._local.hits
+
+    async def aget_many(self, model: str,
+                        texts: list[str]) -> list[Optional[list[float]]]:
+        """
+        批量查询缓存
+        Args:
+            model: 模型名称
+            texts: 查询文本列表
+        Returns:
+            list: 与输入顺序一致，未命中的位置为 None
+        """
+        keys = [make_cache_key(model, text) for text in texts]
+        results: list[Optional[list[float]]] = [None] * len(texts)
+        missing: list[int] = []
+        local_values = self._local.get_many(keys)
+        for i, key in enumerate(keys):
+            data = local_values.get(key)
+            if data is not None:
+                results[i] = unpack_vector(data)
+            else:
+                missing.append(i)
+
+        if missing and self.redis_client is not None:
+            try:
+                values = await self.redis_client.mget(
+                    [self._redis_key(keys[i]) for i in missing])
+                still_missing = []
+                redis_values = {}
+                for i, data in zip(missing, values):
+                    if data:
+                        results[i] = unpack_vector(data)
+                        redis_values[keys[i]] = data
+                        self.redis_hits += 1
+                    else:
+                        still_missing.append(i)
+                self._local.set_many(redis_values)
+                missing = still_missing
+            except Exception as e:
+                logger.warning(f"Redis向量缓存查询失败，仅使用本地缓存: {e}")
+
+        self.misses += len(missing)
+        return results
+
+    async def aset_many(self, model: str, texts: list[str],
+                        vectors: list[list[float]]):
+        """
+        批量写入缓存
+        Args:
+            model: 模型名称
+            texts: 查询文本列表
+            vectors: 对应的嵌入向量
+        """
+        packed = [(make_cache_key(model, text), pack_vector(vector))
+                  for text, vector in zip(texts, vectors)]
+        self._local.set_many(dict(packed))
+
+        if packed and self.redis_client is not None:
+            try:
+                pipe = self.redis_client.pipeline(transaction=False)
+                for key, data in packed:
+                    pipe.set(self._redis_key(key),
+                             data,
+                             ex=self.redis_ttl_seconds)
+                await pipe.execute()
+            except Exception as e:
+                logger.warning(f"Redis向量缓存写入失败: {e}")
+
+    def stats(self) -> dict[str, Any]:
+        """获取命中统计"""
+        lookups = self.local_hits + self.redis_hits + self.misses
+        return {
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_rate": (self.local_hits + self.redis_hits) /
+            lookups if lookups else 0.0,
+            "entries": len(self._local),
+        }
+
+    def clear(self):
+        """清空本地层"""
+        self._local.clear()
+
+
+# 全局缓存实例（本地层共享，Redis 客户端按事件循环区分）
+_embedding_cache: Optional[EmbeddingCache] = None
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """
+    获取全局向量缓存，未启用时返回 None
+    Redis 层在每个事件循环首次使用时惰性创建
+    """
+    global _embedding_cache
+    from doc_agent.core.config import settings
+
+    cache_config = settings.embedding_cache_config
+    if not cache_config.enabled:
+        return None
+
+    if _embedding_cache is None:
+        redis_factory = None
+        if cache_config.redis_enabled:
+            import redis.asyncio as aredis
+
+            # 向量以二进制存储，不能开启 decode_responses
+            def redis_factory():
+                return aredis.from_url(settings.redis_url)
+
+        _embedding_cache = EmbeddingCache(
+            max_entries=cache_config.max_entries,
+            ttl_seconds=cache_config.ttl_seconds,
+            redis_ttl_seconds=cache_config.redis_ttl_seconds,
+            redis_factory=redis_factory)
+        logger.info(
+            f"初始化向量缓存: max_entries={cache_config.max_entries}, "
+            f"ttl={cache_config.ttl_seconds}s, redis={cache_config.redis_enabled}"
+        )
+
+    return _embedding_cache
@@ -0,0 +1,60 @@
+"""
+按事件循环缓存的异步资源
+
+异步客户端只能在创建它的事件循环中使用。以循环对象作为弱引用键缓存：
+- 循环被回收后条目自动移除，不会因 id 复用拿到绑定在已关闭循环上的客户端
+- 每次访问时丢弃已关闭循环的条目（已关闭的循环无法再 await 关闭，只能释放引用）
+worker 中每个任务都用 asyncio.run 新建循环，不会因此累积客户端
+"""
+
+import asyncio
+import threading
+import weakref
+from typing import Callable, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class LoopLocal(Generic[T]):
+    """每个事件循环一个实例的惰性缓存"""
+
+    def __init__(self,
+                 factory: Callable[[], T],
+                 is_usable: Optional[Callable[[T], bool]] = None):
+        """
+        Args:
+            factory: 在当前事件循环中创建资源
+            is_usable: 判断已缓存资源是否仍可用（如未被关闭），不可用时重新创建
+        """
+        self._factory = factory
+        self._is_usable = is_usable
+        self._values: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def _discard_closed_loops(self):
+        for loop in [loop for loop in self._values.keys() if loop.is_closed()]:
+            self._values.pop(loop, None)
+
+    def get(self) -> T:
+        """获取当前事件循环的资源，不存在或不可用时创建（必须在事件循环中调用）"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._discard_closed_loops()
+            value = self._values.get(loop)
+            if value is None or (self._is_usable is not None
+                                 and not self._is_usable(value)):
+                value = self._factory()
+                self._values[loop] = value
+            return value
+
+    def pop(self) -> Optional[T]:
+        """移除并返回当前事件循环的资源（由调用方关闭）"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._discard_closed_loops()
+            return self._values.pop(loop, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._discard_closed_loops()
+            return len(self._values)
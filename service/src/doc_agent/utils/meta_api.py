@@ -1,7 +1,9 @@
 import re
+from typing import Any, Optional
 
 from doc_agent.core.logger import logger
 from doc_agent.utils import redis_meta_client
+from doc_agent.utils.ttl_cache import TTLCache
 
 data_platform_mappings = {
     "standard": 0,
@@ -14,13 +16,59 @@ data_platform_mappings = {
 }
 
 
+# 未在Redis中找到的token也缓存，避免重复查询
+_MISSING = object()
+
+
+class MetaInfoCache:
+    """file_token -> 元信息 的进程内 LRU 缓存，支持 TTL 过期"""
+
+    def __init__(self, max_entries: int = 20000, ttl_seconds: float = 1800):
+        self._cache: TTLCache[str, Any] = TTLCache(max_entries, ttl_seconds)
+
+    def get_many(self, tokens: list[str]) -> tuple[dict[str, Any], list[str]]:
+        """
+        批量查询
+        Returns:
+            tuple: (命中的 token -> 元信息（未找到的为 _MISSING）, 未命中的token列表)
+        """
+        found = self._cache.get_many(tokens)
+        return found, [token for token in tokens if token not in found]
+
+    def set_many(self, values: dict[str, Any]):
+        """批量写入"""
+        self._cache.set_many(values)
+
+    def stats(self) -> dict[str, Any]:
+        """获取命中统计"""
+        return self._cache.stats()
+
+    def clear(self):
+        """清空缓存"""
+        self._cache.clear()
+
+
 class MetaApi:
     """
     语料Meta信息查询接口实现
     """
 
     def __init__(self):
-        pass
+        self._cache: Optional[MetaInfoCache] = None
+        self._cache_initialized = False
+
+    def _get_cache(self) -> Optional[MetaInfoCache]:
+        """获取元信息缓存，未启用时返回 None"""
+        if not self._cache_initialized:
+            from doc_agent.core.config import settings
+
+            cache_config = settings.meta_cache_config
+            if cache_config.enabled:
+                self._cache = MetaInfoCache(
+                    max_entries=cache_config.max_entries,
+                    ttl_seconds=cache_config.ttl_seconds)
+            self._cache_initialized = True
+        return self._cache
 
     def get_meta_info(self, query_list: list[dict]) -> dict:
         '''
@@ -42,7 +90,46 @@ class MetaApi:
         }
         '''
 
-        # 参数验证和标准化
+        token_to_datatype = self._normalize_query_list(query_list)
+        if not token_to_datatype:
+            return {}
+
+        results, missing_tokens = self._lookup_cache(token_to_datatype)
+        if missing_tokens:
+            # 优先从Redis获取元信息
+            redis_results = redis_meta_client.get_meta_info_from_redis(
+                missing_tokens)
+            results.update(
+                self._store_redis_results(redis_results, missing_tokens,
+                                          token_to_datatype))
+        return results
+
+    async def aget_meta_info(self, query_list: list[dict]) -> dict:
+        """
+        get_meta_info 的异步版本
+        先查本地缓存，只对未命中的token发起一次异步Redis pipeline请求
+        """
+        token_to_datatype = self._normalize_query_list(query_list)
+        if not token_to_datatype:
+            return {}
+
+        results, missing_tokens = self._lookup_cache(token_to_datatype)
+        if missing_tokens:
+            redis_results = await redis_meta_client.aget_meta_info_from_redis(
+                missing_tokens)
+            results.update(
+                self._store_redis_results(redis_results, missing_tokens,
+                                          token_to_datatype))
+        logger.debug(
+            f"元信息查询: {len(token_to_datatype)} 个token，未命中缓存 {len(missing_tokens)} 个")
+        return results
+
+    def _normalize_query_list(self, query_list: list[dict]) -> dict[str, int]:
+        """
+        校验并标准化查询参数
+        Returns:
+            dict: 去重后的 token -> dataType
+        """
         for query in query_list:
             if 'data_type' in query and 'dataType' not in query:
                 query['dataType'] = query.pop('data_type')
@@ -55,24 +142,32 @@ class MetaApi:
                     isinstance(item, str) for item in query.get('tokenList')):
                 raise ValueError("tokenList must be a list of strings")
 
-        # 收集所有需要查询的fileToken
-        all_file_tokens = []
-        token_to_datatype = {}  # 保存token和dataType的映射，用于后续的规范编号提取
-
+        # 保存token和dataType的映射，用于后续的规范编号提取
+        token_to_datatype = {}
         for query in query_list:
             data_type = query.get('dataType')
             for token in query.get('tokenList', []):
-                all_file_tokens.append(token)
                 token_to_datatype[token] = data_type
+        return token_to_datatype
+
+    def _lookup_cache(
+            self, token_to_datatype: dict[str,
+                                          int]) -> tuple[dict, list[str]]:
+        """查询本地缓存，返回 (已命中的元信息, 需要查询Redis的token)"""
+        cache = self._get_cache()
+        if cache is None:
+            return {}, list(token_to_datatype)
+        found, missing_tokens = cache.get_many(list(token_to_datatype))
+        results = {
+            token: meta
+            for token, meta in found.items() if meta is not _MISSING
+        }
+        return results, missing_tokens
 
-        if not all_file_tokens:
-            return {}
-
-        # 1. 优先从Redis获取元信息
-        redis_results = redis_meta_client.get_meta_info_from_redis(
-            all_file_tokens)
-
-        # 2. 处理Redis返回的原始数据，转换为标准格式
+    def _store_redis_results(self, redis_results: dict[str, dict],
+                             tokens: list[str],
+                             token_to_datatype: dict[str, int]) -> dict:
+        """将Redis原始数据转换为标准格式并写入缓存"""
         converted_redis_results = {}
         for token, redis_data in redis_results.items():
             if isinstance(redis_data, dict):
@@ -85,19 +180,19 @@ class MetaApi:
                     )
                     parsed_meta_info = {}
                 # 转换为标准格式
-                converted_result = self._convert_redis_to_standard_format(
-                    redis_data, parsed_meta_info, token_to_datatype.get(token))
-                converted_redis_results[token] = converted_result
-
-        # 更新redis_results为转换后的结果
-        redis_results = converted_redis_results
-
-        # 5. 合并Redis和HTTP接口的结果
-        final_results = {}
-        final_results.update(redis_results)
-        # final_results.update(http_results)
-
-        return final_results
+                converted_redis_results[
+                    token] = self._convert_redis_to_standard_format(
+                        redis_data, parsed_meta_info,
+                        token_to_datatype.get(token))
+
+        cache = self._get_cache()
+        if cache is not None:
+            # Redis查询失败时同样返回空结果，此时不缓存"未找到"，避免误判
+            cache.set_many({
+                token: converted_redis_results.get(token, _MISSING)
+                for token in tokens
+            } if redis_results else converted_redis_results)
+        return converted_redis_results
 
     def _convert_redis_to_standard_format(self, redis_data: dict,
                                           meta_info: dict,
@@ -199,12 +294,9 @@ class MetaApi:
 meta_api = MetaApi()
 
 
-def update_doc_meta_data(docs: list):
-    '''
-    获取文档的id和domain_ids，并根据data_platform_mappings转换后调用meta_api.get_meta_info
-    '''
-    # 按数据类型分组文档
-    docs_by_type = {}
+def _build_meta_query_list(docs: list) -> list[dict]:
+    """按数据类型分组文档token（跨查询去重），构建元信息查询参数"""
+    docs_by_type: dict[int, dict[str, None]] = {}
 
     for doc in docs:
         file_token = doc.get('doc_id')
@@ -215,24 +307,17 @@ def update_doc_meta_data(docs: list):
         if data_type is None:
             continue
 
-        # 获取token，假设文档中有token字段
         if file_token:
-            if data_type not in docs_by_type:
-                docs_by_type[data_type] = []
-            docs_by_type[data_type].append(file_token)
+            docs_by_type.setdefault(data_type, {})[file_token] = None
 
-    # 构建query_list用于调用meta_api.get_meta_info
-    query_list = []
-    for data_type, tokens in docs_by_type.items():
-        if tokens:  # 确保有token才添加
-            query_list.append({"dataType": data_type, "tokenList": tokens})
+    return [{
+        "dataType": data_type,
+        "tokenList": list(tokens)
+    } for data_type, tokens in docs_by_type.items() if tokens]
 
-    # 调用meta_api.get_meta_info获取元信息
-    meta_info = {}
-    if query_list:
-        meta_info = meta_api.get_meta_info(query_list)
 
-    # 将元信息更新到对应的文档中的meta_data字段
+def _apply_meta_info(docs: list, meta_info: dict) -> list:
+    """将元信息更新到对应的文档中的meta_data字段"""
     for doc in docs:
         doc_id = doc.get('doc_id')
         if doc_id and doc_id in meta_info:
@@ -252,6 +337,34 @@ def update_doc_meta_data(docs: list):
     return docs
 
 
+def update_doc_meta_data(docs: list):
+    '''
+    获取文档的id和domain_ids，并根据data_platform_mappings转换后调用meta_api.get_meta_info
+    '''
+    query_list = _build_meta_query_list(docs)
+
+    # 调用meta_api.get_meta_info获取元信息
+    meta_info = {}
+    if query_list:
+        meta_info = meta_api.get_meta_info(query_list)
+
+    return _apply_meta_info(docs, meta_info)
+
+
+async def aupdate_doc_meta_data(docs: list):
+    '''
+    update_doc_meta_data 的异步版本，不阻塞事件循环
+    可一次传入多个查询的全部文档，token 去重后只查询一次
+    '''
+    query_list = _build_meta_query_list(docs)
+
+    meta_info = {}
+    if query_list:
+        meta_info = await meta_api.aget_meta_info(query_list)
+
+    return _apply_meta_info(docs, meta_info)
+
+
 if __name__ == "__main__":
 
     print("\n" + "=" * 60)
@@ -1,9 +1,12 @@
 import json
+from typing import Any, Optional
 
 import redis
+import redis.asyncio as aredis
 
 from doc_agent.config.nacos_config import config_file as settings
 from doc_agent.core import logger
+from doc_agent.utils.loop_local import LoopLocal
 
 
 class RedisMetaClient:
@@ -14,6 +17,10 @@ class RedisMetaClient:
     def __init__(self):
         self.redis_client = None
         self.meta_key_pattern = "Data:governance:llm:meta:{}"
+        self._connection_kwargs: dict[str, Any] = {}
+        # 异步客户端按事件循环创建，避免跨事件循环复用连接
+        self._async_clients: LoopLocal[aredis.Redis] = LoopLocal(
+            lambda: aredis.Redis(**self._connection_kwargs))
         self._initialize_client()
 
     def _initialize_client(self):
@@ -32,14 +39,17 @@ class RedisMetaClient:
                 f"尝试连接Redis: {redis_host}:{redis_port}, DB: {redis_db}")
 
             # 创建Redis连接池
-            pool = redis.ConnectionPool(host=redis_host,
-                                        port=redis_port,
-                                        password=redis_password,
-                                        db=redis_db,
-                                        decode_responses=True,
-                                        socket_timeout=5,
-                                        socket_connect_timeout=5,
-                                        retry_on_timeout=True)
+            self._connection_kwargs = {
+                "host": redis_host,
+                "port": redis_port,
+                "password": redis_password,
+                "db": redis_db,
+                "decode_responses": True,
+                "socket_timeout": 5,
+                "socket_connect_timeout": 5,
+                "retry_on_timeout": True
+            }
+            pool = redis.ConnectionPool(**self._connection_kwargs)
 
             self.redis_client = redis.Redis(connection_pool=pool)
 
@@ -91,49 +101,11 @@ class RedisMetaClient:
             logger.debug(f"Redis pipeline返回结果数量: {len(redis_results)}")
 
             # 处理查询结果
-            for i, token in enumerate(file_tokens):
-                redis_data = redis_results[i]
-
-                # 检查redis_data的类型和内容
-                if redis_data and isinstance(redis_data,
-                                             dict) and len(redis_data) > 0:
-                    try:
-                        # 解析metaInfo字段（可能是双重JSON编码）
-                        meta_info_str = redis_data.get('metaInfo', '{}')
-                        if meta_info_str:
-                            # 首先尝试解析JSON
-                            first_parse = json.loads(meta_info_str)
-                            # 如果解析结果是字符串，说明是双重编码，需要再次解析
-                            if isinstance(first_parse, str):
-                                meta_info = json.loads(first_parse)
-                                logger.debug(
-                                    f"双重JSON解码成功，token: {token}, 结果: {meta_info}"
-                                )
-                            else:
-                                meta_info = first_parse
-                                logger.debug(
-                                    f"单层JSON解码成功，token: {token}, 结果: {meta_info}"
-                                )
-                        else:
-                            meta_info = {}
-                    except (json.JSONDecodeError, TypeError) as e:
-                        logger.warning(
-                            f"解析metaInfo失败，token: {token}, 原始值: {meta_info_str}, 错误: {str(e)}"
-                        )
-                        meta_info = {}
-
-                    # 直接返回Redis原始数据，包含解析后的metaInfo
-                    redis_data['parsed_metaInfo'] = meta_info
-                    result[token] = redis_data
+            for token, redis_data in zip(file_tokens, redis_results):
+                parsed = self._parse_redis_data(token, redis_data)
+                if parsed is not None:
+                    result[token] = parsed
                     found_tokens.append(token)
-                else:
-                    # 记录无效数据的情况
-                    if redis_data:
-                        logger.warning(
-                            f"Redis返回的数据格式不正确，token: {token}, 数据类型: {type(redis_data)}, 数据: {redis_data}"
-                        )
-                    else:
-                        logger.debug(f"Redis中没有找到token: {token}")
 
             logger.info(f"从Redis获取到 {len(found_tokens)} 个fileToken的元信息")
             return result
@@ -142,6 +114,92 @@ class RedisMetaClient:
             logger.error(f"从Redis获取元信息失败: {str(e)}")
             return {}
 
+    async def aget_meta_info_from_redis(
+            self, file_tokens: list[str]) -> dict[str, dict]:
+        """
+        异步批量获取元信息原始数据，一次 pipeline 往返，不阻塞事件循环
+
+        Args:
+            file_tokens: 文件token列表
+
+        Returns:
+            dict: 与 get_meta_info_from_redis 相同
+        """
+        client = self._get_async_client()
+        if client is None or not file_tokens:
+            return {}
+
+        result = {}
+        try:
+            logger.debug(f"开始异步从Redis查询 {len(file_tokens)} 个token的元信息")
+            pipe = client.pipeline(transaction=False)
+            for token in file_tokens:
+                pipe.hgetall(self.meta_key_pattern.format(token))
+            redis_results = await pipe.execute()
+
+            for token, redis_data in zip(file_tokens, redis_results):
+                parsed = self._parse_redis_data(token, redis_data)
+                if parsed is not None:
+                    result[token] = parsed
+
+            logger.info(f"异步从Redis获取到 {len(result)} 个fileToken的元信息")
+            return result
+
+        except Exception as e:
+            logger.error(f"异步从Redis获取元信息失败: {str(e)}")
+            return {}
+
+    def _get_async_client(self) -> Optional[aredis.Redis]:
+        """获取当前事件循环的异步Redis客户端，同步客户端初始化失败时不可用"""
+        if not self.redis_client or not self._connection_kwargs:
+            return None
+        return self._async_clients.get()
+
+    def _parse_redis_data(self, token: str, redis_data: Any) -> Optional[dict]:
+        """
+        解析单个token的Redis hash数据
+
+        Returns:
+            dict: Redis原始数据 + parsed_metaInfo，数据无效时返回 None
+        """
+        # 检查redis_data的类型和内容
+        if redis_data and isinstance(redis_data, dict) and len(redis_data) > 0:
+            try:
+                # 解析metaInfo字段（可能是双重JSON编码）
+                meta_info_str = redis_data.get('metaInfo', '{}')
+                if meta_info_str:
+                    # 首先尝试解析JSON
+                    first_parse = json.loads(meta_info_str)
+                    # 如果解析结果是字符串，说明是双重编码，需要再次解析
+                    if isinstance(first_parse, str):
+                        meta_info = json.loads(first_parse)
+                        logger.debug(
+                            f"双重JSON解码成功，token: {token}, 结果: {meta_info}")
+                    else:
+                        meta_info = first_parse
+                        logger.debug(
+                            f"单层JSON解码成功，token: {token}, 结果: {meta_info}")
+                else:
+                    meta_info = {}
+            except (json.JSONDecodeError, TypeError) as e:
+                logger.warning(
+                    f"解析metaInfo失败，token: {token}, 原始值: {meta_info_str}, 错误: {str(e)}"
+                )
+                meta_info = {}
+
+            # 直接返回Redis原始数据，包含解析后的metaInfo
+            redis_data['parsed_metaInfo'] = meta_info
+            return redis_data
+
+        # 记录无效数据的情况
+        if redis_data:
+            logger.warning(
+                f"Redis返回的数据格式不正确，token: {token}, 数据类型: {type(redis_data)}, 数据: {redis_data}"
+            )
+        else:
+            logger.debug(f"Redis中没有找到token: {token}")
+        return None
+
     def get_missing_tokens(self, all_tokens: list[str]) -> list[str]:
         """
         获取Redis中不存在的fileToken列表
@@ -0,0 +1,94 @@
+"""
+重排序评分缓存
+
+按 (规范化查询, 索引, 文档ID) 缓存重排序评分（ES 的 _id 只在单个索引内唯一）。
+交叉编码重排序的评分只取决于查询与单个文档，与同批次其他文档无关，
+因此部分命中时只需对未见过的文档请求重排序，再与缓存评分合并。
+"""
+
+from typing import Any, Optional
+
+from doc_agent.core.logger import logger
+from doc_agent.utils.embedding_cache import normalize_text
+from doc_agent.utils.ttl_cache import TTLCache
+
+# 文档键：(索引, 文档ID)
+DocKey = tuple[str, str]
+
+
+def doc_key(result: Any) -> DocKey:
+    """搜索结果的文档键，跨索引检索时 _id 可能重复，需带上索引"""
+    return (result.index, result.id)
+
+
+class RerankScoreCache:
+    """进程内 LRU 重排序评分缓存，支持 TTL 过期"""
+
+    def __init__(self, max_entries: int = 50000, ttl_seconds: float = 3600):
+        """
+        初始化缓存
+        Args:
+            max_entries: 最大条目数
+            ttl_seconds: 过期时间（秒），<=0 表示不过期
+        """
+        # (规范化查询, 索引, 文档ID) -> 重排序评分
+        self._cache: TTLCache[tuple[str, str, str],
+                              float] = TTLCache(max_entries, ttl_seconds)
+
+    def get_many(self, query: str,
+                 doc_keys: list[DocKey]) -> dict[DocKey, float]:
+        """
+        批量查询评分
+        Args:
+            query: 查询文本
+            doc_keys: 文档键 (索引, 文档ID) 列表
+        Returns:
+            dict: 命中的 文档键 -> 重排序评分
+        """
+        query_key = normalize_text(query)
+        found = self._cache.get_many((query_key, *key) for key in doc_keys)
+        return {
+            entry_key[1:]: score
+            for entry_key, score in found.items()
+        }
+
+    def set_many(self, query: str, scores: dict[DocKey, float]):
+        """
+        批量写入评分
+        Args:
+            query: 查询文本
+            scores: 文档键 (索引, 文档ID) -> 重排序评分
+        """
+        query_key = normalize_text(query)
+        self._cache.set_many({(query_key, *key): score
+                              for key, score in scores.items()})
+
+    def stats(self) -> dict[str, Any]:
+        """获取命中统计"""
+        return self._cache.stats()
+
+    def clear(self):
+        """清空缓存"""
+        self._cache.clear()
+
+
+# 全局缓存实例
+_rerank_cache: Optional[RerankScoreCache] = None
+
+
+def get_rerank_cache() -> Optional[RerankScoreCache]:
+    """获取全局重排序评分缓存，未启用时返回 None"""
+    global _rerank_cache
+    from doc_agent.core.config import settings
+
+    cache_config = settings.rerank_cache_config
+    if not cache_config.enabled:
+        return None
+
+    if _rerank_cache is None:
+        _rerank_cache = RerankScoreCache(
+            max_entries=cache_config.max_entries,
+            ttl_seconds=cache_config.ttl_seconds)
+        logger.info(f"初始化重排序评分缓存: max_entries={cache_config.max_entries}, "
+                    f"ttl={cache_config.ttl_seconds}s")
+    return _rerank_cache
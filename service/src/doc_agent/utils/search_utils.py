@@ -9,6 +9,8 @@ from doc_agent.core.logger import logger
 
 from doc_agent.tools.es_service import ESSearchResult
 from doc_agent.tools.reranker import RerankedSearchResult, RerankerTool
+from doc_agent.utils.rerank_cache import (RerankScoreCache, doc_key,
+                                          get_rerank_cache)
 
 
 def format_search_results(results: list[ESSearchResult],
@@ -91,9 +93,14 @@ async def rerank_search_results(search_results: list[ESSearchResult],
     try:
         logger.info(f"开始重排序，原始结果数量: {len(search_results)}")
 
-        # 执行重排序
-        reranked_results = reranker_tool.rerank_search_results(
-            query=query, search_results=search_results, top_k=top_k)
+        # 执行重排序（异步，不阻塞事件循环），启用缓存时仅对未命中的文档请求重排序
+        rerank_cache = get_rerank_cache()
+        if rerank_cache is not None:
+            reranked_results = await _rerank_with_cache(
+                search_results, query, reranker_tool, rerank_cache, top_k)
+        else:
+            reranked_results = await reranker_tool.arerank_search_results(
+                query=query, search_results=search_results, top_k=top_k)
 
         logger.info(f"重排序完成，返回 {len(reranked_results)} 个结果")
 
@@ -109,22 +116,57 @@ async def rerank_search_results(search_results: list[ESSearchResult],
         # 如果重排序失败，返回原始结果的前top_k个
         fallback_results = []
         for result in search_results[:top_k]:
-            fallback_result = RerankedSearchResult(
-                id=result.id,
-                doc_id=result.doc_id,
-                original_content=result.original_content,
-                div_content=result.div_content,
-                source=result.source,
-                score=result.score,
-                rerank_score=result.score,  # 使用原始评分
-                metadata=result.metadata,
-                alias_name=result.alias_name)
-            fallback_results.append(fallback_result)
+            # 使用原始评分
+            fallback_results.append(result.with_rerank_score(result.score))
 
         logger.info(f"使用原始结果作为后备，返回 {len(fallback_results)} 个结果")
         return fallback_results
 
 
+async def _rerank_with_cache(search_results: list[ESSearchResult], query: str,
+                             reranker_tool: RerankerTool,
+                             rerank_cache: RerankScoreCache,
+                             top_k: int) -> list[RerankedSearchResult]:
+    """
+    基于评分缓存的重排序
+    已缓存的 (查询, 索引, 文档ID) 直接复用评分，只把未见过的文档发送给重排序服务，
+    合并后按评分降序取 top_k，与完整重排序的输出一致
+    """
+    cached_scores = rerank_cache.get_many(
+        query, [doc_key(result) for result in search_results])
+    unseen_results = [
+        result for result in search_results
+        if doc_key(result) not in cached_scores
+    ]
+    logger.info(
+        f"重排序缓存命中 {len(search_results) - len(unseen_results)}/{len(search_results)}"
+    )
+
+    scores = dict(cached_scores)
+    if unseen_results:
+        fresh_scores = await reranker_tool.ascore_documents(
+            query, unseen_results)
+        rerank_cache.set_many(query, fresh_scores)
+        scores.update(fresh_scores)
+
+    scored_results = [
+        result for result in search_results if doc_key(result) in scores
+    ]
+    if not scored_results:
+        if any(result.div_content or result.original_content
+               for result in search_results):
+            raise ValueError("重排序未返回任何评分")
+        logger.warning("所有文档内容都为空，无法进行重排序")
+        return []
+
+    scored_results.sort(key=lambda result: scores[doc_key(result)],
+                        reverse=True)
+    return [
+        result.with_rerank_score(scores[doc_key(result)])
+        for result in scored_results[:top_k]
+    ]
+
+
 def format_reranked_results(reranked_results: list[RerankedSearchResult],
                             query: str,
                             indices_list: list[str] = None) -> str:
@@ -180,7 +222,8 @@ async def search_and_rerank(
     final_top_k: int = 5,
     filters: Optional[dict[str, Any]] = None,
     config: Optional[dict[str, Any]] = None,
-    index: str = "*"
+    index: str = "*",
+    search_results: Optional[list[ESSearchResult]] = None
 ) -> tuple[list[ESSearchResult], list[RerankedSearchResult], str]:
     """
     执行搜索并进行重排序
@@ -192,6 +235,7 @@ async def search_and_rerank(
         initial_top_k: 初始搜索返回结果数量
         final_top_k: 重排序后返回结果数量
         filters: 过滤条件
+        search_results: 已批量获取的搜索结果（如 search_many），提供时跳过搜索
     Returns:
         tuple: (原始搜索结果, 重排序结果, 格式化字符串)
     """
@@ -205,14 +249,15 @@ async def search_and_rerank(
     if config:
         logger.debug(f"配置参数: {config}")
 
-    # 执行搜索
-    logger.info(f"执行搜索: {query}")
-    search_results = await es_search_tool.search(
-        query=query,
-        query_vector=query_vector,
-        top_k=initial_top_k,
-        min_score=config.get('min_score', 0.3) if config else 0.3,
-        index=index)
+    # 执行搜索（已有批量检索结果时直接使用）
+    if search_results is None:
+        logger.info(f"执行搜索: {query}")
+        search_results = await es_search_tool.search(
+            query=query,
+            query_vector=query_vector,
+            top_k=initial_top_k,
+            min_score=config.get('min_score', 0.3) if config else 0.3,
+            index=index)
 
     logger.info(f"搜索完成，获得 {len(search_results)} 个原始结果")
 
@@ -0,0 +1,116 @@
+"""
+进程内 LRU 缓存，支持 TTL 过期与命中统计
+
+查询向量、重排序评分、文档元信息和作业内存索引等缓存共用此实现，
+各自只负责缓存键的构造和值的编码。
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable, Iterable
+from typing import Any, Callable, Generic, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """线程安全的 LRU 缓存，条目写入后 ttl_seconds 过期"""
+
+    def __init__(self,
+                 max_entries: int,
+                 ttl_seconds: float = 0,
+                 on_evict: Optional[Callable[[K, V], None]] = None):
+        """
+        Args:
+            max_entries: 最大条目数，超出时淘汰最久未使用的条目
+            ttl_seconds: 过期时间（秒），<=0 表示不过期
+            on_evict: 条目因容量被淘汰时的回调（在锁内调用，不应阻塞）
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._on_evict = on_evict
+        # key -> (过期时间, 值)，过期时间为 0 表示不过期
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, key: K, now: float) -> tuple[bool, Any]:
+        """在锁内查找条目，过期条目直接删除"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at and expires_at < now:
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def get(self, key: K, default: Any = None) -> Any:
+        """获取值，未命中或已过期时返回 default"""
+        with self._lock:
+            found, value = self._lookup(key, time.monotonic())
+            if found:
+                self.hits += 1
+                return value
+            self.misses += 1
+            return default
+
+    def get_many(self, keys: Iterable[K]) -> dict[K, V]:
+        """批量获取，返回命中的 key -> 值"""
+        now = time.monotonic()
+        found_values: dict[K, V] = {}
+        with self._lock:
+            for key in keys:
+                found, value = self._lookup(key, now)
+                if found:
+                    found_values[key] = value
+                    self.hits += 1
+                else:
+                    self.misses += 1
+        return found_values
+
+    def set(self, key: K, value: V) -> None:
+        """写入单个条目"""
+        self.set_many({key: value})
+
+    def set_many(self, values: dict[K, V]) -> None:
+        """批量写入，写入后按容量淘汰"""
+        expires_at = (time.monotonic() +
+                      self.ttl_seconds) if self.ttl_seconds > 0 else 0
+        with self._lock:
+            for key, value in values.items():
+                self._entries[key] = (expires_at, value)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                evicted_key, (_, evicted_value) = self._entries.popitem(
+                    last=False)
+                if self._on_evict is not None:
+                    self._on_evict(evicted_key, evicted_value)
+
+    def pop(self, key: K, default: Any = None) -> Any:
+        """移除并返回条目（不检查过期）"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def stats(self) -> dict[str, Any]:
+        """获取命中统计"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+        }
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,171 @@
+"""
+全局作业准入队列测试（fakeredis 执行 Lua 脚本）
+"""
+
+import asyncio
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+from doc_agent.core import admission_queue as aq  # noqa: E402
+from doc_agent.core.admission_queue import AdmissionQueue  # noqa: E402
+
+
+@pytest.fixture
+def redis_client(monkeypatch):
+    client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+
+    async def get_redis_client():
+        return client
+
+    monkeypatch.setattr(aq.TaskManager, "get_redis_client", get_redis_client)
+    return client
+
+
+def _queue(worker_id: str, launched: list) -> AdmissionQueue:
+
+    async def handler(task_id: str, **kwargs):
+        return task_id
+
+    def launcher(task_id, coro):
+        launched.append(task_id)
+        coro.close()
+
+    queue = AdmissionQueue(worker_id, capacity=4)
+    queue.register_handler("document", handler)
+    queue._launcher = launcher
+    return queue
+
+
+@pytest.mark.asyncio
+async def test_jobs_are_claimed_fairly_across_tenants(redis_client):
+    launched = []
+    queue = _queue("worker-1", launched)
+
+    positions = [
+        await queue.submit(task_id, "document", tenant, {})
+        for task_id, tenant in [("a1", "A"), ("a2", "A"), ("a3", "A"),
+                                ("b1", "B")]
+    ]
+
+    # 租户 B 的首个作业与租户 A 的首个作业同一轮次，排在 A 的后续作业之前
+    assert positions == [1, 2, 3, 2]
+    assert await queue.get_waiting_index("a2") == 3
+
+    await queue._claim(4, now=100.0, lease_seconds=30)
+
+    assert launched == ["a1", "b1", "a2", "a3"]
+    assert await queue.get_waiting_index("a1") == 0
+    assert await redis_client.hget(aq.ADMISSION_LEASE_OWNERS_KEY,
+                                   "a1") == "worker-1"
+    assert await redis_client.zscore(aq.ADMISSION_LEASES_KEY, "a1") == 130.0
+
+
+@pytest.mark.asyncio
+async def test_cancel_and_waiting_index(redis_client):
+    queue = _queue("worker-1", [])
+    await queue.submit("job-1", "document", "A", {})
+
+    assert await queue.get_waiting_index("job-1") == 1
+    assert await queue.cancel("job-1")
+    assert not await queue.cancel("job-1")
+    assert await queue.get_waiting_index("job-1") is None
+    assert await redis_client.hget(aq.ADMISSION_PAYLOADS_KEY, "job-1") is None
+
+
+@pytest.mark.asyncio
+async def test_expired_lease_is_requeued_at_front(redis_client):
+    launched = []
+    queue = _queue("worker-1", launched)
+    await queue.submit("job-1", "document", "A", {"x": 1})
+    await queue._claim(1, now=0.0, lease_seconds=10)
+    await queue.submit("job-2", "document", "A", {})
+
+    await queue._reap_expired(now=100.0)
+
+    assert await queue.get_waiting_index("job-1") == 1
+    assert await redis_client.hget(aq.ADMISSION_LEASE_OWNERS_KEY,
+                                   "job-1") is None
+    # 载荷保留，重新领取时仍可执行
+    await queue._claim(1, now=100.0, lease_seconds=10)
+    assert launched == ["job-1", "job-1"]
+
+
+@pytest.mark.asyncio
+async def test_release_and_renew_only_touch_own_leases(redis_client):
+    first = _queue("worker-1", [])
+    second = _queue("worker-2", [])
+    await first.submit("job-1", "document", "A", {})
+    await first._claim(1, now=0.0, lease_seconds=10)
+    first._local_jobs.add("job-1")
+
+    # worker-1 失联，租约过期后被 worker-2 重新领取
+    await first._reap_expired(now=100.0)
+    await second._claim(1, now=100.0, lease_seconds=10)
+    second._local_jobs.add("job-1")
+
+    await first._renew_leases(now=105.0, lease_seconds=10)
+    assert await redis_client.zscore(aq.ADMISSION_LEASES_KEY, "job-1") == 110.0
+
+    await first._release("job-1")
+    assert await redis_client.hget(aq.ADMISSION_LEASE_OWNERS_KEY,
+                                   "job-1") == "worker-2"
+    assert await redis_client.hget(aq.ADMISSION_PAYLOADS_KEY,
+                                   "job-1") is not None
+
+    await second._renew_leases(now=105.0, lease_seconds=10)
+    assert await redis_client.zscore(aq.ADMISSION_LEASES_KEY, "job-1") == 115.0
+
+    await second._release("job-1")
+    assert await second.get_waiting_index("job-1") is None
+    assert await redis_client.hget(aq.ADMISSION_PAYLOADS_KEY, "job-1") is None
+
+
+@pytest.mark.asyncio
+async def test_lost_lease_cancels_local_job(redis_client):
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def handler(task_id: str, **kwargs):
+        started.set()
+        try:
+            await asyncio.sleep(3600)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    first = AdmissionQueue("worker-1", capacity=4)
+    first.register_handler("document", handler)
+    first._launcher = lambda task_id, coro: asyncio.create_task(coro)
+    second = _queue("worker-2", [])
+
+    await first.submit("job-1", "document", "A", {})
+    await first._claim(1, now=0.0, lease_seconds=10)
+    await started.wait()
+
+    # worker-1 续约超时，租约被回收并由 worker-2 领取
+    await first._reap_expired(now=100.0)
+    await second._claim(1, now=100.0, lease_seconds=10)
+    await first._renew_leases(now=105.0, lease_seconds=10)
+
+    await asyncio.wait_for(cancelled.wait(), 1)
+    await asyncio.sleep(0)
+    assert first._local_jobs == set()
+    assert first._job_tasks == {}
+    # 被取消的作业不会释放 worker-2 持有的租约
+    assert await redis_client.hget(aq.ADMISSION_LEASE_OWNERS_KEY,
+                                   "job-1") == "worker-2"
+
+
+def test_keys_share_one_cluster_slot():
+    from redis.crc import key_slot
+
+    keys = [
+        aq.ADMISSION_QUEUE_KEY, aq.ADMISSION_PAYLOADS_KEY,
+        aq.ADMISSION_LEASES_KEY, aq.ADMISSION_LEASE_OWNERS_KEY,
+        aq.ADMISSION_VTIME_KEY, aq.ADMISSION_SEQ_KEY,
+        f"{aq.ADMISSION_TENANT_KEY_PREFIX}A"
+    ]
+    assert len({key_slot(key.encode()) for key in keys}) == 1
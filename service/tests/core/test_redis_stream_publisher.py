@@ -0,0 +1,193 @@
+"""
+作业事件流发布测试（fakeredis 执行写入脚本）
+"""
+
+import json
+from unittest.mock import AsyncMock
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+from doc_agent.core.redis_stream_publisher import (  # noqa: E402
+    COMPACT_TOKEN_EVENT_TYPE,
+    TOKEN_EVENT_TYPE,
+    AsyncRedisStreamPublisher,
+    StreamEventBuffer,
+)
+
+
+def _stream_id(stream_id: str) -> tuple[int, int]:
+    ms, seq = stream_id.split("-")
+    return int(ms), int(seq)
+
+
+@pytest.fixture
+def redis_client():
+    return fakeredis.aioredis.FakeRedis(decode_responses=True)
+
+
+class TestAsyncRedisStreamPublisher:
+
+    @pytest.mark.asyncio
+    async def test_publish_event_stamps_redis_assigned_id(self, redis_client):
+        publisher = AsyncRedisStreamPublisher(redis_client, "default")
+
+        stream_id = await publisher.publish_event("job-1", {"eventType": "测试"})
+
+        [(entry_id, fields)] = await redis_client.xrange("job-1")
+        assert entry_id == stream_id
+        payload = json.loads(fields["data"])
+        assert payload["eventType"] == "测试"
+        assert payload["redisStreamId"] == stream_id
+        assert 0 < await redis_client.ttl("job-1") <= 24 * 60 * 60
+
+    @pytest.mark.asyncio
+    async def test_ids_stay_increasing_after_ahead_writer_and_delete(
+            self, redis_client):
+        # 其他进程以超前的 ID 写入后又删除了该事件
+        await redis_client.xadd("job-1", {"data": "{}"}, id="99999999999999-5")
+        await redis_client.xdel("job-1", "99999999999999-5")
+        await redis_client.set("stream_seq:{job-1}", "99999999999999-5")
+        publisher = AsyncRedisStreamPublisher(redis_client, "default")
+
+        first = await publisher.publish_event("job-1", {"eventType": "a"}, False)
+        second = await publisher.publish_event("job-1", {"eventType": "b"},
+                                               False)
+
+        assert _stream_id(first) == (99999999999999, 6)
+        assert _stream_id(second) == (99999999999999, 7)
+
+
+class TestStreamEventBuffer:
+
+    @pytest.mark.asyncio
+    async def test_batches_events_in_one_pipeline(self, redis_client,
+                                                  monkeypatch):
+        buffer = StreamEventBuffer(redis_client, flush_interval_ms=10)
+        publisher = AsyncRedisStreamPublisher(redis_client,
+                                              "default",
+                                              buffer=buffer)
+        pipelines = []
+        real_pipeline = redis_client.pipeline
+
+        def counting_pipeline(**kwargs):
+            pipelines.append(kwargs)
+            return real_pipeline(**kwargs)
+
+        monkeypatch.setattr(redis_client, "pipeline", counting_pipeline)
+
+        await buffer.start()
+        for _ in range(3):
+            assert await publisher.publish_event("job-1", {"eventType": "测试"},
+                                                 False)
+        await buffer.close()
+
+        entries = await redis_client.xrange("job-1")
+        ids = [entry_id for entry_id, _ in entries]
+        assert ids == sorted(ids, key=_stream_id)
+        assert [json.loads(f["data"])["redisStreamId"]
+                for _, f in entries] == ids
+        assert buffer.stats()["published"] == 3
+        assert len(pipelines) == 1
+
+    def test_drops_token_events_above_watermark(self, redis_client):
+        buffer = StreamEventBuffer(redis_client,
+                                   max_queue_size=4,
+                                   token_high_watermark=0.5)
+
+        results = [
+            buffer.offer("job-1", {"eventType": TOKEN_EVENT_TYPE}, False)
+            for _ in range(3)
+        ]
+        assert [bool(r) for r in results] == [True, True, False]
+
+        # 非 token 事件不受水位线影响，但仍受队列容量约束
+        assert buffer.offer("job-1", {"eventType": "章节写作"}, False)
+        assert buffer.offer("job-1", {"eventType": "章节写作"}, False)
+        assert buffer.offer("job-1", {"eventType": "章节写作"}, False) is None
+        assert buffer.stats()["dropped_tokens"] == 1
+        assert buffer.stats()["dropped_events"] == 1
+        assert buffer.stats()["queued"] == 4
+
+    @pytest.mark.asyncio
+    async def test_deletes_by_handle_after_writes(self, redis_client):
+        buffer = StreamEventBuffer(redis_client,
+                                   flush_interval_ms=10,
+                                   max_len=100)
+
+        await buffer.start()
+        token_handle = buffer.offer("job-1", {
+            "eventType": COMPACT_TOKEN_EVENT_TYPE,
+            "i": 0,
+            "d": "文本"
+        }, False)
+        kept = buffer.offer("job-1", {"eventType": "章节写作"}, False)
+        # 与写入处于同一批次的删除会等到 ID 分配后再执行
+        buffer.offer_delete("job-1", [token_handle])
+        await buffer.close()
+
+        [(_, fields)] = await redis_client.xrange("job-1")
+        assert json.loads(fields["data"])["eventType"] == "章节写作"
+        assert kept.startswith("pending:")
+        assert buffer._stream_ids.get(token_handle) is None
+
+    @pytest.mark.asyncio
+    async def test_compact_token_event_has_no_stream_metadata(
+            self, redis_client):
+        buffer = StreamEventBuffer(redis_client)
+        buffer.offer("job-1", {
+            "eventType": COMPACT_TOKEN_EVENT_TYPE,
+            "i": 0,
+            "d": "文本"
+        }, False)
+
+        assert await buffer._flush_batch(buffer._drain_batch())
+
+        [(_, fields)] = await redis_client.xrange("job-1")
+        assert json.loads(fields["data"]) == {
+            "eventType": COMPACT_TOKEN_EVENT_TYPE,
+            "i": 0,
+            "d": "文本"
+        }
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_requeues_non_token_events_with_retry_limit(
+            self, redis_client, monkeypatch):
+        buffer = StreamEventBuffer(redis_client,
+                                   flush_interval_ms=10,
+                                   max_retries=1)
+        real_pipeline = redis_client.pipeline
+
+        def failing_pipeline(**kwargs):
+            pipe = real_pipeline(**kwargs)
+            pipe.execute = AsyncMock(side_effect=ConnectionError("down"))
+            return pipe
+
+        monkeypatch.setattr(redis_client, "pipeline", failing_pipeline)
+
+        first = buffer.offer("job-1", {"eventType": "大纲生成"}, False)
+        buffer.offer("job-1", {"eventType": TOKEN_EVENT_TYPE}, False)
+        buffer.offer_delete("job-1", [first])
+
+        # XDEL 引用同批次的事件，留到下一批
+        assert not await buffer._flush_batch(buffer._drain_batch())
+        queued_later = buffer.offer("job-1", {"eventType": "章节写作"}, False)
+        # token 事件被丢弃，其余事件按原顺序回到队首，排在新事件之前
+        assert [(item[0], item[3]) for item in buffer._queue] == [
+            ("xadd", first), ("xdel", (first, )), ("xadd", queued_later)
+        ]
+
+        assert not await buffer._flush_batch(buffer._drain_batch())
+        assert [item[3] for item in buffer._queue] == [(first, ),
+                                                       queued_later]
+        assert buffer.stats()["failed"] == 2
+
+        monkeypatch.setattr(redis_client, "pipeline", real_pipeline)
+        while buffer._queue:
+            assert await buffer._flush_batch(buffer._drain_batch())
+        assert buffer.stats()["published"] == 1
+        assert buffer._retries == {}
+        [(_, fields)] = await redis_client.xrange("job-1")
+        assert json.loads(fields["data"])["eventType"] == "章节写作"
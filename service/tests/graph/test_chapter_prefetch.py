@@ -0,0 +1,130 @@
+"""
+章节研究预取测试
+"""
+
+import asyncio
+
+import pytest
+
+from doc_agent.graph.main_orchestrator import builder
+from doc_agent.schemas import Source
+
+
+def _source(source_id: int) -> Source:
+    return Source(id=source_id,
+                  doc_id=f"doc-{source_id}",
+                  doc_from="self",
+                  domain_id="web",
+                  index="web",
+                  source_type="webpage",
+                  title=f"来源{source_id}",
+                  content="",
+                  url=f"https://example.com/{source_id}")
+
+
+class _FakeResearchGraph:
+    """按输入的起始编号生成两个信源，预取时返回推迟的信源事件"""
+
+    def __init__(self, block_prefetch: bool = False):
+        self.inputs = []
+        self.block_prefetch = block_prefetch
+
+    async def ainvoke(self, chapter_input: dict) -> dict:
+        self.inputs.append(chapter_input)
+        deferred = chapter_input.get("defer_source_events", False)
+        if deferred and self.block_prefetch:
+            await asyncio.Event().wait()
+        start = chapter_input["current_citation_index"]
+        sources = [_source(start), _source(start + 1)]
+        result = {**chapter_input, "gathered_sources": sources}
+        if deferred:
+            result["deferred_sources_event"] = {
+                "web_sources": sources,
+                "description": "信息收集完成"
+            }
+        return result
+
+
+async def _writer(state: dict) -> dict:
+    return {
+        "final_document": f"## 第{state['current_chapter_index'] + 1}章",
+        "cited_sources_in_chapter": state["gathered_sources"]
+    }
+
+
+def _state(job_id: str, chapter_index: int, citation_index: int) -> dict:
+    return {
+        "job_id": job_id,
+        "topic": "测试",
+        "chapters_to_process": [{
+            "chapter_title": "第一章"
+        }, {
+            "chapter_title": "第二章"
+        }],
+        "current_chapter_index": chapter_index,
+        "current_citation_index": citation_index,
+        "completed_chapters": [],
+        "completed_chapters_content": [],
+        "all_sources": [],
+    }
+
+
+@pytest.fixture
+def published(monkeypatch):
+    events = []
+
+    async def fake_publish(job_id, step, task_type, status, data, **kwargs):
+        events.append((job_id, step, status, data))
+
+    monkeypatch.setattr(builder, "apublish_event", fake_publish)
+    monkeypatch.setattr(builder.settings.chapter_pipeline_config,
+                        "chapter_summary", False)
+    return events
+
+
+@pytest.mark.asyncio
+async def test_prefetched_sources_are_published_with_real_citation_ids(
+        published):
+    research_graph = _FakeResearchGraph()
+    node = builder.create_chapter_processing_node(None, research_graph,
+                                                  _writer)
+
+    first = await node(_state("job-1", 0, 1))
+    second = await node(_state("job-1", 1, first["current_citation_index"]))
+
+    assert [i.get("defer_source_events", False)
+            for i in research_graph.inputs] == [False, True]
+    # 预取结果只在平移编号后发布一次信源事件
+    assert len(published) == 1
+    job_id, step, status, data = published[0]
+    assert (job_id, step, status) == ("job-1", "信息收集", "SUCCESS")
+    # safe_serialize 将数字序列化为字符串，与前端收到的事件格式一致
+    assert [s["id"] for s in data["web_sources"]] == ["2", "3"]
+    assert second["current_citation_index"] == 3
+
+
+@pytest.mark.asyncio
+async def test_release_chapter_tasks_cancels_pending_prefetch(published):
+    research_graph = _FakeResearchGraph(block_prefetch=True)
+    node = builder.create_chapter_processing_node(None, research_graph,
+                                                  _writer)
+
+    await node(_state("job-2", 0, 1))
+    await asyncio.sleep(0)
+    builder.release_chapter_tasks("job-2")
+    await asyncio.sleep(0)
+
+    # 任务已移除，下一章节重新研究
+    await node(_state("job-2", 1, 2))
+    assert [i.get("defer_source_events", False)
+            for i in research_graph.inputs] == [False, True, False]
+    assert published == []
+
+
+@pytest.mark.asyncio
+async def test_empty_job_id_is_rejected(published):
+    node = builder.create_chapter_processing_node(None, _FakeResearchGraph(),
+                                                  _writer)
+
+    with pytest.raises(ValueError):
+        await node(_state("", 0, 1))
@@ -0,0 +1,99 @@
+"""
+流水线模式引用编号重排测试
+"""
+
+import pytest
+
+from doc_agent.graph.main_orchestrator import builder
+from doc_agent.graph.main_orchestrator.builder import renumber_chapter_citations
+from doc_agent.schemas import Source
+
+
+def _source(source_id: int, url: str) -> Source:
+    return Source(id=source_id,
+                  doc_id=f"doc-{source_id}",
+                  doc_from="self",
+                  domain_id="web",
+                  index="web",
+                  source_type="webpage",
+                  title=url,
+                  content="",
+                  url=url)
+
+
+def test_renumber_chapter_citations_is_global_and_dedupes_urls():
+    contents = [
+        "## 第一章\n\n观点A[1]，观点B[2]。",
+        "## 第二章\n\n观点C[1]<信息源 2>，年份[2024]。",
+    ]
+    sources = [
+        [_source(1, "https://a"), _source(2, "https://b")],
+        [_source(1, "https://c"), _source(2, "https://a")],
+    ]
+
+    new_contents, cited_sources = renumber_chapter_citations(contents, sources)
+
+    assert new_contents[0] == "## 第一章\n\n观点A[1]，观点B[2]。"
+    assert new_contents[1] == "## 第二章\n\n观点C[3]<信息源 1>，年份[2024]。"
+    assert [(s.id, s.url) for s in cited_sources] == [(1, "https://a"),
+                                                       (2, "https://b"),
+                                                       (3, "https://c")]
+
+
+@pytest.mark.asyncio
+async def test_pipelined_chapters_publish_disjoint_ids_and_correct_content(
+        monkeypatch):
+    published = []
+    writer_starts = []
+
+    async def fake_publish(job_id, step, task_type, status, data, **kwargs):
+        published.append((step, data))
+
+    class FakeResearchGraph:
+
+        async def ainvoke(self, chapter_input):
+            assert chapter_input["defer_source_events"]
+            # 第二章的第二个信源与第一章重复
+            urls = ["https://a", "https://b"] if chapter_input[
+                "current_chapter_index"] == 0 else ["https://c", "https://a"]
+            sources = [_source(i, url) for i, url in enumerate(urls, 1)]
+            return {
+                **chapter_input, "gathered_sources": sources,
+                "deferred_sources_event": {
+                    "web_sources": sources
+                }
+            }
+
+    async def writer(state):
+        start = state["current_citation_index"]
+        writer_starts.append(start)
+        return {
+            "final_document": f"观点[{start}][{start + 1}]",
+            "cited_sources_in_chapter": state["gathered_sources"]
+        }
+
+    monkeypatch.setattr(builder, "apublish_event", fake_publish)
+    node = builder.create_pipelined_chapters_node(FakeResearchGraph(), writer)
+
+    result = await node({
+        "job_id": "job-1",
+        "chapters_to_process": [{
+            "chapter_title": "第一章"
+        }, {
+            "chapter_title": "第二章"
+        }],
+    })
+
+    source_events = [data for step, data in published if step == "信息收集"]
+    # safe_serialize 将数字序列化为字符串，与前端收到的事件格式一致
+    assert [[s["id"] for s in data["web_sources"]]
+            for data in source_events] == [["1", "2"], ["3", "4"]]
+    assert writer_starts == [1, 3]
+    # 第二章重排后编号变化，发布更正后的章节全文
+    corrections = [
+        data for step, data in published
+        if step == builder.CHAPTER_CONTENT_EVENT_TYPE
+    ]
+    assert [(c["chapterIndex"], c["content"])
+            for c in corrections] == [(1, "观点[3][1]")]
+    assert result["completed_chapters_content"] == ["观点[1][2]", "观点[3][1]"]
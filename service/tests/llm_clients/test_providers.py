@@ -1,7 +1,10 @@
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
 
 from doc_agent.llm_clients.providers import (
     DeepSeekClient,
+    EmbeddingClient,
     GeminiClient,
     InternalLLMClient,
     MoonshotClient,
@@ -91,3 +94,18 @@ class TestLLMClients:
         result = client.invoke("测试prompt")
         assert "Internal答案" in result
         assert "<think>" not in result
+
+    @pytest.mark.asyncio
+    @patch('httpx.AsyncClient.post', new_callable=AsyncMock)
+    async def test_embedding_client_aembed_many(self, mock_post):
+        mock_response = MagicMock()
+        mock_response.json.return_value = [[0.1, 0.2], [0.3, 0.4]]
+        mock_response.raise_for_status.return_value = None
+        mock_post.return_value = mock_response
+        client = EmbeddingClient(base_url="http://fake", api_key="EMPTY")
+        vectors = await client.aembed_many(["查询一", "查询二"])
+        assert vectors == [[0.1, 0.2], [0.3, 0.4]]
+        # 所有文本在一次请求中发送
+        assert mock_post.call_count == 1
+        assert mock_post.call_args.kwargs["json"]["inputs"] == ["查询一", "查询二"]
+        await EmbeddingClient.aclose()
@@ -1,4 +1,5 @@
-from unittest.mock import patch
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
@@ -238,41 +239,65 @@ class TestESSearchTool:
 
         await search_tool.close()
 
-    @patch(
-        'src.doc_agent.tools.es_discovery.ESDiscovery.discover_knowledge_indices'
-    )
-    @patch('src.doc_agent.tools.es_service.ESService.search')
     @pytest.mark.asyncio
-    async def test_hybrid_search(self, mock_search, mock_discover_indices,
-                                 mock_es_search_results):
-        """测试混合搜索"""
-        # 配置mock
-        mock_discover_indices.return_value = [{
-            "name": "documents",
-            "vector_dims": 1536
-        }]
-        mock_search.return_value = mock_es_search_results
+    async def test_hybrid_search(self):
+        """测试混合搜索：KNN 与 BM25 在一次 msearch 中发出并按 RRF 融合"""
+        from doc_agent.tools.es_service import ESService
+
+        def hit(doc_id, score):
+            return {
+                "_id": doc_id,
+                "_index": "documents",
+                "_score": score,
+                "_source": {
+                    "doc_id": doc_id,
+                    "content": f"内容{doc_id}"
+                }
+            }
+
+        with patch.object(ESService, "_ensure_connected", MagicMock()):
+            search_tool = ESSearchTool(hosts=["localhost:9200"],
+                                       username="test_user",
+                                       password="test_pass")
+        search_tool._discovery.refresh_knn_profile = AsyncMock()
+        search_tool._discovery.get_best_index = MagicMock(
+            return_value="documents")
+        search_tool._discovery.get_vector_dims = MagicMock(return_value=1536)
+        service = search_tool._es_service
+        service.valid_indeces = ["documents"]
+        service._ensure_connected = AsyncMock()
+        service._client = MagicMock()
+        service._client.close = AsyncMock()
+        # 第一个子响应为 KNN 结果，第二个为 BM25 结果
+        service._client.msearch = AsyncMock(return_value={
+            "responses": [
+                {"hits": {"hits": [hit("a", 0.9), hit("b", 0.8),
+                                   hit("low", 0.1)]}},
+                {"hits": {"hits": [hit("c", 12.0), hit("b", 9.0)]}},
+            ]
+        })
 
-        search_tool = ESSearchTool(hosts=["localhost:9200"],
-                                   username="test_user",
-                                   password="test_pass")
-
-        # 模拟查询向量
         query_vector = [0.1] * 1536
-
-        # 执行混合搜索
-        results = await search_tool.search_with_hybrid(
-            query="自然语言处理", query_vector=query_vector, top_k=3)
-
-        # 验证结果
-        assert len(results) == 3
+        with patch("doc_agent.tools.es_service.aupdate_doc_meta_data",
+                   AsyncMock(side_effect=lambda docs: docs)):
+            results = await search_tool.search_with_hybrid(
+                query="自然语言处理",
+                query_vector=query_vector,
+                top_k=3,
+                config={"text_recall_size": 5})
+
+        service._client.msearch.assert_awaited_once()
+        body = service._client.msearch.call_args.kwargs["body"]
+        assert len(body) == 4
+        assert body[0]["index"] == body[2]["index"] == "documents"
+        assert body[1]["knn"]["query_vector"] == query_vector
+        assert body[3]["size"] == 5
+        assert "自然语言处理" in json.dumps(body[3], ensure_ascii=False)
+        # b 两路都命中排第一；低于 min_score 的向量结果不参与融合
+        assert [r.id for r in results] == ["b", "a", "c"]
         assert all(isinstance(r, ESSearchResult) for r in results)
-
-        # 验证混合搜索调用
-        mock_search.assert_called_once()
-        call_args = mock_search.call_args
-        assert call_args[1]["query_vector"] == query_vector
-        assert call_args[1]["query"] == "自然语言处理"
+        assert results[0].score == pytest.approx(1 / 62 + 1 / 62)
+        assert results[1].score == pytest.approx(1 / 61)
 
         await search_tool.close()
 
@@ -341,3 +366,103 @@ class TestESSearchTool:
         assert call_args[1]["top_k"] == 5  # vector_recall_size
 
         await search_tool.close()
+
+
+class TestESServiceSearchMany:
+    """ESService.search_many 批量检索测试"""
+
+    @pytest.mark.asyncio
+    async def test_search_many_single_msearch_and_demux(self):
+        """多个查询合并为一次 msearch，并按查询拆分结果"""
+        from doc_agent.tools.es_service import ESService
+
+        def hit(doc_id, score, index="standard_index_prod"):
+            return {
+                "_id": doc_id,
+                "_index": index,
+                "_score": score,
+                "_source": {
+                    "doc_id": doc_id,
+                    "content": f"内容{doc_id}"
+                }
+            }
+
+        with patch.object(ESService, "_ensure_connected", MagicMock()):
+            service = ESService(hosts=["http://fake:9200"])
+        service._ensure_connected = AsyncMock()
+        service._client = MagicMock()
+        service._client.msearch = AsyncMock(return_value={
+            "responses": [
+                {"hits": {"hits": [hit("a", 0.9), hit("b", 0.8)]}},
+                {"error": {"type": "search_phase_execution_exception"}},
+                {"hits": {"hits": [hit("c", 0.7, "personal_knowledge_base")]}},
+            ]
+        })
+
+        with patch("doc_agent.tools.es_service.aupdate_doc_meta_data",
+                   AsyncMock(side_effect=lambda docs: docs)) as mock_meta:
+            results = await service.search_many([
+                {"index": "standard_index_prod", "query": "q1",
+                 "query_vector": [0.1] * 1536},
+                {"index": "standard_index_prod", "query": "q2",
+                 "query_vector": [0.2] * 1536},
+                {"index": "personal_knowledge_base", "query": "q1",
+                 "query_vector": [0.1] * 1536,
+                 "filters": {"doc_id": ["c"]}},
+            ])
+
+        service._client.msearch.assert_awaited_once()
+        assert "responses.status" in service._client.msearch.call_args.kwargs[
+            "filter_path"]
+        mock_meta.assert_awaited_once()
+        assert [[r.id for r in group] for group in results] == [["a", "b"],
+                                                                 [], ["c"]]
+        assert results[0][1].score == 0.8
+        assert results[2][0].doc_from == "self"
+
+    @pytest.mark.asyncio
+    async def test_search_many_hybrid_fuses_knn_and_bm25(self):
+        """混合检索的 KNN 与 BM25 子查询在同一次 msearch 中发出，并按 RRF 融合"""
+        from doc_agent.tools.es_service import ESService
+
+        def hit(doc_id, score):
+            return {
+                "_id": doc_id,
+                "_index": "standard_index_prod",
+                "_score": score,
+                "_source": {
+                    "doc_id": doc_id,
+                    "content": f"内容{doc_id}"
+                }
+            }
+
+        with patch.object(ESService, "_ensure_connected", MagicMock()):
+            service = ESService(hosts=["http://fake:9200"])
+        service._ensure_connected = AsyncMock()
+        service._client = MagicMock()
+        service._client.msearch = AsyncMock(return_value={
+            "responses": [
+                {"hits": {"hits": [hit("a", 0.9), hit("b", 0.8),
+                                   hit("low", 0.1)]}},
+                {"hits": {"hits": [hit("c", 12.0), hit("b", 9.0)]}},
+            ]
+        })
+
+        with patch("doc_agent.tools.es_service.aupdate_doc_meta_data",
+                   AsyncMock(side_effect=lambda docs: docs)):
+            results = await service.search_hybrid(
+                index="standard_index_prod",
+                query="q1",
+                query_vector=[0.1] * 1536,
+                top_k=3,
+                text_top_k=5,
+                min_score=0.3)
+
+        body = service._client.msearch.call_args.kwargs["body"]
+        assert len(body) == 4
+        assert "knn" in body[1]
+        assert body[3]["size"] == 5
+        assert {"term": {"valid": True}} in body[3]["query"]["bool"]["filter"]
+        # b 两路都命中排第一；低于 min_score 的向量结果不参与融合
+        assert [r.id for r in results] == ["b", "a", "c"]
+        assert results[0].score == pytest.approx(1 / 62 + 1 / 62)
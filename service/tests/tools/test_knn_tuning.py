@@ -0,0 +1,57 @@
+"""
+KNN 调优测试
+"""
+
+from unittest.mock import MagicMock, patch
+
+from doc_agent.tools.es_service import ESService
+from doc_agent.tools.knn_tuning import KnnTuner, fit_vector_dims, recall_at_k
+
+
+def test_fit_vector_dims_returns_new_list():
+    vector = [0.1, 0.2]
+
+    padded = fit_vector_dims(vector, 4)
+    truncated = fit_vector_dims(vector, 1)
+
+    assert padded == [0.1, 0.2, 0.0, 0.0]
+    assert truncated == [0.1]
+    assert vector == [0.1, 0.2]
+
+
+def test_num_candidates_scales_with_recall_and_index_size():
+    tuner = KnnTuner(target_recall=0.95,
+                     recall_multipliers={
+                         0.9: 2.0,
+                         0.95: 4.0,
+                         0.99: 10.0
+                     },
+                     reference_docs=1000,
+                     min_candidates=10)
+    tuner.update_index_sizes({"small": 500, "large": 100000})
+
+    assert tuner.num_candidates("small", 10) == 40
+    assert tuner.num_candidates("small", 10, target_recall=0.99) == 100
+    # 100 倍于标定规模：系数 1 + log10(100) = 3
+    assert tuner.num_candidates("large", 10) == 120
+    assert tuner.num_candidates(["small", "large"], 10) == 120
+    assert tuner.num_candidates("small", 5000, target_recall=0.99) == 10000
+
+
+def test_build_knn_search_body_uses_tuner_and_keeps_vector():
+    with patch.object(ESService, "_ensure_connected", MagicMock()):
+        service = ESService(hosts=["http://fake:9200"],
+                            knn_tuner=KnnTuner(min_candidates=10))
+    service.vector_dims = 4
+    vector = [0.1, 0.2]
+
+    body = service._build_knn_search_body(vector, top_k=10)
+
+    assert body["knn"]["query_vector"] == [0.1, 0.2, 0.0, 0.0]
+    assert body["knn"]["num_candidates"] == 40
+    assert vector == [0.1, 0.2]
+
+
+def test_recall_at_k():
+    assert recall_at_k(["a", "b", "x"], ["a", "b", "c"]) == 2 / 3
+    assert recall_at_k([], []) == 1.0
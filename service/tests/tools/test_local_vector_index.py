@@ -0,0 +1,144 @@
+"""
+作业级内存向量索引测试（离线，不依赖 ES）
+"""
+
+import asyncio
+
+import pytest
+
+from doc_agent.tools.es_service import ESSearchResult
+from doc_agent.tools.local_vector_index import (
+    JobVectorIndexRegistry,
+    LocalVectorIndex,
+    tokenize,
+)
+
+
+def _chunk(chunk_id: str, doc_id: str, text: str) -> ESSearchResult:
+    return ESSearchResult(id=chunk_id,
+                          doc_id=doc_id,
+                          index="personal_knowledge_base",
+                          doc_from="self",
+                          original_content=text,
+                          div_content=text,
+                          metadata={"source": "self"})
+
+
+def _build_index() -> LocalVectorIndex:
+    chunks = [
+        _chunk("a1", "doc_a", "电力系统 负荷预测"),
+        _chunk("a2", "doc_a", "变压器 故障诊断"),
+        _chunk("b1", "doc_b", "负荷预测 模型 对比"),
+        _chunk("b2", "doc_b", "没有向量的切片"),
+    ]
+    vectors = [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.8, 0.6, 0.0], None]
+    return LocalVectorIndex(chunks, vectors)
+
+
+def test_tokenize_mixes_words_and_chinese_bigrams():
+    assert tokenize("GPU 负荷预测") == ["gpu", "负", "荷", "负荷", "预", "荷预", "测", "预测"]
+
+
+def test_vector_search_matches_es_cosine_score_and_scope():
+    index = _build_index()
+
+    results = index.search("负荷预测", [2.0, 0.0, 0.0], top_k=2)
+
+    assert len(index) == 4
+    assert [r.id for r in results] == ["a1", "b1"]
+    assert results[0].score == pytest.approx(1.0)
+    assert results[1].score == pytest.approx((1 + 0.8) / 2)
+
+    scoped = index.search("负荷预测", [1.0, 0.0, 0.0],
+                          top_k=5,
+                          doc_ids=["doc_b"],
+                          min_score=0.95)
+    assert [r.id for r in scoped] == []
+    assert index.search("", [1.0, 0.0, 0.0], doc_ids=["missing"]) == []
+
+
+def test_results_are_new_objects_per_query():
+    index = _build_index()
+
+    first = index.search("", [1.0, 0.0, 0.0], top_k=1)[0]
+    first.rerank_score = 0.9
+    second = index.search("", [1.0, 0.0, 0.0], top_k=1)[0]
+
+    assert first is not second
+    assert second.rerank_score == 0.0
+
+
+def test_chunks_without_vectors_are_only_found_by_bm25():
+    index = _build_index()
+
+    assert [r.id for r in index.search("没有向量", None, top_k=1)] == ["b2"]
+    vector_ids = [
+        r.id for r in index.search("", [1.0, 1.0, 1.0], top_k=4, min_score=-1)
+    ]
+    assert vector_ids and "b2" not in vector_ids
+
+    text_only = LocalVectorIndex([_chunk("c1", "doc_c", "变压器 故障")], [None])
+    assert [r.id for r in text_only.search("变压器", [1.0, 0.0, 0.0])] == ["c1"]
+
+
+def test_bm25_and_hybrid_search():
+    index = _build_index()
+
+    text_only = index.search("变压器故障", None, top_k=2)
+    assert [r.id for r in text_only] == ["a2"]
+
+    hybrid = index.search("变压器故障", [1.0, 0.0, 0.0],
+                          top_k=3,
+                          hybrid={
+                              "vector_top_k": 1,
+                              "text_top_k": 1,
+                              "rank_constant": 60
+                          })
+    assert {r.id for r in hybrid} == {"a1", "a2"}
+    assert hybrid[0].score == pytest.approx(1 / 61)
+
+
+def test_registry_loads_once_per_job_and_rebuilds_on_new_docs():
+    registry = JobVectorIndexRegistry(max_jobs=1)
+    loads = []
+
+    async def loader(doc_ids):
+        loads.append(doc_ids)
+        await asyncio.sleep(0)
+        return _build_index()
+
+    async def run():
+        first, second = await asyncio.gather(
+            registry.aget("job", ["doc_b", "doc_a"], loader),
+            registry.aget("job", ["doc_a", "doc_b"], loader))
+        assert first is second
+        await registry.aget("job", ["doc_a"], loader)
+        await registry.aget("other", ["doc_a"], loader)
+        await registry.aget("job", ["doc_a"], loader)
+
+    asyncio.run(run())
+
+    assert loads == [["doc_a", "doc_b"], ["doc_a"], ["doc_a"], ["doc_a"]]
+
+
+def test_registry_does_not_cache_empty_index():
+    registry = JobVectorIndexRegistry()
+    loads = []
+
+    async def loader(doc_ids):
+        loads.append(doc_ids)
+        if len(loads) == 1:
+            return LocalVectorIndex([], [])
+        return _build_index()
+
+    async def run():
+        assert await registry.aget("job", ["doc_a"], loader) is None
+        index = await registry.aget("job", ["doc_a"], loader)
+        assert len(index) == 4
+        assert await registry.aget("job", ["doc_a"], loader) is index
+        registry.release("job")
+        await registry.aget("job", ["doc_a"], loader)
+
+    asyncio.run(run())
+
+    assert len(loads) == 3
@@ -1,4 +1,4 @@
-from unittest.mock import patch
+from unittest.mock import AsyncMock, patch
 
 import pytest
 
@@ -36,7 +36,7 @@ class TestRerankerTool:
                            alias_name="reports")
         ]
 
-    @patch('src.doc_agent.tools.reranker.RerankerClient.invoke')
+    @patch('doc_agent.tools.reranker.RerankerClient.invoke')
     def test_rerank_sorts_documents_by_score(self, mock_invoke,
                                              sample_search_results):
         """测试重排序按评分排序文档"""
@@ -69,6 +69,10 @@ class TestRerankerTool:
         assert reranked_results[1].div_content == "深度学习与计算机视觉"
         assert reranked_results[2].rerank_score == 0.1
         assert reranked_results[2].div_content == "人工智能在医疗诊断中的应用"
+        # 重排序返回浅拷贝，原搜索结果不携带本次查询的评分
+        assert reranked_results[0] is not sample_search_results[1]
+        assert reranked_results[0].metadata is sample_search_results[1].metadata
+        assert all(r.rerank_score == 0.0 for r in sample_search_results)
 
         # 验证API调用
         mock_invoke.assert_called_once()
@@ -76,7 +80,7 @@ class TestRerankerTool:
         assert call_args[1]["prompt"] == "机器学习"
         assert len(call_args[1]["documents"]) == 3
 
-    @patch('src.doc_agent.tools.reranker.RerankerClient.invoke')
+    @patch('doc_agent.tools.reranker.RerankerClient.invoke')
     def test_rerank_with_top_k_limit(self, mock_invoke, sample_search_results):
         """测试带top_k限制的重排序"""
         # 配置mock返回重排序结果
@@ -110,7 +114,7 @@ class TestRerankerTool:
         call_args = mock_invoke.call_args
         assert call_args[1]["size"] == 2
 
-    @patch('src.doc_agent.tools.reranker.RerankerClient.invoke')
+    @patch('doc_agent.tools.reranker.RerankerClient.invoke')
     def test_rerank_with_empty_results(self, mock_invoke):
         """测试空搜索结果的重排序"""
         reranker_tool = RerankerTool(base_url="http://fake", api_key="fake")
@@ -124,7 +128,7 @@ class TestRerankerTool:
         # 验证没有调用API
         mock_invoke.assert_not_called()
 
-    @patch('src.doc_agent.tools.reranker.RerankerClient.invoke')
+    @patch('doc_agent.tools.reranker.RerankerClient.invoke')
     def test_rerank_with_invalid_response(self, mock_invoke,
                                           sample_search_results):
         """测试无效API响应的处理"""
@@ -143,7 +147,7 @@ class TestRerankerTool:
         for result in reranked_results:
             assert result.rerank_score == result.score
 
-    @patch('src.doc_agent.tools.reranker.RerankerClient.invoke')
+    @patch('doc_agent.tools.reranker.RerankerClient.invoke')
     def test_rerank_with_missing_documents(self, mock_invoke,
                                            sample_search_results):
         """测试重排序结果中缺少文档的处理"""
@@ -234,7 +238,7 @@ class TestRerankerTool:
         assert analysis["effectiveness"] == "moderate"
         assert analysis["relevance_score"] > 0  # 应该有相关性
 
-    @patch('src.doc_agent.tools.reranker.RerankerClient.invoke')
+    @patch('doc_agent.tools.reranker.RerankerClient.invoke')
     def test_rerank_with_empty_document_content(self, mock_invoke):
         """测试文档内容为空的情况"""
         # 创建包含空内容的搜索结果
@@ -297,7 +301,7 @@ class TestRerankerTool:
         assert reranked_result.metadata["category"] == "test"
         assert reranked_result.alias_name == "test_index"
 
-    @patch('src.doc_agent.tools.reranker.RerankerClient.invoke')
+    @patch('doc_agent.tools.reranker.RerankerClient.invoke')
     def test_rerank_api_error_handling(self, mock_invoke,
                                        sample_search_results):
         """测试API错误处理"""
@@ -315,3 +319,40 @@ class TestRerankerTool:
         # 验证重排序评分等于原始评分（回退情况）
         for result in reranked_results:
             assert result.rerank_score == result.score
+
+    @pytest.mark.asyncio
+    async def test_arerank_groups_single_request(self):
+        """测试多组结果合并为一次重排序请求并按组拆分"""
+
+        def make_result(doc_id, content, score):
+            return ESSearchResult(id=doc_id,
+                                  doc_id=doc_id,
+                                  index="idx",
+                                  domain_id="domain",
+                                  doc_from="self",
+                                  file_token="",
+                                  original_content=content,
+                                  div_content=content,
+                                  score=score)
+
+        group_a = [make_result("a1", "文档A1", 0.5), make_result("a2", "文档A2", 0.6)]
+        group_b = [make_result("b1", "文档B1", 0.7)]
+
+        reranker_tool = RerankerTool(base_url="http://fake", api_key="fake")
+        mock_ainvoke = AsyncMock(return_value={
+            "sorted_doc_list": [
+                {"text": "文档A2", "rerank_score": 0.95},
+                {"text": "文档B1", "rerank_score": 0.9},
+                {"text": "文档A1", "rerank_score": 0.1},
+            ]
+        })
+        with patch.object(reranker_tool.reranker_client, "ainvoke",
+                          mock_ainvoke):
+            results = await reranker_tool.arerank_groups(
+                query="测试", groups=[group_a, [], group_b], top_k=1)
+
+        mock_ainvoke.assert_awaited_once()
+        assert len(mock_ainvoke.call_args[1]["documents"]) == 3
+        assert [r.id for r in results[0]] == ["a2"]
+        assert results[1] == []
+        assert [r.id for r in results[2]] == ["b1"]
@@ -1,3 +1,6 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
 from doc_agent.tools.web_search import WebSearchTool
 
 
@@ -162,3 +165,68 @@ class TestWebSearchTool:
         # 应该有说明文字
         assert any("注意:" in line for line in lines)
         assert any("模拟的搜索结果" in line for line in lines)
+
+    def test_get_web_docs_fetches_full_content_concurrently(self):
+        """测试短内容网页在共享会话上并发抓取，受全局并发上限约束"""
+        tool = WebSearchTool(config={"max_concurrent_fetches": 2})
+        net_info = [{
+            "url": f"http://site{i}.example/page",
+            "docName": f"网页{i}",
+            "materialContent": "摘要"
+        } for i in range(4)]
+        net_info.append({
+            "url": "http://long.example/page",
+            "docName": "长网页",
+            "materialContent": "长" * 300
+        })
+        sessions = []
+        in_flight = 0
+        max_in_flight = 0
+
+        async def fake_fetch(url, timeout, session):
+            nonlocal in_flight, max_in_flight
+            sessions.append(session)
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return None if "site0" in url else f"完整内容 {url}"
+
+        async def run():
+            try:
+                return await tool.get_web_docs("测试查询")
+            finally:
+                await tool.close()
+
+        with patch.object(tool, "get_web_search",
+                          AsyncMock(return_value=net_info)), patch.object(
+                              tool.web_scraper, "fetch_full_content",
+                              side_effect=fake_fetch):
+            web_docs = asyncio.run(run())
+
+        assert len(sessions) == 4
+        assert all(session is sessions[0] for session in sessions)
+        assert max_in_flight == 2
+        assert [doc["full_content_fetched"] for doc in web_docs
+                ] == [False, True, True, True, False]
+        assert web_docs[0]["text"] == "摘要"
+        assert web_docs[1]["text"] == "完整内容 http://site1.example/page"
+        assert web_docs[4]["text"] == "长" * 300
+
+    def test_shared_session_is_per_event_loop(self):
+        """测试共享会话按事件循环创建，关闭后不再复用"""
+        tool = WebSearchTool()
+
+        async def get_and_close():
+            session = tool._get_session()
+            assert tool._get_session() is session
+            await tool.close()
+            assert session.closed
+            assert tool._get_session() is not session
+            await tool.close()
+            return session
+
+        first = asyncio.run(get_and_close())
+        second = asyncio.run(get_and_close())
+
+        assert first is not second
@@ -0,0 +1,50 @@
+import pytest
+
+from doc_agent.utils.embedding_cache import (
+    EmbeddingCache,
+    make_cache_key,
+    normalize_text,
+)
+
+
+class TestEmbeddingCache:
+
+    def test_normalize_text_collapses_whitespace(self):
+        assert normalize_text("  水电站  \n 设计规范 ") == "水电站 设计规范"
+        assert make_cache_key("gte-qwen", "水电站 设计") == make_cache_key(
+            "gte-qwen", " 水电站\t设计 ")
+        assert make_cache_key("gte-qwen", "水电站") != make_cache_key(
+            "other", "水电站")
+
+    @pytest.mark.asyncio
+    async def test_hit_and_miss_counters(self):
+        cache = EmbeddingCache(max_entries=10)
+        await cache.aset_many("gte-qwen", ["查询一"], [[0.5, 0.25]])
+
+        results = await cache.aget_many("gte-qwen", ["查询一", "查询二"])
+        assert results[0] == [0.5, 0.25]
+        assert results[1] is None
+        stats = cache.stats()
+        assert stats["local_hits"] == 1
+        assert stats["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self):
+        cache = EmbeddingCache(max_entries=2)
+        await cache.aset_many("m", ["a", "b"], [[1.0], [2.0]])
+        # 访问 a，使 b 成为最久未使用的条目
+        await cache.aget_many("m", ["a"])
+        await cache.aset_many("m", ["c"], [[3.0]])
+
+        results = await cache.aget_many("m", ["a", "b", "c"])
+        assert results == [[1.0], None, [3.0]]
+
+    @pytest.mark.asyncio
+    async def test_expired_entries_are_dropped(self):
+        cache = EmbeddingCache(ttl_seconds=-1)
+        await cache.aset_many("m", ["a"], [[1.0]])
+        assert (await cache.aget_many("m", ["a"])) == [[1.0]]
+
+        cache = EmbeddingCache(ttl_seconds=1e-9)
+        await cache.aset_many("m", ["a"], [[1.0]])
+        assert (await cache.aget_many("m", ["a"])) == [None]
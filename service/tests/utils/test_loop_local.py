@@ -0,0 +1,43 @@
+"""
+按事件循环缓存测试
+"""
+
+import asyncio
+
+from doc_agent.utils.loop_local import LoopLocal
+
+
+class _Resource:
+
+    def __init__(self):
+        self.closed = False
+
+
+def test_each_asyncio_run_gets_own_resource_and_closed_loops_are_dropped():
+    cache = LoopLocal(_Resource, is_usable=lambda r: not r.closed)
+
+    async def get_twice():
+        first = cache.get()
+        assert cache.get() is first
+        return first
+
+    first = asyncio.run(get_twice())
+    second = asyncio.run(get_twice())
+
+    assert first is not second
+    # 前一个循环已关闭，条目不再保留
+    assert len(cache) == 0
+
+
+def test_unusable_resource_is_recreated_and_pop_removes_it():
+    cache = LoopLocal(_Resource, is_usable=lambda r: not r.closed)
+
+    async def run():
+        first = cache.get()
+        first.closed = True
+        second = cache.get()
+        assert second is not first
+        assert cache.pop() is second
+        assert cache.pop() is None
+
+    asyncio.run(run())
@@ -0,0 +1,44 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from doc_agent.utils import meta_api as meta_api_module
+from doc_agent.utils.meta_api import MetaApi, MetaInfoCache
+
+
+class TestMetaApiCache:
+
+    @pytest.mark.asyncio
+    async def test_aupdate_doc_meta_data_dedupes_and_caches(self):
+        api = MetaApi()
+        api._cache = MetaInfoCache(max_entries=100)
+        api._cache_initialized = True
+
+        redis_data = {
+            "tok1": {
+                "fileName": "GB 50007-2011 建筑地基基础设计规范.pdf",
+                "showName": "建筑地基基础设计规范",
+                "fileType": "pdf",
+                "parsed_metaInfo": {}
+            }
+        }
+        mock_fetch = AsyncMock(return_value=redis_data)
+
+        docs = [
+            {"doc_id": "tok1", "domain_id": "standard"},
+            {"doc_id": "tok1", "domain_id": "standard"},
+            {"doc_id": "tok2", "domain_id": "standard"},
+        ]
+        with patch.object(meta_api_module, "meta_api", api), \
+                patch.object(meta_api_module.redis_meta_client,
+                             "aget_meta_info_from_redis", mock_fetch):
+            await meta_api_module.aupdate_doc_meta_data(docs)
+            # 第二次查询完全命中本地缓存（包括未找到的 tok2）
+            await meta_api_module.aupdate_doc_meta_data(
+                [{"doc_id": "tok1", "domain_id": "standard"},
+                 {"doc_id": "tok2", "domain_id": "standard"}])
+
+        mock_fetch.assert_awaited_once_with(["tok1", "tok2"])
+        assert docs[0]["meta_data"]["file_name"] == "建筑地基基础设计规范"
+        assert docs[0]["meta_data"]["code"] == "GB 50007-2011"
+        assert "meta_data" not in docs[2]
@@ -0,0 +1,76 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from doc_agent.tools.es_service import ESSearchResult
+from doc_agent.utils.rerank_cache import RerankScoreCache
+from doc_agent.utils.search_utils import rerank_search_results
+
+
+def make_result(doc_id: str,
+                score: float = 0.5,
+                index: str = "idx") -> ESSearchResult:
+    return ESSearchResult(id=doc_id,
+                          doc_id=doc_id,
+                          index=index,
+                          domain_id="domain",
+                          doc_from="self",
+                          file_token="",
+                          original_content=f"内容{doc_id}",
+                          div_content=f"内容{doc_id}",
+                          score=score)
+
+
+class TestRerankScoreCache:
+
+    def test_query_normalization_and_eviction(self):
+        cache = RerankScoreCache(max_entries=2)
+        cache.set_many("水电站  设计", {("idx", "a"): 0.9, ("idx", "b"): 0.8})
+        assert cache.get_many(" 水电站 设计 ", [("idx", "a"), ("idx", "b")]) == {
+            ("idx", "a"): 0.9,
+            ("idx", "b"): 0.8
+        }
+
+        cache.set_many("水电站 设计", {("idx", "c"): 0.7})
+        assert cache.get_many("水电站 设计", [("idx", "a"), ("idx", "b"),
+                                          ("idx", "c")]) == {
+                                              ("idx", "b"): 0.8,
+                                              ("idx", "c"): 0.7
+                                          }
+
+    def test_same_id_in_different_indices_is_not_shared(self):
+        cache = RerankScoreCache()
+        cache.set_many("查询", {("index_a", "1"): 0.9})
+        assert cache.get_many("查询", [("index_a", "1"), ("index_b", "1")]) == {
+            ("index_a", "1"): 0.9
+        }
+
+    @pytest.mark.asyncio
+    async def test_partial_hit_only_scores_unseen_documents(self):
+        cache = RerankScoreCache()
+        cache.set_many("查询", {("idx", "d1"): 0.2, ("idx", "d2"): 0.9})
+
+        reranker_tool = MagicMock()
+        reranker_tool.ascore_documents = AsyncMock(
+            return_value={("idx", "d3"): 0.5})
+        reranker_tool.analyze_rerank_effectiveness.return_value = {}
+
+        results = [make_result("d1"), make_result("d2"), make_result("d3")]
+        with patch("doc_agent.utils.search_utils.get_rerank_cache",
+                   return_value=cache):
+            reranked = await rerank_search_results(results,
+                                                   "查询",
+                                                   reranker_tool,
+                                                   top_k=2)
+
+        sent = reranker_tool.ascore_documents.call_args[0][1]
+        assert [r.id for r in sent] == ["d3"]
+        assert [r.id for r in reranked] == ["d2", "d3"]
+        assert cache.get_many("查询", [("idx", "d3")]) == {("idx", "d3"): 0.5}
+
+        # 全部命中时不再请求重排序服务
+        reranker_tool.ascore_documents.reset_mock()
+        with patch("doc_agent.utils.search_utils.get_rerank_cache",
+                   return_value=cache):
+            await rerank_search_results(results, "查询", reranker_tool, top_k=2)
+        reranker_tool.ascore_documents.assert_not_called()
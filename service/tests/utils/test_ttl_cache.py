@@ -0,0 +1,39 @@
+"""
+TTL LRU 缓存测试
+"""
+
+from doc_agent.utils.ttl_cache import TTLCache
+
+
+def test_lru_eviction_calls_on_evict_and_counts_hits():
+    evicted = []
+    cache = TTLCache(max_entries=2,
+                     on_evict=lambda key, value: evicted.append(key))
+    cache.set_many({"a": 1, "b": 2})
+    assert cache.get("a") == 1
+
+    cache.set("c", 3)
+
+    # b 最久未使用，被淘汰
+    assert evicted == ["b"]
+    assert cache.get_many(["a", "b", "c"]) == {"a": 1, "c": 3}
+    assert cache.stats() == {
+        "hits": 3,
+        "misses": 1,
+        "hit_rate": 0.75,
+        "entries": 2
+    }
+
+
+def test_expired_entries_miss_and_stored_none_is_distinguishable():
+    missing = object()
+    cache = TTLCache(max_entries=10, ttl_seconds=1e-9)
+    cache.set("a", 1)
+    assert cache.get("a", missing) is missing
+    assert len(cache) == 0
+
+    cache = TTLCache(max_entries=10)
+    cache.set("none", None)
+    assert cache.get("none", missing) is None
+    assert cache.pop("none", missing) is None
+    assert cache.pop("none", missing) is missing